@@ -34,6 +34,7 @@ import os
 
 from config import config
 from storage import storage 
+from utils.agent_scheduler import agent_scheduler
 
 class ResearchAgent:
     """Agent for discovering news articles using Gemini Interactions API.
@@ -155,12 +156,19 @@ INSTRUCCIONES COMPLETAS:
                 print(f"[Agent 1] Calling Deep Research agent (with built-in Google Search) to curate {count} texts...")
                 print(f"[Agent 1] Note: This may take 4-5 minutes, please wait...")
                 
-                interaction = self.client.interactions.create(
-                    agent=self.agent_id,
-                    input=prompt,
-                    # No tools parameter - Deep Research agent has Google Search built-in
-                    background=False,  # Synchronous - wait for completion
-                    store=True
+                # Never hedged or retried after a timeout: the timed-out run keeps going,
+                # so a second Deep Research run would double a multi-minute (billed) job
+                interaction = agent_scheduler.call(
+                    'agent1', self.agent_id,
+                    lambda agent_id: self.client.interactions.create(
+                        agent=agent_id,
+                        input=prompt,
+                        # No tools parameter - Deep Research agent has Google Search built-in
+                        background=False,  # Synchronous - wait for completion
+                        store=True
+                    ),
+                    hedge=False,
+                    retry_on_timeout=False
                 )
                 
                 print(f"[Agent 1] Deep Research completed! Status: {interaction.status}")
@@ -176,11 +184,14 @@ INSTRUCCIONES COMPLETAS:
                 print(f"[Agent 1] Calling {self.model_id} with Google Search tool to curate {count} texts...")
                 print(f"[Agent 1] This may take 30-60 seconds, please wait...")
                 
-                interaction = self.client.interactions.create(
-                    model=self.model_id,
-                    input=prompt,
-                    tools=[{"type": "google_search"}],  # Explicitly add Google Search tool
-                    store=False  # Don't store for privacy
+                interaction = agent_scheduler.call(
+                    'agent1', self.model_id,
+                    lambda model_id: self.client.interactions.create(
+                        model=model_id,
+                        input=prompt,
+                        tools=[{"type": "google_search"}],  # Explicitly add Google Search tool
+                        store=False  # Don't store for privacy
+                    )
                 )
                 
                 print(f"[Agent 1] Model search completed! Status: {interaction.status}")
@@ -10,6 +10,8 @@ import re
 
 from config import config
 from storage import storage
+from utils.agent_scheduler import agent_scheduler
+from utils.generative_models import GenerativeModels
 
 
 class ValidationAgent:
@@ -26,13 +28,13 @@ class ValidationAgent:
         genai.configure(api_key=self.api_key)
         
         # Initialize Gemini model (Validation)
-        self.model = genai.GenerativeModel(
-            model_name=config.GEMINI_MODEL_AGENTS234,
-            generation_config={
-                'temperature': 0.3,  # Lower temperature for more consistent validation
-                'max_output_tokens': config.MAX_OUTPUT_TOKENS,
-            }
-        )
+        self.model_id = config.GEMINI_MODEL_AGENTS234
+        self.generation_config = {
+            'temperature': 0.3,  # Lower temperature for more consistent validation
+            'max_output_tokens': config.MAX_OUTPUT_TOKENS,
+        }
+        # GenerativeModel per model ID (hedged requests may use another model)
+        self.models = GenerativeModels(self.generation_config)
         
         # Load prompt template
         prompt_path = config.get_prompt_path('agent2_prompt.txt')
@@ -100,7 +102,10 @@ class ValidationAgent:
             prompt = self.prompt_template + "\n\nTABLA A VALIDAR:\n\n" + tsv_data
 
             print(f"[Agent 2] Calling Gemini for legal audit...")
-            response = self.model.generate_content(prompt)
+            response = agent_scheduler.call(
+                'agent2', self.model_id,
+                lambda model_id: self.models.get(model_id).generate_content(prompt)
+            )
 
             # Extract audit TSV from response
             audit_tsv = self._extract_audit_tsv(response.text)
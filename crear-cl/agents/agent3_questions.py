@@ -8,10 +8,14 @@ import google.generativeai as genai_legacy
 from typing import Dict, List, Optional
 import os
 import re
-import time
 
 from config import config
 from utils.pdf_loader import get_pdf_context_loader
+from utils.agent_scheduler import agent_scheduler
+from utils.generative_models import GenerativeModels
+from utils.pdf_converter import pdf_converter
+from utils.response_cache import response_cache
+from utils.gemini_file_cache import get_gemini_file_cache
 
 
 class QuestionAgent:
@@ -30,14 +34,13 @@ class QuestionAgent:
         
         # Also initialize legacy API for PDF support
         genai_legacy.configure(api_key=self.api_key)
-        self.model_legacy = genai_legacy.GenerativeModel(
-            model_name=self.model_id,
-            generation_config={
-                'temperature': 0.7,
-                'top_p': 0.95,
-                'max_output_tokens': 20000,
-            }
-        )
+        self.generation_config = {
+            'temperature': 0.7,
+            'top_p': 0.95,
+            'max_output_tokens': 20000,
+        }
+        # GenerativeModel per model ID (hedged requests may use another model)
+        self.models = GenerativeModels(self.generation_config)
         
         # Load prompt template
         prompt_filename = agent3_prompt or 'agent3_prompt.txt'
@@ -48,7 +51,7 @@ class QuestionAgent:
         
         # Load PDF context
         self.pdf_loader = get_pdf_context_loader()
-        print(f"[Agent 3] PDF context: {self.pdf_loader.has_context()}")
+        print(f"[Agent 3] PDF context: {len(self.pdf_loader.get_reference_paths())} reference PDFs (uploaded on first use)")
     
     def generate_questions(self, article: Dict) -> Dict:
         """
@@ -76,34 +79,8 @@ class QuestionAgent:
             raise FileNotFoundError(f"DOCX not found: {docx_path}")
         
         try:
-            # Convert DOCX to PDF for Gemini upload
-            from docx2pdf import convert
-            
-            print(f"[Agent 3] Converting DOCX to PDF...")
-            
-            # Save PDF in data directory (persistent, not temporary)
-            pdf_filename = f"{article_id}_article.pdf"
-            pdf_path = os.path.join(config.BASE_DATA_PATH, pdf_filename)
-            
-            # Convert DOCX to PDF
-            convert(docx_path, pdf_path)
-            print(f"[Agent 3] Conversion complete: {pdf_filename}")
-            
-            # Upload PDF to Gemini File API
-            print(f"[Agent 3] Uploading PDF to Gemini...")
-            uploaded_pdf = genai_legacy.upload_file(pdf_path, 
-                                                    display_name=f"{article_id}_article.pdf")
-            
-            # Wait for processing
-            while uploaded_pdf.state.name == "PROCESSING":
-                print(f"[Agent 3] Processing PDF...")
-                time.sleep(2)
-                uploaded_pdf = genai_legacy.get_file(uploaded_pdf.name)
-            
-            if uploaded_pdf.state.name != "ACTIVE":
-                raise ValueError(f"PDF processing failed: {uploaded_pdf.state.name}")
-            
-            print(f"[Agent 3] PDF ready: {uploaded_pdf.uri}")
+            # Convert DOCX to PDF for Gemini upload (cached by DOCX content in data/)
+            pdf_path = pdf_converter.get_pdf(docx_path)
             
             # Build metadata for prompt
             metadata = self._build_metadata_section(article)
@@ -123,28 +100,38 @@ Analiza TODO el contenido del archivo para generar las preguntas.
             
             print(f"[Agent 3] Prompt: {len(full_prompt)} chars")
             
-            # Collect files to send: PDF references + article PDF
-            files_to_send = []
-            if self.pdf_loader and self.pdf_loader.has_context():
-                files_to_send.extend(self.pdf_loader.get_file_references())
-                print(f"[Agent 3] Including {len(files_to_send)} PDF references")
-            
-            files_to_send.append(uploaded_pdf)
-            print(f"[Agent 3] Total files: {len(files_to_send)} (Reference PDFs + Article PDF)")
-            
-            # Generate with legacy API (supports file uploads)
-            response = self.model_legacy.generate_content([full_prompt] + files_to_send)
-            response_text = response.text
+            def call_model() -> str:
+                # Upload PDF to Gemini File API (reused by Agent 4 and improvement;
+                # deleted when the orchestrator releases the article)
+                uploaded_pdf = get_gemini_file_cache().get_or_upload(
+                    pdf_path, display_name=f"{article_id}_article.pdf", owner=article_id
+                )
+                print(f"[Agent 3] PDF ready: {uploaded_pdf.uri}")
+                
+                # Collect files to send: PDF references + article PDF
+                files_to_send = []
+                if self.pdf_loader and self.pdf_loader.has_context():
+                    files_to_send.extend(self.pdf_loader.get_file_references())
+                    print(f"[Agent 3] Including {len(files_to_send)} PDF references")
+                
+                files_to_send.append(uploaded_pdf)
+                print(f"[Agent 3] Total files: {len(files_to_send)} (Reference PDFs + Article PDF)")
+                
+                # Generate with legacy API (supports file uploads)
+                response = agent_scheduler.call(
+                    'agent3', self.model_id,
+                    lambda model_id: self.models.get(model_id).generate_content([full_prompt] + files_to_send)
+                )
+                return response.text
+            
+            response_text = response_cache.generate(
+                self.model_id, full_prompt,
+                self.pdf_loader.get_reference_paths() + [docx_path],
+                call_model, extra='agent3-generate', label=f"Agent 3 {article_id}"
+            )
             response_text = self._sanitize_response_text(response_text)
             
-            # Clean up uploaded PDF from Gemini
-            try:
-                genai_legacy.delete_file(uploaded_pdf.name)
-                print(f"[Agent 3] Cleaned up PDF upload from Gemini")
-            except:
-                pass  # Auto-expires in 48h anyway
-            
-            # Keep the local PDF file for Agent 4 to reuse
+            # Keep the local PDF file and upload for Agent 4 to reuse
             
             # Save debug file
             self._save_debug_file(article_id, response_text)
@@ -196,35 +183,11 @@ Analiza TODO el contenido del archivo para generar las preguntas.
             pdf_path = questions.get('pdf_path')
             
             if not pdf_path or not os.path.exists(pdf_path):
-                # Fallback: check if PDF exists in data directory
-                pdf_filename = f"{article_id}_article.pdf"
-                pdf_path = os.path.join(config.BASE_DATA_PATH, pdf_filename)
-                
-                if not os.path.exists(pdf_path):
-                    # Last resort: convert DOCX to PDF
-                    from docx2pdf import convert
-                    print(f"[Agent 3] Converting DOCX to PDF for improvement...")
-                    convert(docx_path, pdf_path)
-                    print(f"[Agent 3] Conversion complete: {pdf_filename}")
-                else:
-                    print(f"[Agent 3] Reusing existing PDF: {pdf_filename}")
+                # Fallback: cached conversion (converts only if never converted)
+                pdf_path = pdf_converter.get_pdf(docx_path)
             else:
                 print(f"[Agent 3] Reusing PDF from generate_questions: {os.path.basename(pdf_path)}")
             
-            # Upload PDF to Gemini
-            uploaded_pdf = genai_legacy.upload_file(pdf_path,
-                                                   display_name=f"{article_id}_improve.pdf")
-            
-            # Wait for processing
-            while uploaded_pdf.state.name == "PROCESSING":
-                time.sleep(2)
-                uploaded_pdf = genai_legacy.get_file(uploaded_pdf.name)
-            
-            if uploaded_pdf.state.name != "ACTIVE":
-                raise ValueError(f"PDF processing failed: {uploaded_pdf.state.name}")
-            
-            print(f"[Agent 3] PDF ready for improvement")
-            
             # Build improvement prompt
             prompt = f"""Eres diseñador/a senior de preguntas PAES. Recibiste feedback sobre tus preguntas.
 
@@ -249,17 +212,26 @@ Revisa y mejora las preguntas incorporando el feedback. Mantén el formato PAES
 Entrega el set completo mejorado en el mismo formato que originalmente.
 """
             
-            # Generate improved version with PDF file
-            response = self.model_legacy.generate_content([prompt, uploaded_pdf])
-            response_text = response.text
+            def call_model() -> str:
+                # Upload PDF to Gemini (reuses the upload from generate_questions)
+                uploaded_pdf = get_gemini_file_cache().get_or_upload(
+                    pdf_path, display_name=f"{article_id}_article.pdf", owner=article_id
+                )
+                print(f"[Agent 3] PDF ready for improvement")
+                
+                # Generate improved version with PDF file
+                response = agent_scheduler.call(
+                    'agent3', self.model_id,
+                    lambda model_id: self.models.get(model_id).generate_content([prompt, uploaded_pdf])
+                )
+                return response.text
+            
+            response_text = response_cache.generate(
+                self.model_id, prompt, [docx_path], call_model,
+                extra='agent3-improve', label=f"Agent 3 improve {article_id}"
+            )
             response_text = self._sanitize_response_text(response_text)
             
-            # Clean up Gemini upload (keep local PDF)
-            try:
-                genai_legacy.delete_file(uploaded_pdf.name)
-            except:
-                pass
-            
             # Save debug file
             self._save_debug_file(article_id, response_text, improved=True)
             
@@ -308,22 +280,39 @@ Recurso_Discontinuo: {tsv_row.get('Recurso_Discontinuo', 'No')}
     
     def _generate_with_pdfs(self, prompt: str) -> str:
         """Generate using legacy API with PDF context."""
-        pdf_files = self.pdf_loader.get_file_references()
-        content_parts = pdf_files + [prompt]
-        
-        response = self.model_legacy.generate_content(contents=content_parts)
-        return response.text
+        def call_model() -> str:
+            pdf_files = self.pdf_loader.get_file_references()
+            content_parts = pdf_files + [prompt]
+            
+            response = agent_scheduler.call(
+                'agent3', self.model_id,
+                lambda model_id: self.models.get(model_id).generate_content(contents=content_parts)
+            )
+            return response.text
+        
+        return response_cache.generate(
+            self.model_id, prompt, self.pdf_loader.get_reference_paths(), call_model,
+            extra='agent3-pdfs', label="Agent 3 (PDF context)"
+        )
     
     def _generate_with_search(self, prompt: str) -> str:
         """Generate using Interactions API with Google Search."""
-        interaction = self.client.interactions.create(
-            model=self.model_id,
-            input=prompt,
-            tools=[{"type": "google_search"}],
-            store=False
+        def call_model() -> str:
+            interaction = agent_scheduler.call(
+                'agent3', self.model_id,
+                lambda model_id: self.client.interactions.create(
+                    model=model_id,
+                    input=prompt,
+                    tools=[{"type": "google_search"}],
+                    store=False
+                )
+            )
+            return self._extract_interaction_text(interaction)
+        
+        return response_cache.generate(
+            self.model_id, prompt, [], call_model,
+            extra='agent3-google-search', label="Agent 3 (Google Search)"
         )
-        
-        return self._extract_interaction_text(interaction)
     
     def _extract_interaction_text(self, interaction) -> str:
         """Extract text from interaction outputs."""
@@ -12,10 +12,14 @@ from google import genai
 import google.generativeai as genai_legacy
 from typing import Dict, Optional, List
 import os
-import time
 
 from config import config
 from utils.pdf_loader import get_pdf_context_loader
+from utils.agent_scheduler import agent_scheduler
+from utils.generative_models import GenerativeModels
+from utils.pdf_converter import pdf_converter
+from utils.response_cache import response_cache
+from utils.gemini_file_cache import get_gemini_file_cache
 
 
 class ReviewAgent:
@@ -41,14 +45,13 @@ class ReviewAgent:
         
         # Initialize legacy API for file upload support
         genai_legacy.configure(api_key=self.api_key)
-        self.model_legacy = genai_legacy.GenerativeModel(
-            model_name=self.model_id,
-            generation_config={
-                'temperature': 0.3,
-                'top_p': 0.95,
-                'max_output_tokens': 8000,
-            }
-        )
+        self.generation_config = {
+            'temperature': 0.3,
+            'top_p': 0.95,
+            'max_output_tokens': 8000,
+        }
+        # GenerativeModel per model ID (hedged requests may use another model)
+        self.models = GenerativeModels(self.generation_config)
         
         # Load prompt template
         prompt_path = config.get_prompt_path('agent4_prompt.txt')
@@ -77,45 +80,14 @@ class ReviewAgent:
         
         try:
             # Reuse PDF from Agent 3 if available
-            from config import config
             pdf_path = questions.get('pdf_path')
             
             if not pdf_path or not os.path.exists(pdf_path):
-                # Fallback: check if PDF exists in data directory
-                pdf_filename = f"{article_id}_article.pdf"
-                pdf_path = os.path.join(config.BASE_DATA_PATH, pdf_filename)
-                
-                if not os.path.exists(pdf_path):
-                    # Last resort: convert DOCX to PDF
-                    from docx2pdf import convert
-                    print(f"[Agent 4] Converting DOCX to PDF for review...")
-                    convert(docx_path, pdf_path)
-                    print(f"[Agent 4] Conversion complete: {pdf_filename}")
-                else:
-                    print(f"[Agent 4] Reusing existing PDF: {pdf_filename}")
+                # Fallback: cached conversion (converts only if never converted)
+                pdf_path = pdf_converter.get_pdf(docx_path)
             else:
                 print(f"[Agent 4] Reusing PDF from Agent 3: {os.path.basename(pdf_path)}")
             
-            # Upload PDF to Gemini
-            uploaded_pdf = genai_legacy.upload_file(pdf_path,
-                                                   display_name=f"{article_id}_review.pdf")
-            
-            # Wait for processing
-            while uploaded_pdf.state.name == "PROCESSING":
-                time.sleep(2)
-                uploaded_pdf = genai_legacy.get_file(uploaded_pdf.name)
-            
-            if uploaded_pdf.state.name != "ACTIVE":
-                raise ValueError(f"PDF processing failed: {uploaded_pdf.state.name}")
-            
-            print(f"[Agent 4] PDF ready for review")
-            
-            # Prepare Guideline PDFs (same as Agent 3)
-            guideline_files = []
-            if self.pdf_loader and self.pdf_loader.has_context():
-                guideline_files = self.pdf_loader.get_file_references()
-                print(f"[Agent 4] Including {len(guideline_files)} Guideline PDFs")
-            
             # Build review prompt
             questions_text = questions.get('raw_response', '')
             review_prompt = f"""Eres revisor/a senior de preguntas PAES de Competencia Lectora.
@@ -134,18 +106,34 @@ PREGUNTAS GENERADAS:
             
             print(f"[Agent 4] Review prompt: {len(review_prompt)} chars")
             
-            # Generate review with PDF file + guideline PDFs
-            files_to_send = guideline_files + [uploaded_pdf]
-            print(f"[Agent 4] Sending prompt + {len(files_to_send)} files")
-            
-            response = self.model_legacy.generate_content([review_prompt] + files_to_send)
-            feedback_text = response.text
+            def call_model() -> str:
+                # Upload PDF to Gemini (reuses the upload from Agent 3)
+                uploaded_pdf = get_gemini_file_cache().get_or_upload(
+                    pdf_path, display_name=f"{article_id}_article.pdf", owner=article_id
+                )
+                print(f"[Agent 4] PDF ready for review")
                 
-            # Clean up Gemini upload (keep local PDF)
-            try:
-                genai_legacy.delete_file(uploaded_pdf.name)
-            except:
-                pass
+                # Prepare Guideline PDFs (same as Agent 3)
+                guideline_files = []
+                if self.pdf_loader and self.pdf_loader.has_context():
+                    guideline_files = self.pdf_loader.get_file_references()
+                    print(f"[Agent 4] Including {len(guideline_files)} Guideline PDFs")
+                
+                # Generate review with PDF file + guideline PDFs
+                files_to_send = guideline_files + [uploaded_pdf]
+                print(f"[Agent 4] Sending prompt + {len(files_to_send)} files")
+                
+                response = agent_scheduler.call(
+                    'agent4', self.model_id,
+                    lambda model_id: self.models.get(model_id).generate_content([review_prompt] + files_to_send)
+                )
+                return response.text
+            
+            feedback_text = response_cache.generate(
+                self.model_id, review_prompt,
+                self.pdf_loader.get_reference_paths() + [docx_path],
+                call_model, extra='agent4-review', label=f"Agent 4 {article_id}"
+            )
             
             # Save debug file
             self._save_debug_file(article_id, feedback_text)
@@ -6,15 +6,18 @@ from google import genai
 import google.generativeai as genai_legacy
 from typing import Dict, Optional, List, Tuple
 import os
-import time
 import pandas as pd
 from docx import Document
-from docx2pdf import convert
 import shutil
 import re
 
 from config import config
 from utils.pdf_loader import get_pdf_context_loader
+from utils.gemini_file_cache import get_gemini_file_cache
+from utils.pdf_converter import pdf_converter
+from utils.response_cache import response_cache
+from utils.agent_scheduler import agent_scheduler
+from utils.generative_models import GenerativeModels
 
 
 class StandaloneReviewAgent:
@@ -35,14 +38,13 @@ class StandaloneReviewAgent:
         
         # Initialize legacy API for file upload support
         genai_legacy.configure(api_key=self.api_key)
-        self.model_legacy = genai_legacy.GenerativeModel(
-            model_name=self.model_id,
-            generation_config={
-                'temperature': 0.3,
-                'top_p': 0.95,
-                'max_output_tokens': 20000,
-            }
-        )
+        self.generation_config = {
+            'temperature': 0.3,
+            'top_p': 0.95,
+            'max_output_tokens': 20000,
+        }
+        # GenerativeModel per model ID (hedged requests may use another model)
+        self.models = GenerativeModels(self.generation_config)
         
         # Load prompt template
         prompt_path = config.get_prompt_path('agent4_prompt.txt')
@@ -115,28 +117,7 @@ class StandaloneReviewAgent:
             # We need to reconstruct the "PAES Format" string: Text + Questions + Keys
             paes_text = self._reconstruct_paes_format(docx_path, metadata_df)
             
-            # 5. Upload PDF to Gemini
-            print(f"[Agent 4] Uploading Article PDF...")
-            uploaded_pdf = genai_legacy.upload_file(pdf_path, 
-                                                   display_name=f"{article_id}_review_standalone.pdf")
-            
-            # Wait for processing
-            while uploaded_pdf.state.name == "PROCESSING":
-                time.sleep(2)
-                uploaded_pdf = genai_legacy.get_file(uploaded_pdf.name)
-            
-            if uploaded_pdf.state.name != "ACTIVE":
-                raise ValueError(f"PDF processing failed: {uploaded_pdf.state.name}")
-            
-            print(f"[Agent 4] Article PDF ready.")
-            
-            # 6. Prepare Guideline PDFs
-            guideline_files = []
-            if self.pdf_loader and self.pdf_loader.has_context():
-                guideline_files = self.pdf_loader.get_file_references()
-                print(f"[Agent 4] Including {len(guideline_files)} Guideline PDFs")
-                
-            # 7. Construct Prompt
+            # 5. Construct Prompt
             # Similar to agent4_review but explicitly mentioning the guidelines and the reconstructed text
             
             target_q_str = ", ".join(map(str, target_questions))
@@ -160,18 +141,39 @@ PREGUNTAS Y METADATA (Reconstruido):
 {self.prompt_template}
 """
             
-            # 8. Generate Content
-            files_to_send = guideline_files + [uploaded_pdf]
-            print(f"[Agent 4] Sending prompt ({len(review_prompt)} chars) + {len(files_to_send)} files")
+            def call_model() -> str:
+                # 6. Upload PDF to Gemini
+                print(f"[Agent 4] Uploading Article PDF...")
+                uploaded_pdf = get_gemini_file_cache().get_or_upload(
+                    pdf_path, display_name=f"{article_id}_review_standalone.pdf", owner=article_id
+                )
+                
+                print(f"[Agent 4] Article PDF ready.")
+                
+                # 7. Prepare Guideline PDFs
+                guideline_files = []
+                if self.pdf_loader and self.pdf_loader.has_context():
+                    guideline_files = self.pdf_loader.get_file_references()
+                    print(f"[Agent 4] Including {len(guideline_files)} Guideline PDFs")
+                
+                # 8. Generate Content
+                files_to_send = guideline_files + [uploaded_pdf]
+                print(f"[Agent 4] Sending prompt ({len(review_prompt)} chars) + {len(files_to_send)} files")
+                
+                response = agent_scheduler.call(
+                    'agent4', self.model_id,
+                    lambda model_id: self.models.get(model_id).generate_content([review_prompt] + files_to_send)
+                )
+                return response.text
             
-            response = self.model_legacy.generate_content([review_prompt] + files_to_send)
-            feedback_text = response.text
+            feedback_text = response_cache.generate(
+                self.model_id, review_prompt,
+                self.pdf_loader.get_reference_paths() + [docx_path],
+                call_model, extra='agent4-standalone', label=f"Agent 4 standalone {article_id}"
+            )
             
             # 9. Clean up Gemini upload
-            try:
-                genai_legacy.delete_file(uploaded_pdf.name)
-            except:
-                pass
+            get_gemini_file_cache().release_owner(article_id)
                 
             # 10. Save Output
             self._save_output(folder_path, article_id, feedback_text)
@@ -201,19 +203,8 @@ PREGUNTAS Y METADATA (Reconstruido):
         return None
 
     def _convert_docx_to_pdf(self, docx_path: str, article_id: str) -> str:
-        """Convert DOCX to PDF and return path."""
-        folder = os.path.dirname(docx_path)
-        pdf_filename = f"{article_id}_review_context.pdf"
-        pdf_path = os.path.join(folder, pdf_filename)
-        
-        # If it doesn't exist, convert
-        if not os.path.exists(pdf_path):
-            print(f"[Agent 4] Converting DOCX to PDF: {pdf_filename}")
-            convert(docx_path, pdf_path)
-        else:
-            print(f"[Agent 4] Using existing PDF: {pdf_filename}")
-            
-        return pdf_path
+        """Convert DOCX to PDF (cached by DOCX content, so edited files are reconverted) and return path."""
+        return pdf_converter.get_pdf(docx_path)
 
     def _reconstruct_paes_format(self, docx_path: str, df: pd.DataFrame) -> str:
         """
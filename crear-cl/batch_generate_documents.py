@@ -8,17 +8,42 @@ Expected filenames:
 Produces:
   - {id}-Preguntas+Texto.docx
   - {id}-Preguntas Datos.xlsx
+
+Batch runs use a process pool (BATCH_DOC_WORKERS / --workers). Articles whose
+TXT, DOCX and generator code are unchanged since the last run are skipped
+(tracked in {output_folder}/.batch_manifest.json); use --force to rebuild.
+A per-article report with timings is written to batch_report.csv.
 """
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
 import os
 import re
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
+from config import config
 from utils.document_generator import DocumentGenerator
+from utils.file_hash import file_sha256
 
 
 DEBUG_PATTERN = re.compile(r"^debug_questions_improved_(.+)\.txt$", re.IGNORECASE)
+MANIFEST_FILE = ".batch_manifest.json"
+REPORT_FILE = "batch_report.csv"
+
+# Source files that shape the outputs: editing them invalidates the manifest
+GENERATOR_SOURCES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils', 'document_generator.py')
+]
 
 
 def read_debug_file(filepath: str) -> str:
@@ -225,8 +250,7 @@ def process_one(
             return False
 
         # Output paths
-        word_path = os.path.join(output_folder, f"{article_id}-Preguntas+Texto.docx")
-        excel_path = os.path.join(output_folder, f"{article_id}-Preguntas Datos.xlsx")
+        word_path, excel_path = output_paths(output_folder, article_id)
 
         # Generate merged Word (article text from DOCX + questions)
         doc_generator.merge_text_and_questions_docx(
@@ -245,23 +269,126 @@ def process_one(
 
     except Exception as e:
         print(f"[ERROR] Failed to process {article_id}: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
+def output_paths(output_folder: str, article_id: str) -> Tuple[str, str]:
+    """Build Word and Excel output paths for an article."""
+    word_path = os.path.join(output_folder, f"{article_id}-Preguntas+Texto.docx")
+    excel_path = os.path.join(output_folder, f"{article_id}-Preguntas Datos.xlsx")
+    return word_path, excel_path
+
+
+def generator_fingerprint() -> str:
+    """Hash of the parser/generator code, so code changes force regeneration."""
+    digest = hashlib.sha256()
+    for path in GENERATOR_SOURCES:
+        digest.update(file_sha256(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def input_fingerprint(debug_path: str, docx_path: str, generator_hash: str) -> str:
+    """Hash of everything an article's outputs depend on."""
+    parts = [generator_hash, file_sha256(debug_path), file_sha256(docx_path)]
+    return hashlib.sha256('|'.join(parts).encode('ascii')).hexdigest()
+
+
+def load_manifest(output_folder: str) -> Dict[str, Dict]:
+    """Load the batch manifest (article ID -> input fingerprint)."""
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Could not read {MANIFEST_FILE}, regenerating everything: {e}")
+        return {}
+
+
+def save_manifest(output_folder: str, manifest: Dict[str, Dict]):
+    """Persist the batch manifest atomically."""
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(manifest: Dict[str, Dict], article_id: str, fingerprint: str,
+                  output_folder: str) -> bool:
+    """True if the article's outputs exist and were built from the same inputs."""
+    entry = manifest.get(article_id)
+    if not entry or entry.get('fingerprint') != fingerprint:
+        return False
+    return all(os.path.exists(p) for p in output_paths(output_folder, article_id))
+
+
+_worker_generator: Optional[DocumentGenerator] = None
+
+
+def _process_in_worker(article_id: str, debug_path: str, docx_path: str,
+                       output_folder: str) -> Tuple[bool, float, str]:
+    """
+    Pool task: process one article with captured output.
+
+    Returns:
+        (success, seconds, captured log)
+    """
+    global _worker_generator
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            if _worker_generator is None:
+                _worker_generator = DocumentGenerator()
+            ok = process_one(article_id, debug_path, docx_path, output_folder, _worker_generator)
+        except Exception as e:
+            print(f"[ERROR] Failed to process {article_id}: {e}")
+            traceback.print_exc()
+            ok = False
+    return ok, time.perf_counter() - start, log.getvalue()
+
+
+def write_report(output_folder: str, rows: List[Dict]) -> str:
+    """Write the per-article batch report and return its path."""
+    path = os.path.join(output_folder, REPORT_FILE)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['article_id', 'status', 'seconds', 'debug_path', 'docx_path'])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
 def run_batch_from_debug(
     txt_folder: str,
     docx_folder: str,
-    output_folder: Optional[str] = None
-) -> None:
-    """Run batch generation using debug TXT + DOCX sources."""
+    output_folder: Optional[str] = None,
+    workers: Optional[int] = None,
+    force: bool = False
+) -> Dict[str, int]:
+    """
+    Run batch generation using debug TXT + DOCX sources.
+
+    Args:
+        txt_folder: Folder with debug_questions_improved_{id}.txt files
+        docx_folder: Folder with {id}.docx files
+        output_folder: Output folder (defaults to docx_folder)
+        workers: Worker processes (default: config.BATCH_DOC_WORKERS, 0 = one per CPU)
+        force: Regenerate articles even if their inputs are unchanged
+
+    Returns:
+        Counts of success / skipped / failed articles
+    """
+    results = {"success": 0, "skipped": 0, "failed": 0}
+
     if not os.path.isdir(txt_folder):
         print(f"[ERROR] TXT folder not found: {txt_folder}")
-        return
+        return results
     if not os.path.isdir(docx_folder):
         print(f"[ERROR] DOCX folder not found: {docx_folder}")
-        return
+        return results
 
     output_folder = output_folder or docx_folder
     os.makedirs(output_folder, exist_ok=True)
@@ -270,7 +397,10 @@ def run_batch_from_debug(
     if not debug_files:
         print(f"[WARNING] No debug TXT files found in: {txt_folder}")
         print("Expected pattern: debug_questions_improved_{id}.txt")
-        return
+        return results
+
+    workers = config.BATCH_DOC_WORKERS if workers is None else workers
+    workers = max(1, workers or os.cpu_count() or 1)
 
     print("="*80)
     print("BATCH DEBUG GENERATION")
@@ -279,32 +409,85 @@ def run_batch_from_debug(
     print(f"DOCX folder: {os.path.abspath(docx_folder)}")
     print(f"Output:      {os.path.abspath(output_folder)}")
     print(f"Files found: {len(debug_files)}")
+    print(f"Workers:     {workers}")
     print("="*80)
 
-    doc_generator = DocumentGenerator()
+    batch_start = time.perf_counter()
+    manifest = {} if force else load_manifest(output_folder)
+    generator_hash = generator_fingerprint()
+    report: Dict[str, Dict] = {}
+    pending: List[Tuple[str, str, str, Optional[str]]] = []
 
-    results = {"success": 0, "failed": 0}
     for article_id, debug_path in debug_files:
         docx_path = resolve_docx_path(docx_folder, article_id)
-        ok = process_one(
-            article_id,
-            debug_path,
-            docx_path,
-            output_folder,
-            doc_generator
-        )
-        if ok:
-            results["success"] += 1
+        row = {'article_id': article_id, 'status': '', 'seconds': '',
+               'debug_path': debug_path, 'docx_path': docx_path}
+        report[article_id] = row
+
+        fingerprint = None
+        if os.path.exists(docx_path):
+            fingerprint = input_fingerprint(debug_path, docx_path, generator_hash)
+            if is_up_to_date(manifest, article_id, fingerprint, output_folder):
+                row['status'] = 'skipped'
+                results["skipped"] += 1
+                continue
+        pending.append((article_id, debug_path, docx_path, fingerprint))
+
+    if results["skipped"]:
+        print(f"[INFO] Skipping {results['skipped']} unchanged article(s)")
+
+    def record(article_id: str, fingerprint: Optional[str], ok: bool, seconds: float):
+        report[article_id]['status'] = 'success' if ok else 'failed'
+        report[article_id]['seconds'] = f"{seconds:.2f}"
+        if ok and fingerprint:
+            manifest[article_id] = {'fingerprint': fingerprint}
         else:
-            results["failed"] += 1
+            manifest.pop(article_id, None)
+        save_manifest(output_folder, manifest)
+        results["success" if ok else "failed"] += 1
+
+    if workers == 1 or len(pending) <= 1:
+        doc_generator = DocumentGenerator()
+        for article_id, debug_path, docx_path, fingerprint in pending:
+            start = time.perf_counter()
+            ok = process_one(article_id, debug_path, docx_path, output_folder, doc_generator)
+            record(article_id, fingerprint, ok, time.perf_counter() - start)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {
+                pool.submit(_process_in_worker, article_id, debug_path, docx_path, output_folder):
+                    (article_id, fingerprint)
+                for article_id, debug_path, docx_path, fingerprint in pending
+            }
+            for future in as_completed(futures):
+                article_id, fingerprint = futures[future]
+                try:
+                    ok, seconds, log = future.result()
+                except BrokenProcessPool as e:
+                    ok, seconds, log = False, 0.0, f"[ERROR] Worker crashed while processing {article_id}: {e}\n"
+                except Exception as e:
+                    ok, seconds, log = False, 0.0, f"[ERROR] Failed to process {article_id}: {e}\n"
+                print(log, end='')
+                record(article_id, fingerprint, ok, seconds)
+
+    report_path = write_report(output_folder, list(report.values()))
+    elapsed = time.perf_counter() - batch_start
 
     print("\n" + "="*80)
     print("BATCH DEBUG GENERATION COMPLETE")
     print("="*80)
     print(f"Total:     {len(debug_files)}")
     print(f"Success:   {results['success']}")
+    print(f"Skipped:   {results['skipped']}")
     print(f"Failed:    {results['failed']}")
+    print(f"Time:      {elapsed:.1f}s")
+    timed = [r for r in report.values() if r['seconds']]
+    if timed:
+        slowest = max(timed, key=lambda r: float(r['seconds']))
+        print(f"Slowest:   {slowest['article_id']} ({slowest['seconds']}s)")
+    print(f"Report:    {report_path}")
     print("="*80)
+    return results
 
 
 def _extract_id_from_debug_filename(debug_path: str) -> Optional[str]:
@@ -364,19 +547,19 @@ def run_single_from_debug(
 
 def main():
     """CLI entry point (txt_folder, docx_folder, output_folder optional)."""
-    if len(sys.argv) < 3:
-        print("ERROR: Missing arguments")
-        print()
-        print("Usage:")
-        print(f"  python {os.path.basename(__file__)} <txt_folder> <docx_folder> [output_folder]")
+    parser = argparse.ArgumentParser(description="Generate Word/Excel from debug TXT + DOCX folders")
+    parser.add_argument('txt_folder', help='Folder containing debug_questions_improved_{id}.txt files')
+    parser.add_argument('docx_folder', help='Folder containing {id}.docx source files')
+    parser.add_argument('output_folder', nargs='?', help='Output folder (defaults to DOCX folder)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: BATCH_DOC_WORKERS env, 0 = one per CPU)')
+    parser.add_argument('--force', action='store_true', help='Regenerate articles even if unchanged')
+    args = parser.parse_args()
+
+    results = run_batch_from_debug(args.txt_folder, args.docx_folder, args.output_folder,
+                                   workers=args.workers, force=args.force)
+    if results["failed"]:
         sys.exit(1)
 
-    txt_folder = sys.argv[1]
-    docx_folder = sys.argv[2]
-    output_folder = sys.argv[3] if len(sys.argv) > 3 else None
-
-    run_batch_from_debug(txt_folder, docx_folder, output_folder)
-
 
 if __name__ == '__main__':
     main()
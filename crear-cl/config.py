@@ -29,12 +29,31 @@ class Config:
     ARTICLES_PER_BATCH = 10
     DEFAULT_BATCHES = 1
     
+    # Parallel article processing (Agents 3-4)
+    ARTICLE_WORKERS = int(os.getenv('ARTICLE_WORKERS', '1'))  # Articles processed at once
+    GEMINI_MAX_CONCURRENT = int(os.getenv('GEMINI_MAX_CONCURRENT', '4'))  # In-flight requests per model
+    GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '20'))  # Per model, 0 = unlimited
+    
     # PDF Context for Agent 3
     AGENT3_CONTEXT_DIR = 'agent-3-context'
     
     # File Paths
     BASE_DATA_PATH = './data'
-    STATE_FILE = 'processing_state.csv'
+    STATE_DB = 'processing_state.db'  # SQLite state store (WAL)
+    STATE_FILE = 'processing_state.csv'  # Legacy CSV state (imported once) / CSV export
+    GEMINI_UPLOAD_INDEX = 'gemini_uploads.json'  # Reusable Gemini File API uploads
+    PDF_CACHE_DIR = 'pdf_cache'  # DOCX -> PDF conversions by DOCX content hash
+    RESPONSE_CACHE_DIR = 'response_cache'  # Agent 3/4 responses by (model, prompt, files)
+    RESPONSE_CACHE_MODE = os.getenv('RESPONSE_CACHE_MODE', 'record')  # off | record | reuse | replay
+    
+    # DOCX -> PDF conversion: 'auto' (LibreOffice on Linux, Word elsewhere), 'libreoffice', 'docx2pdf'
+    PDF_CONVERTER = os.getenv('PDF_CONVERTER', 'auto')
+    PDF_CONVERTER_WORKERS = int(os.getenv('PDF_CONVERTER_WORKERS', '2'))  # Concurrent LibreOffice conversions
+    LIBREOFFICE_PATH = os.getenv('LIBREOFFICE_PATH', 'soffice')
+
+    # Batch Word/Excel regeneration from debug TXT (0 = one process per CPU)
+    BATCH_DOC_WORKERS = int(os.getenv('BATCH_DOC_WORKERS', '0'))
+
     PROMPTS_DIR = './prompts'
     
     # Gemini Model Configuration
@@ -47,6 +66,16 @@ class Config:
     
     # Agents 2, 3, 4 use standard model
     GEMINI_MODEL_AGENTS234 = os.getenv('GEMINI_MODEL_AGENTS234', 'gemini-3.1-pro-preview')
+
+    # Gemini call scheduler (all agents): timeouts, retries and hedging
+    GEMINI_CALL_TIMEOUT = int(os.getenv('GEMINI_CALL_TIMEOUT', '600'))  # Seconds per attempt
+    AGENT1_CALL_TIMEOUT = int(os.getenv('AGENT1_CALL_TIMEOUT', '1800'))  # Deep Research takes minutes
+    GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '2'))  # Retries on timeouts / 429 / 5xx
+    GEMINI_BACKOFF_SECONDS = float(os.getenv('GEMINI_BACKOFF_SECONDS', '5'))  # Doubled per retry
+    GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv('GEMINI_BACKOFF_MAX_SECONDS', '60'))
+    GEMINI_HEDGE_PERCENTILE = float(os.getenv('GEMINI_HEDGE_PERCENTILE', '0'))  # e.g. 95; 0 = no hedging
+    GEMINI_HEDGE_MODEL = os.getenv('GEMINI_HEDGE_MODEL') or GEMINI_MODEL_AGENTS234
+    GEMINI_UPLOAD_TIMEOUT = int(os.getenv('GEMINI_UPLOAD_TIMEOUT', '300'))  # File API PROCESSING wait
     
     # Legacy config for backwards compatibility
     GEMINI_MODEL_AGENT1 = AGENT1_DEEP_RESEARCH
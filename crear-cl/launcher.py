@@ -29,6 +29,7 @@ class PAESLauncher:
         self.docx_file_path = tk.StringVar()
         self.output_file_folder_path = tk.StringVar()
         self.reverse_var = tk.BooleanVar(value=False)
+        self.workers_var = tk.IntVar(value=1)
         self.agent3_prompt_var = tk.StringVar()
 
         # Scan for Agent 3 prompt files
@@ -94,7 +95,11 @@ class PAESLauncher:
         self.reverse_check = ttk.Checkbutton(self.pipeline_frame, text="Reverse Order", variable=self.reverse_var)
         self.reverse_check.grid(row=0, column=2, sticky=tk.W, padx=5)
 
-        ttk.Separator(self.pipeline_frame, orient='horizontal').grid(row=1, column=0, columnspan=3, sticky='ew', pady=10)
+        ttk.Label(self.pipeline_frame, text="Workers:").grid(row=0, column=3, sticky=tk.W, padx=5)
+        self.workers_entry = ttk.Entry(self.pipeline_frame, textvariable=self.workers_var, width=5)
+        self.workers_entry.grid(row=0, column=4, sticky=tk.W, padx=5)
+
+        ttk.Separator(self.pipeline_frame, orient='horizontal').grid(row=1, column=0, columnspan=5, sticky='ew', pady=10)
 
         # Agent 1 Config Section
         self.agent1_frame = ttk.LabelFrame(self.pipeline_frame, text="Agent 1 Settings", padding="5")
@@ -339,6 +344,9 @@ class PAESLauncher:
             if self.reverse_var.get():
                 cmd.append("--reverse")
 
+            if self.workers_var.get() > 1:
+                cmd.extend(["--workers", str(self.workers_var.get())])
+
             # Agent 3 prompt selection (only when starting from agent3)
             if start_from == "agent3":
                 prompt = self.agent3_prompt_var.get()
@@ -45,6 +45,10 @@ def validate_config() -> bool:
     if config.AGENT1_MODE not in ['agent', 'model']:
         errors.append(f"AGENT1_MODE must be 'agent' or 'model', got: {config.AGENT1_MODE}")
     
+    # Check response cache mode
+    if config.RESPONSE_CACHE_MODE not in ['off', 'record', 'reuse', 'replay']:
+        errors.append(f"RESPONSE_CACHE_MODE must be off, record, reuse or replay, got: {config.RESPONSE_CACHE_MODE}")
+    
     # Print errors
     if errors:
         print("\n" + "="*70)
@@ -64,6 +68,7 @@ def validate_config() -> bool:
     print(f"  [OK] Data Directory: {config.BASE_DATA_PATH}")
     print(f"  [OK] Agent 1 Mode: {config.AGENT1_MODE}")
     print(f"  [OK] Model: {config.GEMINI_MODEL_AGENTS234}")
+    print(f"  [OK] Response Cache: {config.RESPONSE_CACHE_MODE}")
     
     # Show PDF context status
     pdf_count = 0
@@ -95,7 +100,8 @@ def batch_mode(args):
         start_from=args.start_from,
         tsv_file=args.tsv_file,
         reverse=args.reverse,
-        agent3_prompt=args.agent3_prompt
+        agent3_prompt=args.agent3_prompt,
+        workers=args.workers
     )
 
 
@@ -116,6 +122,7 @@ def review_standalone_mode(args):
     
     # Initialize Agent
     from agents.agent4_standalone import StandaloneReviewAgent
+    from utils.agent_scheduler import agent_scheduler
     agent = StandaloneReviewAgent()
     
     # Scan for files
@@ -160,6 +167,8 @@ def review_standalone_mode(args):
             import traceback
             traceback.print_exc()
 
+    agent_scheduler.print_metrics()
+
     # Save skipped sets to file
     if skipped_sets:
         skipped_file = os.path.join(folder_path, "textos incompletos - no revisados.txt")
@@ -198,6 +207,12 @@ Examples:
   # Parallel processing - Terminal 2 (from bottom)
   python main.py --start-from agent3 --batches 1 --tsv-file data/agent2_mj.csv --reverse
   
+  # Parallel processing - single run, 4 articles at once
+  python main.py --start-from agent3 --batches 1 --tsv-file data/agent2_mj.csv --workers 4
+  
+  # Re-run Agents 3-4 from recorded responses (no Gemini calls, e.g. after a parser fix)
+  python main.py --start-from agent3 --batches 1 --tsv-file data/agent2_mj.csv --response-cache replay
+  
   # Validate configuration only
   python main.py --validate-only
   
@@ -209,6 +224,9 @@ Examples:
 
   # Batch from debug TXT + DOCX
   python main.py --batch-debug --txt-folder "data/debug_txt" --docx-folder "data/source_docx"
+
+  # Rebuild every document after a template change (4 processes)
+  python main.py --batch-debug --txt-folder "data/debug_txt" --docx-folder "data/source_docx" --workers 4 --force
         """
     )
     
@@ -276,6 +294,18 @@ Examples:
         action='store_true',
         help='Process articles in reverse order (bottom to top) - useful for parallel processing'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Articles processed at once in Steps 3-6 (default: ARTICLE_WORKERS env, 1); '
+             'worker processes for --batch-debug (default: BATCH_DOC_WORKERS env, one per CPU)'
+    )
+    parser.add_argument(
+        '--response-cache',
+        choices=['off', 'record', 'reuse', 'replay'],
+        help='Agent 3/4 response cache: record (default) stores responses, reuse serves them '
+             'and calls Gemini on a miss, replay serves them only (offline)'
+    )
     parser.add_argument(
         '--agent3-prompt',
         type=str,
@@ -301,6 +331,11 @@ Examples:
         type=str,
         help='Optional output folder for generated documents (defaults to DOCX folder)'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Regenerate all documents in --batch-debug, even unchanged ones'
+    )
     parser.add_argument(
         '--txt-file',
         type=str,
@@ -314,6 +349,10 @@ Examples:
     
     args = parser.parse_args()
     
+    # Response cache mode is read when the agents are loaded
+    if args.response_cache:
+        config.RESPONSE_CACHE_MODE = args.response_cache
+    
     # Validate configuration first
     if not validate_config():
         print("[Error] Fix configuration errors before running pipeline")
@@ -352,7 +391,10 @@ Examples:
                 print("\n[Error] --txt-folder and --docx-folder are required for --batch-debug")
                 sys.exit(1)
             from batch_generate_documents import run_batch_from_debug
-            run_batch_from_debug(args.txt_folder, args.docx_folder, args.output_folder)
+            results = run_batch_from_debug(args.txt_folder, args.docx_folder, args.output_folder,
+                                           workers=args.workers, force=args.force)
+            if results["failed"]:
+                sys.exit(1)
         elif args.single_debug:
             if not args.txt_file or not args.docx_file:
                 print("\n[Error] --txt-file and --docx-file are required for --single-debug")
@@ -1,165 +1,418 @@
 """
-Merge multiple Excel files into a single Excel file.
+Merge multiple Excel files into a single Excel (or CSV) file.
 Adds the source filename as the first column for each file.
 
+Workbooks are streamed (openpyxl read-only in, write-only out) and only one
+input file is held in memory at a time, so memory does not grow with the
+archive. The merge is incremental: a manifest next to the output records which
+files are already merged (and their columns), and a re-run only reads new or
+modified files. Rows of modified or deleted files are dropped from the output,
+as are columns that no remaining file has. CSV outputs are appended in place;
+.xlsx outputs are rewritten by streaming the previous merge plus the new rows.
+
 Usage:
-    python merge_excel_files.py <folder_path>
+    python merge_excel_files.py <folder_path> [output_filename] [--full]
     python merge_excel_files.py data/Batch_3
-    python merge_excel_files.py C:/path/to/folder
+    python merge_excel_files.py data/Batch_3 archive.csv
+    python merge_excel_files.py C:/path/to/folder --full
 """
+import argparse
+import csv
+import json
 import os
-import sys
-import pandas as pd
+import traceback
+from datetime import date, datetime
 from pathlib import Path
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import Workbook, load_workbook
+
+from utils.file_hash import file_sha256
+
+
+FILENAME_COLUMN = 'Archivo'
+PREVIEW_ROWS = 5
+
+
+def manifest_path_for(output_path: str) -> str:
+    """Manifest file stored next to the merged output."""
+    folder, name = os.path.split(output_path)
+    return os.path.join(folder, f".{name}.manifest.json")
+
+
+def load_manifest(output_path: str) -> Optional[Dict]:
+    """Load the merge manifest, or None if the output has to be built from scratch."""
+    path = manifest_path_for(output_path)
+    if not os.path.exists(path) or not os.path.exists(output_path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read manifest, rebuilding: {e}")
+        return None
+    if not manifest.get('columns') or 'files' not in manifest:
+        return None
+    return manifest
+
+
+def save_manifest(output_path: str, manifest: Dict):
+    """Persist the merge manifest atomically."""
+    path = manifest_path_for(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_signature(file_path: str) -> Dict:
+    """Size, mtime and content hash of an input file."""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(file_path)}
+
+
+def is_unchanged(entry: Optional[Dict], file_path: str) -> bool:
+    """True if a manifest entry still matches the file on disk."""
+    if not entry:
+        return False
+    stat = os.stat(file_path)
+    if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    # Touched but maybe not edited (copied, re-synced): compare content
+    return entry.get('size') == stat.st_size and entry.get('sha256') == file_sha256(file_path)
+
+
+def normalize_headers(header_row: Tuple) -> List[str]:
+    """
+    Turn a header row into column names the way pandas.read_excel does:
+    empty headers become "Unnamed: i" and duplicates get ".1", ".2" suffixes.
+    Trailing empty header cells are dropped.
+    """
+    cells = list(header_row)
+    while cells and (cells[-1] is None or str(cells[-1]).strip() == ''):
+        cells.pop()
+
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None or str(cell).strip() == '' else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_headers(file_path: str) -> List[str]:
+    """Read only the header row of the first sheet."""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(max_row=1, values_only=True):
+            return normalize_headers(row)
+        return []
+    finally:
+        wb.close()
+
+
+def iter_data_rows(file_path: str) -> Iterator[Tuple]:
+    """Stream data rows (after the header) of the first sheet, skipping empty rows."""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        next(rows, None)
+        for row in rows:
+            if any(value is not None and value != '' for value in row):
+                yield row
+    finally:
+        wb.close()
+
+
+def iter_output_rows(output_path: str) -> Iterator[Tuple]:
+    """Stream data rows of a previous merged output (.xlsx or .csv)."""
+    if output_path.lower().endswith('.csv'):
+        with open(output_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield tuple(row)
+    else:
+        yield from iter_data_rows(output_path)
+
+
+def csv_value(value) -> str:
+    """Format a cell for CSV output (Spanish decimal comma, like storage.write_csv)."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return repr(value).replace('.', ',')
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class MergedWriter:
+    """Row-at-a-time writer for the merged output (.xlsx write-only or .csv)."""
+
+    def __init__(self, path: str, columns: List[str], append: bool = False):
+        """
+        Open the output.
+
+        Args:
+            path: Output path (.csv or .xlsx)
+            columns: Output header
+            append: Append to an existing CSV instead of creating a new file
+        """
+        self.path = path
+        self.is_csv = path.lower().endswith('.csv')
+        self.rows_written = 0
+        self.preview: List[Tuple] = []
 
+        if self.is_csv:
+            self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+            self._csv = csv.writer(self._file)
+            if not append:
+                self._csv.writerow(columns)
+        else:
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._sheet.append(columns)
 
-def merge_excel_files(folder_path: str, output_filename: str = None):
+    def write(self, row: List, preview: bool = True):
+        if self.is_csv:
+            self._csv.writerow([csv_value(v) for v in row])
+        else:
+            self._sheet.append(row)
+        self.rows_written += 1
+        if preview and len(self.preview) < PREVIEW_ROWS:
+            self.preview.append(tuple(row))
+
+    def close(self):
+        if self.is_csv:
+            self._file.close()
+        else:
+            self._workbook.save(self.path)
+
+
+def merge_excel_files(folder_path: str, output_filename: str = None, full: bool = False):
     """
     Merge all Excel files in a folder into a single Excel file.
-    
+
     Args:
         folder_path: Path to folder containing Excel files
-        output_filename: Optional custom output filename
+        output_filename: Optional custom output filename (.xlsx or .csv;
+                         default merged_{folder}.xlsx)
+        full: Ignore the manifest and merge every file again
+
+    Returns:
+        Output path, or None on failure
     """
     # Validate folder
     if not os.path.exists(folder_path):
         print(f"ERROR: Folder not found: {folder_path}")
         return
-    
+
     if not os.path.isdir(folder_path):
         print(f"ERROR: Not a directory: {folder_path}")
         return
-    
-    # Find all .xlsx files
+
+    # Output is saved in the same folder as input files
+    if not output_filename:
+        folder_name = os.path.basename(os.path.abspath(folder_path))
+        output_filename = f"merged_{folder_name}.xlsx"
+    output_path = os.path.join(folder_path, output_filename)
+
+    # Find all .xlsx files (skipping merged outputs and Excel lock files)
     files = []
     for file in Path(folder_path).glob('*.xlsx'):
+        if file.name.startswith('~$') or os.path.abspath(file) == os.path.abspath(output_path):
+            continue
+        if os.path.exists(manifest_path_for(str(file))):
+            continue
         files.append(str(file))
-    
+
     if not files:
         print(f"No .xlsx files found in: {folder_path}")
         return
-    
+
     # Sort files for consistent processing
     files.sort()
-    
+
+    manifest = None if full else load_manifest(output_path)
+    merged: Dict[str, Dict] = manifest['files'] if manifest else {}
+
+    kept = {os.path.basename(f) for f in files if is_unchanged(merged.get(os.path.basename(f)), f)}
+    new_files = [f for f in files if os.path.basename(f) not in kept]
+    dropped = set(merged) - kept  # modified or deleted since the last merge
+
     print("="*80)
     print("EXCEL FILES MERGER")
     print("="*80)
     print(f"Folder: {os.path.abspath(folder_path)}")
     print(f"Files found: {len(files)}")
+    print(f"Already merged: {len(kept)}")
+    print(f"To merge: {len(new_files)}")
+    if dropped:
+        print(f"Modified/removed since last merge: {len(dropped)}")
     print("="*80)
-    
+
+    if not new_files and not dropped:
+        print(f"\nUp to date: {output_path}")
+        return output_path
+
     # List files
     print("\nFiles to merge:")
-    for i, file in enumerate(files, 1):
+    for i, file in enumerate(new_files, 1):
         print(f"  {i}. {os.path.basename(file)}")
-    
-    # Process each file
-    print("\nProcessing files...")
-    all_dataframes = []
-    
-    for file_path in files:
+
+    # Columns of the files kept from the previous merge (older manifests did not record them)
+    kept_columns: Dict[str, List[str]] = {}
+    for name in kept:
+        kept_columns[name] = merged[name].get('columns') or read_headers(os.path.join(folder_path, name))
+        merged[name] = dict(merged[name], columns=kept_columns[name])
+
+    # Header pass: only the first row of each new file is read
+    file_columns: Dict[str, List[str]] = {}
+    for file_path in new_files:
         filename = os.path.basename(file_path)
-        filename_without_ext = os.path.splitext(filename)[0]
-        
         try:
-            print(f"\n  Reading: {filename}")
-            
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            
-            print(f"    Rows: {len(df)}")
-            print(f"    Columns: {list(df.columns)}")
-            
-            # Add filename as first column
-            df.insert(0, 'Archivo', filename_without_ext)
-            
-            # Append to list
-            all_dataframes.append(df)
-            
-            print(f"    [OK] Added with filename column")
-            
+            headers = read_headers(file_path)
+            if FILENAME_COLUMN in headers:
+                raise ValueError(f"cannot insert {FILENAME_COLUMN}, already exists")
+            file_columns[filename] = headers
         except Exception as e:
             print(f"    [ERROR] Failed to read {filename}: {e}")
             continue
-    
-    if not all_dataframes:
+
+    if not file_columns and not dropped:
         print("\nERROR: No files were successfully processed")
         return
-    
-    # Merge all dataframes
+
+    # Output layout: previous columns still used by a kept file, then the new ones
+    previous_columns = manifest['columns'] if manifest else None
+    used = {col for headers in kept_columns.values() for col in headers}
+    columns: List[str] = [FILENAME_COLUMN] + [col for col in (previous_columns or [])[1:] if col in used]
+    for headers in file_columns.values():
+        for col in headers:
+            if col not in columns:
+                columns.append(col)
+
+    # CSV outputs can be appended to when nothing has to be removed or re-shaped
+    append = (manifest is not None and output_path.lower().endswith('.csv')
+              and not dropped and columns == previous_columns)
+    write_path = output_path if append else f"{output_path}.tmp{os.path.splitext(output_path)[1]}"
+
     print("\n" + "="*80)
     print("MERGING FILES...")
     print("="*80)
-    
+
     try:
-        merged_df = pd.concat(all_dataframes, ignore_index=True)
-        
-        print(f"Total rows in merged file: {len(merged_df)}")
-        print(f"Columns: {list(merged_df.columns)}")
-        
-        # Generate output filename
-        if not output_filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            folder_name = os.path.basename(os.path.abspath(folder_path))
-            output_filename = f"merged_{folder_name}_{timestamp}.xlsx"
-        
-        # Save to same folder as input files
-        output_path = os.path.join(folder_path, output_filename)
-        
-        print(f"\nSaving merged file...")
-        merged_df.to_excel(output_path, index=False, engine='openpyxl')
-        
-        print(f"[OK] Saved: {output_path}")
+        writer = MergedWriter(write_path, columns, append=append)
+        try:
+            # Stream rows kept from the previous merge into the new layout
+            if manifest and not append and kept:
+                print(f"\n  Copying {sum(merged[name].get('rows', 0) for name in kept)} rows from previous merge")
+                kept_stems = {os.path.splitext(name)[0] for name in kept}
+                positions = [columns.index(col) if col in columns else None for col in previous_columns]
+                for row in iter_output_rows(output_path):
+                    if not row or str(row[0]) not in kept_stems:
+                        continue
+                    out = [None] * len(columns)
+                    for pos, value in zip(positions, row):
+                        if pos is not None:
+                            out[pos] = value
+                    writer.write(out, preview=False)
+
+            merged = {name: merged[name] for name in kept}
+            for file_path in new_files:
+                filename = os.path.basename(file_path)
+                if filename not in file_columns:
+                    continue
+                filename_without_ext = os.path.splitext(filename)[0]
+                positions = [columns.index(col) for col in file_columns[filename]]
+
+                print(f"\n  Reading: {filename}")
+                # The whole file is read before writing, so one that fails halfway adds no rows
+                try:
+                    rows = []
+                    for row in iter_data_rows(file_path):
+                        out = [None] * len(columns)
+                        # Add filename as first column
+                        out[0] = filename_without_ext
+                        for pos, value in zip(positions, row):
+                            out[pos] = value
+                        rows.append(out)
+                except Exception as e:
+                    print(f"    [ERROR] Failed to read {filename}: {e}")
+                    continue
+                for out in rows:
+                    writer.write(out)
+
+                merged[filename] = dict(file_signature(file_path), rows=len(rows), columns=file_columns[filename])
+                print(f"    Rows: {len(rows)}")
+                print(f"    Columns: {file_columns[filename]}")
+                print(f"    [OK] Added with filename column")
+        finally:
+            writer.close()
+
+        if not append:
+            os.replace(write_path, output_path)
+        save_manifest(output_path, {'columns': columns, 'files': merged})
+        total_rows = sum(entry.get('rows', 0) for entry in merged.values())
+
+        print(f"\n[OK] Saved: {output_path}")
         print(f"Size: {os.path.getsize(output_path):,} bytes")
-        
+
         # Show preview
-        print("\n" + "="*80)
-        print("PREVIEW (first 5 rows):")
-        print("="*80)
-        print(merged_df.head(5).to_string(index=False))
-        
+        if writer.preview:
+            print("\n" + "="*80)
+            print(f"PREVIEW (first {len(writer.preview)} new rows):")
+            print("="*80)
+            for row in writer.preview:
+                print(" | ".join('' if v is None else str(v) for v in row))
+
         # Summary
         print("\n" + "="*80)
         print("MERGE COMPLETE")
         print("="*80)
-        print(f"Files merged: {len(all_dataframes)}")
-        print(f"Total rows: {len(merged_df)}")
+        print(f"Files merged: {len(merged)} ({len(merged) - len(kept)} new)")
+        print(f"Total rows: {total_rows}")
+        print(f"Columns: {columns}")
         print(f"Output file: {output_path}")
         print("="*80)
-        
+
         return output_path
-        
+
     except Exception as e:
         print(f"\nERROR: Failed to merge files: {e}")
-        import traceback
         traceback.print_exc()
+        if not append and os.path.exists(write_path):
+            os.remove(write_path)
+        elif append:
+            # A partial append no longer matches the manifest: rebuild next time
+            os.remove(manifest_path_for(output_path))
         return None
 
 
 def main():
     """Main entry point."""
-    # Check arguments
-    if len(sys.argv) < 2:
-        print("ERROR: Missing folder path argument")
-        print()
-        print("Usage:")
-        print(f"  python {os.path.basename(__file__)} <folder_path>")
-        print()
-        print("Examples:")
-        print(f"  python {os.path.basename(__file__)} data/Batch_3")
-        print(f"  python {os.path.basename(__file__)} .")
-        print(f"  python {os.path.basename(__file__)} C:/path/to/folder")
-        sys.exit(1)
-    
-    folder_path = sys.argv[1]
-    
-    # Optional: custom output filename
-    output_filename = sys.argv[2] if len(sys.argv) > 2 else None
-    
+    parser = argparse.ArgumentParser(
+        description="Merge all .xlsx files in a folder into one file (incremental)",
+        epilog=f"Examples:\n"
+               f"  python {os.path.basename(__file__)} data/Batch_3\n"
+               f"  python {os.path.basename(__file__)} data/Batch_3 archive.csv\n"
+               f"  python {os.path.basename(__file__)} C:/path/to/folder --full",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('folder_path', help='Folder containing .xlsx files')
+    parser.add_argument('output_filename', nargs='?',
+                        help='Output filename in the same folder, .xlsx or .csv (default: merged_{folder}.xlsx)')
+    parser.add_argument('--full', action='store_true', help='Ignore the manifest and merge every file again')
+    args = parser.parse_args()
+
     # Run merger
-    merge_excel_files(folder_path, output_filename)
+    merge_excel_files(args.folder_path, args.output_filename, full=args.full)
 
 
 if __name__ == '__main__':
@@ -11,6 +11,9 @@ Workflow:
 6. Document Generation & Upload (PDF + 2 DOCX files)
 """
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict
 from datetime import datetime
 
@@ -19,6 +22,8 @@ from storage import storage
 from utils.state_manager import state_manager
 from utils.document_generator import doc_generator
 from utils.drive_manager import drive_manager
+from utils.concurrency import ThreadTaggedStdout
+from utils.agent_scheduler import agent_scheduler
 
 # Lazy imports for agents to avoid loading heavy dependencies when not needed
 # from agents.agent1_research import research_agent, ResearchAgent
@@ -27,6 +32,39 @@ from utils.drive_manager import drive_manager
 # from agents.agent4_review import review_agent, ReviewAgent
 
 
+class ArticleProgress:
+    """Thread-safe tracker of in-flight articles for parallel runs."""
+    
+    def __init__(self, total: int, stream=None):
+        self.total = total
+        self.stream = stream or sys.stdout
+        self.done = 0
+        self.failed = 0
+        self.in_flight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def update(self, article_id: str, step: str):
+        """Record the step an article is currently on and print progress."""
+        with self._lock:
+            self.in_flight[article_id] = step
+            self._print()
+    
+    def finish(self, article_id: str, ok: bool = True):
+        """Mark an article as finished and print progress."""
+        with self._lock:
+            self.in_flight.pop(article_id, None)
+            self.done += 1
+            if not ok:
+                self.failed += 1
+            self._print()
+    
+    def _print(self):
+        running = ', '.join(f"{aid} ({step})" for aid, step in self.in_flight.items()) or '-'
+        failed = f", {self.failed} failed" if self.failed else ""
+        self.stream.write(f"[Progress] {self.done}/{self.total} done{failed} | in flight: {running}\n")
+        self.stream.flush()
+
+
 class PipelineOrchestrator:
     """Orchestrates the multi-agent PAES question generation pipeline."""
     
@@ -44,6 +82,10 @@ class PipelineOrchestrator:
         
         self.output_dir = config.BASE_DATA_PATH  # Output directory for generated documents
         
+        # Parallel article processing (Drive client is not thread-safe)
+        self._drive_lock = threading.Lock()
+        self._progress = None
+        
         print("[Orchestrator] Initialized (Agents lazy-loaded)")
     
     @property
@@ -82,7 +124,8 @@ class PipelineOrchestrator:
                      start_from: str = 'agent1',
                      tsv_file: Optional[str] = None,
                      reverse: bool = False,
-                     agent3_prompt: Optional[str] = None):
+                     agent3_prompt: Optional[str] = None,
+                     workers: Optional[int] = None):
         """
         Run the complete PAES question generation pipeline.
         
@@ -94,9 +137,17 @@ class PipelineOrchestrator:
             start_from: Starting point ('agent1', 'agent2', or 'agent3')
             tsv_file: TSV file for agent2/agent3 start
             reverse: Process articles in reverse order (bottom to top)
+            agent3_prompt: Agent 3 prompt variant
+            workers: Articles processed at once (default: config.ARTICLE_WORKERS)
         """
-        # Store Agent 3 prompt choice for _process_article
-        self._agent3_prompt = agent3_prompt
+        workers = max(1, workers or config.ARTICLE_WORKERS)
+
+        # Agents 3 and 4 are shared by every article in the run (their
+        # reference PDF uploads are reused); a custom prompt needs its own instance
+        if agent3_prompt:
+            from agents.agent3_questions import QuestionAgent
+            self._question_agent = QuestionAgent(agent3_prompt=agent3_prompt)
+            print(f"[Orchestrator] Using Agent 3 prompt: {agent3_prompt}")
 
         # Override Agent 1 mode if specified
         if agent1_mode:
@@ -114,6 +165,8 @@ class PipelineOrchestrator:
             print(f"  Topic: {topic}")
         if reverse:
             print(f"  Order: REVERSE (bottom to top)")
+        if workers > 1:
+            print(f"  Article workers: {workers}")
         print(f"{'='*70}\n")
         
         try:
@@ -144,12 +197,18 @@ class PipelineOrchestrator:
                         validated_articles = list(reversed(validated_articles))
                         print(f"[Orchestrator] Processing in REVERSE order ({len(validated_articles)} articles)")
 
+                    # Convert article DOCX files up front (LibreOffice pool runs them in parallel)
+                    self._prefetch_article_pdfs(validated_articles)
+
                     # Process each validated article (Steps 3-6)
-                    for i, article in enumerate(validated_articles, 1):
-                        print(f"\n{'='*60}")
-                        print(f"[Orchestrator] Article {i}/{len(validated_articles)}: {article.get('article_id', 'N/A')}")
-                        print(f"{'='*60}")
-                        self._process_article(article)
+                    if workers > 1 and len(validated_articles) > 1:
+                        self._process_articles_parallel(validated_articles, workers)
+                    else:
+                        for i, article in enumerate(validated_articles, 1):
+                            print(f"\n{'='*60}")
+                            print(f"[Orchestrator] Article {i}/{len(validated_articles)}: {article.get('article_id', 'N/A')}")
+                            print(f"{'='*60}")
+                            self._process_article(article)
                     
                     # Upload master CSV
                     self._upload_master_csv()
@@ -172,12 +231,16 @@ class PipelineOrchestrator:
             if agent1_mode and self._research_agent:
                 from agents.agent1_research import research_agent
                 self._research_agent = research_agent
+            # Back to the default Agent 3 prompt
+            if agent3_prompt:
+                self._question_agent = None
         
         # Final statistics
         print(f"\n{'='*70}")
         print(f"[Orchestrator] ALL BATCHES COMPLETE ({num_batches} batches)")
         print(f"{'='*70}\n")
         self._print_statistics()
+        agent_scheduler.print_metrics()
     
     def _run_full_pipeline(self, topic: Optional[str], count: int) -> List[Dict]:
         """Run complete pipeline: Agent 1 → Agent 2 → return validated articles."""
@@ -411,36 +474,94 @@ class PipelineOrchestrator:
         print(f"[STEP 2] Complete: {len(approved_articles)}/{len(articles)} approved\n")
         return approved_articles
     
-    def _process_article(self, article: Dict):
-        """Process a single article through Steps 3-6."""
+    def _prefetch_article_pdfs(self, articles: List[Dict]):
+        """Fill the DOCX -> PDF cache for all articles before Steps 3-6."""
+        docx_paths = [a['docx_path'] for a in articles
+                      if a.get('docx_path') and os.path.exists(a['docx_path'])]
+        if len(docx_paths) < 2:
+            return
+        
+        from utils.pdf_converter import pdf_converter
+        print(f"[Orchestrator] Converting {len(docx_paths)} article DOCX files to PDF...")
+        pdf_converter.convert_many(docx_paths)
+    
+    def _process_articles_parallel(self, articles: List[Dict], workers: int):
+        """
+        Process articles through Steps 3-6 with a thread pool.
+        
+        Model calls are throttled per model by utils.concurrency.rate_limiter;
+        each article's log lines are prefixed with its ID.
+        
+        Args:
+            articles: Validated articles
+            workers: Number of articles processed at once
+        """
+        workers = min(workers, len(articles))
+        print(f"[Orchestrator] Processing {len(articles)} articles with {workers} workers")
+        
+        original_stdout = sys.stdout
+        self._progress = ArticleProgress(len(articles), original_stdout)
+        tagged_stdout = ThreadTaggedStdout(original_stdout)
+        
+        def run(article: Dict):
+            article_id = str(article.get('article_id', 'unknown'))
+            tagged_stdout.set_tag(article_id)
+            ok = False
+            try:
+                self._progress.update(article_id, 'started')
+                ok = self._process_article(article)
+            finally:
+                tagged_stdout.set_tag(None)
+                self._progress.finish(article_id, ok)
+        
+        sys.stdout = tagged_stdout
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='article') as pool:
+                # _process_article handles its own errors; result() surfaces anything else
+                for future in [pool.submit(run, article) for article in articles]:
+                    future.result()
+        finally:
+            sys.stdout = original_stdout
+            self._progress = None
+    
+    def _report_step(self, article_id: str, step: str):
+        """Report the current step of an article to the parallel progress tracker."""
+        if self._progress is not None:
+            self._progress.update(str(article_id), step)
+    
+    def _process_article(self, article: Dict) -> bool:
+        """
+        Process a single article through Steps 3-6.
+        
+        Returns:
+            True if the article completed, False if it stopped on an error
+        """
         article_id = article.get('article_id', 'unknown')
         title = article.get('title', 'Untitled')
         
         try:
-            # Create fresh agent instances
-            print(f"[Orchestrator] Creating fresh Agent 3 & 4 instances...")
-            from agents.agent3_questions import QuestionAgent
-            from agents.agent4_review import ReviewAgent
-            q_agent = QuestionAgent(agent3_prompt=self._agent3_prompt)
-            r_agent = ReviewAgent()
+            q_agent = self.question_agent
+            r_agent = self.review_agent
             
             # Step 3: Generate questions
+            self._report_step(article_id, 'STEP 3')
             print(f"\n[STEP 3] Question Generation - Agent 3")
             try:
                 questions = q_agent.generate_questions(article)
             except FileNotFoundError as e:
                 print(f"[STEP 3] Skipping {article_id}: {e}")
                 self.state_manager.mark_error(article_id, f"DOCX file not found: {e}")
-                return
+                return False
             
             if not questions or not questions.get('questions'):
                 print(f"[STEP 3] ERROR: No questions generated")
                 self.state_manager.mark_error(article_id, "No questions generated")
-                return
+                return False
             
             self.state_manager.mark_questions_generated(article_id)
             
             # Step 4: Review questions
+            self._report_step(article_id, 'STEP 4')
             print(f"\n[STEP 4] Question Review - Agent 4")
             try:
                 feedback = r_agent.review_questions(article, questions)
@@ -449,9 +570,10 @@ class PipelineOrchestrator:
                 import traceback
                 traceback.print_exc()
                 self.state_manager.mark_error(article_id, f"Review failed: {e}")
-                return
+                return False
             
             # Step 5: Improve questions
+            self._report_step(article_id, 'STEP 5')
             print(f"\n[STEP 5] Question Improvement - Agent 3")
             try:
                 improved = q_agent.improve_questions(questions, feedback, article)
@@ -460,11 +582,12 @@ class PipelineOrchestrator:
                 import traceback
                 traceback.print_exc()
                 self.state_manager.mark_error(article_id, f"Improvement failed: {e}")
-                return
+                return False
             
             self.state_manager.mark_questions_improved(article_id)
             
             # Step 6: Generate documents
+            self._report_step(article_id, 'STEP 6')
             print(f"\n[STEP 6] Document Generation")
             
             # Generate merged Word documents (article text + questions)
@@ -516,15 +639,17 @@ class PipelineOrchestrator:
                 questions_improved_excel = None
             
             # Upload or save locally
+            self._report_step(article_id, 'upload')
             print(f"\n[STEP 6] Upload to Drive")
             try:
-                self.drive_manager.upload_article_package(
-                    article, 
-                    questions_initial_word, 
-                    questions_improved_word,
-                    questions_initial_excel,
-                    questions_improved_excel
-                )
+                with self._drive_lock:
+                    self.drive_manager.upload_article_package(
+                        article, 
+                        questions_initial_word, 
+                        questions_improved_word,
+                        questions_initial_excel,
+                        questions_improved_excel
+                    )
                 print(f"[Drive] Upload successful")
                 self.state_manager.mark_article_processed(article_id, uploaded=True)
             except Exception as e:
@@ -533,27 +658,32 @@ class PipelineOrchestrator:
                 self.state_manager.mark_article_processed(article_id, uploaded=False)
             
             print(f"\n[Orchestrator] ✓ Article complete: {title[:50]}")
+            return True
         
         except Exception as e:
             print(f"\n[Orchestrator] ERROR processing article: {e}")
             import traceback
             traceback.print_exc()
             self.state_manager.mark_error(article_id, str(e))
+            return False
+        
+        finally:
+            # Article finished: delete its PDF upload (reference PDFs are kept)
+            from utils.gemini_file_cache import get_gemini_file_cache
+            get_gemini_file_cache().release_owner(article_id)
     
     def _upload_master_csv(self):
         """Upload master validated articles CSV to Drive."""
         try:
             print(f"\n[Orchestrator] Uploading master CSV...")
             
-            state_df = self.state_manager.load_state()
-            validated_df = state_df[state_df['license_status'] == 'approved']
+            csv_path = self.state_manager.export_csv(
+                "validated_articles.csv", license_status='approved'
+            )
             
-            if not validated_df.empty:
-                csv_path = self.doc_generator.generate_validated_csv(
-                    validated_df.to_dict('records'),
-                    filename="validated_articles.csv"
-                )
-                self.drive_manager.upload_master_csv(csv_path)
+            if csv_path:
+                with self._drive_lock:
+                    self.drive_manager.upload_master_csv(csv_path)
                 print("[Drive] Master CSV uploaded")
         
         except Exception as e:
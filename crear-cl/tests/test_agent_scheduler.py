@@ -0,0 +1,150 @@
+"""
+Tests for utils.agent_scheduler with a fake model client: timeouts, retries,
+hedging, and stalled requests that must not hold rate-limiter slots.
+"""
+import threading
+import time
+
+import pytest
+
+from utils.agent_scheduler import AgentCallTimeout, AgentScheduler
+from utils.concurrency import ModelRateLimiter
+
+
+class ServerError(Exception):
+    """Transient error, retried by name like the google-genai one."""
+
+
+class FakeClient:
+    """
+    Model client whose behaviour is scripted per call: a number is a latency
+    in seconds, an exception is raised, 'stall' never returns (until the test ends).
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, model_id):
+        with self._lock:
+            self.calls.append(model_id)
+            step = self.script.pop(0) if self.script else 0
+        if step == 'stall':
+            self.release.wait()
+            return f"late {model_id}"
+        if isinstance(step, Exception):
+            raise step
+        time.sleep(step)
+        return f"response from {model_id}"
+
+
+def make_scheduler(max_concurrent=4, **kwargs):
+    options = dict(default_timeout=0.5, max_retries=1, backoff_seconds=0,
+                   backoff_max_seconds=0, hedge_percentile=0, hedge_model='hedge-model',
+                   sleep=lambda seconds: None)
+    options.update(kwargs)
+    limiter = ModelRateLimiter(max_concurrent=max_concurrent, requests_per_minute=0)
+    return AgentScheduler(limiter=limiter, **options)
+
+
+@pytest.fixture
+def clients():
+    created = []
+    yield created
+    for client in created:
+        client.release.set()
+
+
+def fake(clients, script):
+    client = FakeClient(script)
+    clients.append(client)
+    return client
+
+
+def test_timeout_is_retried(clients):
+    client = fake(clients, ['stall', 0])
+    scheduler = make_scheduler()
+
+    assert scheduler.call('agent3', 'model', client) == "response from model"
+    metrics = scheduler.metrics()['agent3']
+    assert (metrics['timeouts'], metrics['retries'], metrics['failures']) == (1, 1, 0)
+
+
+def test_non_retryable_error_is_raised_at_once(clients):
+    client = fake(clients, [ValueError("bad request"), 0])
+    scheduler = make_scheduler()
+
+    with pytest.raises(ValueError):
+        scheduler.call('agent3', 'model', client)
+    assert client.calls == ['model']
+
+
+def test_retries_are_bounded(clients):
+    client = fake(clients, [ServerError("503"), ServerError("503"), 0])
+    scheduler = make_scheduler(max_retries=1)
+
+    with pytest.raises(ServerError):
+        scheduler.call('agent3', 'model', client)
+    assert len(client.calls) == 2
+    assert scheduler.metrics()['agent3']['failures'] == 1
+
+
+def test_slow_request_is_hedged(clients):
+    # Five fast calls set the latency percentile, then the primary stalls
+    client = fake(clients, [0.01] * 5 + ['stall', 0.01])
+    scheduler = make_scheduler(hedge_percentile=95, default_timeout=2)
+
+    for _ in range(5):
+        scheduler.call('agent3', 'model', client)
+    assert scheduler.call('agent3', 'model', client) == "response from hedge-model"
+    metrics = scheduler.metrics()['agent3']
+    assert (metrics['hedges'], metrics['hedge_wins']) == (1, 1)
+
+
+def test_stalled_requests_do_not_hold_slots(clients):
+    # One slot: a stalled call that timed out must not block the next calls
+    client = fake(clients, ['stall', 'stall', 0, 0])
+    scheduler = make_scheduler(max_concurrent=1, max_retries=0, default_timeout=0.2)
+
+    for _ in range(2):
+        with pytest.raises(AgentCallTimeout):
+            scheduler.call('agent3', 'model', client)
+    start = time.monotonic()
+    assert scheduler.call('agent3', 'model', client) == "response from model"
+    assert scheduler.call('agent3', 'model', client) == "response from model"
+    assert time.monotonic() - start < 0.2
+
+
+def test_wait_for_a_slot_is_bounded(clients):
+    client = fake(clients, [0])
+    limiter = ModelRateLimiter(max_concurrent=1, requests_per_minute=0)
+    scheduler = AgentScheduler(limiter=limiter, default_timeout=0.2, max_retries=0,
+                               hedge_percentile=0, sleep=lambda seconds: None)
+    limiter.acquire('model')  # held by someone else for the whole test
+
+    start = time.monotonic()
+    with pytest.raises(AgentCallTimeout):
+        scheduler.call('agent3', 'model', client)
+    assert time.monotonic() - start < 1
+    assert client.calls == []
+
+
+def test_timeout_is_not_retried_when_disabled(clients):
+    # Deep Research: the timed-out run keeps going, a retry would start a second one
+    client = fake(clients, ['stall', 0])
+    scheduler = make_scheduler(max_retries=2)
+
+    with pytest.raises(AgentCallTimeout):
+        scheduler.call('agent1', 'deep-research', client, hedge=False, retry_on_timeout=False)
+    assert client.calls == ['deep-research']
+    assert scheduler.metrics()['agent1']['retries'] == 0
+
+
+def test_other_errors_are_retried_when_timeout_retries_are_disabled(clients):
+    client = fake(clients, [ServerError("503"), 0])
+    scheduler = make_scheduler(max_retries=2)
+
+    assert scheduler.call('agent1', 'deep-research', client, hedge=False,
+                          retry_on_timeout=False) == "response from deep-research"
@@ -0,0 +1,78 @@
+"""
+Tests for utils.gemini_file_cache index persistence when two processes (the
+--reverse workflow) share one index file.
+"""
+import json
+import time
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from utils.gemini_file_cache import GeminiFileCache
+
+
+def entry(name):
+    return {'name': name, 'uri': f"https://files/{name}", 'display_name': name,
+            'expires_at': time.time() + 24 * 3600}
+
+
+def add(cache, key, owner=None):
+    """Record an upload the way get_or_upload does, without calling Gemini."""
+    with cache._lock:
+        cache._removed.discard(key)
+        cache._index[key] = entry(f"files/{key}")
+        cache._save_index()
+        cache._files[key] = object()
+        if owner:
+            cache._owners.setdefault(key, set()).add(owner)
+
+
+def saved_keys(index_file):
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return set(json.load(f))
+
+
+def test_saves_from_two_processes_are_merged(tmp_path):
+    index_file = str(tmp_path / "uploads.json")
+    forward, reverse = GeminiFileCache(index_file), GeminiFileCache(index_file)
+
+    add(forward, 'a')
+    add(reverse, 'b')
+    add(forward, 'c')
+
+    assert saved_keys(index_file) == {'a', 'b', 'c'}
+    # Each process also picks up the other's uploads for reuse
+    assert set(forward._index) == {'a', 'b', 'c'}
+
+
+def test_released_entries_are_not_resurrected_by_the_merge(tmp_path):
+    index_file = str(tmp_path / "uploads.json")
+    forward, reverse = GeminiFileCache(index_file), GeminiFileCache(index_file)
+    add(forward, 'a', owner='C001')
+    add(reverse, 'b')
+
+    forward.release_owner('C001')
+
+    assert saved_keys(index_file) == {'b'}
+    add(forward, 'c')
+    assert saved_keys(index_file) == {'b', 'c'}
+
+
+def test_no_shared_temp_file_is_left_behind(tmp_path):
+    index_file = str(tmp_path / "uploads.json")
+    cache = GeminiFileCache(index_file)
+
+    add(cache, 'a')
+
+    assert [p.name for p in tmp_path.iterdir()] == ["uploads.json"]
+
+
+def test_expired_entries_are_dropped_on_load(tmp_path):
+    index_file = tmp_path / "uploads.json"
+    index_file.write_text(json.dumps({
+        'old': dict(entry('files/old'), expires_at=time.time() - 60),
+        'new': entry('files/new'),
+    }), encoding='utf-8')
+
+    assert set(GeminiFileCache(str(index_file))._index) == {'new'}
@@ -0,0 +1,64 @@
+"""
+Tests for merge_excel_files: incremental merges stay consistent when a file
+fails halfway or is removed.
+"""
+import os
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import merge_excel_files as mef
+
+
+def write_workbook(path, header, rows):
+    wb = Workbook()
+    wb.active.append(header)
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+
+
+def read_output(path):
+    rows = list(load_workbook(path, read_only=True).active.iter_rows(values_only=True))
+    return list(rows[0]), [tuple(row) for row in rows[1:]]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    write_workbook(tmp_path / "a.xlsx", ["Pregunta", "Clave"], [["p1", "A"], ["p2", "B"]])
+    return tmp_path
+
+
+def test_file_failing_halfway_adds_no_rows(folder, monkeypatch):
+    write_workbook(folder / "b.xlsx", ["Pregunta", "Clave"], [["p3", "C"], ["p4", "D"]])
+    iter_data_rows = mef.iter_data_rows
+
+    def failing_iter_data_rows(file_path):
+        for index, row in enumerate(iter_data_rows(file_path)):
+            if os.path.basename(file_path) == "b.xlsx" and index == 1:
+                raise OSError("truncated file")
+            yield row
+
+    monkeypatch.setattr(mef, "iter_data_rows", failing_iter_data_rows)
+    output = mef.merge_excel_files(str(folder))
+    _, rows = read_output(output)
+    assert [row[0] for row in rows] == ["a", "a"]
+
+    # Next run (file readable again) adds b exactly once
+    monkeypatch.setattr(mef, "iter_data_rows", iter_data_rows)
+    write_workbook(folder / "c.xlsx", ["Pregunta", "Clave"], [["p5", "A"]])
+    mef.merge_excel_files(str(folder))
+    _, rows = read_output(output)
+    assert sorted(row[1] for row in rows) == ["p1", "p2", "p3", "p4", "p5"]
+
+
+def test_columns_of_removed_files_are_dropped(folder):
+    write_workbook(folder / "b.xlsx", ["Pregunta", "Solo en b"], [["p3", "x"]])
+    output = mef.merge_excel_files(str(folder))
+    assert read_output(output)[0] == ["Archivo", "Pregunta", "Clave", "Solo en b"]
+
+    os.remove(folder / "b.xlsx")
+    mef.merge_excel_files(str(folder))
+    columns, rows = read_output(output)
+    assert columns == ["Archivo", "Pregunta", "Clave"]
+    assert rows == [("a", "p1", "A"), ("a", "p2", "B")]
@@ -0,0 +1,92 @@
+"""
+Tests for utils.response_cache: hits, misses and offline replay, keyed on the
+article DOCX so reconverting it to PDF does not invalidate recorded responses.
+"""
+import pytest
+
+from utils.response_cache import ResponseCache, ResponseCacheMiss
+
+
+class FakeModel:
+    """Counts calls and returns a numbered response."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"response {self.calls}"
+
+
+@pytest.fixture
+def docx(tmp_path):
+    path = tmp_path / "C001.docx"
+    path.write_bytes(b"article content")
+    return str(path)
+
+
+def test_reuse_serves_recorded_response(tmp_path, docx):
+    model = FakeModel()
+    ResponseCache(str(tmp_path / "cache"), 'record').generate('m', 'prompt', [docx], model)
+
+    text = ResponseCache(str(tmp_path / "cache"), 'reuse').generate('m', 'prompt', [docx], model)
+
+    assert text == "response 1"
+    assert model.calls == 1
+
+
+def test_reuse_calls_model_on_miss_and_stores(tmp_path, docx):
+    cache = ResponseCache(str(tmp_path / "cache"), 'reuse')
+    model = FakeModel()
+
+    assert cache.generate('m', 'prompt', [docx], model) == "response 1"
+    assert cache.generate('m', 'other prompt', [docx], model) == "response 2"
+    assert cache.generate('other-model', 'prompt', [docx], model) == "response 3"
+    assert cache.generate('m', 'prompt', [docx], model) == "response 1"
+    assert model.calls == 3
+
+
+def test_replay_miss_raises_without_calling(tmp_path, docx):
+    cache = ResponseCache(str(tmp_path / "cache"), 'replay')
+    model = FakeModel()
+
+    with pytest.raises(ResponseCacheMiss):
+        cache.generate('m', 'prompt', [docx], model, label="Agent 3 C001")
+    assert model.calls == 0
+
+
+def test_replay_hit_needs_no_call(tmp_path, docx):
+    ResponseCache(str(tmp_path / "cache"), 'record').generate('m', 'prompt', [docx], FakeModel())
+    model = FakeModel()
+
+    text = ResponseCache(str(tmp_path / "cache"), 'replay').generate('m', 'prompt', [docx], model)
+
+    assert text == "response 1"
+    assert model.calls == 0
+
+
+def test_key_follows_docx_content_not_its_pdf(tmp_path, docx):
+    cache = ResponseCache(str(tmp_path / "cache"), 'reuse')
+    pdf = tmp_path / "C001.pdf"
+    pdf.write_bytes(b"%PDF CreationDate 2026-01-01")
+    key = cache.make_key('m', 'prompt', [docx])
+
+    # Reconverting rewrites the PDF with new metadata; the key must not move
+    pdf.write_bytes(b"%PDF CreationDate 2026-02-02")
+    assert cache.make_key('m', 'prompt', [docx]) == key
+
+    # Editing the DOCX is a new request
+    with open(docx, 'wb') as f:
+        f.write(b"edited article content")
+    assert cache.make_key('m', 'prompt', [docx]) != key
+
+
+def test_off_mode_always_calls(tmp_path, docx):
+    cache = ResponseCache(str(tmp_path / "cache"), 'off')
+    model = FakeModel()
+
+    cache.generate('m', 'prompt', [docx], model)
+    cache.generate('m', 'prompt', [docx], model)
+
+    assert model.calls == 2
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,106 @@
+"""
+Tests for utils.state_manager: the one-time legacy CSV import, concurrent
+status updates from several threads, and busy-database errors.
+"""
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from storage import storage
+from utils.state_manager import StateManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return StateManager(str(tmp_path / "state.db"), str(tmp_path / "missing.csv"))
+
+
+def add(manager, count):
+    return manager.add_articles([
+        {'title': f"Artículo {n}", 'url': f"https://example.com/{n}", 'source': 'test'}
+        for n in range(count)
+    ])
+
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    legacy = str(tmp_path / "processing_state.csv")
+    storage.write_csv(pd.DataFrame([
+        {'article_id': 'C001', 'title': 'Uno', 'url': 'https://a', 'license_status': 'cc_valid',
+         'processing_status': 'validated', 'questions_generated': True, 'uploaded_to_drive': 'False'},
+        {'article_id': 'C002', 'title': 'Dos', 'url': 'https://b', 'license_status': 'no_license',
+         'processing_status': 'rejected', 'questions_generated': False, 'uploaded_to_drive': 1},
+    ]), legacy)
+    db = str(tmp_path / "state.db")
+
+    manager = StateManager(db, legacy)
+
+    first = manager.get_article_by_id('C001')
+    assert first['title'] == 'Uno'
+    assert first['questions_generated'] is True and first['uploaded_to_drive'] is False
+    assert manager.get_article_by_id('C002')['uploaded_to_drive'] is True
+    assert [a['article_id'] for a in manager.get_pending_articles()] == ['C001']
+
+    # Later changes are kept: the CSV is not imported again over them
+    manager.mark_article_processed('C001')
+    assert StateManager(db, legacy).get_article_by_id('C001')['processing_status'] == 'completed'
+
+
+def test_concurrent_updates_are_all_kept(manager):
+    article_ids = add(manager, 8)
+    errors = []
+
+    def process(article_id):
+        try:
+            manager.update_license_validation(article_id, 'cc_valid', 'CC BY')
+            manager.mark_questions_generated(article_id)
+            manager.mark_questions_improved(article_id)
+            manager.mark_article_processed(article_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=process, args=(aid,)) for aid in article_ids for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    state = manager.load_state()
+    assert len(state) == 8
+    assert set(state['processing_status']) == {'completed'}
+    assert state['questions_generated'].all() and state['questions_improved'].all()
+    assert manager.get_statistics()['completed'] == 8
+
+
+def test_busy_database_raises_the_busy_error(manager):
+    article_id = add(manager, 1)[0]
+    manager.BUSY_TIMEOUT = 0.1
+    other_process = sqlite3.connect(manager.state_db, isolation_level=None)
+    other_process.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            manager.mark_error(article_id, "boom")
+    finally:
+        other_process.execute('ROLLBACK')
+        other_process.close()
+
+    # Nothing was half-written and the database is usable again
+    assert manager.get_article_by_id(article_id)['processing_status'] == 'pending'
+    manager.mark_error(article_id, "boom")
+    assert manager.get_article_by_id(article_id)['error_message'] == "boom"
+
+
+def test_failed_statement_rolls_back_the_transaction(manager):
+    add(manager, 2)
+    before = manager.load_state()
+
+    with pytest.raises(sqlite3.OperationalError):
+        manager._update(before['article_id'][0], no_such_column=1)
+    with pytest.raises(RuntimeError):
+        with manager._transaction() as conn:
+            conn.execute("DELETE FROM articles")
+            raise RuntimeError("abort")
+
+    assert manager.load_state().equals(before)
@@ -0,0 +1,385 @@
+"""
+Scheduler for Gemini calls made by Agents 1-4.
+Every request runs with a per-attempt timeout, bounded exponential-backoff
+retries on transient errors, and optional hedging: once an attempt is slower
+than the agent's recent latency percentile, a second request is sent to the
+hedge model and the first response wins. Per-agent latency and token
+metrics are collected for the end-of-run summary.
+
+Waiting for a rate-limiter slot is bounded by the attempt timeout, and an
+attempt the scheduler stops waiting for (timed out, or beaten by the other
+request of a hedge) gives its slot back right away: a request that never
+returns keeps its thread, but cannot hold a slot and block later calls.
+
+Requests are plain callables taking the model ID, so the scheduler can be
+exercised with a local fake client.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import config
+from utils.concurrency import ModelRateLimiter, rate_limiter
+
+
+# Hedging needs a few observed latencies before the percentile means anything
+HEDGE_MIN_SAMPLES = 5
+LATENCY_WINDOW = 200
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    'DeadlineExceeded', 'InternalServerError', 'ResourceExhausted',
+    'ServiceUnavailable', 'TooManyRequests', 'ServerError'
+}
+
+
+class AgentCallTimeout(TimeoutError):
+    """Raised when a model request does not finish within its timeout."""
+
+    def __init__(self, message: str, request_running: bool = False):
+        """
+        Args:
+            message: Error message
+            request_running: The request was sent and may still be running
+                             (False when no rate-limiter slot was free)
+        """
+        super().__init__(message)
+        self.request_running = request_running
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Timeouts, connection errors, rate limits (429) and server errors (5xx) are
+    retried; invalid requests, safety blocks and parsing errors are not.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    for attr in ('code', 'status_code'):
+        code = getattr(error, attr, None)
+        if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+            return True
+    return False
+
+
+def extract_token_usage(response: Any) -> Tuple[int, int]:
+    """
+    Read (input, output) token counts from a generate_content response or an
+    Interactions API result. Missing usage data counts as zero.
+    """
+    usage = getattr(response, 'usage_metadata', None) or getattr(response, 'usage', None)
+    if usage is None:
+        return 0, 0
+
+    def first(*names) -> int:
+        for name in names:
+            value = getattr(usage, name, None)
+            if isinstance(value, int):
+                return value
+        return 0
+
+    return (first('prompt_token_count', 'total_input_tokens', 'input_tokens'),
+            first('candidates_token_count', 'total_output_tokens', 'output_tokens'))
+
+
+class AgentMetrics:
+    """Latency and token counters for one agent."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank latency percentile, or None without enough samples."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'retries': self.retries,
+            'timeouts': self.timeouts,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'p50_seconds': ordered[len(ordered) // 2] if ordered else None,
+            'p95_seconds': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else None
+        }
+
+
+class _Attempt:
+    """One in-flight request on a background thread, and its rate-limiter slot."""
+
+    def __init__(self, limiter: ModelRateLimiter, model_id: str, hedge: bool = False):
+        self.limiter = limiter
+        self.model_id = model_id
+        self.hedge = hedge
+        self.future = Future()
+        self.started = threading.Event()
+        self.start_time: Optional[float] = None
+        self._abandoned = False
+        self._holds_slot = False
+        self._slot_lock = threading.Lock()
+
+    def take_slot(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False if none was free or the attempt was abandoned."""
+        if not self.limiter.acquire(self.model_id, timeout=timeout):
+            return False
+        with self._slot_lock:
+            if not self._abandoned:
+                self._holds_slot = True
+                return True
+        self.limiter.release(self.model_id)
+        return False
+
+    def release_slot(self):
+        """Return the slot (only once, whether the request finished or was abandoned)."""
+        with self._slot_lock:
+            holds_slot, self._holds_slot = self._holds_slot, False
+        if holds_slot:
+            self.limiter.release(self.model_id)
+
+    def abandon(self):
+        """Stop waiting for this request and free its slot, even if it never returns."""
+        with self._slot_lock:
+            self._abandoned = True
+        self.release_slot()
+
+
+class AgentScheduler:
+    """Runs agent model requests with timeouts, retries, hedging and metrics."""
+
+    def __init__(self, limiter: Optional[ModelRateLimiter] = None,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None,
+                 backoff_max_seconds: Optional[float] = None,
+                 hedge_percentile: Optional[float] = None,
+                 hedge_model: Optional[str] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize scheduler.
+
+        Args:
+            limiter: Per-model rate limiter (defaults to the shared rate_limiter)
+            timeouts: Per-agent attempt timeouts in seconds (e.g. {'agent1': 1800})
+            default_timeout: Attempt timeout for other agents (default: config.GEMINI_CALL_TIMEOUT)
+            max_retries: Retries after the first attempt (default: config.GEMINI_MAX_RETRIES)
+            backoff_seconds: First retry delay, doubled per retry (default: config.GEMINI_BACKOFF_SECONDS)
+            backoff_max_seconds: Cap on the retry delay (default: config.GEMINI_BACKOFF_MAX_SECONDS)
+            hedge_percentile: Latency percentile that triggers a hedge, 0 = off
+                              (default: config.GEMINI_HEDGE_PERCENTILE)
+            hedge_model: Model for hedged requests (default: config.GEMINI_HEDGE_MODEL)
+            sleep: Sleep function used between retries
+        """
+        self.limiter = limiter or rate_limiter
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout if default_timeout is not None else config.GEMINI_CALL_TIMEOUT
+        self.max_retries = max(0, max_retries if max_retries is not None else config.GEMINI_MAX_RETRIES)
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else config.GEMINI_BACKOFF_SECONDS
+        self.backoff_max_seconds = (backoff_max_seconds if backoff_max_seconds is not None
+                                    else config.GEMINI_BACKOFF_MAX_SECONDS)
+        self.hedge_percentile = hedge_percentile if hedge_percentile is not None else config.GEMINI_HEDGE_PERCENTILE
+        self.hedge_model = hedge_model or config.GEMINI_HEDGE_MODEL
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, AgentMetrics] = {}
+
+    def _agent_metrics(self, agent: str) -> AgentMetrics:
+        with self._lock:
+            return self._metrics.setdefault(agent, AgentMetrics())
+
+    def _count(self, agent: str, field: str, amount: int = 1):
+        metrics = self._agent_metrics(agent)
+        with self._lock:
+            setattr(metrics, field, getattr(metrics, field) + amount)
+
+    def _backoff(self, retry: int) -> float:
+        """Exponential backoff with jitter for the given retry (1-based)."""
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** (retry - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def call(self, agent: str, model_id: str, request: Callable[[str], Any],
+             hedge: bool = True, timeout: Optional[float] = None,
+             retry_on_timeout: bool = True) -> Any:
+        """
+        Run a model request through the scheduler.
+
+        Args:
+            agent: Agent name for timeouts and metrics ('agent1' ... 'agent4')
+            model_id: Primary model (or Deep Research agent) ID
+            request: Performs the call for a given model ID and returns the response
+            hedge: Allow a hedged request to the hedge model
+            timeout: Attempt timeout in seconds (default: per-agent / default timeout)
+            retry_on_timeout: Retry after a request timed out. A timed-out request
+                              keeps running (and billing) on its thread, so turn
+                              this off for long jobs such as Deep Research
+
+        Returns:
+            Response returned by request
+        """
+        timeout = timeout or self.timeouts.get(agent, self.default_timeout)
+        self._count(agent, 'calls')
+
+        for retry in range(self.max_retries + 1):
+            if retry:
+                delay = self._backoff(retry)
+                print(f"[Scheduler] {agent}: retry {retry}/{self.max_retries} in {delay:.1f}s")
+                self._count(agent, 'retries')
+                self._sleep(delay)
+            try:
+                return self._attempt(agent, model_id, request, timeout, hedge)
+            except Exception as e:
+                abandoned_request = isinstance(e, AgentCallTimeout) and e.request_running
+                if (retry == self.max_retries or not is_retryable(e)
+                        or (abandoned_request and not retry_on_timeout)):
+                    self._count(agent, 'failures')
+                    raise
+                print(f"[Scheduler] {agent}: {type(e).__name__}: {e}")
+
+    def _launch(self, agent: str, model_id: str, request: Callable[[str], Any],
+                queue_timeout: float, hedge: bool = False) -> _Attempt:
+        """
+        Start a request on a daemon thread (abandoned requests never block exit).
+        The thread waits at most queue_timeout seconds for a rate-limiter slot.
+        """
+        attempt = _Attempt(self.limiter, model_id, hedge)
+
+        def run():
+            try:
+                if not attempt.take_slot(queue_timeout):
+                    raise AgentCallTimeout(f"{agent}: no {model_id} slot free within {queue_timeout:g}s")
+                attempt.start_time = time.monotonic()
+                attempt.started.set()
+                try:
+                    result = request(model_id)
+                finally:
+                    attempt.release_slot()
+                attempt.future.set_result(result)
+            except BaseException as e:
+                attempt.future.set_exception(e)
+            finally:
+                attempt.started.set()
+
+        threading.Thread(target=run, name=f"{agent}-{model_id}", daemon=True).start()
+        return attempt
+
+    def _attempt(self, agent: str, model_id: str, request: Callable[[str], Any],
+                 timeout: float, hedge: bool) -> Any:
+        """One attempt: the primary request plus at most one hedged request."""
+        metrics = self._agent_metrics(agent)
+        with self._lock:
+            hedge_after = metrics.percentile(self.hedge_percentile) if hedge and self.hedge_percentile else None
+
+        primary = self._launch(agent, model_id, request, queue_timeout=timeout)
+        attempts: List[_Attempt] = [primary]
+        try:
+            return self._await(agent, model_id, request, timeout, hedge_after, attempts)
+        finally:
+            # Requests still running are no longer waited for: free their slots
+            for attempt in attempts:
+                attempt.abandon()
+
+    def _await(self, agent: str, model_id: str, request: Callable[[str], Any], timeout: float,
+               hedge_after: Optional[float], attempts: List[_Attempt]) -> Any:
+        """Wait for the first successful response among `attempts`, hedging when due."""
+        primary = attempts[0]
+        # Time spent waiting for a rate-limiter slot does not count toward the
+        # timeout, but that wait is bounded by the timeout as well
+        if not primary.started.wait(timeout):
+            self._count(agent, 'timeouts')
+            raise AgentCallTimeout(f"{agent}: no {model_id} slot free within {timeout:g}s")
+        started = primary.start_time or time.monotonic()
+        deadline = started + timeout
+        hedged = False
+
+        while True:
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= 0:
+                self._count(agent, 'timeouts')
+                raise AgentCallTimeout(f"{agent} request to {model_id} timed out after {timeout:g}s",
+                                       request_running=True)
+
+            wait_for = remaining
+            if hedge_after is not None and not hedged:
+                until_hedge = started + hedge_after - now
+                if until_hedge <= 0:
+                    print(f"[Scheduler] {agent}: no response after {hedge_after:.2g}s, "
+                          f"hedging with {self.hedge_model}")
+                    attempts.append(self._launch(agent, self.hedge_model, request,
+                                                 queue_timeout=remaining, hedge=True))
+                    self._count(agent, 'hedges')
+                    hedged = True
+                    continue
+                wait_for = min(wait_for, until_hedge)
+
+            wait([a.future for a in attempts], timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for attempt in [a for a in attempts if a.future.done()]:
+                error = attempt.future.exception()
+                if error is None:
+                    self._record_success(agent, attempt)
+                    return attempt.future.result()
+                attempts.remove(attempt)
+                if not attempts:
+                    raise error
+                # The other request is still running; keep waiting for it
+
+    def _record_success(self, agent: str, attempt: _Attempt):
+        input_tokens, output_tokens = extract_token_usage(attempt.future.result())
+        latency = time.monotonic() - (attempt.start_time or time.monotonic())
+        metrics = self._agent_metrics(agent)
+        with self._lock:
+            metrics.latencies.append(latency)
+            metrics.input_tokens += input_tokens
+            metrics.output_tokens += output_tokens
+            if attempt.hedge:
+                metrics.hedge_wins += 1
+
+    def metrics(self) -> Dict[str, Dict]:
+        """
+        Get per-agent metrics.
+
+        Returns:
+            Dict of agent -> counters, token totals and p50/p95 latency
+        """
+        with self._lock:
+            return {agent: m.summary() for agent, m in sorted(self._metrics.items())}
+
+    def print_metrics(self):
+        """Print the per-agent metrics table (nothing if no calls were made)."""
+        metrics = self.metrics()
+        if not metrics:
+            return
+        print("\n[Scheduler] Gemini calls by agent:")
+        for agent, m in metrics.items():
+            p50 = f"{m['p50_seconds']:.1f}s" if m['p50_seconds'] is not None else "-"
+            p95 = f"{m['p95_seconds']:.1f}s" if m['p95_seconds'] is not None else "-"
+            print(f"  {agent}: {m['calls']} calls, {m['failures']} failed, {m['retries']} retries, "
+                  f"{m['timeouts']} timeouts, {m['hedges']} hedges ({m['hedge_wins']} won) | "
+                  f"p50 {p50}, p95 {p95} | tokens in {m['input_tokens']:,}, out {m['output_tokens']:,}")
+
+
+# Global scheduler shared by Agents 1-4
+agent_scheduler = AgentScheduler(timeouts={'agent1': config.AGENT1_CALL_TIMEOUT})
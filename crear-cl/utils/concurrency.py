@@ -0,0 +1,145 @@
+"""
+Concurrency helpers for running several articles in parallel.
+Provides a per-model rate limiter shared by all agents and per-thread
+log prefixes for parallel article runs.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import config
+
+
+class ModelRateLimiter:
+    """Caps concurrent calls and request rate per Gemini model."""
+
+    def __init__(self, max_concurrent: int = 4, requests_per_minute: int = 20):
+        """
+        Initialize rate limiter.
+
+        Args:
+            max_concurrent: Maximum in-flight requests per model
+            requests_per_minute: Maximum request starts per minute per model (0 = unlimited)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.requests_per_minute = max(0, requests_per_minute)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def _semaphore(self, model_id: str) -> threading.BoundedSemaphore:
+        """Get (or create) the semaphore for a model."""
+        with self._lock:
+            if model_id not in self._semaphores:
+                self._semaphores[model_id] = threading.BoundedSemaphore(self.max_concurrent)
+            return self._semaphores[model_id]
+
+    def _reserve_start(self, model_id: str) -> float:
+        """
+        Reserve the next start time for a model.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        if not self.requests_per_minute:
+            return 0.0
+
+        interval = 60.0 / self.requests_per_minute
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(model_id, now))
+            self._next_slot[model_id] = start + interval
+        return start - now
+
+    def acquire(self, model_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Take a request slot for a model and wait for its rate-limit start time.
+
+        Args:
+            model_id: Gemini model (or agent) identifier
+            timeout: Maximum seconds to wait for a free slot (None = no limit)
+
+        Returns:
+            True if a slot was taken (release it with release()), False on timeout
+        """
+        if not self._semaphore(model_id).acquire(timeout=timeout):
+            return False
+        wait = self._reserve_start(model_id)
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def release(self, model_id: str):
+        """Return a slot taken with acquire()."""
+        self._semaphore(model_id).release()
+
+    @contextmanager
+    def limit(self, model_id: str):
+        """
+        Context manager wrapping a single model request.
+
+        Args:
+            model_id: Gemini model (or agent) identifier
+        """
+        self.acquire(model_id)
+        try:
+            yield
+        finally:
+            self.release(model_id)
+
+
+class ThreadTaggedStdout:
+    """
+    Stdout wrapper that prefixes each line printed by a tagged worker thread.
+    Keeps the log readable when several articles print at the same time.
+    """
+
+    def __init__(self, stream):
+        """
+        Initialize wrapper.
+
+        Args:
+            stream: Underlying stream (usually sys.stdout)
+        """
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_tag(self, tag: str = None):
+        """Set (or clear with None) the line prefix for the current thread."""
+        self.flush()
+        self._local.tag = tag
+        self._local.buffer = ''
+
+    def write(self, text: str) -> int:
+        tag = getattr(self._local, 'tag', None)
+        if not tag:
+            with self._lock:
+                return self.stream.write(text)
+
+        self._local.buffer += text
+        *lines, self._local.buffer = self._local.buffer.split('\n')
+        if lines:
+            with self._lock:
+                for line in lines:
+                    self.stream.write(f"[{tag}] {line}\n" if line else "\n")
+        return len(text)
+
+    def flush(self):
+        buffer = getattr(self._local, 'buffer', '')
+        if buffer:
+            self._local.buffer = ''
+            with self._lock:
+                self.stream.write(f"[{self._local.tag}] {buffer}\n")
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# Global rate limiter shared by Agents 3 and 4
+rate_limiter = ModelRateLimiter(
+    max_concurrent=config.GEMINI_MAX_CONCURRENT,
+    requests_per_minute=config.GEMINI_REQUESTS_PER_MINUTE
+)
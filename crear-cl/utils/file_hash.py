@@ -0,0 +1,37 @@
+"""
+Content hashes for local files.
+Memoised by (path, size, mtime) so repeated lookups of the same PDF/DOCX are free.
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file's content.
+
+    Args:
+        path: Local file path
+
+    Returns:
+        Hex digest
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        if memo_key in _hashes:
+            return _hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    with _lock:
+        _hashes[memo_key] = digest.hexdigest()
+    return _hashes[memo_key]
@@ -0,0 +1,213 @@
+"""
+Gemini File API upload cache.
+Reuses uploaded files by content hash until they expire (48h) and keeps a
+persisted index so a restarted run reuses the same uploads.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Set
+
+import google.generativeai as genai
+
+from config import config
+from utils.file_hash import file_sha256
+
+
+# Gemini deletes uploads 48h after creation; stop reusing them a bit earlier
+UPLOAD_TTL_SECONDS = 48 * 3600
+EXPIRY_MARGIN_SECONDS = 3600
+
+
+class GeminiFileCache:
+    """Process-wide cache of Gemini File API uploads keyed by file content."""
+
+    def __init__(self, index_file: str = None):
+        """
+        Initialize upload cache.
+
+        Args:
+            index_file: JSON index path (defaults to data/<GEMINI_UPLOAD_INDEX>)
+        """
+        self.index_file = index_file or os.path.join(config.BASE_DATA_PATH, config.GEMINI_UPLOAD_INDEX)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._files: Dict[str, object] = {}  # content hash -> verified Gemini File object
+        self._owners: Dict[str, Set[str]] = {}  # content hash -> articles using the upload
+        self._removed: Set[str] = set()  # keys dropped since the last save
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load persisted index, dropping expired entries."""
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Gemini Cache] WARNING: Could not read {self.index_file}: {e}")
+            return {}
+        now = time.time()
+        return {k: v for k, v in index.items() if v.get('expires_at', 0) - EXPIRY_MARGIN_SECONDS > now}
+
+    def _save_index(self):
+        """
+        Persist index (caller holds self._lock).
+
+        Another process (the --reverse workflow runs two) may have saved since
+        this one loaded, so the file is re-read and merged with this process's
+        additions and removals, then replaced through a PID-unique temp file.
+        """
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        merged = self._load_index()
+        for key in self._removed:
+            merged.pop(key, None)
+        merged.update(self._index)
+        self._index = merged
+        self._removed.clear()
+
+        tmp_path = f"{self.index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def _drop_entry(self, key: str) -> Optional[Dict]:
+        """Remove an index entry so the next save drops it from the file too (caller holds self._lock)."""
+        self._removed.add(key)
+        return self._index.pop(key, None)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_or_upload(self, path: str, display_name: Optional[str] = None,
+                      owner: Optional[str] = None):
+        """
+        Get an ACTIVE Gemini file for a local file, uploading only if needed.
+
+        Args:
+            path: Local file path
+            display_name: Display name for a new upload
+            owner: Article ID using the upload (released with release_owner);
+                   None for shared files that are kept until they expire
+
+        Returns:
+            Gemini File object
+        """
+        key = file_sha256(path)
+
+        with self._key_lock(key):
+            uploaded = self._cached_file(key)
+            if uploaded is not None:
+                print(f"[Gemini Cache] Reusing upload: {os.path.basename(path)}")
+            else:
+                uploaded = self._upload(path, display_name or os.path.basename(path))
+                expiration = getattr(uploaded, 'expiration_time', None)
+                expires_at = expiration.timestamp() if expiration else time.time() + UPLOAD_TTL_SECONDS
+                with self._lock:
+                    self._removed.discard(key)
+                    self._index[key] = {
+                        'name': uploaded.name,
+                        'uri': uploaded.uri,
+                        'display_name': display_name or os.path.basename(path),
+                        'expires_at': expires_at
+                    }
+                    self._save_index()
+
+            with self._lock:
+                self._files[key] = uploaded
+                if owner is not None:
+                    self._owners.setdefault(key, set()).add(str(owner))
+            return uploaded
+
+    def _cached_file(self, key: str):
+        """Return a reusable File object for a content hash, or None."""
+        with self._lock:
+            entry = self._index.get(key)
+            uploaded = self._files.get(key)
+
+        if not entry or entry['expires_at'] - EXPIRY_MARGIN_SECONDS <= time.time():
+            return None
+        if uploaded is not None:
+            return uploaded
+
+        # Entry from a previous run: confirm it still exists before reusing it
+        try:
+            uploaded = genai.get_file(entry['name'])
+        except Exception:
+            uploaded = None
+        if uploaded is None or uploaded.state.name != "ACTIVE":
+            with self._lock:
+                self._drop_entry(key)
+                self._save_index()
+            return None
+        return uploaded
+
+    def _upload(self, path: str, display_name: str):
+        """Upload a file and wait until Gemini finishes processing it."""
+        print(f"[Gemini Cache] Uploading: {os.path.basename(path)}")
+        uploaded = genai.upload_file(path, display_name=display_name)
+
+        deadline = time.monotonic() + config.GEMINI_UPLOAD_TIMEOUT
+        while uploaded.state.name == "PROCESSING":
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"File processing for {display_name} still pending after {config.GEMINI_UPLOAD_TIMEOUT}s"
+                )
+            time.sleep(2)
+            uploaded = genai.get_file(uploaded.name)
+
+        if uploaded.state.name != "ACTIVE":
+            raise ValueError(f"File processing failed for {display_name}: {uploaded.state.name}")
+        return uploaded
+
+    def release_owner(self, owner: str):
+        """
+        Delete the uploads of a finished article from Gemini.
+        Uploads still used by another article, or without owner, are kept.
+
+        Args:
+            owner: Article ID passed to get_or_upload
+        """
+        owner = str(owner)
+        to_delete = []
+        with self._lock:
+            for key, owners in list(self._owners.items()):
+                if owner not in owners:
+                    continue
+                owners.discard(owner)
+                if not owners:
+                    del self._owners[key]
+                    entry = self._drop_entry(key)
+                    self._files.pop(key, None)
+                    if entry:
+                        to_delete.append(entry['name'])
+            if to_delete:
+                self._save_index()
+
+        for name in to_delete:
+            try:
+                genai.delete_file(name)
+            except Exception:
+                pass  # Auto-expires in 48h anyway
+        if to_delete:
+            print(f"[Gemini Cache] Released {len(to_delete)} upload(s) for {owner}")
+
+
+# Global upload cache instance (lazy initialization)
+gemini_file_cache = None
+_gemini_file_cache_lock = threading.Lock()
+
+def get_gemini_file_cache() -> GeminiFileCache:
+    """
+    Get or create the global Gemini upload cache.
+
+    Returns:
+        GeminiFileCache instance
+    """
+    global gemini_file_cache
+    with _gemini_file_cache_lock:
+        if gemini_file_cache is None:
+            gemini_file_cache = GeminiFileCache()
+    return gemini_file_cache
@@ -0,0 +1,34 @@
+"""
+GenerativeModel instances (legacy google.generativeai API) by model ID.
+A hedged request (utils.agent_scheduler) may run on another model than the
+agent's own, so agents ask this pool for the model of each request.
+"""
+import threading
+from typing import Dict
+
+import google.generativeai as genai_legacy
+
+
+class GenerativeModels:
+    """One GenerativeModel per model ID, all with the agent's generation config."""
+
+    def __init__(self, generation_config: Dict):
+        """
+        Initialize pool.
+
+        Args:
+            generation_config: Generation config shared by every model of the agent
+        """
+        self.generation_config = generation_config
+        self._models: Dict[str, genai_legacy.GenerativeModel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str) -> genai_legacy.GenerativeModel:
+        """GenerativeModel for a model ID (created on first use)."""
+        with self._lock:
+            if model_id not in self._models:
+                self._models[model_id] = genai_legacy.GenerativeModel(
+                    model_name=model_id,
+                    generation_config=self.generation_config
+                )
+            return self._models[model_id]
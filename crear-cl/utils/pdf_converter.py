@@ -0,0 +1,181 @@
+"""
+Cached DOCX -> PDF conversion for Agents 3 and 4.
+PDFs are stored under data/pdf_cache/ by DOCX content hash, so every step of
+an article (generate, review, improve) and later runs reuse one conversion.
+Linux converts with a pool of headless LibreOffice processes; Windows/macOS
+use docx2pdf (Microsoft Word).
+"""
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import config
+from utils.file_hash import file_sha256
+
+
+class LibreOfficePool:
+    """Pool of headless LibreOffice profiles so several conversions can run at once."""
+
+    def __init__(self, size: int = 2, binary: str = 'soffice'):
+        """
+        Initialize converter pool.
+
+        Args:
+            size: Number of conversions that may run concurrently
+            binary: LibreOffice executable (soffice / libreoffice)
+        """
+        self.binary = binary
+        self._profiles = queue.Queue()
+        # One user profile per slot: LibreOffice refuses to run twice on the same profile
+        for i in range(max(1, size)):
+            self._profiles.put(os.path.join(tempfile.gettempdir(), f"crear-cl-libreoffice-{i}"))
+
+    def convert(self, docx_path: str, pdf_path: str):
+        """
+        Convert one DOCX to PDF.
+
+        Args:
+            docx_path: Source DOCX path
+            pdf_path: Destination PDF path
+        """
+        profile = self._profiles.get()
+        try:
+            with tempfile.TemporaryDirectory() as out_dir:
+                cmd = [
+                    self.binary, '--headless', '--norestore', '--nologo',
+                    f"-env:UserInstallation={Path(profile).as_uri()}",
+                    '--convert-to', 'pdf', '--outdir', out_dir, docx_path
+                ]
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                produced = os.path.join(out_dir, f"{Path(docx_path).stem}.pdf")
+                if result.returncode != 0 or not os.path.exists(produced):
+                    raise RuntimeError(
+                        f"LibreOffice conversion failed ({result.returncode}): {result.stderr.strip()}"
+                    )
+                shutil.move(produced, pdf_path)
+        finally:
+            self._profiles.put(profile)
+
+
+_word_lock = threading.Lock()
+
+
+def _convert_with_word(docx_path: str, pdf_path: str):
+    """
+    Convert DOCX to PDF with docx2pdf, one conversion at a time.
+
+    On Windows docx2pdf drives Word through COM, which must be initialized
+    in every thread that uses it.
+    """
+    from docx2pdf import convert
+
+    with _word_lock:
+        if sys.platform == 'win32' and threading.current_thread() is not threading.main_thread():
+            import pythoncom
+            pythoncom.CoInitialize()
+            try:
+                convert(docx_path, pdf_path)
+            finally:
+                pythoncom.CoUninitialize()
+        else:
+            convert(docx_path, pdf_path)
+
+
+class PDFConversionCache:
+    """DOCX -> PDF conversions cached by DOCX content hash."""
+
+    def __init__(self, cache_dir: Optional[str] = None, backend: Optional[str] = None,
+                 workers: Optional[int] = None):
+        """
+        Initialize conversion cache.
+
+        Args:
+            cache_dir: Folder for cached PDFs (defaults to data/<PDF_CACHE_DIR>)
+            backend: 'libreoffice', 'docx2pdf' or 'auto' (defaults to config.PDF_CONVERTER)
+            workers: Concurrent LibreOffice conversions (defaults to config.PDF_CONVERTER_WORKERS)
+        """
+        self.cache_dir = cache_dir or os.path.join(config.BASE_DATA_PATH, config.PDF_CACHE_DIR)
+        backend = backend or config.PDF_CONVERTER
+        if backend == 'auto':
+            backend = 'libreoffice' if sys.platform.startswith('linux') else 'docx2pdf'
+        self.backend = backend
+        self.workers = max(1, workers or config.PDF_CONVERTER_WORKERS)
+        self._pool = LibreOfficePool(self.workers, config.LIBREOFFICE_PATH) if backend == 'libreoffice' else None
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_pdf(self, docx_path: str) -> str:
+        """
+        Get the PDF for a DOCX, converting only if this content was never converted.
+
+        Args:
+            docx_path: Source DOCX path
+
+        Returns:
+            Path to the cached PDF
+        """
+        if not os.path.exists(docx_path):
+            raise FileNotFoundError(f"DOCX not found: {docx_path}")
+
+        key = file_sha256(docx_path)
+        pdf_path = os.path.join(self.cache_dir, f"{key[:24]}.pdf")
+
+        with self._key_lock(key):
+            if os.path.exists(pdf_path):
+                print(f"[PDF Cache] Reusing PDF for {os.path.basename(docx_path)}")
+                return pdf_path
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            print(f"[PDF Cache] Converting {os.path.basename(docx_path)} ({self.backend})...")
+            tmp_path = f"{pdf_path}.{threading.get_ident()}.tmp.pdf"
+            try:
+                if self._pool is not None:
+                    self._pool.convert(docx_path, tmp_path)
+                else:
+                    _convert_with_word(docx_path, tmp_path)
+                os.replace(tmp_path, pdf_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            print(f"[PDF Cache] Conversion complete: {os.path.basename(pdf_path)}")
+            return pdf_path
+
+    def convert_many(self, docx_paths: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Convert several DOCX files up front (LibreOffice pool runs them in parallel).
+
+        Args:
+            docx_paths: Source DOCX paths
+
+        Returns:
+            Dict of DOCX path -> PDF path (None if conversion failed)
+        """
+        unique_paths = list(dict.fromkeys(p for p in docx_paths if p))
+        results: Dict[str, Optional[str]] = {}
+
+        def convert_one(docx_path: str):
+            try:
+                results[docx_path] = self.get_pdf(docx_path)
+            except Exception as e:
+                print(f"[PDF Cache] ERROR converting {os.path.basename(docx_path)}: {e}")
+                results[docx_path] = None
+
+        workers = self.workers if self._pool is not None else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(convert_one, unique_paths))
+        return results
+
+
+# Global conversion cache instance
+pdf_converter = PDFConversionCache()
@@ -1,11 +1,14 @@
 """
 PDF Context Loader for Agent 3.
 Uploads reference PDFs to Gemini File API for native PDF processing.
+Uploads go through utils.gemini_file_cache, so they are reused across runs.
 """
 import os
 from typing import Optional, List
 import google.generativeai as genai
-import time
+import threading
+
+from utils.gemini_file_cache import get_gemini_file_cache
 
 
 class PDFContextLoader:
@@ -24,19 +27,29 @@ class PDFContextLoader:
         self.pdfs_loaded = []  # List of PDF filenames
         self.api_key = api_key
         self._upload_attempted = False  # Track if we've tried to upload
+        self._upload_lock = threading.Lock()  # Articles may run in parallel threads
         
         # Don't upload PDFs here - will upload on first use (lazy loading)
     
     def _ensure_uploaded(self):
         """
         Ensure PDFs are uploaded (lazy loading).
-        Only uploads once on first call.
+        Only uploads once on first call; concurrent callers wait for
+        the first upload to finish instead of seeing an empty list.
         """
         if self._upload_attempted:
             return
         
-        self._upload_attempted = True
-        
+        with self._upload_lock:
+            if self._upload_attempted:
+                return
+            try:
+                self._upload_pdfs()
+            finally:
+                self._upload_attempted = True
+    
+    def _upload_pdfs(self):
+        """Upload every PDF in the context directory to the Gemini File API."""
         # Configure Gemini API if not already done
         if self.api_key:
             genai.configure(api_key=self.api_key)
@@ -45,39 +58,41 @@ class PDFContextLoader:
             print(f"[PDF Loader] Warning: Directory '{self.pdf_dir}' not found. Agent 3 will run without PDF context.")
             return
         
-        pdf_files = sorted([f for f in os.listdir(self.pdf_dir) if f.endswith('.pdf')])
+        pdf_files = [os.path.basename(p) for p in self.get_reference_paths()]
         
         if not pdf_files:
             print(f"[PDF Loader] Warning: No PDF files found in '{self.pdf_dir}'")
             return
         
-        print(f"[Agent 3] Uploading {len(pdf_files)} PDF reference documents to Gemini...")
+        print(f"[Agent 3] Loading {len(pdf_files)} PDF reference documents into Gemini...")
         
         for pdf_file in pdf_files:
             pdf_path = os.path.join(self.pdf_dir, pdf_file)
             
             try:
-                # Upload PDF to Gemini File API
-                uploaded_file = genai.upload_file(pdf_path, display_name=pdf_file)
-                
-                # Wait for file to be processed
-                while uploaded_file.state.name == "PROCESSING":
-                    print(f"[Agent 3] Processing {pdf_file}...")
-                    time.sleep(2)
-                    uploaded_file = genai.get_file(uploaded_file.name)
-                
-                if uploaded_file.state.name == "ACTIVE":
-                    self.uploaded_files.append(uploaded_file)
-                    self.pdfs_loaded.append(pdf_file)
-                    print(f"[Agent 3] OK Uploaded: {pdf_file}")
-                else:
-                    print(f"[Agent 3] ERROR: Failed to process {pdf_file} - State: {uploaded_file.state.name}")
+                # Upload PDF to Gemini File API (reused across runs until it expires)
+                uploaded_file = get_gemini_file_cache().get_or_upload(pdf_path, display_name=pdf_file)
+                self.uploaded_files.append(uploaded_file)
+                self.pdfs_loaded.append(pdf_file)
+                print(f"[Agent 3] OK Uploaded: {pdf_file}")
             
             except Exception as e:
                 print(f"[Agent 3] ERROR uploading {pdf_file}: {e}")
         
         print(f"[Agent 3] Total: {len(self.uploaded_files)} PDF reference documents ready")
     
+    def get_reference_paths(self) -> List[str]:
+        """
+        Get local paths of the reference PDFs (no upload).
+        Used to identify cached model responses.
+        
+        Returns:
+            Sorted list of PDF paths
+        """
+        if not os.path.exists(self.pdf_dir):
+            return []
+        return [os.path.join(self.pdf_dir, f) for f in sorted(os.listdir(self.pdf_dir)) if f.endswith('.pdf')]
+    
     def get_file_references(self) -> List:
         """
         Get list of uploaded file objects for use in prompts.
@@ -161,6 +176,7 @@ Revisa estos documentos para:
 
 # Global PDF context loader instance (lazy initialization)
 pdf_context_loader = None
+_pdf_context_loader_lock = threading.Lock()
 
 def get_pdf_context_loader() -> PDFContextLoader:
     """
@@ -170,11 +186,12 @@ def get_pdf_context_loader() -> PDFContextLoader:
         PDFContextLoader instance
     """
     global pdf_context_loader
-    if pdf_context_loader is None:
-        from config import config
-        pdf_context_loader = PDFContextLoader(
-            pdf_dir=config.AGENT3_CONTEXT_DIR,
-            api_key=config.GEMINI_API_KEY
-        )
+    with _pdf_context_loader_lock:
+        if pdf_context_loader is None:
+            from config import config
+            pdf_context_loader = PDFContextLoader(
+                pdf_dir=config.AGENT3_CONTEXT_DIR,
+                api_key=config.GEMINI_API_KEY
+            )
     return pdf_context_loader
 
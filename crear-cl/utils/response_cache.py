@@ -0,0 +1,137 @@
+"""
+Content-addressed cache of model responses for Agents 3 and 4.
+Responses are keyed on (model, prompt, source file contents) so parser and
+document-generation changes can be re-run without calling Gemini. Articles are
+keyed on their DOCX, not the converted PDF: conversions embed timestamps and
+producer metadata, so the PDF bytes change on every reconversion and machine.
+
+Modes (RESPONSE_CACHE_MODE / --response-cache):
+- off:    no caching
+- record: always call the model and store the response (default)
+- reuse:  serve stored responses, call the model on a miss
+- replay: serve stored responses only; a miss raises ResponseCacheMiss (offline)
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from config import config
+from utils.file_hash import file_sha256
+
+
+RESPONSE_CACHE_MODES = ('off', 'record', 'reuse', 'replay')
+
+
+class ResponseCacheMiss(Exception):
+    """Raised in replay mode when no response was recorded for a request."""
+
+
+class ResponseCache:
+    """Stores model responses as JSON files named by request hash."""
+
+    def __init__(self, cache_dir: Optional[str] = None, mode: Optional[str] = None):
+        """
+        Initialize response cache.
+
+        Args:
+            cache_dir: Folder for cached responses (defaults to data/<RESPONSE_CACHE_DIR>)
+            mode: One of RESPONSE_CACHE_MODES (defaults to config.RESPONSE_CACHE_MODE)
+        """
+        self.cache_dir = cache_dir or os.path.join(config.BASE_DATA_PATH, config.RESPONSE_CACHE_DIR)
+        self.mode = mode or config.RESPONSE_CACHE_MODE
+        if self.mode not in RESPONSE_CACHE_MODES:
+            raise ValueError(f"Invalid response cache mode '{self.mode}' (use {', '.join(RESPONSE_CACHE_MODES)})")
+
+    def make_key(self, model_id: str, prompt: str, source_paths: List[str] = (),
+                 extra: str = '') -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            model_id: Model identifier
+            prompt: Full prompt text
+            source_paths: Source files behind the attachments (order matters)
+            extra: Anything else that changes the response (agent step, tools)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        request = {
+            'model': model_id,
+            'prompt': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'files': [file_sha256(path) for path in source_paths],
+            'extra': extra
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the stored response text for a key, or None."""
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['text']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Response Cache] WARNING: Unreadable entry {os.path.basename(path)}: {e}")
+            return None
+
+    def store(self, key: str, text: str, model_id: str, source_paths: List[str] = (),
+              label: str = ''):
+        """Store a response text under a key."""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'label': label,
+            'model': model_id,
+            'files': [os.path.basename(p) for p in source_paths],
+            'created': datetime.now().isoformat(),
+            'text': text
+        }
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def generate(self, model_id: str, prompt: str, source_paths: List[str],
+                 call: Callable[[], str], extra: str = '', label: str = '') -> str:
+        """
+        Get a model response through the cache.
+
+        Args:
+            model_id: Model identifier
+            prompt: Full prompt text
+            source_paths: Source files behind the attachments (article DOCX, reference PDFs)
+            call: Performs uploads + the model call and returns the response text
+            extra: Anything else that changes the response (agent step, tools)
+            label: Name shown in logs (e.g. "Agent 3 C001")
+
+        Returns:
+            Response text
+        """
+        if self.mode == 'off':
+            return call()
+
+        key = self.make_key(model_id, prompt, source_paths, extra)
+
+        if self.mode in ('reuse', 'replay'):
+            cached = self.lookup(key)
+            if cached is not None:
+                print(f"[Response Cache] Replaying {label or key[:12]}")
+                return cached
+            if self.mode == 'replay':
+                raise ResponseCacheMiss(f"No recorded response for {label or 'request'} (key {key[:12]})")
+
+        text = call()
+        self.store(key, text, model_id, source_paths, label)
+        return text
+
+
+# Global response cache instance
+response_cache = ResponseCache()
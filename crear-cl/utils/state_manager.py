@@ -1,412 +1,431 @@
 """
 State management system to track article processing status.
-Maintains a CSV file with processing state for all articles.
+Keeps one row per article in a SQLite database (WAL mode), so each status
+transition is a single-row transaction and several orchestrator processes
+can share the state. The legacy CSV is imported once and can be exported.
 """
+import os
+import re
+import sqlite3
+import hashlib
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, List, Dict
 from storage import storage
 from config import config
 
 
+STATE_COLUMNS = [
+    'article_id',
+    'title',
+    'url',
+    'source',
+    'date',
+    'license_status',
+    'license_type',
+    'processing_status',
+    'questions_generated',
+    'questions_improved',
+    'uploaded_to_drive',
+    'created_date',
+    'processed_date',
+    'error_message'
+]
+BOOL_COLUMNS = ['questions_generated', 'questions_improved', 'uploaded_to_drive']
+
+
 class StateManager:
     """Manages processing state for articles."""
-    
-    def __init__(self, state_file: str = None):
+
+    # Seconds a connection waits for another process's write lock
+    BUSY_TIMEOUT = 30
+
+    def __init__(self, state_db: str = None, legacy_csv: str = None):
         """
         Initialize state manager.
-        
+
         Args:
-            state_file: Path to state CSV file (defaults to config setting)
-        """
-        self.state_file = state_file or config.STATE_FILE
-        self._initialize_state_file()
-    
-    def _initialize_state_file(self):
-        """Initialize state file if it doesn't exist."""
-        if not storage.exists(self.state_file):
-            # Create empty state DataFrame with required columns
-            df = pd.DataFrame(columns=[
-                'article_id',
-                'title',
-                'url',
-                'source',
-                'date',
-                'license_status',
-                'license_type',
-                'processing_status',
-                'questions_generated',
-                'questions_improved',
-                'uploaded_to_drive',
-                'created_date',
-                'processed_date',
-                'error_message'
-            ])
-            storage.write_csv(df, self.state_file)
-    
+            state_db: Path to state database (defaults to data/<STATE_DB>)
+            legacy_csv: CSV state file imported on first use (defaults to config.STATE_FILE)
+        """
+        self.state_db = state_db or os.path.join(storage.base_path, config.STATE_DB)
+        self.state_file = legacy_csv or config.STATE_FILE
+        self._initialize_state_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a short-lived connection (one per operation, safe across threads)."""
+        conn = sqlite3.connect(self.state_db, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            # BEGIN itself may have failed (database busy): keep that error
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run a read query."""
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _initialize_state_db(self):
+        """Create the state database if needed and import the legacy CSV once."""
+        os.makedirs(os.path.dirname(self.state_db) or '.', exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    article_id TEXT PRIMARY KEY,
+                    title TEXT DEFAULT '',
+                    url TEXT DEFAULT '',
+                    source TEXT DEFAULT '',
+                    date TEXT DEFAULT '',
+                    license_status TEXT DEFAULT '',
+                    license_type TEXT DEFAULT '',
+                    processing_status TEXT DEFAULT 'pending',
+                    questions_generated INTEGER DEFAULT 0,
+                    questions_improved INTEGER DEFAULT 0,
+                    uploaded_to_drive INTEGER DEFAULT 0,
+                    created_date TEXT DEFAULT '',
+                    processed_date TEXT DEFAULT '',
+                    error_message TEXT DEFAULT ''
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)')
+            empty = conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0
+        finally:
+            conn.close()
+
+        if empty and storage.exists(self.state_file):
+            df = storage.read_csv(self.state_file)
+            if not df.empty and 'article_id' in df.columns:
+                self.save_state(df)
+                print(f"[State] Imported {len(df)} articles from {self.state_file}")
+
+    def _records(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """Convert database rows to article dictionaries."""
+        records = []
+        for row in rows:
+            record = dict(row)
+            for col in BOOL_COLUMNS:
+                record[col] = bool(record[col])
+            records.append(record)
+        return records
+
     def load_state(self) -> pd.DataFrame:
         """
-        Load current state from CSV.
-        
+        Load current state.
+
         Returns:
             DataFrame with current processing state
         """
-        return storage.read_csv(self.state_file)
-    
+        rows = self._query(f"SELECT {', '.join(STATE_COLUMNS)} FROM articles ORDER BY rowid")
+        return pd.DataFrame(self._records(rows), columns=STATE_COLUMNS)
+
     def save_state(self, df: pd.DataFrame):
         """
-        Save state DataFrame to CSV.
-        
+        Replace the whole state with a DataFrame (bulk import / restore).
+
         Args:
             df: State DataFrame to save
         """
-        storage.write_csv(df, self.state_file)
-    
+        df = df.reindex(columns=STATE_COLUMNS)
+        rows = []
+        for record in df.to_dict('records'):
+            row = []
+            for col in STATE_COLUMNS:
+                value = record[col]
+                if col in BOOL_COLUMNS:
+                    value = int(str(value).strip().lower() in ('true', '1', '1.0'))
+                elif pd.isna(value):
+                    value = ''
+                else:
+                    value = str(value)
+                row.append(value)
+            rows.append(row)
+
+        placeholders = ', '.join('?' for _ in STATE_COLUMNS)
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM articles')
+            conn.executemany(
+                f"INSERT OR REPLACE INTO articles ({', '.join(STATE_COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def export_csv(self, file_path: str = None, license_status: str = None) -> Optional[str]:
+        """
+        Export state to CSV through storage (Spanish number format).
+
+        Args:
+            file_path: Output CSV (defaults to config.STATE_FILE)
+            license_status: Only export articles with this license status
+
+        Returns:
+            Full path to the CSV, or None if there were no matching articles
+        """
+        df = self.load_state()
+        if license_status is not None:
+            df = df[df['license_status'] == license_status]
+        if df.empty:
+            return None
+        return storage.write_csv(df, file_path or self.state_file)
+
     def add_articles(self, articles: List[Dict]) -> List[str]:
         """
         Add new articles to state tracking.
-        
+
         Args:
             articles: List of article dictionaries
-            
+
         Returns:
             List of article IDs added
         """
-        df = self.load_state()
         article_ids = []
-        
+        rows = []
+
         for article in articles:
             article_id = self._generate_article_id(article)
             article_ids.append(article_id)
-            
-            # Check if article already exists (only if we have the column)
-            if not df.empty and 'article_id' in df.columns and article_id in df['article_id'].values:
-                continue
-            
-            # Add new article
-            new_row = {
-                'article_id': article_id,
-                'title': article.get('title', ''),
-                'url': article.get('url', ''),
-                'source': article.get('source', ''),
-                'date': article.get('date', ''),
-                'license_status': '',
-                'license_type': '',
-                'processing_status': 'pending',
-                'questions_generated': False,
-                'questions_improved': False,
-                'uploaded_to_drive': False,
-                'created_date': datetime.now().isoformat(),
-                'processed_date': '',
-                'error_message': ''
-            }
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        
-        self.save_state(df)
+            rows.append((
+                article_id,
+                article.get('title', ''),
+                article.get('url', ''),
+                article.get('source', ''),
+                article.get('date', ''),
+                datetime.now().isoformat()
+            ))
+
+        # Articles already tracked are left untouched
+        with self._transaction() as conn:
+            conn.executemany(
+                """INSERT OR IGNORE INTO articles
+                   (article_id, title, url, source, date, created_date)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                rows
+            )
         return article_ids
-    
-    def update_license_validation(self, article_id: str, license_status: str, 
+
+    def _update(self, article_id: str, **values):
+        """Update columns of one article (no-op if the article is not tracked)."""
+        assignments = ', '.join(f"{col} = ?" for col in values)
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE articles SET {assignments} WHERE article_id = ?",
+                (*values.values(), str(article_id))
+            )
+
+    def update_license_validation(self, article_id: str, license_status: str,
                                   license_type: str, validation_reason: str = ""):
         """
         Update license validation results for an article.
-        
+
         Args:
             article_id: Article identifier
             license_status: Validation status (cc_valid, cc_invalid, no_license)
             license_type: Type of Creative Commons license
             validation_reason: Reason for validation result
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            # Use explicit str dtype to avoid FutureWarning
-            df.loc[mask, 'license_status'] = str(license_status)
-            df.loc[mask, 'license_type'] = str(license_type)
-            
-            # Update processing status based on license
-            if license_status == 'cc_valid':
-                df.loc[mask, 'processing_status'] = str('validated')
-            else:
-                df.loc[mask, 'processing_status'] = str('rejected')
-                df.loc[mask, 'error_message'] = str(validation_reason)
-            
-            self.save_state(df)
-    
+        # Update processing status based on license
+        if license_status == 'cc_valid':
+            self._update(article_id,
+                         license_status=str(license_status),
+                         license_type=str(license_type),
+                         processing_status='validated')
+        else:
+            self._update(article_id,
+                         license_status=str(license_status),
+                         license_type=str(license_type),
+                         processing_status='rejected',
+                         error_message=str(validation_reason))
+
     def mark_questions_generated(self, article_id: str):
         """
         Mark that initial questions have been generated for an article.
-        
+
         Args:
             article_id: Article identifier
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            df.loc[mask, 'questions_generated'] = True
-            df.loc[mask, 'processing_status'] = 'questions_generated'
-            self.save_state(df)
-    
+        self._update(article_id, questions_generated=1, processing_status='questions_generated')
+
     def mark_questions_improved(self, article_id: str):
         """
         Mark that questions have been improved for an article.
-        
+
         Args:
             article_id: Article identifier
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            df.loc[mask, 'questions_improved'] = True
-            df.loc[mask, 'processing_status'] = 'questions_improved'
-            self.save_state(df)
-    
+        self._update(article_id, questions_improved=1, processing_status='questions_improved')
+
     def mark_article_processed(self, article_id: str, uploaded: bool = True):
         """
         Mark an article as fully processed and uploaded.
-        
+
         Args:
             article_id: Article identifier
             uploaded: Whether files were uploaded to Drive
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            df.loc[mask, 'processing_status'] = str('completed')
-            df.loc[mask, 'uploaded_to_drive'] = bool(uploaded)
-            df.loc[mask, 'processed_date'] = str(datetime.now().isoformat())
-            self.save_state(df)
-    
+        self._update(article_id,
+                     processing_status='completed',
+                     uploaded_to_drive=int(bool(uploaded)),
+                     processed_date=datetime.now().isoformat())
+
     def mark_error(self, article_id: str, error_message: str):
         """
         Mark an article as having an error during processing.
-        
+
         Args:
             article_id: Article identifier
             error_message: Error description
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            df.loc[mask, 'processing_status'] = 'error'
-            df.loc[mask, 'error_message'] = error_message
-            self.save_state(df)
-    
+        self._update(article_id, processing_status='error', error_message=str(error_message))
+
     def get_validated_articles(self) -> List[Dict]:
         """
         Get all validated articles that need processing.
-        
+
         Returns:
             List of validated article dictionaries
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'license_status' not in df.columns:
-            return []
-        
-        validated = df[df['license_status'] == 'cc_valid']
-        return validated.to_dict('records')
-    
+        rows = self._query("SELECT * FROM articles WHERE license_status = 'cc_valid' ORDER BY rowid")
+        return self._records(rows)
+
     def get_pending_articles(self) -> List[Dict]:
         """
         Get articles pending question generation.
-        
+
         Returns:
             List of article dictionaries
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'license_status' not in df.columns or 'processing_status' not in df.columns:
-            return []
-        
-        pending = df[
-            (df['license_status'] == 'cc_valid') & 
-            (df['processing_status'].isin(['validated', 'questions_generated']))
-        ]
-        return pending.to_dict('records')
-    
+        rows = self._query(
+            """SELECT * FROM articles
+               WHERE license_status = 'cc_valid'
+                 AND processing_status IN ('validated', 'questions_generated')
+               ORDER BY rowid"""
+        )
+        return self._records(rows)
+
     def get_article_by_id(self, article_id: str) -> Optional[Dict]:
         """
         Get article information by ID.
-        
+
         Args:
             article_id: Article identifier
-            
+
         Returns:
             Article dictionary or None if not found
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return
-        
-        mask = df['article_id'] == article_id
-        
-        if mask.any():
-            return df[mask].iloc[0].to_dict()
-        return None
-    
+        rows = self._query("SELECT * FROM articles WHERE article_id = ?", (str(article_id),))
+        return self._records(rows)[0] if rows else None
+
     def get_statistics(self) -> Dict:
         """
         Get processing statistics.
-        
+
         Returns:
             Dictionary with statistics
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'license_status' not in df.columns or 'processing_status' not in df.columns:
-            return {
-                'total_articles': 0,
-                'validated': 0,
-                'rejected': 0,
-                'completed': 0,
-                'pending': 0,
-                'in_progress': 0,
-                'errors': 0
-            }
-        
-        return {
-            'total_articles': len(df),
-            'validated': len(df[df['license_status'] == 'cc_valid']),
-            'rejected': len(df[df['license_status'] != 'cc_valid']),
-            'completed': len(df[df['processing_status'] == 'completed']),
-            'pending': len(df[df['processing_status'] == 'pending']),
-            'in_progress': len(df[df['processing_status'].isin(['validated', 'questions_generated'])]),
-            'errors': len(df[df['processing_status'] == 'error'])
-        }
-    
+        row = self._query(
+            """SELECT
+                 COUNT(*) AS total_articles,
+                 COALESCE(SUM(license_status = 'cc_valid'), 0) AS validated,
+                 COALESCE(SUM(COALESCE(license_status, '') != 'cc_valid'), 0) AS rejected,
+                 COALESCE(SUM(processing_status = 'completed'), 0) AS completed,
+                 COALESCE(SUM(processing_status = 'pending'), 0) AS pending,
+                 COALESCE(SUM(processing_status IN ('validated', 'questions_generated')), 0) AS in_progress,
+                 COALESCE(SUM(processing_status = 'error'), 0) AS errors
+               FROM articles"""
+        )[0]
+        return dict(row)
+
     def get_processed_urls(self) -> List[str]:
         """
         Get list of all processed article URLs for duplicate prevention.
-        
+
         Returns:
             List of URLs that have been processed
         """
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing url column
-        if df.empty or 'url' not in df.columns:
-            return []
-        
-        # Get all URLs that are not empty
-        urls = df[df['url'].notna() & (df['url'] != '')]['url'].tolist()
-        return urls
-    
+        rows = self._query("SELECT url FROM articles WHERE url IS NOT NULL AND url != '' ORDER BY rowid")
+        return [row['url'] for row in rows]
+
     def is_duplicate(self, url: str) -> bool:
         """
         Check if a URL has already been processed.
-        
+
         Args:
             url: URL to check
-            
+
         Returns:
             True if URL exists in state, False otherwise
         """
         if not url:
             return False
-        
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing url column
-        if df.empty or 'url' not in df.columns:
-            return False
-        
-        return url in df['url'].values
-    
+
+        return bool(self._query("SELECT 1 FROM articles WHERE url = ? LIMIT 1", (url,)))
+
     def get_processed_count(self) -> int:
         """
         Get total count of processed articles.
-        
+
         Returns:
             Number of articles that have been processed
         """
-        df = self.load_state()
-        return len(df)
-    
+        return self._query("SELECT COUNT(*) FROM articles")[0][0]
+
     def _generate_article_id(self, article: Dict) -> str:
         """
         Generate unique article ID from article data.
-        
+
         Args:
             article: Article dictionary
-            
+
         Returns:
             Unique article identifier
         """
         # Use URL as base for ID, or create from title and source
         if 'url' in article and article['url']:
             # Clean URL to create ID
-            import hashlib
             return hashlib.md5(article['url'].encode()).hexdigest()[:12]
         else:
             # Fallback to title + source hash
-            import hashlib
             data = f"{article.get('title', '')}_{article.get('source', '')}"
             return hashlib.md5(data.encode()).hexdigest()[:12]
-    
+
     def get_last_id(self) -> Optional[str]:
         """Get the last article ID used (for continuing numbering)."""
-        df = self.load_state()
-        
-        # Handle empty DataFrame or missing columns
-        if df.empty or 'article_id' not in df.columns:
-            return None
-        
-        # Extract article IDs and find the highest number
-        article_ids = df['article_id'].dropna().tolist()
-        if not article_ids:
-            return None
-        
+        rows = self._query("SELECT article_id FROM articles WHERE article_id IS NOT NULL")
+
         # Find the highest numeric ID (e.g., C030 -> 30)
-        import re
         max_num = 0
         max_id = None
-        
-        for aid in article_ids:
+
+        for row in rows:
+            aid = row['article_id']
             match = re.search(r'C(\d+)', str(aid))
             if match:
                 num = int(match.group(1))
                 if num > max_num:
                     max_num = num
                     max_id = aid
-        
+
         return max_id
 
 
 # Global state manager instance
 state_manager = StateManager()
-
@@ -1,41 +1,94 @@
-import csv, boto3, sys
+"""
+cargar_alumnos.py
+Carga los emails de un CSV (columna 'email') en la Contact List de SES v2.
+
+Crea los contactos en paralelo (--workers). Si el contacto ya existe se
+actualiza para asegurar que no esté dado de baja, y ante TooManyRequests /
+Throttling se reintenta con espera exponencial.
+
+Uso:
+  python cargar_alumnos.py lista.csv --workers 8
+"""
+
+import argparse
+import csv
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+from ses_retry import with_retry
 
 REGION = "us-east-2"
 CONTACT_LIST = "alumnos"
 
-def main(csv_path):
-    ses = boto3.client("sesv2", region_name=REGION)
-    created, updated, skipped = 0, 0, 0
 
+def load_contact(ses, email: str) -> str:
+    """Crea el contacto o, si ya existía, lo reactiva. Devuelve 'created' o 'updated'."""
+    try:
+        with_retry(
+            ses.create_contact,
+            ContactListName=CONTACT_LIST,
+            EmailAddress=email,
+            UnsubscribeAll=False,
+            # AttributesData y TopicPreferences son opcionales
+        )
+        return "created"
+    except ses.exceptions.ConflictException:
+        # Ya existía; asegúrate que no esté dado de baja
+        with_retry(
+            ses.update_contact,
+            ContactListName=CONTACT_LIST,
+            EmailAddress=email,
+            UnsubscribeAll=False
+        )
+        return "updated"
+
+
+def read_emails(csv_path):
+    seen = set()
     with open(csv_path, newline="", encoding="utf-8") as f:
         for row in csv.DictReader(f):
             email = (row.get("email") or "").strip()
-            if not email:
+            if not email or email.lower() in seen:
                 continue
-            try:
-                ses.create_contact(
-                    ContactListName=CONTACT_LIST,
-                    EmailAddress=email,
-                    UnsubscribeAll=False,
-                    # AttributesData y TopicPreferences son opcionales
-                )
-                created += 1
-            except ses.exceptions.ConflictException:
-                # Ya existía; asegúrate que no esté dado de baja
-                ses.update_contact(
-                    ContactListName=CONTACT_LIST,
-                    EmailAddress=email,
-                    UnsubscribeAll=False
-                )
-                updated += 1
-            except Exception as e:
-                print(f"SKIP {email}: {e}")
-                skipped += 1
-
-    print(f"Listo. creados={created}, actualizados={updated}, omitidos={skipped}")
+            seen.add(email.lower())
+            yield email
+
+
+def main(csv_path, workers=8):
+    ses = boto3.client(
+        "sesv2", region_name=REGION,
+        # Los reintentos por Throttling los maneja with_retry
+        config=Config(retries={"max_attempts": 1, "mode": "standard"}, max_pool_connections=max(10, workers)),
+    )
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+
+    def task(email):
+        try:
+            return email, load_contact(ses, email), None
+        except Exception as e:
+            return email, "skipped", e
+
+    try:
+        emails = list(read_emails(csv_path))
+    except FileNotFoundError:
+        print(f"ERROR: no se encontró el archivo CSV: {csv_path}", file=sys.stderr)
+        sys.exit(2)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for email, result, error in pool.map(task, emails):
+            counts[result] += 1
+            if error is not None:
+                print(f"SKIP {email}: {error}")
+
+    print(f"Listo. creados={counts['created']}, actualizados={counts['updated']}, omitidos={counts['skipped']}")
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python cargar_contactos.py lista.csv")
-        sys.exit(1)
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Cargar emails de un CSV en la Contact List de SES.")
+    parser.add_argument("csv", help="Ruta al CSV con columna 'email'.")
+    parser.add_argument("--workers", type=int, default=8, help="Contactos creados en paralelo (por defecto 8).")
+    args = parser.parse_args()
+    main(args.csv, max(1, args.workers))
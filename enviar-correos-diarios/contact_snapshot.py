@@ -0,0 +1,153 @@
+"""
+contact_snapshot.py
+Copia local (SQLite) de una Contact List de SES v2.
+
+ListContacts no permite pedir solo los contactos modificados, así que la
+sincronización recorre las páginas, pero:
+- escribe solo los contactos cuyo LastUpdatedTimestamp es más nuevo que el guardado,
+- entrega los destinatarios de cada página apenas llega (el envío parte con la
+  primera página, sin esperar la lista completa),
+- al terminar una pasada completa borra los contactos que ya no están en SES
+  (los vistos en la pasada se anotan en una tabla temporal, sin tocar las filas
+  que no cambiaron).
+
+Con --no-sync en send_bulk_email.py se usa la copia local tal cual, sin llamar a SES.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Dict, Iterator, Optional
+
+PAGE_SIZE = 1000  # máximo de ListContacts
+
+
+class ContactSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                contact_list TEXT NOT NULL,
+                email TEXT NOT NULL,
+                unsubscribe_all INTEGER NOT NULL DEFAULT 0,
+                topics TEXT NOT NULL DEFAULT '{}',          -- TopicName -> OPT_IN / OPT_OUT
+                topic_defaults TEXT NOT NULL DEFAULT '{}',
+                last_updated REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (contact_list, email)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS syncs (
+                contact_list TEXT PRIMARY KEY,
+                sync_id INTEGER NOT NULL,
+                completed_at REAL,
+                contacts INTEGER
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _is_recipient(unsubscribe_all: bool, topics: Dict[str, str], topic_name: Optional[str]) -> bool:
+        # Igual que el filtro de SES FilteredStatus=OPT_IN + TopicFilter (sin usar el default del tópico)
+        if unsubscribe_all:
+            return False
+        return topic_name is None or topics.get(topic_name) == "OPT_IN"
+
+    @staticmethod
+    def _row(contact_list: str, contact: Dict) -> tuple:
+        topics = {p["TopicName"]: p["SubscriptionStatus"] for p in contact.get("TopicPreferences", [])}
+        defaults = {p["TopicName"]: p["SubscriptionStatus"] for p in contact.get("TopicDefaultPreferences", [])}
+        updated = contact.get("LastUpdatedTimestamp")
+        updated = updated.timestamp() if hasattr(updated, "timestamp") else float(updated or 0)
+        return (contact_list, contact["EmailAddress"], int(bool(contact.get("UnsubscribeAll"))),
+                json.dumps(topics, sort_keys=True), json.dumps(defaults, sort_keys=True), updated)
+
+    def last_sync(self, contact_list: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT sync_id, completed_at, contacts FROM syncs WHERE contact_list = ?", (contact_list,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"sync_id": row[0], "completed_at": row[1], "contacts": row[2]}
+
+    def sync(self, ses_client, contact_list: str, topic_name: Optional[str] = None) -> Iterator[str]:
+        """
+        Sincroniza la copia local con SES y entrega los destinatarios página a página.
+        Los destinatarios son los contactos sin UnsubscribeAll y, si se indica
+        topic_name, con ese tópico en OPT_IN.
+        """
+        previous = self.last_sync(contact_list)
+        sync_id = (previous["sync_id"] if previous else 0) + 1
+        seen = changed = 0
+        next_token = None
+        start = time.time()
+        # Emails vistos en esta pasada (tabla temporal de esta conexión)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_contacts (email TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM seen_contacts")
+
+        while True:
+            params = {"ContactListName": contact_list, "PageSize": PAGE_SIZE}
+            if next_token:
+                params["NextToken"] = next_token
+            response = ses_client.list_contacts(**params)
+            contacts = response.get("Contacts", [])
+
+            rows = [self._row(contact_list, c) for c in contacts if c.get("EmailAddress")]
+            before = self.conn.total_changes
+            # Solo se reescriben los contactos modificados desde la última sincronización
+            self.conn.executemany("""
+                INSERT INTO contacts (contact_list, email, unsubscribe_all, topics, topic_defaults, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (contact_list, email) DO UPDATE SET
+                    unsubscribe_all = excluded.unsubscribe_all,
+                    topics = excluded.topics,
+                    topic_defaults = excluded.topic_defaults,
+                    last_updated = excluded.last_updated
+                WHERE excluded.last_updated > contacts.last_updated
+            """, rows)
+            changed += self.conn.total_changes - before
+            self.conn.executemany("INSERT OR IGNORE INTO seen_contacts (email) VALUES (?)", [(r[1],) for r in rows])
+            self.conn.commit()
+            seen += len(rows)
+
+            for row in rows:
+                if self._is_recipient(bool(row[2]), json.loads(row[3]), topic_name):
+                    yield row[1]
+
+            next_token = response.get("NextToken")
+            if not next_token:
+                break
+
+        # Pasada completa: lo que no apareció fue eliminado de la Contact List
+        removed = self.conn.execute(
+            "DELETE FROM contacts WHERE contact_list = ? AND email NOT IN (SELECT email FROM seen_contacts)",
+            (contact_list,)
+        ).rowcount
+        self.conn.execute("DELETE FROM seen_contacts")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO syncs (contact_list, sync_id, completed_at, contacts) VALUES (?, ?, ?, ?)",
+            (contact_list, sync_id, time.time(), seen)
+        )
+        self.conn.commit()
+        print(f"[Contactos] '{contact_list}' sincronizada: {seen} contactos, {changed} nuevos/modificados, "
+              f"{removed} eliminados ({time.time() - start:.1f}s)")
+
+    def recipients(self, contact_list: str, topic_name: Optional[str] = None) -> Iterator[str]:
+        """Entrega los destinatarios guardados localmente, sin llamar a SES."""
+        cursor = self.conn.execute(
+            "SELECT email, unsubscribe_all, topics FROM contacts WHERE contact_list = ? ORDER BY email",
+            (contact_list,)
+        )
+        for email, unsubscribe_all, topics in cursor:
+            if self._is_recipient(bool(unsubscribe_all), json.loads(topics), topic_name):
+                yield email
+
+    def count(self, contact_list: str) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM contacts WHERE contact_list = ?", (contact_list,)
+        ).fetchone()[0]
@@ -23,20 +23,43 @@ Uso (Windows / PowerShell):
     --region us-east-2
 
 El CSV debe tener al menos la columna: email
+
+Ritmo de envío:
+- Lee la cuota de la cuenta (GetAccount) y envía con varios hilos limitados por
+  un token bucket ajustado a MaxSendRate (o --rate si es menor).
+- Ante errores de Throttling reduce la tasa a la mitad, reintenta con espera
+  exponencial y vuelve a subirla de a poco con los envíos exitosos.
+- Guarda cada dirección enviada en un checkpoint (--checkpoint, por defecto
+  uno por plantilla y día). Si el proceso se corta, al volver a ejecutar el
+  mismo comando se omiten las direcciones ya enviadas.
+- Con --contact-list los destinatarios se leen página a página y el envío parte
+  con la primera página. La lista se guarda en una copia local SQLite
+  (--snapshot, por defecto contactos_<lista>.db) que solo reescribe los
+  contactos modificados; --no-sync envía usando esa copia sin consultar SES.
+- --endpoint-url permite apuntar a un SES local (moto server, LocalStack).
 """
 
 import argparse
 import csv
 import json
+import math
 import os
+import queue
 import sys
+import threading
 import time
-from typing import Iterable, List
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from contact_snapshot import ContactSnapshot
+from ses_retry import MAX_RETRIES, THROTTLING_CODES, backoff_delay, error_code
 
-MAX_PER_BULK = 50  # límite de SES para send_bulk_email
+# Errores que detienen todo el envío (cuota diaria agotada, cuenta pausada)
+FATAL_CODES = {"LimitExceededException", "SendingPausedException", "AccountSuspendedException"}
 
 
 def read_emails_from_csv(path: str) -> List[str]:
@@ -60,47 +83,243 @@ def read_emails_from_csv(path: str) -> List[str]:
     return emails
 
 
-def read_emails_from_contact_list(ses_client, contact_list_name: str, topic_name: str = None) -> List[str]:
+def iter_emails_from_contact_list(ses_client, contact_list_name: str, topic_name: str = None,
+                                  snapshot_path: str = None, sync: bool = True) -> Iterator[str]:
     """
-    Recupera todos los emails de una Contact List de SES.
-    Filtra por TopicName si se especifica.
+    Entrega los emails de una Contact List de SES a medida que llegan las páginas,
+    usando una copia local en SQLite (contact_snapshot.py).
+    Filtra por TopicName (OPT_IN) si se especifica.
+    Con sync=False no llama a SES y usa la última copia local.
     """
-    emails = []
-    next_token = None
-    
-    print(f"Recuperando contactos de la lista '{contact_list_name}'...")
-    
-    while True:
-        params = {"ContactListName": contact_list_name}
-        if next_token:
-            params["NextToken"] = next_token
-        if topic_name:
-            params["Filter"] = {"FilteredStatus": "OPT_IN", "TopicFilter": {"TopicName": topic_name}}
-        
+    snapshot_path = snapshot_path or f"contactos_{contact_list_name}.db"
+    snapshot = ContactSnapshot(snapshot_path)
+    try:
+        if not sync:
+            info = snapshot.last_sync(contact_list_name)
+            if not info:
+                print(f"ERROR: no hay copia local de '{contact_list_name}' en {snapshot_path}; "
+                      f"ejecuta sin --no-sync.", file=sys.stderr)
+                sys.exit(2)
+            print(f"Usando copia local {snapshot_path}: {snapshot.count(contact_list_name)} contactos "
+                  f"(sincronizada {datetime.fromtimestamp(info['completed_at']):%Y-%m-%d %H:%M}).")
+            yield from snapshot.recipients(contact_list_name, topic_name)
+            return
+
+        print(f"Recuperando contactos de la lista '{contact_list_name}' (copia local: {snapshot_path})...")
         try:
-            response = ses_client.list_contacts(**params)
-            contacts = response.get("Contacts", [])
-            
-            for contact in contacts:
-                email = contact.get("EmailAddress")
-                if email:
-                    emails.append(email)
-            
-            next_token = response.get("NextToken")
-            if not next_token:
-                break
-                
+            yield from snapshot.sync(ses_client, contact_list_name, topic_name)
         except ClientError as e:
             print(f"ERROR al recuperar contactos: {e}", file=sys.stderr)
             sys.exit(2)
-    
-    print(f"Se recuperaron {len(emails)} contactos de la lista.")
-    return emails
+    finally:
+        snapshot.close()
+
+
+class TokenBucket:
+    """
+    Limita la tasa de envíos compartida entre hilos.
+    La tasa baja a la mitad ante Throttling y sube de a poco con cada éxito
+    hasta volver al máximo (AIMD).
+    """
+
+    def __init__(self, rate: float, min_rate: float = 1.0):
+        self.max_rate = max(rate, min_rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.rate = self.max_rate
+        self.capacity = 1.0  # sin ráfagas: SES mide la tasa en ventanas cortas
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.last_cut = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        with self.lock:
+            now = time.monotonic()
+            # Varios hilos reciben el mismo Throttling a la vez: se cuenta como uno
+            if now - self.last_cut < 1.0:
+                return
+            self.last_cut = now
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+
+    def succeeded(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.01)
+
+
+class Checkpoint:
+    """Archivo con una dirección enviada por línea, para reanudar envíos cortados."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.sent: Set[str] = set()
+        self.lock = threading.Lock()
+        self.file = None
+        if not path:
+            return
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.sent = {line.strip().lower() for line in f if line.strip()}
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __contains__(self, email: str) -> bool:
+        return email.lower() in self.sent
+
+    def add(self, email: str):
+        with self.lock:
+            self.sent.add(email.lower())
+            if self.file:
+                self.file.write(email.lower() + "\n")
+                self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+def get_send_quota(ses_client) -> Dict[str, float]:
+    """
+    Lee la cuota de envío de la cuenta (GetAccount).
+    Devuelve MaxSendRate, Max24HourSend (-1 = sin límite) y SentLast24Hours.
+    """
+    account = ses_client.get_account()
+    if not account.get("SendingEnabled", True):
+        print("ERROR: el envío está deshabilitado en esta cuenta de SES.", file=sys.stderr)
+        sys.exit(2)
+    quota = account.get("SendQuota", {})
+    return {
+        "MaxSendRate": float(quota.get("MaxSendRate", 1.0)),
+        "Max24HourSend": float(quota.get("Max24HourSend", -1)),
+        "SentLast24Hours": float(quota.get("SentLast24Hours", 0)),
+    }
+
+
+def error_message(e: Exception) -> str:
+    if isinstance(e, ClientError):
+        return e.response.get("Error", {}).get("Message", str(e))
+    return str(e)
+
+
+def send_all(ses_client, recipients: Iterable[str], build_params: Callable[[str], Dict],
+             rate: float, workers: int, checkpoint: Checkpoint, limit: Optional[int] = None,
+             report_every: float = 10.0) -> Dict:
+    """
+    Envía un correo por destinatario con un pool de hilos limitado por un token bucket.
+
+    recipients puede ser un generador: los hilos empiezan a enviar mientras se
+    siguen leyendo destinatarios. Las direcciones que ya están en el checkpoint
+    se omiten; limit corta el envío al llegar a esa cantidad (cuota diaria).
+    Devuelve un dict con ok, fail, skipped, failures, stopped, seconds y rate.
+    """
+    bucket = TokenBucket(rate)
+    pending: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=workers * 4)
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"ok": 0, "fail": 0, "skipped": 0, "failures": [], "stopped": None}
+
+    def send_one(email_addr: str):
+        for attempt in range(MAX_RETRIES + 1):
+            if stop.is_set():
+                return
+            bucket.acquire()
+            try:
+                ses_client.send_email(**build_params(email_addr))
+            except (ClientError, BotoCoreError) as e:
+                code = error_code(e)
+                if code in FATAL_CODES:
+                    with lock:
+                        stats["stopped"] = f"{code} - {error_message(e)}"
+                    stop.set()
+                    return
+                transient = code in THROTTLING_CODES or isinstance(e, BotoCoreError)
+                if transient and attempt < MAX_RETRIES:
+                    if code in THROTTLING_CODES:
+                        bucket.throttled()
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                with lock:
+                    stats["fail"] += 1
+                    stats["failures"].append((email_addr, code, error_message(e)))
+                return
+            bucket.succeeded()
+            checkpoint.add(email_addr)
+            with lock:
+                stats["ok"] += 1
+            return
+
+    def worker():
+        while True:
+            email_addr = pending.get()
+            if email_addr is None:
+                return
+            try:
+                send_one(email_addr)
+            except Exception as e:
+                # Un error inesperado no puede matar el hilo: sin hilos vivos, pending.put se bloquea
+                with lock:
+                    stats["fail"] += 1
+                    stats["failures"].append((email_addr, error_code(e), error_message(e)))
 
+    def reporter():
+        while not done.wait(report_every):
+            with lock:
+                ok, fail = stats["ok"], stats["fail"]
+            elapsed = time.monotonic() - start
+            print(f"[Progreso] OK: {ok}  FAIL: {fail}  ({ok / elapsed:.1f} msg/s, "
+                  f"límite actual {bucket.rate:.1f} msg/s)")
 
-def chunked(iterable: List[str], size: int) -> Iterable[List[str]]:
-    for i in range(0, len(iterable), size):
-        yield iterable[i:i + size]
+    start = time.monotonic()
+    done = threading.Event()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    threading.Thread(target=reporter, daemon=True).start()
+
+    queued = 0
+    try:
+        for email_addr in recipients:
+            if stop.is_set():
+                break
+            if email_addr in checkpoint:
+                stats["skipped"] += 1
+                continue
+            if limit is not None and queued >= limit:
+                stats["stopped"] = f"cuota diaria: solo quedaban {limit} envíos disponibles"
+                break
+            pending.put(email_addr)
+            queued += 1
+    except KeyboardInterrupt:
+        stats["stopped"] = "interrumpido por el usuario"
+        stop.set()
+    finally:
+        # Los hilos siguen vaciando la cola aun detenidos, así que put no se bloquea para siempre
+        for _ in threads:
+            pending.put(None)
+        for t in threads:
+            t.join()
+        done.set()
+
+    stats["seconds"] = time.monotonic() - start
+    stats["rate"] = stats["ok"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
 
 
 def main():
@@ -112,20 +331,45 @@ def main():
     parser.add_argument("--contact-list", default=None, help="Nombre de la Contact List (para obtener emails y {{amazonSESUnsubscribeUrl}}).")
     parser.add_argument("--topic", default=None, help="TopicName (opcional) dentro de la Contact List.")
     parser.add_argument("--config-set", default=None, help="ConfigurationSetName para métricas/eventos (opcional).")
-    parser.add_argument("--batch", type=int, default=MAX_PER_BULK, help=f"Tamaño de lote (<= {MAX_PER_BULK}).")
-    parser.add_argument("--sleep", type=float, default=0.2, help="Pausa en segundos entre lotes (p.ej., 0.2).")
+    parser.add_argument("--rate", type=float, default=None, help="Máximo de correos por segundo (por defecto MaxSendRate de la cuenta).")
+    parser.add_argument("--workers", type=int, default=0, help="Hilos de envío (0 = automático según la tasa).")
+    parser.add_argument("--checkpoint", default=None, help="Archivo de direcciones ya enviadas (por defecto envio_<plantilla>_<fecha>.checkpoint).")
+    parser.add_argument("--no-checkpoint", action="store_true", help="No leer ni escribir checkpoint.")
+    parser.add_argument("--snapshot", default=None, help="Copia local SQLite de la Contact List (por defecto contactos_<lista>.db).")
+    parser.add_argument("--no-sync", action="store_true", help="Usar la copia local de la Contact List sin consultar SES.")
+    parser.add_argument("--endpoint-url", default=None, help="Endpoint alternativo de SES (p.ej. moto server o LocalStack para pruebas).")
+    # Obsoletos: el ritmo ahora lo fijan --rate / MaxSendRate
+    parser.add_argument("--batch", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--sleep", type=float, default=None, help=argparse.SUPPRESS)
     args = parser.parse_args()
 
-    if args.batch < 1 or args.batch > MAX_PER_BULK:
-        print(f"ERROR: --batch debe estar entre 1 y {MAX_PER_BULK}", file=sys.stderr)
-        sys.exit(2)
+    if args.batch is not None or args.sleep is not None:
+        print("AVISO: --batch y --sleep ya no se usan; el ritmo lo fijan --rate y la cuota de SES.")
 
     # Validar que se proporcione al menos una fuente de emails
     if not args.csv and not args.contact_list:
         print("ERROR: Debes especificar --csv o --contact-list para obtener los destinatarios.", file=sys.stderr)
         sys.exit(2)
 
-    ses = boto3.client("sesv2", region_name=args.region)
+    ses = boto3.client(
+        "sesv2", region_name=args.region, endpoint_url=args.endpoint_url,
+        # Los reintentos por Throttling los maneja send_all (con tasa adaptativa)
+        config=Config(retries={"max_attempts": 1, "mode": "standard"}, max_pool_connections=64),
+    )
+
+    # Cuota de la cuenta
+    try:
+        quota = get_send_quota(ses)
+    except ClientError as e:
+        print(f"AVISO: no se pudo leer la cuota de SES ({error_code(e)}); se usa --rate o 1 msg/s.")
+        quota = {"MaxSendRate": args.rate or 1.0, "Max24HourSend": -1, "SentLast24Hours": 0}
+    rate = min(args.rate, quota["MaxSendRate"]) if args.rate else quota["MaxSendRate"]
+    workers = args.workers or min(64, max(4, math.ceil(rate)))
+    limit = None
+    if quota["Max24HourSend"] >= 0:
+        limit = max(0, int(quota["Max24HourSend"] - quota["SentLast24Hours"]))
+    print(f"Cuota SES: MaxSendRate={quota['MaxSendRate']:g}/s, "
+          f"enviados últimas 24h={quota['SentLast24Hours']:.0f}/{quota['Max24HourSend']:.0f}")
 
     # Obtener emails desde CSV o Contact List
     if args.csv:
@@ -134,71 +378,70 @@ def main():
             print("No hay destinatarios válidos en el CSV.", file=sys.stderr)
             sys.exit(0)
     else:
-        emails = read_emails_from_contact_list(ses, args.contact_list, args.topic)
-        if not emails:
-            print("No hay destinatarios en la Contact List.", file=sys.stderr)
-            sys.exit(0)
-
-    total_ok = 0
-    total_fail = 0
+        # Se envía mientras se leen las páginas de la lista
+        emails = iter_emails_from_contact_list(ses, args.contact_list, args.topic,
+                                               snapshot_path=args.snapshot, sync=not args.no_sync)
 
     # Tu plantilla sólo usa {{amazonSESUnsubscribeUrl}}, así que TemplateData puede ser "{}"
     default_template_data = json.dumps({})
 
-    start = time.time()
+    # NOTA: ListManagementOptions solo funciona con send_email individual, NO con send_bulk_email
+    # Por eso usamos send_email (un destinatario por llamada)
+    def build_params(email_addr: str) -> Dict:
+        params = {
+            "FromEmailAddress": args.sender,
+            "Destination": {"ToAddresses": [email_addr]},
+            "Content": {
+                "Template": {
+                    "TemplateName": args.template,
+                    "TemplateData": default_template_data
+                }
+            }
+        }
+        if args.contact_list:
+            params["ListManagementOptions"] = {"ContactListName": args.contact_list}
+            if args.topic:
+                params["ListManagementOptions"]["TopicName"] = args.topic
+        if args.config_set:
+            params["ConfigurationSetName"] = args.config_set
+        return params
+
+    checkpoint_path = None
+    if not args.no_checkpoint:
+        checkpoint_path = args.checkpoint or f"envio_{args.template}_{date.today().isoformat()}.checkpoint"
+    checkpoint = Checkpoint(checkpoint_path)
+
     source = "Contact List" if not args.csv else "CSV"
-    print(f"Iniciando envío: {len(emails)} destinatarios (fuente: {source}), región={args.region}, plantilla={args.template}")
+    total = f"{len(emails)} destinatarios" if args.csv else "destinatarios a medida que se leen"
+    print(f"Iniciando envío: {total} (fuente: {source}), región={args.region}, plantilla={args.template}")
+    print(f"Tasa: {rate:g} msg/s con {workers} hilos")
     if args.contact_list:
         print(f"Usando ContactList='{args.contact_list}' para List-Unsubscribe / one-click")
+    if checkpoint_path:
+        print(f"Checkpoint: {checkpoint_path} ({len(checkpoint.sent)} direcciones ya enviadas)")
 
-    # NOTA: ListManagementOptions solo funciona con send_email individual, NO con send_bulk_email
-    # Por eso usamos send_email en lugar de send_bulk_email cuando se especifica --contact-list
-    for batch_num, batch_emails in enumerate(chunked(emails, args.batch), start=1):
-        batch_ok = 0
-        batch_fail = []
-        
-        for email_addr in batch_emails:
-            params = {
-                "FromEmailAddress": args.sender,
-                "Destination": {"ToAddresses": [email_addr]},
-                "Content": {
-                    "Template": {
-                        "TemplateName": args.template,
-                        "TemplateData": default_template_data
-                    }
-                }
-            }
-            
-            if args.contact_list:
-                params["ListManagementOptions"] = {"ContactListName": args.contact_list}
-                if args.topic:
-                    params["ListManagementOptions"]["TopicName"] = args.topic
-            
-            if args.config_set:
-                params["ConfigurationSetName"] = args.config_set
-            
-            try:
-                ses.send_email(**params)
-                batch_ok += 1
-                total_ok += 1
-            except ClientError as e:
-                batch_fail.append((email_addr, e))
-                total_fail += 1
-        
-        print(f"[Lote {batch_num}] OK: {batch_ok}/{len(batch_emails)}  (Total OK: {total_ok}/{len(emails)})")
-        
-        if batch_fail:
-            for addr, e in batch_fail[:5]:  # muestra hasta 5 fallos por lote
-                code = e.response.get('Error', {}).get('Code', 'Unknown')
-                msg = e.response.get('Error', {}).get('Message', str(e))
-                print(f"  - FAIL {addr}: {code} - {msg}")
-            if len(batch_fail) > 5:
-                print(f"  ... y {len(batch_fail) - 5} fallos más en este lote.")
-
-        time.sleep(max(0.0, args.sleep))
-
-    secs = time.time() - start
-    print(f"Terminado. OK={total_ok}, FAIL={total_fail}, Total={len(emails)} en {secs:.1f}s")
+    try:
+        stats = send_all(ses, emails, build_params, rate, workers, checkpoint, limit=limit)
+    finally:
+        checkpoint.close()
+
+    processed = stats["ok"] + stats["fail"] + stats["skipped"]
+    if not processed and not stats["stopped"]:
+        print("No hay destinatarios en la Contact List.", file=sys.stderr)
+        sys.exit(0)
+
+    for addr, code, msg in stats["failures"][:20]:  # muestra hasta 20 fallos
+        print(f"  - FAIL {addr}: {code} - {msg}")
+    if len(stats["failures"]) > 20:
+        print(f"  ... y {len(stats['failures']) - 20} fallos más.")
+    if stats["stopped"]:
+        print(f"DETENIDO: {stats['stopped']}. Vuelve a ejecutar el mismo comando para continuar.", file=sys.stderr)
+
+    print(f"Terminado. OK={stats['ok']}, FAIL={stats['fail']}, YA ENVIADOS={stats['skipped']}, "
+          f"Total={processed} en {stats['seconds']:.1f}s ({stats['rate']:.1f} msg/s, "
+          f"límite SES {quota['MaxSendRate']:g} msg/s)")
+    if stats["stopped"]:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
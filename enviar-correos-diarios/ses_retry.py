@@ -0,0 +1,39 @@
+"""
+ses_retry.py
+Reintentos ante exceso de tasa de SES, compartidos por send_bulk_email.py y
+cargar_alumnos.py: códigos de Throttling, espera exponencial con jitter y un
+envoltorio para llamadas sueltas.
+"""
+
+import random
+import time
+
+from botocore.exceptions import ClientError
+
+# Errores de SES que indican exceso de tasa: se reintentan más lento
+THROTTLING_CODES = {"Throttling", "ThrottlingException", "TooManyRequestsException"}
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5   # segundos, se duplica en cada reintento
+BACKOFF_MAX = 30.0
+
+
+def error_code(e: Exception) -> str:
+    if isinstance(e, ClientError):
+        return e.response.get("Error", {}).get("Code", "Unknown")
+    return type(e).__name__
+
+
+def backoff_delay(attempt: int) -> float:
+    """Espera antes del reintento número attempt (desde 0), con jitter."""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def with_retry(call, **params):
+    """Ejecuta una llamada a SES reintentando los errores de exceso de tasa."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return call(**params)
+        except ClientError as e:
+            if error_code(e) not in THROTTLING_CODES or attempt == MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
@@ -0,0 +1,111 @@
+"""
+Pruebas de ContactSnapshot.sync con un cliente SES falso: solo se escriben
+los contactos nuevos o modificados y se borran los que ya no están en SES.
+"""
+import pytest
+
+from contact_snapshot import ContactSnapshot
+
+
+class FakeSES:
+    """ListContacts paginado sobre un dict email -> (LastUpdatedTimestamp, UnsubscribeAll, tópicos)."""
+
+    def __init__(self, contacts, page_size=2):
+        self.contacts = dict(contacts)
+        self.page_size = page_size
+        self.calls = 0
+
+    def list_contacts(self, ContactListName, PageSize, NextToken=None):
+        self.calls += 1
+        emails = sorted(self.contacts)
+        start = int(NextToken or 0)
+        page = emails[start:start + self.page_size]
+        response = {"Contacts": [
+            {"EmailAddress": email, "LastUpdatedTimestamp": self.contacts[email][0],
+             "UnsubscribeAll": self.contacts[email][1],
+             "TopicPreferences": [{"TopicName": t, "SubscriptionStatus": s}
+                                  for t, s in self.contacts[email][2].items()]}
+            for email in page
+        ]}
+        if start + self.page_size < len(emails):
+            response["NextToken"] = str(start + self.page_size)
+        return response
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    snap = ContactSnapshot(str(tmp_path / "contactos.db"))
+    # Registra cada fila reescrita de contacts
+    snap.conn.execute("CREATE TEMP TABLE writes (email TEXT)")
+    snap.conn.execute("""
+        CREATE TEMP TRIGGER log_updates AFTER UPDATE ON main.contacts
+        BEGIN INSERT INTO writes VALUES (new.email); END
+    """)
+    yield snap
+    snap.close()
+
+
+def writes(snap):
+    rows = [r[0] for r in snap.conn.execute("SELECT email FROM writes")]
+    snap.conn.execute("DELETE FROM writes")
+    return rows
+
+
+CONTACTS = {
+    "a@x.cl": (100, False, {"clases": "OPT_IN"}),
+    "b@x.cl": (100, False, {"clases": "OPT_OUT"}),
+    "c@x.cl": (100, True, {"clases": "OPT_IN"}),
+    "d@x.cl": (100, False, {}),
+    "e@x.cl": (100, False, {"clases": "OPT_IN"}),
+}
+
+
+def test_first_sync_stores_everything_and_filters_recipients(snapshot):
+    ses = FakeSES(CONTACTS)
+
+    assert list(snapshot.sync(ses, "alumnos")) == ["a@x.cl", "b@x.cl", "d@x.cl", "e@x.cl"]
+    assert snapshot.count("alumnos") == 5
+    assert ses.calls == 3
+    assert list(snapshot.recipients("alumnos", "clases")) == ["a@x.cl", "e@x.cl"]
+    assert snapshot.last_sync("alumnos")["contacts"] == 5
+
+
+def test_unchanged_contacts_are_not_rewritten(snapshot):
+    ses = FakeSES(CONTACTS)
+    list(snapshot.sync(ses, "alumnos"))
+    writes(snapshot)
+
+    list(snapshot.sync(ses, "alumnos"))
+    assert writes(snapshot) == []
+
+    ses.contacts["b@x.cl"] = (200, False, {"clases": "OPT_IN"})
+    list(snapshot.sync(ses, "alumnos"))
+    assert writes(snapshot) == ["b@x.cl"]
+    assert list(snapshot.recipients("alumnos", "clases")) == ["a@x.cl", "b@x.cl", "e@x.cl"]
+    assert snapshot.last_sync("alumnos")["sync_id"] == 3
+
+
+def test_contacts_removed_from_ses_are_deleted(snapshot):
+    ses = FakeSES(CONTACTS)
+    list(snapshot.sync(ses, "alumnos"))
+    list(snapshot.sync(FakeSES({"z@x.cl": (1, False, {})}), "otra_lista"))
+
+    del ses.contacts["a@x.cl"], ses.contacts["e@x.cl"]
+    list(snapshot.sync(ses, "alumnos"))
+
+    assert list(snapshot.recipients("alumnos")) == ["b@x.cl", "d@x.cl"]
+    # Otras listas no se tocan
+    assert snapshot.count("otra_lista") == 1
+
+
+def test_interrupted_sync_deletes_nothing(snapshot):
+    ses = FakeSES(CONTACTS)
+    list(snapshot.sync(ses, "alumnos"))
+
+    recipients = snapshot.sync(FakeSES({"a@x.cl": CONTACTS["a@x.cl"]}, page_size=1), "alumnos")
+    next(recipients)
+    recipients.close()
+    # La pasada siguiente parte con la tabla temporal vacía
+    list(snapshot.sync(ses, "alumnos"))
+
+    assert snapshot.count("alumnos") == 5
@@ -0,0 +1,120 @@
+"""
+Pruebas de send_all con un cliente SES falso: backoff ante Throttling, errores
+fatales, reanudación por checkpoint, límite de cuota y errores inesperados.
+"""
+import threading
+
+import pytest
+
+pytest.importorskip("boto3")
+from botocore.exceptions import ClientError  # noqa: E402
+
+import send_bulk_email as sbe  # noqa: E402
+import ses_retry  # noqa: E402
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "SendEmail")
+
+
+class FakeSES:
+    """Cliente SES falso: errors[email] es la lista de códigos a lanzar antes de aceptar el envío."""
+
+    def __init__(self, errors=None):
+        self.errors = {email: list(codes) for email, codes in (errors or {}).items()}
+        self.sent = []
+        self.attempts = []
+        self.lock = threading.Lock()
+
+    def send_email(self, **params):
+        email = params["Destination"]["ToAddresses"][0]
+        with self.lock:
+            self.attempts.append(email)
+            codes = self.errors.get(email)
+            if codes:
+                raise client_error(codes.pop(0))
+            self.sent.append(email)
+
+
+def build_params(email):
+    return {"Destination": {"ToAddresses": [email]}}
+
+
+def run(ses, recipients, checkpoint=None, workers=1, limit=None, params=build_params):
+    """send_all con un tiempo máximo: si los hilos mueren, el envío se colgaría."""
+    result = {}
+    checkpoint = checkpoint or sbe.Checkpoint(None)
+    thread = threading.Thread(target=lambda: result.update(
+        sbe.send_all(ses, recipients, params, rate=1000, workers=workers,
+                     checkpoint=checkpoint, limit=limit, report_every=60)), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "send_all no terminó"
+    return result
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ses_retry, "BACKOFF_BASE", 0)
+
+
+def emails(count):
+    return [f"alumno{i}@example.com" for i in range(count)]
+
+
+def test_throttling_is_retried_with_backoff(monkeypatch):
+    throttled = []
+    monkeypatch.setattr(sbe.TokenBucket, "throttled", lambda self: throttled.append(self.rate))
+    ses = FakeSES({"alumno0@example.com": ["Throttling", "TooManyRequestsException"]})
+
+    stats = run(ses, emails(3))
+
+    assert stats["ok"] == 3 and stats["fail"] == 0
+    assert ses.attempts.count("alumno0@example.com") == 3
+    assert len(throttled) == 2
+
+
+def test_fatal_code_stops_the_run():
+    ses = FakeSES({"alumno2@example.com": ["LimitExceededException"]})
+
+    stats = run(ses, emails(20))
+
+    assert stats["stopped"].startswith("LimitExceededException")
+    assert ses.sent == emails(2)
+    assert stats["ok"] == 2
+
+
+def test_checkpoint_resume_skips_sent_addresses(tmp_path):
+    path = tmp_path / "envio.checkpoint"
+    path.write_text("ALUMNO0@example.com\nalumno1@example.com\n", encoding="utf-8")
+    checkpoint = sbe.Checkpoint(str(path))
+    ses = FakeSES()
+
+    stats = run(ses, emails(4), checkpoint=checkpoint)
+    checkpoint.close()
+
+    assert stats["skipped"] == 2 and stats["ok"] == 2
+    assert ses.sent == emails(4)[2:]
+    assert set(path.read_text(encoding="utf-8").lower().split()) == set(emails(4))
+
+
+def test_limit_stops_at_the_daily_quota():
+    ses = FakeSES()
+
+    stats = run(ses, emails(5), limit=2)
+
+    assert ses.sent == emails(2)
+    assert "cuota diaria" in stats["stopped"]
+
+
+def test_unexpected_error_counts_as_failure_and_keeps_sending():
+    def failing_params(email):
+        if email == "alumno1@example.com":
+            raise KeyError("TemplateData")
+        return build_params(email)
+
+    ses = FakeSES()
+    stats = run(ses, emails(20), workers=2, params=failing_params)
+
+    assert stats["ok"] == 19 and stats["fail"] == 1
+    assert stats["failures"][0][:2] == ("alumno1@example.com", "KeyError")
@@ -0,0 +1,70 @@
+"""
+On-disk cache of parsed CL inputs, keyed by file fingerprint.
+
+The fingerprint is the SHA-256 of the file content, so a set copied from
+input/ to output/processed/ hits the entries created while validating it.
+Cached values:
+  - "excel": result of validating a CL Excel (DataFrame + issues)
+  - "docx": source docx split into page blocks (serialised XML)
+
+Entries are pickles under output/cache/<kind>/; a missing or unreadable
+entry is simply a cache miss.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import CACHE_DIR
+
+# Bump when the cached structures or the parsing rules change
+CACHE_VERSION = 1
+
+# (resolved path, size, mtime_ns) -> sha256, so unchanged files are hashed once per process
+_fingerprints: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_fingerprint(path: Path) -> str:
+    """SHA-256 of the file content (memoised per process on path, size and mtime)."""
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    fingerprint = _fingerprints.get(key)
+    if fingerprint is None:
+        fingerprint = hashlib.sha256(path.read_bytes()).hexdigest()
+        _fingerprints[key] = fingerprint
+    return fingerprint
+
+
+def _entry_path(kind: str, key: str) -> Path:
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{key}".encode("utf-8")).hexdigest()
+    return CACHE_DIR / kind / digest[:2] / f"{digest}.pkl"
+
+
+def load_cached(kind: str, key: str) -> Optional[object]:
+    """Cached value for (kind, key), or None on a miss."""
+    entry = _entry_path(kind, key)
+    if not entry.exists():
+        return None
+    try:
+        with open(entry, "rb") as handle:
+            return pickle.load(handle)
+    except Exception:
+        return None
+
+
+def store_cached(kind: str, key: str, value: object) -> None:
+    """Store a value; written to a temp file and renamed so readers never see half an entry."""
+    entry = _entry_path(kind, key)
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as handle:
+            pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry)
+    except Exception as exc:
+        print(f"[WARNING] No se pudo guardar cache {kind}: {exc}")
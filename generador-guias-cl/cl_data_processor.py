@@ -5,6 +5,7 @@ CL data processing utilities: file pairing, Excel normalization, and filtering.
 from __future__ import annotations
 
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Tuple
@@ -12,11 +13,13 @@ from typing import Dict, List, Tuple
 import pandas as pd
 from unidecode import unidecode
 
+from cl_cache import file_fingerprint, load_cached, store_cached
 from config import (
     CL_COLUMNS,
     CL_COLUMN_ALIASES,
     CL_FILTER_ORDER_INDEPENDENT,
     CL_FILTER_ORDER_TOP_DOWN,
+    CL_PROCESS_WORKERS,
     CL_REQUIRED_COLUMNS,
     CL_UNIFORM_COLUMNS,
     INPUT_DIR,
@@ -94,7 +97,27 @@ def list_cl_input_sets(input_dir: Path = INPUT_DIR) -> List[CLTextSet]:
 
 
 def read_and_validate_cl_excel(excel_path: Path) -> Tuple[pd.DataFrame, List[str]]:
-    """Read CL excel and validate required columns and basic rules."""
+    """Read CL excel and validate required columns and basic rules.
+
+    Results are cached by file fingerprint, so an unchanged Excel is only
+    read and validated once.
+    """
+    try:
+        cache_key = f"{file_fingerprint(excel_path)}:{excel_path.name}"
+    except OSError as exc:
+        return pd.DataFrame(), [f"No se pudo leer {excel_path.name}: {exc}"]
+
+    cached = load_cached("excel", cache_key)
+    if cached is not None:
+        return cached
+
+    df, issues = _read_and_validate_cl_excel_uncached(excel_path)
+    if not df.empty or issues:
+        store_cached("excel", cache_key, (df, issues))
+    return df, issues
+
+
+def _read_and_validate_cl_excel_uncached(excel_path: Path) -> Tuple[pd.DataFrame, List[str]]:
     issues: List[str] = []
 
     try:
@@ -262,7 +285,39 @@ def process_cl_set(text_set: CLTextSet) -> Tuple[bool, List[str]]:
     return True, issues
 
 
-def process_from_list(list_path: Path | None = None) -> List[Dict[str, object]]:
+def _process_cl_set_isolated(text_set: CLTextSet) -> Tuple[bool, List[str]]:
+    """process_cl_set, turning an unexpected error into a failed result."""
+    try:
+        return process_cl_set(text_set)
+    except Exception as exc:
+        return False, [f"{text_set.codigo_texto}: error inesperado: {exc}"]
+
+
+def process_cl_sets(text_sets: List[CLTextSet], workers: int | None = None) -> List[Tuple[bool, List[str]]]:
+    """Process several sets, across a process pool when more than one worker is used.
+
+    Each set succeeds or fails on its own. Returns (success, issues) per set,
+    in the order of text_sets.
+    """
+    workers = CL_PROCESS_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(text_sets)))
+    if workers == 1:
+        return [_process_cl_set_isolated(text_set) for text_set in text_sets]
+
+    print(f"Procesando {len(text_sets)} sets con {workers} procesos...")
+    results: List[Tuple[bool, List[str]]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_process_cl_set_isolated, text_set) for text_set in text_sets]
+        for text_set, future in zip(text_sets, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                # The worker process died: only its set fails
+                results.append((False, [f"{text_set.codigo_texto}: fallo el proceso de trabajo: {exc}"]))
+    return results
+
+
+def process_from_list(list_path: Path | None = None, workers: int | None = None) -> List[Dict[str, object]]:
     """Process sets listed in procesar.txt (one Codigo Texto prefix per line)."""
     if list_path is None:
         list_path = INPUT_DIR / "procesar.txt"
@@ -278,6 +333,7 @@ def process_from_list(list_path: Path | None = None) -> List[Dict[str, object]]:
 
     available = {s.codigo_texto: s for s in list_cl_input_sets()}
     results: List[Dict[str, object]] = []
+    to_process: Dict[str, Dict[str, object]] = {}
 
     for code in lines:
         if code not in available:
@@ -285,19 +341,26 @@ def process_from_list(list_path: Path | None = None) -> List[Dict[str, object]]:
             results.append({"code": code, "success": False, "issues": ["Par no encontrado en input/"]})
             continue
 
-        success, issues = process_cl_set(available[code])
-        results.append({"code": code, "success": success, "issues": issues})
+        if code in to_process:
+            # Processing the same set twice at once would race on the copies
+            results.append({"code": code, "success": False, "issues": [f"{code}: repetido en procesar.txt"]})
+            continue
+
+        result = {"code": code, "success": False, "issues": []}
+        to_process[code] = result
+        results.append(result)
+
+    codes = list(to_process)
+    for code, (success, issues) in zip(codes, process_cl_sets([available[code] for code in codes], workers)):
+        to_process[code].update(success=success, issues=issues)
 
     return results
 
 
-def process_all_sets() -> List[Dict[str, object]]:
+def process_all_sets(workers: int | None = None) -> List[Dict[str, object]]:
     """Process all available CL sets in input/."""
     sets = list_cl_input_sets()
-    results: List[Dict[str, object]] = []
-
-    for text_set in sets:
-        success, issues = process_cl_set(text_set)
-        results.append({"code": text_set.codigo_texto, "success": success, "issues": issues})
-
-    return results
+    return [
+        {"code": text_set.codigo_texto, "success": success, "issues": issues}
+        for text_set, (success, issues) in zip(sets, process_cl_sets(sets, workers))
+    ]
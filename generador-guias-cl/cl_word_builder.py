@@ -3,6 +3,9 @@ CL word assembly utilities.
 
 This module parses a source docx into text section + question blocks using page breaks,
 then assembles a final guide by keeping only selected questions per text.
+
+Page blocks are cached by file fingerprint (on disk and per process), so a
+source docx is only opened and split the first time it is seen.
 """
 
 from __future__ import annotations
@@ -15,11 +18,17 @@ from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 from docx import Document
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import qn
+from lxml import etree
 
+from cl_cache import file_fingerprint, load_cached, store_cached
 from config import BASE_DIR, CL_COLUMNS, CL_FILENAME_PREFIX
 
+# Parsed page blocks kept in memory (fingerprint -> pages), oldest dropped first
+_PAGES_MEMO_SIZE = 64
+_pages_memo: Dict[str, List[List[object]]] = {}
+
 
 @dataclass
 class ParsedTextDocument:
@@ -58,10 +67,32 @@ def _split_body_by_page_breaks(doc: Document) -> List[List[object]]:
     return pages
 
 
+def _load_source_pages(docx_path: Path) -> List[List[object]]:
+    """Page blocks of a source docx, from the cache when its content was seen before.
+
+    The returned elements are shared: callers must copy them before inserting.
+    """
+    fingerprint = file_fingerprint(docx_path)
+    pages = _pages_memo.get(fingerprint)
+    if pages is not None:
+        return pages
+
+    cached = load_cached("docx", fingerprint)
+    if cached is not None:
+        pages = [[parse_xml(xml) for xml in page] for page in cached]
+    else:
+        pages = _split_body_by_page_breaks(Document(str(docx_path)))
+        store_cached("docx", fingerprint, [[etree.tostring(block) for block in page] for page in pages])
+
+    if len(_pages_memo) >= _PAGES_MEMO_SIZE:
+        _pages_memo.pop(next(iter(_pages_memo)))
+    _pages_memo[fingerprint] = pages
+    return pages
+
+
 def parse_cl_source_docx(docx_path: Path, expected_questions: int) -> ParsedTextDocument:
     """Parse CL source docx and split into text pages + question pages."""
-    doc = Document(str(docx_path))
-    pages = _split_body_by_page_breaks(doc)
+    pages = _load_source_pages(docx_path)
 
     if len(pages) < expected_questions:
         raise ValueError(
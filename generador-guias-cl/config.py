@@ -2,6 +2,7 @@
 Configuration settings for the CL-only guide generator.
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent
@@ -12,6 +13,12 @@ OUTPUT_DIR = BASE_DIR / "output"
 PROCESSED_DIR = OUTPUT_DIR / "processed"
 CL_MASTER_PATH = OUTPUT_DIR / "cl_master.xlsx"
 
+# Parsed inputs (validated Excel, docx split into page blocks), keyed by file content
+CACHE_DIR = OUTPUT_DIR / "cache"
+
+# Worker processes used to process several text sets at once
+CL_PROCESS_WORKERS = int(os.getenv("CL_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 # App config
 STREAMLIT_CONFIG = {
     "page_title": "Generador CL",
@@ -103,6 +110,7 @@ def ensure_directories() -> None:
         INPUT_DIR,
         OUTPUT_DIR,
         PROCESSED_DIR,
+        CACHE_DIR,
     ]:
         directory.mkdir(parents=True, exist_ok=True)
 
@@ -29,6 +29,7 @@ from config import (
     CL_COLUMNS,
     CL_DEFAULT_TARGET_QUESTIONS,
     CL_FILTER_ORDER_TOP_DOWN,
+    CL_MASTER_PATH,
     NOMBRES_GUIAS_PATH,
     STREAMLIT_CONFIG,
     ensure_directories,
@@ -162,6 +163,22 @@ def _build_catalog_from_master(master_df: pd.DataFrame) -> tuple[pd.DataFrame, D
     return catalog, by_code
 
 
+def _master_file_key() -> tuple | None:
+    """(size, mtime) of the master file; changes whenever the master is rewritten."""
+    if not CL_MASTER_PATH.exists():
+        return None
+    stat = CL_MASTER_PATH.stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_master_and_catalog(master_key: tuple | None) -> tuple[pd.DataFrame, pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Master + text catalog, rebuilt only when the master file changes (shared, read-only)."""
+    master_df = load_cl_master()
+    catalog_df, by_codigo_df = _build_catalog_from_master(master_df)
+    return master_df, catalog_df, by_codigo_df
+
+
 def _build_cascading_top_filters(catalog_df: pd.DataFrame) -> Dict[str, str]:
     filters: Dict[str, str] = {}
     working_df = catalog_df.copy()
@@ -780,12 +797,11 @@ def main() -> None:
     st.title(PAGE_TITLE)
     st.markdown("---")
 
-    master_df = load_cl_master()
+    master_df, catalog_df, by_codigo_df = _load_master_and_catalog(_master_file_key())
     if master_df.empty:
         st.error("No hay datos disponibles. Ejecuta `python main.py process-cl` para consolidar antes de usar la app.")
         return
 
-    catalog_df, by_codigo_df = _build_catalog_from_master(master_df)
     if catalog_df.empty:
         st.error("No se pudo construir el catalogo desde master CL.")
         return
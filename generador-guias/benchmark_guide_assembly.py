@@ -0,0 +1,315 @@
+"""
+Benchmark for guide assembly (guide_assembler.py).
+
+Builds guides of 10, 40 and 80 questions and compares:
+  - one-shot: assemble_guide() over all questions (single ZIP write)
+  - legacy:   the previous streamlit_app create_word_guide() merge, copied
+              below unchanged except for Streamlit error reporting: each
+              question is extracted to a temp dir together with the growing
+              guide, merged with ElementTree and the whole guide re-zipped
+
+Questions are synthetic python-docx documents (text, a table and a distinct
+PNG each, all named image1.png so media renaming is exercised), or real
+question files with --questions-dir (cycled if there are fewer than needed).
+
+Usage:
+    python benchmark_guide_assembly.py
+    python benchmark_guide_assembly.py --sizes 10,40,80 --repeat 5
+    python benchmark_guide_assembly.py --questions-dir preguntas_divididas/M30M
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, List
+
+from docx import Document
+from docx.shared import Cm
+from PIL import Image
+
+from guide_assembler import assemble_guide
+
+
+def make_question_docx(index: int) -> bytes:
+    """A one-page question with statement, image, table and alternatives."""
+    document = Document()
+    document.add_paragraph(f"Enunciado de la pregunta sintética {index}: ¿cuál es el valor de x?")
+    image = BytesIO()
+    Image.new("RGB", (160, 90), ((index * 37) % 256, (index * 71) % 256, (index * 113) % 256)).save(image, "PNG")
+    image.seek(0)
+    document.add_picture(image, width=Cm(6))
+    table = document.add_table(rows=2, cols=3)
+    for row in table.rows:
+        for col, cell in enumerate(row.cells):
+            cell.text = str(index + col)
+    for letter in "ABCDE":
+        document.add_paragraph(f"{letter}) alternativa {letter.lower()} de la pregunta {index}")
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def load_questions(count: int, questions_dir: Path = None) -> List[bytes]:
+    if questions_dir is None:
+        return [make_question_docx(index) for index in range(count)]
+    files = sorted(questions_dir.glob("*.docx"))
+    if not files:
+        raise SystemExit(f"No .docx files in {questions_dir}")
+    return [files[index % len(files)].read_bytes() for index in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# Baseline: previous streamlit_app merge (create_word_guide and helpers)
+# ---------------------------------------------------------------------------
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+
+def legacy_create_word_guide(questions: List[bytes]) -> bytes:
+    """Previous create_word_guide(): copy the first question, then merge the rest one by one."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for index, question in enumerate(questions):
+            path = os.path.join(temp_dir, f"question_{index}.docx")
+            with open(path, 'wb') as f:
+                f.write(question)
+            paths.append(path)
+
+        merged_doc_path = os.path.join(temp_dir, "merged_document.docx")
+        shutil.copy2(paths[0], merged_doc_path)
+        total_questions = len(paths)
+        legacy_add_question_header_to_document(merged_doc_path, 1, total_questions)
+        for i, doc_path in enumerate(paths[1:], start=2):
+            legacy_merge_word_documents_zip(merged_doc_path, doc_path, i, total_questions)
+        with open(merged_doc_path, 'rb') as f:
+            return f.read()
+
+
+def legacy_merge_word_documents_zip(target_doc_path: str, source_doc_path: str,
+                                    question_number: int = None, total_questions: int = None):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target_extract_dir = os.path.join(temp_dir, "target")
+        with zipfile.ZipFile(target_doc_path, 'r') as zip_ref:
+            zip_ref.extractall(target_extract_dir)
+        source_extract_dir = os.path.join(temp_dir, "source")
+        with zipfile.ZipFile(source_doc_path, 'r') as zip_ref:
+            zip_ref.extractall(source_extract_dir)
+
+        image_mapping = legacy_copy_images_with_mapping(source_extract_dir, target_extract_dir)
+        legacy_merge_document_xml_with_relationships(target_extract_dir, source_extract_dir, image_mapping,
+                                                     question_number, total_questions)
+
+        with zipfile.ZipFile(target_doc_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+            for root, dirs, files in os.walk(target_extract_dir):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    zip_ref.write(file_path, os.path.relpath(file_path, target_extract_dir))
+
+
+def legacy_copy_images_with_mapping(source_extract_dir: str, target_extract_dir: str) -> dict:
+    source_media_dir = os.path.join(source_extract_dir, "word", "media")
+    target_media_dir = os.path.join(target_extract_dir, "word", "media")
+    image_mapping = {}
+    if os.path.exists(source_media_dir):
+        os.makedirs(target_media_dir, exist_ok=True)
+        existing_images = set(os.listdir(target_media_dir))
+        for filename in os.listdir(source_media_dir):
+            if filename in existing_images:
+                name, ext = os.path.splitext(filename)
+                counter = 1
+                while f"{name}_{counter}{ext}" in existing_images:
+                    counter += 1
+                new_filename = f"{name}_{counter}{ext}"
+            else:
+                new_filename = filename
+            shutil.copy2(os.path.join(source_media_dir, filename), os.path.join(target_media_dir, new_filename))
+            image_mapping[filename] = new_filename
+            existing_images.add(new_filename)
+    return image_mapping
+
+
+def _legacy_find_body(root):
+    for elem in root.iter():
+        if elem.tag.endswith('body'):
+            return elem
+    return None
+
+
+def legacy_merge_document_xml_with_relationships(target_extract_dir: str, source_extract_dir: str,
+                                                 image_mapping: dict, question_number: int = None,
+                                                 total_questions: int = None):
+    target_xml_path = os.path.join(target_extract_dir, "word", "document.xml")
+    target_tree = ET.parse(target_xml_path)
+    source_tree = ET.parse(os.path.join(source_extract_dir, "word", "document.xml"))
+    target_body = _legacy_find_body(target_tree.getroot())
+    source_body = _legacy_find_body(source_tree.getroot())
+    if target_body is None or source_body is None:
+        raise ValueError("Could not find body elements in documents")
+
+    relationship_mapping = legacy_create_relationship_mapping(target_extract_dir, source_extract_dir, image_mapping)
+
+    page_break = ET.Element(f'{{{W_NS}}}p')
+    br = ET.SubElement(page_break, f'{{{W_NS}}}r')
+    page_br = ET.SubElement(br, f'{{{W_NS}}}br')
+    page_br.set(f'{{{W_NS}}}type', 'page')
+    target_body.append(page_break)
+
+    for i, element in enumerate(source_body):
+        if not element.tag.endswith('sectPr'):
+            updated_element = legacy_update_relationship_ids(element, relationship_mapping)
+            if question_number is not None and total_questions is not None and i == 0 and element.tag.endswith('p'):
+                legacy_add_question_number_to_first_text(updated_element, question_number)
+            target_body.append(updated_element)
+
+    target_tree.write(target_xml_path, encoding='utf-8', xml_declaration=True)
+
+
+def legacy_add_question_number_to_first_text(paragraph, question_number: int):
+    new_run = ET.Element(f'{{{W_NS}}}r')
+    text_elem = ET.SubElement(new_run, f'{{{W_NS}}}t')
+    text_elem.text = f"{question_number}. "
+    text_elem.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+    insert_index = 0
+    for i, child in enumerate(paragraph):
+        if child.tag.endswith('pPr'):
+            insert_index = i + 1
+            break
+    paragraph.insert(insert_index, new_run)
+
+
+def legacy_add_question_header_to_document(doc_path: str, question_number: int, total_questions: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with zipfile.ZipFile(doc_path, 'r') as zip_ref:
+            zip_ref.extractall(temp_dir)
+        doc_xml_path = os.path.join(temp_dir, "word", "document.xml")
+        tree = ET.parse(doc_xml_path)
+        body = _legacy_find_body(tree.getroot())
+        if body is None:
+            raise ValueError("Could not find body element in document")
+        for elem in body:
+            if elem.tag.endswith('p'):
+                legacy_add_question_number_to_first_text(elem, question_number)
+                break
+        tree.write(doc_xml_path, encoding='utf-8', xml_declaration=True)
+        with zipfile.ZipFile(doc_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+            for root, dirs, files in os.walk(temp_dir):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    zip_ref.write(file_path, os.path.relpath(file_path, temp_dir))
+
+
+def legacy_get_max_relationship_id(target_extract_dir: str) -> int:
+    rels_xml_path = os.path.join(target_extract_dir, "word", "_rels", "document.xml.rels")
+    if not os.path.exists(rels_xml_path):
+        return 0
+    max_id = 0
+    for relationship in ET.parse(rels_xml_path).getroot().iter():
+        if relationship.tag.endswith('Relationship'):
+            rel_id = relationship.get('Id')
+            if rel_id and rel_id.startswith('rId'):
+                try:
+                    max_id = max(max_id, int(rel_id[3:]))
+                except ValueError:
+                    pass
+    return max_id
+
+
+def legacy_create_relationship_mapping(target_extract_dir: str, source_extract_dir: str, image_mapping: dict) -> dict:
+    max_rel_id = legacy_get_max_relationship_id(target_extract_dir)
+    source_rels_path = os.path.join(source_extract_dir, "word", "_rels", "document.xml.rels")
+    if not os.path.exists(source_rels_path):
+        return {}
+    relationship_mapping = {}
+    for relationship in ET.parse(source_rels_path).getroot().iter():
+        if relationship.tag.endswith('Relationship'):
+            target = relationship.get('Target')
+            if target and target.startswith('media/') and os.path.basename(target) in image_mapping:
+                max_rel_id += 1
+                relationship_mapping[relationship.get('Id')] = f"rId{max_rel_id}"
+    legacy_update_relationships_file_with_mapping(target_extract_dir, source_extract_dir, image_mapping,
+                                                  relationship_mapping)
+    return relationship_mapping
+
+
+def legacy_update_relationship_ids(element, relationship_mapping: dict):
+    updated_element = ET.fromstring(ET.tostring(element))
+    for elem in updated_element.iter():
+        if elem.tag.endswith('blip'):
+            embed_id = elem.get(f'{{{R_NS}}}embed')
+            if embed_id and embed_id in relationship_mapping:
+                elem.set(f'{{{R_NS}}}embed', relationship_mapping[embed_id])
+        elif elem.tag.endswith('imagedata'):
+            src = elem.get(f'{{{R_NS}}}id')
+            if src and src in relationship_mapping:
+                elem.set(f'{{{R_NS}}}id', relationship_mapping[src])
+    return updated_element
+
+
+def legacy_update_relationships_file_with_mapping(target_extract_dir: str, source_extract_dir: str,
+                                                  image_mapping: dict, relationship_mapping: dict):
+    target_rels_path = os.path.join(target_extract_dir, "word", "_rels", "document.xml.rels")
+    target_rels_tree = ET.parse(target_rels_path)
+    target_rels_root = target_rels_tree.getroot()
+    source_rels_path = os.path.join(source_extract_dir, "word", "_rels", "document.xml.rels")
+    if not os.path.exists(source_rels_path):
+        return
+    for relationship in ET.parse(source_rels_path).getroot().iter():
+        if relationship.tag.endswith('Relationship'):
+            target = relationship.get('Target')
+            if target and target.startswith('media/'):
+                old_filename = os.path.basename(target)
+                old_rel_id = relationship.get('Id')
+                if old_filename in image_mapping and old_rel_id in relationship_mapping:
+                    new_rel = ET.Element('{http://schemas.openxmlformats.org/package/2006/relationships}Relationship')
+                    new_rel.set('Id', relationship_mapping[old_rel_id])
+                    new_rel.set('Type', relationship.get('Type', ''))
+                    new_rel.set('Target', f"media/{image_mapping[old_filename]}")
+                    target_rels_root.append(new_rel)
+    target_rels_tree.write(target_rels_path, encoding='utf-8', xml_declaration=True)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def time_call(fn: Callable[[], bytes], repeat: int):
+    durations = []
+    result = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return min(durations), statistics.median(durations), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark guide assembly")
+    parser.add_argument("--sizes", default="10,40,80", help="Comma-separated question counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case")
+    parser.add_argument("--questions-dir", type=Path, help="Use real question .docx files from this folder")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    questions = load_questions(max(sizes), args.questions_dir)
+
+    print(f"{'questions':>9}  {'mode':<8}  {'min (s)':>8}  {'median (s)':>10}  {'ms/question':>11}  {'size (KB)':>9}")
+    for size in sizes:
+        subset = questions[:size]
+        for mode, fn in (
+            ("one-shot", lambda: assemble_guide(subset)),
+            ("legacy", lambda: legacy_create_word_guide(subset)),
+        ):
+            best, median, output_size = time_call(fn, args.repeat)
+            print(f"{size:>9}  {mode:<8}  {best:>8.3f}  {median:>10.3f}  {best * 1000 / size:>11.2f}  {output_size / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,22 @@ PREGUNTAS_DIVIDIDAS_DIR = OUTPUT_DIR / "preguntas_divididas"
 EXCELS_ACTUALIZADOS_DIR = OUTPUT_DIR / "excels_actualizados"
 EXCELES_MAESTROS_DIR = OUTPUT_DIR / "excels_maestros"
 
+# Live question catalog (SQLite). excel_maestro_*.xlsx files are exported from it on demand
+CATALOG_DB_PATH = Path(os.getenv("CATALOG_DB_PATH", str(EXCELES_MAESTROS_DIR / "catalogo_preguntas.sqlite")))
+
+# Question previews: PNGs keyed by .docx content hash (kept across restarts),
+# rendered by a small pool of warm LibreOffice processes
+PREVIEW_CACHE_DIR = Path(os.getenv("PREVIEW_CACHE_DIR", str(OUTPUT_DIR / "previews")))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+PREVIEW_TIMEOUT = int(os.getenv("PREVIEW_TIMEOUT", "45"))  # seconds per document
+LIBREOFFICE_PATH = os.getenv("LIBREOFFICE_PATH")  # soffice executable, if not in PATH
+# Warm soffice listeners through LibreOffice's Python bridge (uno). Experimental:
+# not yet verified against a real LibreOffice install, so off unless set to 1
+PREVIEW_USE_UNO = os.getenv("PREVIEW_USE_UNO", "0") == "1"
+
+# Batch processing of Word/Excel sets: worker processes (1 = one set after another)
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "1"))
+
 # Subject mappings for folder organization
 SUBJECT_FOLDERS = {
     "M1": "M1", 
@@ -0,0 +1,281 @@
+"""
+In-memory access to .docx packages (ZIP of XML parts and media).
+
+The source ZIP is read once and every entry is kept in its compressed form;
+only the main document and its relationships are parsed (once, with lxml).
+Packages are written back in a single pass: unchanged parts are copied as
+their original compressed bytes, new XML parts are deflated, and new media
+that is already compressed (PNG, JPEG...) is stored as-is.
+"""
+
+import copy
+import posixpath
+import struct
+import time
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Union
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+O_NS = "urn:schemas-microsoft-com:office:office"
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# Parts that can be dropped when no kept relationship points at them
+PRUNABLE_PREFIXES = ("word/media/", "word/embeddings/")
+
+# Formats that are already compressed: deflating them again only costs CPU
+PRECOMPRESSED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".webp",
+    ".zip", ".docx", ".xlsx", ".pptx", ".mp3", ".mp4",
+}
+
+
+# Comments/PIs are dropped so every element has a string tag
+_XML_PARSER = etree.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True)
+
+
+def _resolve_target(target: str, base_dir: str = "word") -> str:
+    """Resolve a relationship target (relative to word/) to a part name."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def referenced_relationship_ids(element) -> Set[str]:
+    """All relationship IDs referenced from `element` (r:id, r:embed, o:relid...)."""
+    rel_ids = set()
+    for node in element.iter():
+        for key, value in node.attrib.items():
+            if key.startswith("{" + R_NS + "}") or key == "{" + O_NS + "}relid":
+                rel_ids.add(value)
+    return rel_ids
+
+
+class RawEntry(NamedTuple):
+    """A ZIP entry exactly as stored in the source package (still compressed)."""
+    compress_type: int
+    crc: int
+    file_size: int
+    data: bytes
+
+    def decompress(self) -> bytes:
+        if self.compress_type == zipfile.ZIP_STORED:
+            return self.data
+        return zlib.decompress(self.data, -15)
+
+
+# Part content for write_package: new bytes, or an entry copied verbatim
+PartData = Union[bytes, RawEntry]
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+def read_raw_entries(data: bytes) -> Dict[str, RawEntry]:
+    """Read every ZIP entry's compressed bytes without decompressing them."""
+    entries = {}
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or info.flag_bits & 0x1:
+                # Unusual/encrypted entry: fall back to a decompressed copy
+                content = zf.read(info)
+                entries[info.filename] = RawEntry(zipfile.ZIP_STORED, zlib.crc32(content), len(content), content)
+                continue
+            offset = info.header_offset
+            name_len, extra_len = struct.unpack_from("<HH", data, offset + 26)
+            start = offset + _LOCAL_HEADER.size + name_len + extra_len
+            entries[info.filename] = RawEntry(
+                info.compress_type, info.CRC, info.file_size, data[start:start + info.compress_size]
+            )
+    return entries
+
+
+class DocxPackage:
+    """A .docx held in memory: raw ZIP entries plus the parsed main document."""
+
+    def __init__(self, entries: Dict[str, RawEntry]):
+        self.entries = entries
+        self._document_root = None
+        self._relationships_root = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DocxPackage":
+        return cls(read_raw_entries(data))
+
+    def read(self, name: str) -> bytes:
+        """Decompressed content of part `name`."""
+        return self.entries[name].decompress()
+
+    # ── Main document ─────────────────────────────────────────────────────────
+
+    @property
+    def document_root(self):
+        if self._document_root is None:
+            self._document_root = etree.fromstring(self.read(DOCUMENT_PART), _XML_PARSER)
+        return self._document_root
+
+    @property
+    def body(self):
+        return self.document_root.find(f"{{{W_NS}}}body")
+
+    @property
+    def relationships_root(self):
+        if self._relationships_root is None:
+            rels = self.read(DOCUMENT_RELS_PART) if DOCUMENT_RELS_PART in self.entries else None
+            self._relationships_root = (
+                etree.fromstring(rels, _XML_PARSER) if rels else etree.Element(f"{{{PKG_REL_NS}}}Relationships")
+            )
+        return self._relationships_root
+
+    def relationships(self) -> List[etree._Element]:
+        return list(self.relationships_root)
+
+    def document_skeleton(self):
+        """Copy of the document root with an empty body (body attributes kept)."""
+        root = self.document_root
+        body = self.body
+        children = list(body)
+        for child in children:
+            body.remove(child)
+        try:
+            return copy.deepcopy(root)
+        finally:
+            for child in children:
+                body.append(child)
+
+    # ── Part bookkeeping ──────────────────────────────────────────────────────
+
+    def parts_referenced_outside_document(self) -> Set[str]:
+        """Targets referenced by any .rels file other than the main document's."""
+        referenced = set()
+        for name in self.entries:
+            if not name.endswith(".rels") or name == DOCUMENT_RELS_PART:
+                continue
+            # word/charts/_rels/chart1.xml.rels -> targets relative to word/charts
+            source_dir = posixpath.dirname(posixpath.dirname(name))
+            for rel in etree.fromstring(self.read(name), _XML_PARSER):
+                if rel.get("TargetMode") != "External":
+                    referenced.add(_resolve_target(rel.get("Target", ""), source_dir))
+        return referenced
+
+    def subset_parts(self, document_xml: bytes, rel_ids: Set[str],
+                     always_keep: Optional[Set[str]] = None) -> Dict[str, PartData]:
+        """
+        Parts for a package whose main document is `document_xml` and which
+        only uses relationships `rel_ids`: unreferenced media/embeddings (and
+        their relationships) are dropped, everything else is kept as-is.
+        """
+        always_keep = always_keep if always_keep is not None else self.parts_referenced_outside_document()
+        rels_root = etree.Element(self.relationships_root.tag, nsmap=self.relationships_root.nsmap)
+        dropped = set()
+        for rel in self.relationships():
+            target = _resolve_target(rel.get("Target", ""))
+            prunable = rel.get("TargetMode") != "External" and target.startswith(PRUNABLE_PREFIXES)
+            if prunable and rel.get("Id") not in rel_ids:
+                dropped.add(target)
+                continue
+            rels_root.append(copy.deepcopy(rel))
+        kept_targets = {
+            _resolve_target(rel.get("Target", ""))
+            for rel in rels_root
+            if rel.get("TargetMode") != "External"
+        }
+        dropped -= kept_targets | always_keep
+
+        parts: Dict[str, PartData] = {}
+        for name, entry in self.entries.items():
+            if name in dropped:
+                continue
+            if name == DOCUMENT_PART:
+                parts[name] = document_xml
+            elif name == DOCUMENT_RELS_PART:
+                parts[name] = serialize_xml(rels_root)
+            elif name == CONTENT_TYPES_PART and dropped:
+                parts[name] = remove_content_type_overrides(entry.decompress(), dropped)
+            else:
+                parts[name] = entry
+        return parts
+
+
+def serialize_xml(root) -> bytes:
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def remove_content_type_overrides(content_types_xml: bytes, part_names: Iterable[str]) -> bytes:
+    """Drop <Override> entries for removed parts from [Content_Types].xml."""
+    removed = {"/" + name for name in part_names}
+    root = etree.fromstring(content_types_xml, _XML_PARSER)
+    stale = [node for node in root.findall(f"{{{CT_NS}}}Override") if node.get("PartName") in removed]
+    if not stale:
+        return content_types_xml
+    for node in stale:
+        root.remove(node)
+    return serialize_xml(root)
+
+
+def _encode_part(name: str, data: bytes) -> RawEntry:
+    extension = posixpath.splitext(name)[1].lower()
+    if extension in PRECOMPRESSED_EXTENSIONS:
+        return RawEntry(zipfile.ZIP_STORED, zlib.crc32(data), len(data), data)
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return RawEntry(zipfile.ZIP_DEFLATED, zlib.crc32(data), len(data), compressed)
+
+
+def write_package(parts: Dict[str, PartData]) -> bytes:
+    """
+    Write parts to .docx bytes in one pass ([Content_Types].xml first).
+
+    RawEntry values are copied with their original compressed bytes; bytes
+    values are compressed here. zipfile has no public API for copying an
+    entry without recompressing it, so the (ZIP32, no-extras) container is
+    written directly.
+    """
+    names = sorted(parts, key=lambda name: name != CONTENT_TYPES_PART)
+    entries = [
+        (name, part if isinstance(part, RawEntry) else _encode_part(name, part))
+        for name, part in ((name, parts[name]) for name in names)
+    ]
+
+    now = time.localtime()
+    dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+    dos_date = ((now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+
+    chunks: List[bytes] = []
+    central: List[bytes] = []
+    offset = 0
+    for name, entry in entries:
+        encoded_name = name.encode("utf-8")
+        flags = 0x800 if not encoded_name.isascii() else 0
+        header = _LOCAL_HEADER.pack(
+            b"PK\x03\x04", 20, 0, flags, entry.compress_type, dos_time, dos_date,
+            entry.crc & 0xFFFFFFFF, len(entry.data), entry.file_size, len(encoded_name), 0,
+        )
+        central.append(_CENTRAL_HEADER.pack(
+            b"PK\x01\x02", 20, 0, 20, 0, flags, entry.compress_type, dos_time, dos_date,
+            entry.crc & 0xFFFFFFFF, len(entry.data), entry.file_size, len(encoded_name),
+            0, 0, 0, 0, 0, offset,
+        ) + encoded_name)
+        chunks += [header, encoded_name, entry.data]
+        offset += len(header) + len(encoded_name) + len(entry.data)
+        if offset > _ZIP32_LIMIT:
+            raise ValueError("Package too large for a ZIP32 .docx")
+
+    central_bytes = b"".join(central)
+    end_record = _END_RECORD.pack(
+        b"PK\x05\x06", 0, 0, len(entries), len(entries), len(central_bytes), offset, 0
+    )
+    return b"".join(chunks) + central_bytes + end_record
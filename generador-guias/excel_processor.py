@@ -4,11 +4,12 @@ Excel processing module for handling question metadata and file paths.
 
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from storage import StorageClient
 from config import EXCELS_ACTUALIZADOS_DIR, EXCEL_COLUMNS, SUBJECT_FOLDERS, VALID_ANSWER_KEYS, VALID_DIFFICULTY_VALUES, REQUIRED_INPUT_COLUMNS
-from id_generator import generate_pregunta_id
+from id_generator import PreguntaIDRegistry, build_id_prefixes
+from master_consolidator import MasterConsolidator
 
 # =============================================================================
 # CONFIGURATION CONSTANTS - All hardcoded values here at the top
@@ -25,11 +26,45 @@ MAX_COLUMN_WIDTH = 50
 MIN_COLUMN_WIDTH = 10
 
 
+# Known PreguntaIDs of this process, loaded on first use (see get_id_registry)
+_id_registry: Optional[PreguntaIDRegistry] = None
+
+
+def load_known_pregunta_ids(storage_client: StorageClient) -> set:
+    """PreguntaIDs in the catalog and in not-yet-consolidated updated Excels."""
+    return MasterConsolidator(storage_client).known_pregunta_ids()
+
+
+def init_id_registry(known_ids: Iterable[str], partition: Tuple[int, int] = (0, 1)):
+    """
+    Set this process's registry from IDs loaded elsewhere. Pool workers get
+    the IDs from the parent (they do not open the catalog) and a suffix
+    partition of their own, so that workers processing sets side by side
+    cannot hand out the same ID.
+    """
+    global _id_registry
+    _id_registry = PreguntaIDRegistry(known_ids, partition)
+
+
+def get_id_registry(storage_client: StorageClient) -> PreguntaIDRegistry:
+    """
+    Registry of every PreguntaID in the catalog and in not-yet-consolidated
+    updated Excels. Loaded once per process (unless set with init_id_registry);
+    generated IDs are added to it.
+    """
+    global _id_registry
+    if _id_registry is None:
+        _id_registry = PreguntaIDRegistry(load_known_pregunta_ids(storage_client))
+        print(f"Loaded PreguntaID registry ({len(_id_registry)} known IDs)")
+    return _id_registry
+
+
 class ExcelProcessor:
     """Handles Excel file operations for question metadata."""
     
-    def __init__(self, storage_client: StorageClient):
+    def __init__(self, storage_client: StorageClient, id_registry: Optional[PreguntaIDRegistry] = None):
         self.storage = storage_client
+        self.id_registry = id_registry
     
     def read_excel_metadata(self, excel_path: str) -> pd.DataFrame:
         """Read Excel file with question metadata."""
@@ -65,33 +100,32 @@ class ExcelProcessor:
             return pd.DataFrame()
     
     def generate_pregunta_ids(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Generate PreguntaID for each row in the DataFrame."""
+        """
+        Generate PreguntaID for each row in the DataFrame.
+        
+        Abbreviations are computed once per distinct metadata value, and the
+        random suffixes are checked against the PreguntaID registry (all
+        subjects) so a new ID never matches an existing question.
+        """
         if df.empty:
             return df
             
         df = df.copy()
+        registry = self.id_registry if self.id_registry is not None else get_id_registry(self.storage)
         
-        def _generate_id_for_row(row: pd.Series) -> str:
-            """Generate ID for a single row."""
-            try:
-                return generate_pregunta_id(
-                    eje_tematico=row.get(EXCEL_COLUMNS['eje_tematico'], ''),
-                    area_tematica=row.get(EXCEL_COLUMNS['area_tematica'], ''),
-                    conocimiento_subtema=row.get(EXCEL_COLUMNS['conocimiento_subtema'], ''),
-                    habilidad=row.get(EXCEL_COLUMNS['habilidad'], ''),
-                    dificultad=row.get(EXCEL_COLUMNS['dificultad'], ''),
-                    clave=row.get(EXCEL_COLUMNS['clave'], '')
-                )
-            except Exception as e:
-                print(f"Warning: Error generating PreguntaID for row {row.name}: {e}")
-                return f"ERROR-{row.name:03d}"
-        
-        df['PreguntaID'] = df.apply(_generate_id_for_row, axis=1)
+        def _column(key: str) -> pd.Series:
+            column = EXCEL_COLUMNS[key]
+            return df[column] if column in df.columns else pd.Series('', index=df.index)
         
-        # Check for duplicate IDs
-        duplicates = df['PreguntaID'].duplicated().sum()
-        if duplicates > 0:
-            print(f"Warning: Found {duplicates} duplicate PreguntaIDs")
+        prefixes = build_id_prefixes(
+            eje_tematico=_column('eje_tematico'),
+            area_tematica=_column('area_tematica'),
+            conocimiento_subtema=_column('conocimiento_subtema'),
+            habilidad=_column('habilidad'),
+            dificultad=_column('dificultad'),
+            clave=_column('clave')
+        )
+        df['PreguntaID'] = registry.generate_ids(prefixes)
         
         return df
     
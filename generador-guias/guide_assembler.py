@@ -0,0 +1,317 @@
+"""
+Guide assembly: merge individual question .docx files into one guide.
+
+All question packages are opened in memory (docx_package.DocxPackage), their
+bodies are appended to the first question's document with relationship IDs
+and part names renumbered as they are copied, and the guide is written with a
+single write_package() call. Unchanged parts (styles, media...) keep their
+original compressed bytes. No Streamlit dependency: the app and scripts call
+assemble_guide() / assemble_guide_from_paths() directly.
+
+The first question's package is the base of the guide, so its styles,
+numbering, headers/footers and section properties (A4 page setup) apply to
+the whole guide, exactly as when questions were merged one by one.
+"""
+
+import copy
+import posixpath
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from lxml import etree
+
+from docx_package import (
+    CONTENT_TYPES_PART,
+    CT_NS,
+    DOCUMENT_PART,
+    DOCUMENT_RELS_PART,
+    O_NS,
+    PKG_REL_NS,
+    R_NS,
+    W_NS,
+    DocxPackage,
+    PartData,
+    RawEntry,
+    _XML_PARSER,
+    _resolve_target,
+    serialize_xml,
+    write_package,
+)
+
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+QuestionDoc = Union[bytes, DocxPackage]
+
+
+def _rels_part_name(part_name: str) -> str:
+    """word/embeddings/oleObject1.bin -> word/embeddings/_rels/oleObject1.bin.rels"""
+    directory, filename = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", filename + ".rels")
+
+
+def _relative_target(part_name: str, source_dir: str) -> str:
+    return posixpath.relpath(part_name, source_dir)
+
+
+def _is_relationship_attribute(key: str) -> bool:
+    return key.startswith("{" + R_NS + "}") or key == "{" + O_NS + "}relid"
+
+
+def add_question_number(paragraph, question_number: int) -> None:
+    """
+    Insert "N. " as a separate run at the start of a paragraph (after its
+    pPr), so the number is never injected into equations or formatted text.
+    """
+    run = etree.Element(f"{{{W_NS}}}r")
+    text = etree.SubElement(run, f"{{{W_NS}}}t")
+    text.text = f"{question_number}. "
+    text.set(XML_SPACE, "preserve")
+
+    insert_index = 0
+    for index, child in enumerate(paragraph):
+        if child.tag == f"{{{W_NS}}}pPr":
+            insert_index = index + 1
+            break
+    paragraph.insert(insert_index, run)
+
+
+def _page_break_paragraph():
+    paragraph = etree.Element(f"{{{W_NS}}}p")
+    run = etree.SubElement(paragraph, f"{{{W_NS}}}r")
+    etree.SubElement(run, f"{{{W_NS}}}br").set(f"{{{W_NS}}}type", "page")
+    return paragraph
+
+
+class GuideAssembler:
+    """
+    Accumulates question bodies into a single guide document.
+
+    The first package added becomes the base; each later package contributes
+    its body content (without its sectPr) preceded by a page break. Parts the
+    content references (images, OLE equations, charts and their own .rels)
+    are copied under unique names; identical media is stored only once.
+    Added packages are never modified (content is copied), and to_bytes()
+    can be called any number of times, also between add_question() calls.
+    """
+
+    def __init__(self, number_questions: bool = True):
+        self.number_questions = number_questions
+        self.question_count = 0
+        self._base: Optional[DocxPackage] = None
+        self._content: List[etree._Element] = []
+        self._new_parts: Dict[str, PartData] = {}
+        self._part_names: set = set()
+        self._media_by_content: Dict[Tuple[int, int, bytes], str] = {}
+        self._next_rel_id = 1
+        self._relationships = None
+        self._content_types = None
+        self._default_extensions: set = set()
+        self._override_parts: set = set()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def add_question(self, question_doc: QuestionDoc) -> None:
+        """Append one question (.docx bytes or an opened DocxPackage)."""
+        package = question_doc if isinstance(question_doc, DocxPackage) else DocxPackage.from_bytes(question_doc)
+        if self._base is None:
+            self._set_base(package)
+            elements = self._body_content(package)
+        else:
+            elements = self._body_content(package)
+            rel_mapping = self._import_relationships(package, elements)
+            for element in elements:
+                for node in element.iter():
+                    for key, value in node.attrib.items():
+                        if _is_relationship_attribute(key) and value in rel_mapping:
+                            node.set(key, rel_mapping[value])
+            self._content.append(_page_break_paragraph())
+
+        self.question_count += 1
+        if self.number_questions:
+            first_paragraph = next((el for el in elements if el.tag == f"{{{W_NS}}}p"), None)
+            if first_paragraph is not None:
+                add_question_number(first_paragraph, self.question_count)
+        self._content.extend(elements)
+
+    def to_bytes(self) -> bytes:
+        """Write the guide package (one ZIP pass)."""
+        if self._base is None:
+            raise ValueError("No questions were added to the guide")
+
+        root = self._base.document_skeleton()
+        body = root.find(f"{{{W_NS}}}body")
+        body.extend(self._content)
+        section = self._base.body.find(f"{{{W_NS}}}sectPr")
+        if section is not None:
+            body.append(copy.deepcopy(section))
+        # Drawing IDs must be unique within the document
+        for index, doc_pr in enumerate(body.iter(f"{{{WP_NS}}}docPr"), start=1):
+            doc_pr.set("id", str(index))
+        document_xml = serialize_xml(root)
+        # Detach the content again so later add_question()/to_bytes() calls see it unchanged
+        body.clear()
+
+        parts: Dict[str, PartData] = dict(self._base.entries)
+        parts[DOCUMENT_PART] = document_xml
+        parts[DOCUMENT_RELS_PART] = serialize_xml(self._relationships)
+        parts[CONTENT_TYPES_PART] = serialize_xml(self._content_types)
+        parts.update(self._new_parts)
+        return write_package(parts)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _body_content(package: DocxPackage) -> List[etree._Element]:
+        body = package.body
+        if body is None:
+            raise ValueError("Question document has no body")
+        return [copy.deepcopy(child) for child in body if child.tag != f"{{{W_NS}}}sectPr"]
+
+    def _set_base(self, package: DocxPackage) -> None:
+        self._base = package
+        self._part_names = set(package.entries)
+        self._relationships = copy.deepcopy(package.relationships_root)
+        for rel in self._relationships:
+            rel_id = rel.get("Id", "")
+            if rel_id.startswith("rId") and rel_id[3:].isdigit():
+                self._next_rel_id = max(self._next_rel_id, int(rel_id[3:]) + 1)
+
+        self._content_types = etree.fromstring(package.read(CONTENT_TYPES_PART), _XML_PARSER)
+        for node in self._content_types:
+            if node.tag == f"{{{CT_NS}}}Default":
+                self._default_extensions.add(node.get("Extension", "").lower())
+            elif node.tag == f"{{{CT_NS}}}Override":
+                self._override_parts.add(node.get("PartName", "").lstrip("/"))
+
+        for name in package.entries:
+            if name.startswith("word/media/"):
+                self._remember_media(name, package.entries[name])
+
+    def _remember_media(self, name: str, entry: RawEntry) -> None:
+        self._media_by_content.setdefault((entry.crc, entry.file_size, entry.data), name)
+
+    def _new_rel_id(self) -> str:
+        rel_id = f"rId{self._next_rel_id}"
+        self._next_rel_id += 1
+        return rel_id
+
+    def _unique_part_name(self, name: str) -> str:
+        if name not in self._part_names:
+            return name
+        stem, extension = posixpath.splitext(name)
+        counter = 1
+        while f"{stem}_{counter}{extension}" in self._part_names:
+            counter += 1
+        return f"{stem}_{counter}{extension}"
+
+    def _import_relationships(self, package: DocxPackage, elements: Iterable) -> Dict[str, str]:
+        """Add the relationships `elements` use to the guide; old Id -> new Id."""
+        used = set()
+        for element in elements:
+            for node in element.iter():
+                for key, value in node.attrib.items():
+                    if _is_relationship_attribute(key):
+                        used.add(value)
+
+        source_types = etree.fromstring(package.read(CONTENT_TYPES_PART), _XML_PARSER)
+        imported: Dict[str, str] = {}
+        mapping = {}
+        for rel in package.relationships():
+            old_id = rel.get("Id")
+            if old_id not in used:
+                continue
+            new_rel = etree.SubElement(self._relationships, f"{{{PKG_REL_NS}}}Relationship")
+            new_rel.set("Id", self._new_rel_id())
+            new_rel.set("Type", rel.get("Type", ""))
+            if rel.get("TargetMode") == "External":
+                new_rel.set("Target", rel.get("Target", ""))
+                new_rel.set("TargetMode", "External")
+            else:
+                part_name = self._import_part(package, _resolve_target(rel.get("Target", "")), source_types, imported)
+                new_rel.set("Target", _relative_target(part_name, "word"))
+            mapping[old_id] = new_rel.get("Id")
+        return mapping
+
+    def _import_part(self, package: DocxPackage, name: str, source_types, imported: Dict[str, str]) -> str:
+        """Copy part `name` (and the parts its own .rels point at) into the guide."""
+        if name in imported:
+            return imported[name]
+        if name not in package.entries:
+            # Dangling relationship in the source: keep its target as-is
+            return name
+        entry = package.entries[name]
+        rels_name = _rels_part_name(name)
+        has_rels = rels_name in package.entries
+
+        if not has_rels:
+            key = (entry.crc, entry.file_size, entry.data)
+            if key in self._media_by_content:
+                imported[name] = self._media_by_content[key]
+                return imported[name]
+
+        new_name = self._unique_part_name(name)
+        imported[name] = new_name
+        self._part_names.add(new_name)
+        self._new_parts[new_name] = entry
+        if not has_rels:
+            self._remember_media(new_name, entry)
+        self._register_content_type(name, new_name, source_types)
+
+        if has_rels:
+            source_dir = posixpath.dirname(name)
+            new_dir = posixpath.dirname(new_name)
+            rels_root = etree.fromstring(package.read(rels_name), _XML_PARSER)
+            for rel in rels_root:
+                if rel.get("TargetMode") == "External":
+                    continue
+                target = self._import_part(package, _resolve_target(rel.get("Target", ""), source_dir), source_types, imported)
+                rel.set("Target", _relative_target(target, new_dir))
+            rels_part = _rels_part_name(new_name)
+            self._part_names.add(rels_part)
+            self._new_parts[rels_part] = serialize_xml(rels_root)
+        return new_name
+
+    def _register_content_type(self, source_name: str, new_name: str, source_types) -> None:
+        extension = posixpath.splitext(new_name)[1].lstrip(".").lower()
+        for node in source_types:
+            if node.tag == f"{{{CT_NS}}}Override" and node.get("PartName") == "/" + source_name:
+                if new_name not in self._override_parts:
+                    override = etree.SubElement(self._content_types, f"{{{CT_NS}}}Override")
+                    override.set("PartName", "/" + new_name)
+                    override.set("ContentType", node.get("ContentType", ""))
+                    self._override_parts.add(new_name)
+                return
+        if extension in self._default_extensions:
+            return
+        for node in source_types:
+            if node.tag == f"{{{CT_NS}}}Default" and node.get("Extension", "").lower() == extension:
+                default = etree.Element(f"{{{CT_NS}}}Default")
+                default.set("Extension", node.get("Extension"))
+                default.set("ContentType", node.get("ContentType", ""))
+                # Defaults conventionally precede Overrides
+                self._content_types.insert(0, default)
+                self._default_extensions.add(extension)
+                return
+
+
+def assemble_guide(question_docs: Sequence[QuestionDoc], number_questions: bool = True) -> bytes:
+    """
+    Build a guide .docx from question documents, in order.
+
+    Args:
+        question_docs: .docx bytes (or opened DocxPackage) per question
+        number_questions: Prefix each question's first paragraph with "N. "
+
+    Returns:
+        The guide as .docx bytes
+    """
+    assembler = GuideAssembler(number_questions=number_questions)
+    for question_doc in question_docs:
+        assembler.add_question(question_doc)
+    return assembler.to_bytes()
+
+
+def assemble_guide_from_paths(paths: Sequence[Union[str, Path]], number_questions: bool = True) -> bytes:
+    """assemble_guide() for question files on disk."""
+    return assemble_guide([Path(path).read_bytes() for path in paths], number_questions=number_questions)
@@ -2,14 +2,30 @@
 Question ID generation module for the Generador de Guías Escolares system.
 Generates unique PreguntaID following the format:
 {EJE}-{AREA}-{SUBTEMA}-{HABILIDAD}-{DIFICULTAD}-{CLAVE}-{RANDOM}
+
+Uniqueness is enforced with a PreguntaIDRegistry (set of every known ID):
+suffixes that clash with it are redrawn before an ID is handed out. Worker
+processes cannot see each other's registry, so each one draws from its own
+partition of the suffix space (see generate_random_suffixes).
 """
 
 import re
 import random
 import string
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from unidecode import unidecode
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Character set of each position of the random suffix: LLNNLLNN
+SUFFIX_PATTERN = [string.ascii_uppercase] * 2 + [string.digits] * 2 + [string.ascii_uppercase] * 2 + [string.digits] * 2
+
+# Partitions of the suffix space: one per value of its two leading letters
+SUFFIX_PARTITIONS = len(string.ascii_uppercase) ** 2
+
+# Redraw rounds before giving up on a unique suffix (each round redraws only the clashing IDs)
+MAX_SUFFIX_ATTEMPTS = 100
 
 def clean_text_for_abbreviation(text: str, length: int = 3) -> str:
     """
@@ -26,8 +42,11 @@ def clean_text_for_abbreviation(text: str, length: int = 3) -> str:
         return "XXX"
     
     # Convert to string and strip whitespace
-    text = str(text).strip()
-    
+    return _abbreviate(str(text).strip(), length)
+
+@lru_cache(maxsize=4096)
+def _abbreviate(text: str, length: int) -> str:
+    """Memoised body of clean_text_for_abbreviation (metadata values repeat a lot)."""
     # Remove accents and convert to uppercase
     clean_text = unidecode(text).upper()
     
@@ -84,6 +103,125 @@ def generate_random_suffix(length: int = 8) -> str:
     
     return suffix
 
+def generate_random_suffixes(count: int, partition: Tuple[int, int] = (0, 1)) -> List[str]:
+    """
+    Generate `count` random LLNNLLNN suffixes in one go.
+    
+    Args:
+        count: Number of suffixes
+        partition: (index, total). The two leading letters are drawn among the
+            pairs whose position in AA..ZZ equals index modulo total, so
+            suffixes of different partitions never coincide
+    
+    Returns:
+        List of random strings following the pattern LLNNLLNN
+    """
+    index, total = partition
+    positions = [random.choices(characters, k=count) for characters in SUFFIX_PATTERN]
+    if total > 1:
+        letters = string.ascii_uppercase
+        heads = random.choices(range(index, SUFFIX_PARTITIONS, total), k=count)
+        positions[0] = [letters[head // len(letters)] for head in heads]
+        positions[1] = [letters[head % len(letters)] for head in heads]
+    return ["".join(chars) for chars in zip(*positions)]
+
+def clean_clave(clave) -> str:
+    """Answer key as a single letter A-D, "X" otherwise."""
+    clave_clean = str(clave).strip().upper() if clave else "X"
+    if len(clave_clean) > 1:
+        clave_clean = clave_clean[0]
+    if clave_clean not in "ABCD":
+        clave_clean = "X"
+    return clave_clean
+
+def _map_unique(values: pd.Series, function) -> np.ndarray:
+    """Apply `function` once per distinct value of `values` (and once for missing values)."""
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([function(value) for value in uniques] + [function(None)], dtype=object)
+    return mapped[codes]  # code -1 (missing) picks the trailing function(None)
+
+def build_id_prefixes(
+    eje_tematico: pd.Series,
+    area_tematica: pd.Series,
+    conocimiento_subtema: pd.Series,
+    habilidad: pd.Series,
+    dificultad: pd.Series,
+    clave: pd.Series,
+    separator: str = "-"
+) -> List[str]:
+    """
+    Build the {EJE}-{AREA}-{SUBTEMA}-{HABILIDAD}-{DIFICULTAD}-{CLAVE} part of the
+    IDs of many questions at once (one abbreviation per distinct value).
+    
+    Args:
+        eje_tematico, area_tematica, conocimiento_subtema, habilidad, dificultad, clave:
+            Aligned Series with one value per question
+        separator: Separator character (default "-")
+    
+    Returns:
+        List of ID prefixes, one per question
+    """
+    parts = [
+        _map_unique(values, clean_text_for_abbreviation)
+        for values in (eje_tematico, area_tematica, conocimiento_subtema, habilidad, dificultad)
+    ]
+    parts.append(_map_unique(clave, clean_clave))
+    return [separator.join(fields) for fields in zip(*parts)]
+
+class PreguntaIDRegistry:
+    """
+    Set of every known PreguntaID (all subjects), used to hand out new IDs
+    that cannot clash with an existing question.
+    
+    Registries that generate IDs at the same time (one per worker process)
+    must use distinct partitions (index, total) with the same total.
+    """
+    
+    def __init__(self, existing_ids: Iterable[str] = (), partition: Tuple[int, int] = (0, 1)):
+        index, total = partition
+        if not 1 <= total <= SUFFIX_PARTITIONS or not 0 <= index < total:
+            raise ValueError(f"Invalid PreguntaID partition {partition} (at most {SUFFIX_PARTITIONS})")
+        self._ids = {str(pregunta_id) for pregunta_id in existing_ids if pregunta_id}
+        self.partition = partition
+    
+    def __contains__(self, pregunta_id: str) -> bool:
+        return pregunta_id in self._ids
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def add(self, pregunta_ids: Iterable[str]):
+        """Register IDs created elsewhere."""
+        self._ids.update(pregunta_ids)
+    
+    def generate_ids(self, prefixes: List[str], separator: str = "-") -> List[str]:
+        """
+        Generate one new ID per prefix, unique against the registry and each other.
+        The new IDs are registered.
+        
+        Args:
+            prefixes: ID prefixes (see build_id_prefixes)
+            separator: Separator character (default "-")
+        
+        Returns:
+            List of new PreguntaIDs, aligned with `prefixes`
+        """
+        ids = [f"{prefix}{separator}{suffix}" for prefix, suffix in zip(prefixes, generate_random_suffixes(len(prefixes), self.partition))]
+        pending = range(len(ids))
+        for _ in range(MAX_SUFFIX_ATTEMPTS):
+            clashes = []
+            for index in pending:
+                if ids[index] in self._ids:
+                    clashes.append(index)
+                else:
+                    self._ids.add(ids[index])
+            if not clashes:
+                return ids
+            for index, suffix in zip(clashes, generate_random_suffixes(len(clashes), self.partition)):
+                ids[index] = f"{prefixes[index]}{separator}{suffix}"
+            pending = clashes
+        raise RuntimeError(f"Could not generate unique PreguntaIDs for {len(pending)} questions")
+
 def generate_pregunta_id(
     eje_tematico: str,
     area_tematica: str, 
@@ -91,7 +229,8 @@ def generate_pregunta_id(
     habilidad: str,
     dificultad: str,
     clave: str,
-    separator: str = "-"
+    separator: str = "-",
+    registry: Optional[PreguntaIDRegistry] = None
 ) -> str:
     """
     Generate a unique PreguntaID following the specified format.
@@ -104,6 +243,7 @@ def generate_pregunta_id(
         dificultad: Nivel de dificultad (e.g., "Media")
         clave: Letra de respuesta correcta (e.g., "C")
         separator: Separator character (default "-")
+        registry: Known IDs; when given, the suffix is redrawn until the ID is new
     
     Returns:
         Generated PreguntaID (e.g., "OND-FIS-LONG-ANA-MED-C-A1B2")
@@ -116,27 +256,21 @@ def generate_pregunta_id(
     dificultad_abbr = clean_text_for_abbreviation(dificultad)
     
     # Clean clave (should be single letter A-D)
-    clave_clean = str(clave).strip().upper() if clave else "X"
-    if len(clave_clean) > 1:
-        clave_clean = clave_clean[0]
-    if clave_clean not in "ABCD":
-        clave_clean = "X"
-    
-    # Generate random suffix
-    random_suffix = generate_random_suffix()
+    clave_clean = clean_clave(clave)
     
-    # Combine all parts
-    pregunta_id = separator.join([
+    prefix = separator.join([
         eje_abbr,
         area_abbr, 
         subtema_abbr,
         habilidad_abbr,
         dificultad_abbr,
-        clave_clean,
-        random_suffix
+        clave_clean
     ])
+    if registry is not None:
+        return registry.generate_ids([prefix], separator)[0]
     
-    return pregunta_id
+    # Generate random suffix and combine all parts
+    return separator.join([prefix, generate_random_suffix()])
 
 def validate_pregunta_id(pregunta_id: str) -> bool:
     """
@@ -3,14 +3,20 @@ Main CLI entry point for the Generador de Guías Escolares system.
 """
 
 import argparse
+import contextlib
+import io
+import multiprocessing
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from storage import StorageClient
-from config import ensure_directories, SUBJECT_FOLDERS, INPUT_DIR, EXCELS_ACTUALIZADOS_DIR
+from config import ensure_directories, SUBJECT_FOLDERS, INPUT_DIR, EXCELS_ACTUALIZADOS_DIR, BASE_DIR, EXCEL_COLUMNS, PROCESS_WORKERS
 from question_processor import QuestionProcessor
-from excel_processor import ExcelProcessor
+from excel_processor import ExcelProcessor, init_id_registry, load_known_pregunta_ids
 from master_consolidator import MasterConsolidator
+from preview_service import PreviewService
 
 def get_available_subjects(storage: StorageClient) -> list:
     """
@@ -373,7 +379,7 @@ def process_single_set(base_filename: str, subject: str, storage: StorageClient,
         
         # Step 2: Process Word document
         print("\n2. Processing Word document...")
-        page_docs = question_processor.split_document_by_pages(str(docx_path))
+        page_docs = question_processor.split_document(str(docx_path))
         
         if not page_docs:
             msg = "Error: Could not split Word document into pages"
@@ -398,7 +404,9 @@ def process_single_set(base_filename: str, subject: str, storage: StorageClient,
         
         # Step 3: Create individual question files
         print("\n3. Creating individual question files...")
-        processing_results = question_processor.process_word_document(str(docx_path), df.to_dict('records'), subject)
+        processing_results = question_processor.process_word_document(
+            str(docx_path), df.to_dict('records'), subject, question_docs=page_docs
+        )
         
         successful_files = [r for r in processing_results if r['success']]
         failed_files = [r for r in processing_results if not r['success']]
@@ -441,6 +449,133 @@ def process_single_set(base_filename: str, subject: str, storage: StorageClient,
         print(msg)
         return False, msg
 
+# Storage client of a pool worker process (created once per process by the pool initializer)
+_worker_storage = None
+
+def _init_process_worker(worker_counter, worker_count: int, known_ids: set):
+    """
+    Pool initializer: one StorageClient per worker process, and a PreguntaID
+    registry built from the IDs the parent loaded, with a suffix partition of
+    its own (workers cannot see the IDs the others generate).
+    """
+    global _worker_storage
+    _worker_storage = StorageClient()
+    with worker_counter.get_lock():
+        index = worker_counter.value
+        worker_counter.value += 1
+    init_id_registry(known_ids, (index, worker_count))
+
+def _process_pool(workers: int, known_ids: set) -> ProcessPoolExecutor:
+    """
+    Pool of `workers` set-processing processes, each with its own PreguntaID
+    partition. known_ids is loaded once by the caller: workers never open the
+    catalog or re-read the updated Excels.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_process_worker,
+        initargs=(multiprocessing.Value('i', 0), workers, known_ids),
+    )
+
+def _process_set_job(base_filename: str, subject: str, docx_path: str, xlsx_path: str) -> tuple:
+    """
+    Run process_single_set inside a pool worker.
+    
+    Output is captured and returned so sets running side by side do not
+    interleave their logs; an unexpected error becomes a failed result.
+    
+    Returns:
+        tuple: (success (bool), message (str), seconds (float), log (str))
+    """
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            success, msg = process_single_set(base_filename, subject, _worker_storage, docx_path, xlsx_path)
+    except Exception as e:
+        success, msg = False, f"Error processing set: {str(e)}"
+    return success, msg, time.perf_counter() - start, log.getvalue()
+
+def unique_sets(sets: list) -> list:
+    """
+    Drop sets whose base name was already listed (the first one is kept),
+    printing a warning for each. Processing the same set twice would rewrite
+    its output files, or race on them when running in parallel.
+    """
+    seen = set()
+    unique = []
+    for item in sets:
+        if item[0] in seen:
+            print(f"\n[WARNING] Set listed more than once, processing it once: {item[0]}")
+            continue
+        seen.add(item[0])
+        unique.append(item)
+    return unique
+
+def process_sets(subject: str, sets: list, storage: StorageClient, workers: int = None) -> list:
+    """
+    Process several Word/Excel sets, in a process pool when more than one worker is used.
+    
+    Each set succeeds or fails on its own: a failing set (or a worker process
+    that dies) does not stop the others. A base name listed more than once is
+    processed once (see unique_sets), whatever the number of workers.
+    
+    Args:
+        subject: Subject area
+        sets: List of (base_filename, docx_path, xlsx_path)
+        storage: Storage client (used directly when running with one worker)
+        workers: Worker processes (default: PROCESS_WORKERS; 1 = one set after another)
+        
+    Returns:
+        list: (base_filename, success, message, seconds) per distinct set, in the order of `sets`
+    """
+    sets = unique_sets(sets)
+    workers = PROCESS_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(sets)))
+    
+    if workers == 1:
+        results = []
+        for base_name, docx_path, xlsx_path in sets:
+            start = time.perf_counter()
+            success, msg = process_single_set(base_name, subject, storage, docx_path, xlsx_path)
+            results.append((base_name, success, msg, time.perf_counter() - start))
+        return results
+    
+    print(f"\nProcessing {len(sets)} sets with {workers} worker processes...")
+    known_ids = load_known_pregunta_ids(storage)
+    print(f"Loaded PreguntaID registry ({len(known_ids)} known IDs)")
+    results = [None] * len(sets)
+    with _process_pool(workers, known_ids) as pool:
+        futures = {
+            pool.submit(_process_set_job, base_name, subject, str(docx_path), str(xlsx_path)): index
+            for index, (base_name, docx_path, xlsx_path) in enumerate(sets)
+        }
+        
+        for future in as_completed(futures):
+            index = futures[future]
+            base_name = sets[index][0]
+            try:
+                success, msg, seconds, log = future.result()
+            except Exception as e:
+                # The worker process died (e.g. out of memory): only its sets fail
+                success, msg, seconds, log = False, f"Worker process failed: {str(e)}", 0.0, ""
+            print(log, end="")
+            print(f"   [{'OK' if success else 'FAILED'}] {base_name} ({seconds:.1f}s)")
+            results[index] = (base_name, success, msg, seconds)
+    return results
+
+def print_set_timings(results: list, wall_seconds: float):
+    """Print the per-set processing times of a batch."""
+    if not results:
+        return
+    print(f"\n   SET TIMINGS:")
+    print(f"   {'-'*56}")
+    for base_name, success, _, seconds in results:
+        print(f"   {'✅' if success else '❌'} {base_name}: {seconds:.1f}s")
+    total_seconds = sum(result[3] for result in results)
+    print(f"   {'-'*56}")
+    print(f"   Sum of set times: {total_seconds:.1f}s | Wall time: {wall_seconds:.1f}s")
+
 def consolidate_subject(subject: str, storage: StorageClient, full: bool = False) -> bool:
     """
     Consolidate Excel files for a subject into a master file.
@@ -454,7 +589,7 @@ def consolidate_subject(subject: str, storage: StorageClient, full: bool = False
     Returns:
         True if successful, False otherwise
     """
-    consolidation_mode = "Full (reset)" if full else "Incremental (new files only)"
+    consolidation_mode = "Full (reset)" if full else "Incremental (new and changed files)"
     print(f"\n{'='*60}")
     print(f"Consolidating {subject} Excel files...")
     print(f"Mode: {consolidation_mode}")
@@ -480,7 +615,7 @@ def consolidate_subject(subject: str, storage: StorageClient, full: bool = False
         
         # Get summary
         summary = consolidator.get_consolidation_summary(df, subject)
-        summary_label = "Total questions" if full else "New questions added"
+        summary_label = "Total questions" if full else "Questions in new/changed files"
         print(f"\n Consolidation Summary for {subject}:")
         print(f"   {summary_label}: {summary['total_questions']}")
         print(f"   Source files: {len(summary.get('source_files', {}))}")
@@ -495,15 +630,60 @@ def consolidate_subject(subject: str, storage: StorageClient, full: bool = False
                 if issue_list:
                     print(f"   {issue_type}: {issue_list}")
         
-        print(f"\n[SUCCESS] Master Excel saved: {output_path}")
+        print(f"\n[SUCCESS] Master catalog updated: {output_path}")
         return True
         
     except Exception as e:
         print(f"Error consolidating {subject}: {e}")
         return False
 
-def save_processing_report(subject: str, total: int, processed: int, failed: int, failed_details: list, storage: StorageClient, mode: str, other_incomplete: list = None):
-    """Save processing report to a text file."""
+def prerender_subject_previews(subject: str, storage: StorageClient, workers: int = None) -> bool:
+    """
+    Render (and cache) the preview of every question in a subject's catalog.
+    Questions whose .docx content was already rendered are skipped.
+    
+    Args:
+        subject: Subject area
+        storage: Storage client
+        workers: Number of LibreOffice workers (default: PREVIEW_WORKERS)
+        
+    Returns:
+        True if no preview failed, False otherwise
+    """
+    print(f"\n{'='*60}")
+    print(f"Rendering {subject} question previews...")
+    print(f"{'='*60}")
+    
+    try:
+        df = MasterConsolidator(storage).catalog.load_subject(subject)
+        if df.empty:
+            print(f"No master data found for {subject}")
+            return False
+        
+        # Question files are stored relative to the project root (as in the app)
+        paths = [str(BASE_DIR / path) for path in df[EXCEL_COLUMNS['ruta_relativa']].dropna()]
+        service = PreviewService(workers=workers)
+        if not service.available:
+            print("Error: LibreOffice not found (set LIBREOFFICE_PATH)")
+            return False
+        
+        start = datetime.now()
+        stats = service.prerender(paths, progress=lambda done, total: print(f"   Rendered {done}/{total}", end="\r"))
+        service.close()
+        elapsed = (datetime.now() - start).total_seconds()
+        
+        print(f"\n   Questions: {stats['total']}")
+        print(f"   Already cached: {stats['cached']}")
+        print(f"   Rendered: {stats['rendered']} ({elapsed:.1f}s)")
+        print(f"   Failed: {stats['failed']}")
+        return stats['failed'] == 0
+        
+    except Exception as e:
+        print(f"Error rendering previews for {subject}: {e}")
+        return False
+
+def save_processing_report(subject: str, total: int, processed: int, failed: int, failed_details: list, storage: StorageClient, mode: str, other_incomplete: list = None, set_results: list = None, wall_seconds: float = None):
+    """Save processing report to a text file (set_results: process_sets output, for per-set timings)."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"resultados_procesar_{subject}_{timestamp}.txt"
     report_path = INPUT_DIR / subject / filename
@@ -538,6 +718,17 @@ def save_processing_report(subject: str, total: int, processed: int, failed: int
         for name, reason in other_incomplete:
             report_content.append(f"   • {name}: {reason}")
         report_content.append("="*60)
+
+    if set_results:
+        report_content.append("")
+        report_content.append("SET TIMINGS:")
+        report_content.append("-" * 56)
+        for name, success, _, seconds in set_results:
+            report_content.append(f"{'✅' if success else '❌'} {name}: {seconds:.1f}s")
+        report_content.append("-" * 56)
+        report_content.append(f"Sum of set times: {sum(r[3] for r in set_results):.1f}s")
+        if wall_seconds is not None:
+            report_content.append(f"Wall time: {wall_seconds:.1f}s")
         
     try:
         storage.write_bytes(str(report_path), "\n".join(report_content).encode('utf-8'))
@@ -545,13 +736,15 @@ def save_processing_report(subject: str, total: int, processed: int, failed: int
     except Exception as e:
         print(f"\n[WARNING] Could not save report file: {e}")
 
-def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bool:
+def process_multiple_files_from_list(subject: str, storage: StorageClient, workers: int = None, consolidate: bool = False) -> bool:
     """
     Process multiple file sets listed in 'procesar.txt' file in the subject folder.
     
     Args:
         subject: Subject area
         storage: Storage client
+        workers: Worker processes (default: PROCESS_WORKERS; 1 = one set after another)
+        consolidate: Run one incremental consolidation after the whole batch
         
     Returns:
         True if at least one file was processed, False otherwise
@@ -566,6 +759,14 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
     try:
         content = storage.read_text(str(list_path))
         lines = [line.strip() for line in content.splitlines() if line.strip()]
+        # Names match case-insensitively, so "Set1" and "set1" are the same set
+        unique_lines = {}
+        for line in lines:
+            if line.lower() in unique_lines:
+                print(f"\n[WARNING] Set listed more than once in 'procesar.txt', processing it once: {line}")
+            else:
+                unique_lines[line.lower()] = line
+        lines = list(unique_lines.values())
         
         if not lines:
             print(f"\n[WARNING] 'procesar.txt' is empty.")
@@ -590,6 +791,8 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
         missing_count = 0
         
         failed_sets = []  # List to store failed sets info: (name, reason)
+        sets_to_process = []  # (target_name, docx_path, xlsx_path)
+        requested_names = []  # base_name as written in procesar.txt, per set to process
         
         for base_name in lines:
             target_name = base_name
@@ -599,12 +802,8 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
                 
             if target_name in pairs_map:
                 docx_path, xlsx_path = pairs_map[target_name]
-                success, msg = process_single_set(target_name, subject, storage, docx_path, xlsx_path)
-                if success:
-                    processed_count += 1
-                else:
-                    failed_count += 1
-                    failed_sets.append((base_name, msg))
+                sets_to_process.append((target_name, docx_path, xlsx_path))
+                requested_names.append(base_name)
             else:
                 missing_count += 1
                 failed_count += 1 # Count missing as failed for the report
@@ -624,6 +823,16 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
                     print(f"Make sure both {base_name}.docx and {base_name}.xlsx exist in {INPUT_DIR / subject}")
                     failed_sets.append((base_name, "Files not found"))
         
+        start = time.perf_counter()
+        set_results = process_sets(subject, sets_to_process, storage, workers) if sets_to_process else []
+        wall_seconds = time.perf_counter() - start
+        for base_name, (_, success, msg, _) in zip(requested_names, set_results):
+            if success:
+                processed_count += 1
+            else:
+                failed_count += 1
+                failed_sets.append((base_name, msg))
+        
         # Check for other incomplete sets in the folder that were not in the list
         all_incomplete = set(incomplete_sets.keys())
         processed_bases_lower = {b.lower() for b in lines}
@@ -646,6 +855,8 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
             for name, reason in failed_sets:
                 print(f"   ❌ {name}: {reason}")
         
+        print_set_timings(set_results, wall_seconds)
+        
         # Prepare other_incomplete list with reasons for reporting
         other_incomplete_with_reasons = []
         if other_incomplete:
@@ -662,7 +873,10 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
         print(f"{'='*60}")
         
         # Save report
-        save_processing_report(subject, len(lines), processed_count, failed_count, failed_sets, storage, "Batch List (procesar.txt)", other_incomplete_with_reasons)
+        save_processing_report(subject, len(lines), processed_count, failed_count, failed_sets, storage, "Batch List (procesar.txt)", other_incomplete_with_reasons, set_results, wall_seconds)
+        
+        if consolidate and processed_count > 0:
+            consolidate_subject(subject, storage)
         
         return processed_count > 0
         
@@ -670,13 +884,15 @@ def process_multiple_files_from_list(subject: str, storage: StorageClient) -> bo
         print(f"Error reading list file: {e}")
         return False
 
-def process_all_in_subject(subject: str, storage: StorageClient) -> bool:
+def process_all_in_subject(subject: str, storage: StorageClient, workers: int = None, consolidate: bool = False) -> bool:
     """
     Process all available file sets in the subject folder.
     
     Args:
         subject: Subject area
         storage: Storage client
+        workers: Worker processes (default: PROCESS_WORKERS; 1 = one set after another)
+        consolidate: Run one incremental consolidation after the whole batch
         
     Returns:
         True if at least one file was processed, False otherwise
@@ -694,8 +910,10 @@ def process_all_in_subject(subject: str, storage: StorageClient) -> bool:
     failed_sets = [] # List to store failed sets info: (name, reason)
     
     # Process valid pairs
-    for base_name, docx_path, xlsx_path in pairs:
-        success, msg = process_single_set(base_name, subject, storage, docx_path, xlsx_path)
+    start = time.perf_counter()
+    set_results = process_sets(subject, pairs, storage, workers)
+    wall_seconds = time.perf_counter() - start
+    for base_name, success, msg, _ in set_results:
         if success:
             processed_count += 1
         else:
@@ -723,11 +941,15 @@ def process_all_in_subject(subject: str, storage: StorageClient) -> bool:
         print(f"   {'-'*56}")
         for name, reason in failed_sets:
             print(f"   ❌ {name}: {reason}")
-            
+    
+    print_set_timings(set_results, wall_seconds)
     print(f"{'='*60}")
     
     # Save report
-    save_processing_report(subject, total_found, processed_count, failed_count, failed_sets, storage, "All Files in Folder")
+    save_processing_report(subject, total_found, processed_count, failed_count, failed_sets, storage, "All Files in Folder", set_results=set_results, wall_seconds=wall_seconds)
+    
+    if consolidate and processed_count > 0:
+        consolidate_subject(subject, storage)
     
     return processed_count > 0
 
@@ -904,7 +1126,12 @@ Examples:
   # Legacy mode - specify files directly (looks in input/{subject}/ folder)
   python main.py process-set test_base --subject F30M
   
-  # Consolidate Excel files for a subject (incremental - only new files)
+  # Process every set in input/F30M/ (or only those in procesar.txt) with 4 worker processes,
+  # then consolidate once
+  python main.py process-batch --subject F30M --workers 4 --consolidate
+  python main.py process-batch --subject F30M --from-list --workers 4
+  
+  # Consolidate Excel files for a subject (incremental - new and changed files)
   python main.py consolidate --subject F30M
   
   # Full consolidation (reset master file)
@@ -916,6 +1143,14 @@ Examples:
   # Full consolidation for all subjects
   python main.py consolidate --all-subjects --full
   
+  # Export master Excel(s) from the question catalog
+  python main.py export --subject F30M
+  python main.py export --all-subjects
+  
+  # Pre-render question previews (after consolidating)
+  python main.py previews --subject F30M
+  python main.py consolidate --subject F30M --previews
+  
   # Initialize directories
   python main.py init
 
@@ -937,6 +1172,17 @@ Directory Structure:
     process_parser.add_argument('--subject', choices=list(SUBJECT_FOLDERS.keys()),
                                help='[OPTIONAL] Subject area. If not provided, uses interactive mode.')
     
+    # Batch processing command
+    batch_parser = subparsers.add_parser('process-batch', help='Process all Word/Excel sets of a subject (optionally in parallel)')
+    batch_parser.add_argument('--subject', choices=list(SUBJECT_FOLDERS.keys()), required=True,
+                              help='Subject area')
+    batch_parser.add_argument('--from-list', action='store_true',
+                              help="Only process the sets listed in the subject's procesar.txt")
+    batch_parser.add_argument('--workers', type=int,
+                              help='Worker processes (default: PROCESS_WORKERS; 1 = one set after another)')
+    batch_parser.add_argument('--consolidate', action='store_true',
+                              help='Run one incremental consolidation after the batch')
+    
     # Consolidate command
     consolidate_parser = subparsers.add_parser('consolidate', help='Consolidate Excel files (incremental by default)')
     consolidate_parser.add_argument('--subject', choices=list(SUBJECT_FOLDERS.keys()),
@@ -944,7 +1190,25 @@ Directory Structure:
     consolidate_parser.add_argument('--all-subjects', action='store_true',
                                    help='Consolidate all subjects')
     consolidate_parser.add_argument('--full', action='store_true',
-                                   help='Full consolidation (reset master file). Default is incremental (only new files).')
+                                   help='Full consolidation (reset master file). Default is incremental (new and changed files).')
+    consolidate_parser.add_argument('--previews', action='store_true',
+                                   help='Pre-render question previews of the consolidated subjects')
+    
+    # Export command
+    export_parser = subparsers.add_parser('export', help='Export master Excel files from the question catalog')
+    export_parser.add_argument('--subject', choices=list(SUBJECT_FOLDERS.keys()),
+                               help='Subject to export')
+    export_parser.add_argument('--all-subjects', action='store_true',
+                               help='Export all subjects in the catalog')
+    
+    # Previews command
+    previews_parser = subparsers.add_parser('previews', help='Pre-render question previews into the preview cache')
+    previews_parser.add_argument('--subject', choices=list(SUBJECT_FOLDERS.keys()),
+                                 help='Subject to render')
+    previews_parser.add_argument('--all-subjects', action='store_true',
+                                 help='Render all subjects in the catalog')
+    previews_parser.add_argument('--workers', type=int,
+                                 help='LibreOffice workers (default: PREVIEW_WORKERS)')
     
     # Init command
     init_parser = subparsers.add_parser('init', help='Initialize project directories')
@@ -997,9 +1261,16 @@ Directory Structure:
             success, _ = process_single_set(args.base_filename, args.subject, storage)
             sys.exit(0 if success else 1)
     
+    elif args.command == 'process-batch':
+        if args.from_list:
+            success = process_multiple_files_from_list(args.subject, storage, workers=args.workers, consolidate=args.consolidate)
+        else:
+            success = process_all_in_subject(args.subject, storage, workers=args.workers, consolidate=args.consolidate)
+        sys.exit(0 if success else 1)
+    
     elif args.command == 'consolidate':
         if args.all_subjects:
-            consolidation_mode = "Full (reset)" if args.full else "Incremental (new files only)"
+            consolidation_mode = "Full (reset)" if args.full else "Incremental (new and changed files)"
             print(f"Consolidating all subjects...")
             print(f"Mode: {consolidation_mode}")
             consolidator = MasterConsolidator(storage)
@@ -1014,8 +1285,11 @@ Directory Structure:
             if results:
                 print(f"\n[SUCCESS] Successfully consolidated {len(results)} subjects")
                 for subject, (df, output_path) in results.items():
-                    questions_label = "total questions" if args.full else "new questions"
+                    questions_label = "total questions" if args.full else "questions from new/changed files"
                     print(f"   {subject}: {len(df)} {questions_label} -> {output_path}")
+                if args.previews:
+                    for subject in results:
+                        prerender_subject_previews(subject, storage)
             else:
                 print("No subjects to consolidate")
                 sys.exit(1)
@@ -1025,7 +1299,37 @@ Directory Structure:
                 sys.exit(1)
             
             success = consolidate_subject(args.subject, storage, full=args.full)
+            if success and args.previews:
+                prerender_subject_previews(args.subject, storage)
             sys.exit(0 if success else 1)
+    
+    elif args.command == 'export':
+        consolidator = MasterConsolidator(storage)
+        if args.all_subjects:
+            subjects = consolidator.catalog.subjects()
+        elif args.subject:
+            subjects = [args.subject]
+        else:
+            print("Error: --subject is required when not using --all-subjects")
+            sys.exit(1)
+        
+        exported = [path for path in (consolidator.export_master_excel(subject) for subject in subjects) if path]
+        if not exported:
+            print("No master data to export")
+            sys.exit(1)
+        print(f"\n[SUCCESS] Exported {len(exported)} master Excel file(s)")
+    
+    elif args.command == 'previews':
+        if args.all_subjects:
+            subjects = MasterConsolidator(storage).catalog.subjects()
+        elif args.subject:
+            subjects = [args.subject]
+        else:
+            print("Error: --subject is required when not using --all-subjects")
+            sys.exit(1)
+        
+        results = [prerender_subject_previews(subject, storage, workers=args.workers) for subject in subjects]
+        sys.exit(0 if results and all(results) else 1)
 
 if __name__ == "__main__":
     main()
@@ -1,19 +1,31 @@
 """
-Master Excel consolidation module for combining multiple Excel files by subject.
+Master consolidation module for combining multiple Excel files by subject.
+
+Consolidated questions are stored in the question catalog (question_catalog.py);
+excel_maestro_{subject}.xlsx files are exported from it on demand.
+
+Incremental consolidation is driven by a manifest of (path, size, mtime,
+SHA-256) per source Excel kept in the catalog: files whose size and mtime are
+unchanged are not even read, new and edited files are detected by content,
+and only their rows are upserted.
 """
 
+import hashlib
 import pandas as pd
+from io import BytesIO
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from storage import StorageClient
-from config import EXCELS_ACTUALIZADOS_DIR, EXCELES_MAESTROS_DIR, SUBJECT_FOLDERS
+from config import EXCELS_ACTUALIZADOS_DIR, SUBJECT_FOLDERS
+from question_catalog import QuestionCatalog
 
 class MasterConsolidator:
-    """Handles consolidation of multiple Excel files into master files by subject."""
+    """Handles consolidation of multiple Excel files into the master catalog by subject."""
     
-    def __init__(self, storage_client: StorageClient):
+    def __init__(self, storage_client: StorageClient, catalog: Optional[QuestionCatalog] = None):
         self.storage = storage_client
+        self.catalog = catalog or QuestionCatalog(storage_client)
     
     def get_updated_excel_files(self, subject: str) -> List[str]:
         """
@@ -45,7 +57,7 @@ class MasterConsolidator:
     
     def get_already_processed_files(self, subject: str) -> List[str]:
         """
-        Get list of files that are already included in the master Excel.
+        Get list of files that are already included in the master catalog.
         
         Args:
             subject: Subject area
@@ -54,75 +66,155 @@ class MasterConsolidator:
             List of already processed file names
         """
         try:
-            # Check if master Excel exists
-            filename = f"excel_maestro_{subject.lower()}.xlsx"
-            master_path = EXCELES_MAESTROS_DIR / filename
-            
-            if not self.storage.exists(str(master_path)):
-                return []
-            
-            # Read master Excel and get unique source files
-            df = pd.read_excel(master_path)
-            if 'Archivo origen' in df.columns:
-                return df['Archivo origen'].unique().tolist()
-            else:
-                return []
+            # Indexed lookup of the distinct 'Archivo origen' values
+            return self.catalog.source_files(subject)
                 
         except Exception as e:
             print(f"Error getting processed files for {subject}: {e}")
             return []
     
+    def iter_source_changes(self, subject: str) -> Iterator[Tuple[str, str, Optional[bytes], Optional[tuple]]]:
+        """
+        Compare the subject's source Excel files with the catalog manifest,
+        one file at a time.
+        
+        Files with the same size and mtime as recorded are not read. Others
+        are read and hashed: same content only refreshes the manifest entry.
+        Files that were consolidated before the manifest existed (listed as
+        'Archivo origen') are recorded as they are, without re-importing them.
+        Only the file being yielded is held in memory.
+        
+        Args:
+            subject: Subject area
+            
+        Yields:
+            (status, path, file bytes, manifest entry) where status is
+                'new' / 'changed': bytes and entry are set
+                'refresh': entry to record without re-importing (no bytes)
+                'unchanged': neither is set
+                'removed': in the manifest but no longer on disk (last)
+            and a manifest entry is (path, size, mtime, sha256)
+        """
+        manifest = self.catalog.source_manifest(subject)
+        legacy_sources = None
+        
+        excel_files = self.get_updated_excel_files(subject)
+        for file_path in excel_files:
+            size, mtime = self.storage.file_info(file_path)
+            known = manifest.get(file_path)
+            if known and known[0] == size and known[1] == mtime:
+                yield 'unchanged', file_path, None, None
+                continue
+            
+            data = self.storage.read_bytes(file_path)
+            entry = (file_path, size, mtime, hashlib.sha256(data).hexdigest())
+            if known:
+                if known[2] == entry[3]:
+                    yield 'refresh', file_path, None, entry
+                else:
+                    yield 'changed', file_path, data, entry
+                continue
+            
+            if legacy_sources is None:
+                legacy_sources = set() if manifest else set(self.get_already_processed_files(subject))
+            if Path(file_path).name in legacy_sources:
+                yield 'refresh', file_path, None, entry
+            else:
+                yield 'new', file_path, data, entry
+        
+        present = set(excel_files)
+        for path in manifest:
+            if path not in present:
+                yield 'removed', path, None, None
+    
+    def detect_source_changes(self, subject: str) -> Dict[str, list]:
+        """
+        Summary of iter_source_changes() (file contents are not kept).
+        
+        Args:
+            subject: Subject area
+            
+        Returns:
+            Dictionary with:
+                'new' / 'changed' / 'refresh': [manifest entry]
+                'unchanged' / 'removed': [path]
+        """
+        changes = {'new': [], 'changed': [], 'unchanged': [], 'refresh': [], 'removed': []}
+        for status, file_path, _, entry in self.iter_source_changes(subject):
+            changes[status].append(entry if entry is not None else file_path)
+        return changes
+    
+    def known_pregunta_ids(self) -> set:
+        """
+        Every PreguntaID already handed out: the catalog (all subjects) plus the
+        updated Excels that have not been consolidated yet.
+        
+        Returns:
+            Set of PreguntaIDs
+        """
+        known = self.catalog.all_pregunta_ids()
+        for subject, subject_folder in SUBJECT_FOLDERS.items():
+            if not self.storage.exists(str(EXCELS_ACTUALIZADOS_DIR / subject_folder)):
+                continue
+            manifest = self.catalog.source_manifest(subject)
+            consolidated = set(self.catalog.source_files(subject))
+            for file_path in self.get_updated_excel_files(subject):
+                if file_path in manifest or Path(file_path).name in consolidated:
+                    continue
+                try:
+                    df = pd.read_excel(BytesIO(self.storage.read_bytes(file_path)), usecols=['PreguntaID'])
+                    known.update(df['PreguntaID'].dropna().astype(str))
+                except Exception as e:
+                    print(f"Warning: Could not read PreguntaIDs from {file_path}: {e}")
+        return known
+    
     def get_new_excel_files(self, subject: str) -> List[str]:
         """
-        Get list of new Excel files that haven't been processed yet.
+        Get list of Excel files that are new or were edited since they were consolidated.
         
         Args:
             subject: Subject area
             
         Returns:
-            List of new file paths
+            List of new or changed file paths
         """
         try:
-            all_files = self.get_updated_excel_files(subject)
-            processed_files = self.get_already_processed_files(subject)
-            
-            # Filter out already processed files
-            new_files = []
-            for file_path in all_files:
-                file_name = Path(file_path).name
-                if file_name not in processed_files:
-                    new_files.append(file_path)
-            
-            return new_files
+            changes = self.detect_source_changes(subject)
+            return [entry[0] for entry in changes['new'] + changes['changed']]
             
         except Exception as e:
             print(f"Error getting new Excel files for {subject}: {e}")
             return []
     
-    def read_excel_file(self, file_path: str) -> pd.DataFrame:
+    def read_excel_file(self, file_path: str, data: Optional[bytes] = None) -> pd.DataFrame:
         """
         Read an Excel file and return as DataFrame.
         
         Args:
             file_path: Path to the Excel file
+            data: File content, if it was already read
             
         Returns:
             DataFrame with Excel data
         """
         try:
-            df = pd.read_excel(file_path)
+            if data is None:
+                data = self.storage.read_bytes(file_path)
+            df = pd.read_excel(BytesIO(data))
             return df
         except Exception as e:
             print(f"Error reading Excel file {file_path}: {e}")
             return pd.DataFrame()
     
-    def _consolidate_files_list(self, excel_files: List[str], file_label: str = "file") -> pd.DataFrame:
+    def _consolidate_files_list(self, excel_files: List[str], file_label: str = "file",
+                                manifest_entries: Optional[list] = None) -> pd.DataFrame:
         """
         Private helper method to consolidate a list of Excel files.
         
         Args:
             excel_files: List of file paths to consolidate
             file_label: Label for print messages (e.g., "file", "new file")
+            manifest_entries: If given, (path, size, mtime, sha256) of each file read is appended
             
         Returns:
             Consolidated DataFrame
@@ -135,12 +227,16 @@ class MasterConsolidator:
         
         for file_path in excel_files:
             print(f"Reading {file_label}: {file_path}...")
-            df = self.read_excel_file(file_path)
+            size, mtime = self.storage.file_info(file_path)
+            data = self.storage.read_bytes(file_path)
+            df = self.read_excel_file(file_path, data)
             
             if not df.empty:
                 # Add source file information
                 df['Archivo origen'] = Path(file_path).name
                 dataframes.append(df)
+                if manifest_entries is not None:
+                    manifest_entries.append((file_path, size, mtime, hashlib.sha256(data).hexdigest()))
             else:
                 print(f"Warning: Empty or invalid file {file_path}")
         
@@ -163,12 +259,13 @@ class MasterConsolidator:
         
         return consolidated_df
     
-    def consolidate_subject_excels(self, subject: str) -> pd.DataFrame:
+    def consolidate_subject_excels(self, subject: str, manifest_entries: Optional[list] = None) -> pd.DataFrame:
         """
         Consolidate all Excel files for a specific subject into one master DataFrame.
         
         Args:
             subject: Subject area
+            manifest_entries: If given, receives the manifest entry of each file read
             
         Returns:
             Consolidated DataFrame
@@ -182,7 +279,8 @@ class MasterConsolidator:
                 return pd.DataFrame()
             
             # Use helper method to consolidate
-            consolidated_df = self._consolidate_files_list(excel_files, file_label="file")
+            consolidated_df = self._consolidate_files_list(excel_files, file_label="file",
+                                                           manifest_entries=manifest_entries)
             
             if consolidated_df.empty:
                 print(f"No valid data found for subject: {subject}")
@@ -195,135 +293,123 @@ class MasterConsolidator:
     
     def consolidate_new_excels_only(self, subject: str) -> pd.DataFrame:
         """
-        Consolidate only new Excel files that haven't been processed yet.
+        Consolidate only Excel files that are new or changed since they were consolidated.
         
         Args:
             subject: Subject area
             
         Returns:
-            DataFrame with only new data
+            DataFrame with the rows of the new/changed files
         """
         try:
-            # Get only new Excel files
-            new_excel_files = self.get_new_excel_files(subject)
-            
-            if not new_excel_files:
-                print(f"No new Excel files found for subject: {subject}")
+            found = 0
+            dataframes = []
+            for status, file_path, data, _ in self.iter_source_changes(subject):
+                if status not in ('new', 'changed'):
+                    continue
+                found += 1
+                df = self._read_source_file(file_path, data)
+                if not df.empty:
+                    dataframes.append(df)
+            
+            if not found:
+                print(f"No new or changed Excel files found for subject: {subject}")
                 return pd.DataFrame()
-            
-            print(f"Found {len(new_excel_files)} new files to process for {subject}")
-            
-            # Use helper method to consolidate
-            new_data_df = self._consolidate_files_list(new_excel_files, file_label="new file")
-            
-            if new_data_df.empty:
+            if not dataframes:
                 print(f"No valid new data found for subject: {subject}")
+                return pd.DataFrame()
             
-            return new_data_df
+            return pd.concat(dataframes, ignore_index=True, sort=False)
             
         except Exception as e:
             print(f"Error consolidating new Excel files for {subject}: {e}")
             return pd.DataFrame()
     
+    def _read_source_file(self, file_path: str, data: bytes) -> pd.DataFrame:
+        """Rows of one source Excel, tagged with their 'Archivo origen'."""
+        df = self.read_excel_file(file_path, data)
+        if df.empty:
+            print(f"Warning: Empty or invalid file {file_path}")
+            return df
+        df['Archivo origen'] = Path(file_path).name
+        return df
+    
     def save_master_excel(self, df: pd.DataFrame, subject: str) -> str:
         """
-        Save consolidated DataFrame as master Excel file.
+        Save consolidated DataFrame as the subject's master data (replacing it).
         
         Args:
             df: Consolidated DataFrame
             subject: Subject area
             
         Returns:
-            Path to the saved master file
+            Path to the master catalog
         """
         try:
-            # Ensure output directory exists
-            self.storage.ensure_directory(str(EXCELES_MAESTROS_DIR))
-            
-            # Create filename
-            filename = f"excel_maestro_{subject.lower()}.xlsx"
-            output_path = EXCELES_MAESTROS_DIR / filename
+            count = self.catalog.replace_subject(subject, df)
             
-            # Save Excel file
-            df.to_excel(output_path, index=False)
-            
-            print(f"Master Excel saved: {output_path}")
-            return str(output_path)
+            print(f"Master catalog saved: {subject} ({count} questions) in {self.catalog.db_key}")
+            return str(self.catalog.db_key)
             
         except Exception as e:
-            print(f"Error saving master Excel for {subject}: {e}")
+            print(f"Error saving master data for {subject}: {e}")
             return ""
     
     def append_to_master_excel(self, new_df: pd.DataFrame, subject: str) -> str:
         """
-        Append new data to existing master Excel file, preserving existing columns.
+        Append new data to the subject's master data, preserving existing columns.
+        Questions whose PreguntaID is already in the master keep their existing row.
+        Only the new rows are written.
         
         Args:
             new_df: New data to append
             subject: Subject area
             
         Returns:
-            Path to the updated master file
+            Path to the master catalog
         """
         try:
-            # Ensure output directory exists
-            self.storage.ensure_directory(str(EXCELES_MAESTROS_DIR))
+            added = self.catalog.add_questions(subject, new_df)
             
-            # Create filename
-            filename = f"excel_maestro_{subject.lower()}.xlsx"
-            output_path = EXCELES_MAESTROS_DIR / filename
+            skipped = len(new_df) - added
+            if skipped:
+                print(f"Skipped {skipped} duplicate questions when appending")
+            print(f"Appended {added} new questions to master catalog: {subject}")
             
-            # Check if master file exists
-            if self.storage.exists(str(output_path)):
-                # Read existing master file
-                existing_df = pd.read_excel(output_path)
-                
-                # Ensure new data has same columns as existing data
-                # Add missing columns to new data with default values
-                for col in existing_df.columns:
-                    if col not in new_df.columns:
-                        new_df[col] = None  # or appropriate default value
-                
-                # Add missing columns to existing data
-                for col in new_df.columns:
-                    if col not in existing_df.columns:
-                        existing_df[col] = None
-                
-                # Combine dataframes
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True, sort=False)
-                
-                # Remove duplicates based on PreguntaID (keep first occurrence)
-                initial_count = len(combined_df)
-                combined_df = combined_df.drop_duplicates(subset=['PreguntaID'], keep='first')
-                final_count = len(combined_df)
-                
-                if initial_count != final_count:
-                    print(f"Removed {initial_count - final_count} duplicate questions when appending")
-                
-                # Sort by PreguntaID for consistency
-                combined_df = combined_df.sort_values('PreguntaID').reset_index(drop=True)
-                
-                # Save updated master file
-                combined_df.to_excel(output_path, index=False)
-                print(f"Appended {len(new_df)} new questions to master Excel: {output_path}")
-                
-            else:
-                # No existing master file, save new data as master
-                new_df.to_excel(output_path, index=False)
-                print(f"Created new master Excel with {len(new_df)} questions: {output_path}")
+            return str(self.catalog.db_key)
+            
+        except Exception as e:
+            print(f"Error appending to master data for {subject}: {e}")
+            return ""
+    
+    def export_master_excel(self, subject: str) -> str:
+        """
+        Export the subject's master data to excel_maestro_{subject}.xlsx.
+        
+        Args:
+            subject: Subject area
             
-            return str(output_path)
+        Returns:
+            Path to the exported Excel file ("" if there is nothing to export)
+        """
+        try:
+            output_path = self.catalog.export_master_excel(subject)
+            if output_path:
+                print(f"Master Excel exported: {output_path}")
+            else:
+                print(f"No master data to export for {subject}")
+            return output_path
             
         except Exception as e:
-            print(f"Error appending to master Excel for {subject}: {e}")
+            print(f"Error exporting master Excel for {subject}: {e}")
             return ""
     
     def consolidate_and_save(self, subject: str) -> Tuple[pd.DataFrame, str]:
         """
         Complete FULL consolidation pipeline for a subject.
-        This RESETS the master file by processing ALL Excel files.
+        This RESETS the subject's master data by processing ALL Excel files.
         
-        Use this when you want to rebuild the master file from scratch.
+        Use this when you want to rebuild the master data from scratch.
         For adding only new files, use consolidate_and_append_new() instead.
         
         Args:
@@ -333,41 +419,94 @@ class MasterConsolidator:
             Tuple of (consolidated DataFrame, output file path)
         """
         # Consolidate Excel files
-        consolidated_df = self.consolidate_subject_excels(subject)
+        manifest_entries = []
+        consolidated_df = self.consolidate_subject_excels(subject, manifest_entries)
         
         if consolidated_df.empty:
             return consolidated_df, ""
         
-        # Save master Excel
-        output_path = self.save_master_excel(consolidated_df, subject)
+        # Save master data and restart the manifest from the files just read
+        with self.catalog.batch():
+            output_path = self.save_master_excel(consolidated_df, subject)
+            if output_path:
+                self.catalog.record_sources(subject, manifest_entries, replace=True)
         
         return consolidated_df, output_path
     
     def consolidate_and_append_new(self, subject: str) -> Tuple[pd.DataFrame, str]:
         """
-        INCREMENTAL consolidation pipeline - only processes new files and appends to existing master.
+        INCREMENTAL consolidation pipeline - only processes new or edited files.
         This is the RECOMMENDED default method as it's faster and preserves existing data.
         
-        Only processes Excel files that are not already in the master file.
-        If the master file doesn't exist, it creates a new one.
+        Source files are compared with the manifest (size, mtime, content
+        hash). For each new or changed file its rows are upserted and rows it
+        no longer contains are removed; unchanged files are not read. Work is
+        proportional to the changed files, not to the master size.
+        If the subject is not in the catalog yet, it is created.
         
         Args:
             subject: Subject area
             
         Returns:
-            Tuple of (new data DataFrame, output file path)
+            Tuple of (rows of new/changed files DataFrame, output file path)
+        """
+        # One catalog upload for the whole run on a non-local backend
+        with self.catalog.batch():
+            return self._append_new_and_changed(subject)
+    
+    def _append_new_and_changed(self, subject: str) -> Tuple[pd.DataFrame, str]:
         """
-        # Get only new Excel files and consolidate them
-        new_data_df = self.consolidate_new_excels_only(subject)
+        Body of consolidate_and_append_new (runs inside one catalog batch).
+        Source files are read, upserted and released one at a time.
+        """
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'refresh': 0, 'removed': 0}
+        refresh = []
+        dataframes = []
+        try:
+            for status, file_path, data, entry in self.iter_source_changes(subject):
+                counts[status] += 1
+                if status == 'refresh':
+                    refresh.append(entry)
+                elif status == 'removed':
+                    print(f"WARNING: Source file no longer exists (its questions are kept): {file_path}")
+                elif status in ('new', 'changed'):
+                    df = self._upsert_source_file(subject, f"{status} file", file_path, data, entry)
+                    if df is not None:
+                        dataframes.append(df)
+        except Exception as e:
+            print(f"Error checking source files for {subject}: {e}")
         
-        if new_data_df.empty:
-            print(f"No new data to process for {subject}")
-            return new_data_df, ""
+        if refresh:
+            self.catalog.record_sources(subject, refresh)
+        if not counts['new'] and not counts['changed']:
+            print(f"No new or changed files for {subject} ({counts['unchanged'] + counts['refresh']} unchanged)")
+            return pd.DataFrame(), ""
         
-        # Append new data to existing master Excel
-        output_path = self.append_to_master_excel(new_data_df, subject)
+        print(f"Processed {counts['new']} new and {counts['changed']} changed files for {subject}")
+        if not dataframes:
+            print(f"No valid new data found for subject: {subject}")
+            return pd.DataFrame(), ""
         
-        return new_data_df, output_path
+        return pd.concat(dataframes, ignore_index=True, sort=False), str(self.catalog.db_key)
+    
+    def _upsert_source_file(self, subject: str, label: str, file_path: str, data: bytes,
+                            entry: tuple) -> Optional[pd.DataFrame]:
+        """Upsert one new/changed source file; its rows, or None if nothing was written."""
+        print(f"Reading {label}: {file_path}...")
+        df = self._read_source_file(file_path, data)
+        if df.empty:
+            return None
+        try:
+            written, removed = self.catalog.upsert_source_rows(subject, df['Archivo origen'].iloc[0], df)
+        except Exception as e:
+            print(f"Error updating master data from {file_path}: {e}")
+            return None
+        # Recorded only once its rows are in, so a failed file is retried next run
+        self.catalog.record_sources(subject, [entry])
+        skipped = df['PreguntaID'].nunique() - written
+        print(f"   {written} questions written, {removed} removed"
+              + (f", {skipped} unchanged or owned by another file" if skipped > 0 else ""))
+        return df
     
     def get_consolidation_summary(self, df: pd.DataFrame, subject: str) -> Dict[str, any]:
         """
@@ -437,9 +576,9 @@ class MasterConsolidator:
     def consolidate_all_subjects(self) -> Dict[str, Tuple[pd.DataFrame, str]]:
         """
         FULL consolidation of Excel files for all subjects.
-        This RESETS all master files by processing ALL Excel files.
+        This RESETS all master data by processing ALL Excel files.
         
-        Use this when you want to rebuild all master files from scratch.
+        Use this when you want to rebuild all master data from scratch.
         For adding only new files, use consolidate_all_subjects_incremental() instead.
         
         Returns:
@@ -466,11 +605,11 @@ class MasterConsolidator:
     
     def consolidate_all_subjects_incremental(self) -> Dict[str, Tuple[pd.DataFrame, str]]:
         """
-        INCREMENTAL consolidation for all subjects - only processes new files.
+        INCREMENTAL consolidation for all subjects - only processes new or changed files.
         This is the RECOMMENDED default method as it's faster and preserves existing data.
         
-        Only processes Excel files that are not already in the master files.
-        If a master file doesn't exist, it creates a new one.
+        Unchanged source files are only stat-ed (see detect_source_changes()).
+        If a subject is not in the catalog yet, it is created.
         
         Returns:
             Dictionary mapping subject names to (new_data_DataFrame, output_path) tuples
@@ -487,10 +626,10 @@ class MasterConsolidator:
                 # Print summary for new data
                 summary = self.get_consolidation_summary(new_df, subject)
                 print(f"New data summary for {subject}:")
-                print(f"  New questions added: {summary['total_questions']}")
-                print(f"  New source files: {len(summary.get('source_files', {}))}")
+                print(f"  Questions in new/changed files: {summary['total_questions']}")
+                print(f"  New/changed source files: {len(summary.get('source_files', {}))}")
             else:
-                print(f"No new data found for {subject}")
+                print(f"No new or changed data for {subject}")
         
         return results
 
@@ -0,0 +1,365 @@
+"""
+Question previews: .docx -> PNG through warm LibreOffice processes.
+
+A PreviewService owns a small pool of LibreOffice workers. Each worker keeps
+its own user profile between conversions. Requests wait in a queue for the
+next idle worker.
+
+Rendered pages are stored on disk under PREVIEW_CACHE_DIR, keyed by the
+SHA-256 of the .docx content: the cache survives restarts, is shared by the
+app and the CLI, and a re-generated question file gets a fresh preview.
+prerender() warms the cache for many files at once (main.py previews).
+
+Workers convert with `soffice --convert-to png`, and bulk pre-rendering
+converts a whole batch of files per soffice run. With PREVIEW_USE_UNO=1 and
+the LibreOffice Python bridge (uno) importable, each worker instead keeps one
+headless soffice listening on a local socket, so a preview no longer pays a
+LibreOffice cold start. That path is experimental (not yet verified against a
+real soffice); documents it cannot convert go through the command line.
+"""
+
+import atexit
+import hashlib
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from config import LIBREOFFICE_PATH, PREVIEW_CACHE_DIR, PREVIEW_TIMEOUT, PREVIEW_USE_UNO, PREVIEW_WORKERS
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # LibreOffice's Python bridge is optional
+    uno = None
+
+# Experimental warm listeners: opt-in, and only when the bridge is installed
+USE_UNO = PREVIEW_USE_UNO and uno is not None
+
+# Bump when the rendering changes so old cached PNGs are not reused
+RENDER_VERSION = b"png-v1"
+
+# Files per soffice run when pre-rendering through the command line
+CLI_BATCH_SIZE = 25
+
+SOFFICE_CANDIDATES = [
+    "soffice",
+    "libreoffice",
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+    r"C:\Program Files\LibreOffice\program\soffice.com",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+]
+
+SOFFICE_FLAGS = ["--headless", "--invisible", "--nodefault", "--nolockcheck", "--nologo", "--norestore"]
+
+
+def find_soffice() -> Optional[str]:
+    """LibreOffice executable: LIBREOFFICE_PATH, else the first one found."""
+    for candidate in ([LIBREOFFICE_PATH] if LIBREOFFICE_PATH else []) + SOFFICE_CANDIDATES:
+        found = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if found:
+            return found
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _read_pngs(directory: Path, stem: str) -> List[bytes]:
+    return [path.read_bytes() for path in sorted(directory.glob(f"{stem}*.png"))]
+
+
+class PreviewCache:
+    """PNG pages on disk, one folder per .docx content hash."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or PREVIEW_CACHE_DIR)
+
+    @staticmethod
+    def key(docx_bytes: bytes) -> str:
+        return hashlib.sha256(RENDER_VERSION + docx_bytes).hexdigest()
+
+    def _folder(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """Cached pages, or None if this content was never rendered."""
+        folder = self._folder(key)
+        if not folder.is_dir():
+            return None
+        return _read_pngs(folder, "page-") or None
+
+    def put(self, key: str, pages: Sequence[bytes]) -> None:
+        """Store pages atomically (readers never see a half-written folder)."""
+        folder = self._folder(key)
+        folder.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=folder.parent))
+        for number, page in enumerate(pages, start=1):
+            (staging / f"page-{number:03d}.png").write_bytes(page)
+        try:
+            os.replace(staging, folder)
+        except OSError:
+            # Rendered concurrently by someone else: keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+class LibreOfficeWorker:
+    """
+    One LibreOffice conversion slot with a persistent user profile.
+
+    Conversions run `soffice --convert-to png`. With use_uno, a headless
+    soffice is started on first use and kept listening on a local socket;
+    documents are loaded and exported through that process, and the worker
+    falls back to the command line if the listener cannot start.
+    """
+
+    def __init__(self, soffice: str, profile_dir: Path, timeout: int = PREVIEW_TIMEOUT,
+                 use_uno: bool = USE_UNO):
+        self.soffice = soffice
+        self.profile_dir = Path(profile_dir)
+        self.timeout = timeout
+        self.use_uno = use_uno and uno is not None
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    @property
+    def _profile_arg(self) -> str:
+        return f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}"
+
+    # ── Warm listener (uno) ───────────────────────────────────────────────────
+
+    def _start_listener(self) -> None:
+        port = _free_port()
+        self._process = subprocess.Popen(
+            [self.soffice, *SOFFICE_FLAGS, self._profile_arg,
+             f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                context = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError("LibreOffice listener did not start")
+                time.sleep(0.25)
+        self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    @staticmethod
+    def _properties(**values) -> tuple:
+        properties = []
+        for name, value in values.items():
+            prop = PropertyValue()
+            prop.Name, prop.Value = name, value
+            properties.append(prop)
+        return tuple(properties)
+
+    def _convert_with_listener(self, docx_path: Path, png_path: Path) -> None:
+        if self._desktop is None or self._process is None or self._process.poll() is not None:
+            self._start_listener()
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(docx_path)), "_blank", 0, self._properties(Hidden=True, ReadOnly=True)
+        )
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not open {docx_path.name}")
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(str(png_path)), self._properties(FilterName="writer_png_Export")
+            )
+        finally:
+            document.close(True)
+
+    # ── Command line ──────────────────────────────────────────────────────────
+
+    def _convert_with_cli(self, docx_paths: List[Path], out_dir: Path) -> None:
+        result = subprocess.run(
+            [self.soffice, *SOFFICE_FLAGS, self._profile_arg,
+             "--convert-to", "png", "--outdir", str(out_dir), *map(str, docx_paths)],
+            capture_output=True, text=True, timeout=self.timeout * len(docx_paths),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Return code {result.returncode}: {result.stderr[:200]}")
+
+    # ── Conversion ────────────────────────────────────────────────────────────
+
+    def render_many(self, documents: Sequence[bytes]) -> List[List[bytes]]:
+        """PNG pages for each .docx (an empty list where conversion failed)."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            work = Path(temp_dir)
+            paths = []
+            for index, data in enumerate(documents):
+                path = work / f"q{index:04d}.docx"
+                path.write_bytes(data)
+                paths.append(path)
+
+            cli_paths = paths
+            if self.use_uno:
+                cli_paths = []
+                for path in paths:
+                    try:
+                        self._convert_with_listener(path, path.with_suffix(".png"))
+                    except Exception as e:
+                        # The listener may have died: start a new one next time
+                        print(f"Preview conversion failed for {path.name}, using the command line: {e}")
+                        self.close()
+                        cli_paths.append(path)
+            if cli_paths:
+                try:
+                    self._convert_with_cli(cli_paths, work)
+                except (subprocess.TimeoutExpired, RuntimeError) as e:
+                    print(f"LibreOffice conversion failed: {e}")
+
+            return [_read_pngs(work, path.stem) for path in paths]
+
+    def render(self, data: bytes) -> List[bytes]:
+        """PNG pages of one .docx, retrying once with a fresh LibreOffice."""
+        pages = self.render_many([data])[0]
+        if not pages:
+            self.close()
+            pages = self.render_many([data])[0]
+        return pages
+
+    def close(self) -> None:
+        """Stop the listener process, if any."""
+        self._desktop = None
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+
+
+class PreviewService:
+    """Cached .docx -> PNG previews rendered by a pool of LibreOffice workers."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, workers: Optional[int] = None,
+                 soffice: Optional[str] = None, use_uno: bool = USE_UNO):
+        self.cache = PreviewCache(cache_dir)
+        self.soffice = soffice or find_soffice()
+        self.worker_count = max(1, workers or PREVIEW_WORKERS)
+        self.use_uno = use_uno and uno is not None
+        self._idle: "queue.Queue[LibreOfficeWorker]" = queue.Queue()
+        self._workers: List[LibreOfficeWorker] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def available(self) -> bool:
+        return self.soffice is not None
+
+    def _acquire_worker(self) -> LibreOfficeWorker:
+        """Next idle worker; workers are created lazily up to worker_count."""
+        with self._lock:
+            if self._idle.empty() and len(self._workers) < self.worker_count:
+                profile_dir = self.cache.cache_dir / ".libreoffice-profiles" / f"worker-{len(self._workers) + 1}"
+                worker = LibreOfficeWorker(self.soffice, profile_dir, use_uno=self.use_uno)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def _with_worker(self, job: Callable[[LibreOfficeWorker], List]) -> List:
+        worker = self._acquire_worker()
+        try:
+            return job(worker)
+        finally:
+            self._idle.put(worker)
+
+    def render(self, docx_path: str) -> List[bytes]:
+        """
+        PNG pages (bytes) of a question document, from the cache when the same
+        content was rendered before. Returns [] if it cannot be converted.
+        """
+        data = Path(docx_path).read_bytes()
+        key = self.cache.key(data)
+        pages = self.cache.get(key)
+        if pages is not None:
+            return pages
+        if not self.available:
+            print("LibreOffice not found: cannot render previews")
+            return []
+        pages = self._with_worker(lambda worker: worker.render(data))
+        if pages:
+            self.cache.put(key, pages)
+        return pages
+
+    def prerender(self, docx_paths: Sequence[str], progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """
+        Render every document that is not cached yet, using all workers.
+
+        Args:
+            docx_paths: Question .docx files (local filesystem paths)
+            progress: Optional callback(done, total) over the uncached files
+
+        Returns:
+            Counts: total, cached, rendered, failed
+        """
+        pending: Dict[str, bytes] = {}
+        failed = 0
+        for path in docx_paths:
+            try:
+                data = Path(path).read_bytes()
+            except Exception as e:
+                print(f"Cannot read {path}: {e}")
+                failed += 1
+                continue
+            key = self.cache.key(data)
+            if self.cache.get(key) is None:
+                pending.setdefault(key, data)
+
+        stats = {"total": len(docx_paths), "cached": len(docx_paths) - failed - len(pending), "rendered": 0, "failed": failed}
+        if not pending:
+            return stats
+        if not self.available:
+            print("LibreOffice not found: cannot render previews")
+            stats["failed"] += len(pending)
+            return stats
+
+        keys = list(pending)
+        # A warm listener converts one document at a time; the command line
+        # amortizes its start-up over a batch
+        batch_size = 1 if self.use_uno else CLI_BATCH_SIZE
+        batches = [keys[start:start + batch_size] for start in range(0, len(keys), batch_size)]
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            futures = [
+                executor.submit(self._with_worker, lambda worker, batch=batch: worker.render_many([pending[k] for k in batch]))
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                for key, pages in zip(batch, future.result()):
+                    if pages:
+                        self.cache.put(key, pages)
+                        stats["rendered"] += 1
+                    else:
+                        stats["failed"] += 1
+                done += len(batch)
+                if progress:
+                    progress(done, len(keys))
+        return stats
+
+    def close(self) -> None:
+        """Stop all LibreOffice processes."""
+        for worker in self._workers:
+            worker.close()
@@ -0,0 +1,659 @@
+"""
+Question catalog: the live store for master question data.
+
+All subjects live in one SQLite database (WAL journal, so the Streamlit app
+and the CLI can use it at the same time). Each question row keeps the full
+master record as JSON plus the filter columns (eje, área, unidad/subtema,
+habilidad, dificultad, archivo origen) as indexed SQL columns. Loading a
+subject no longer parses an .xlsx and filters can run as indexed queries.
+
+Question usage is an append-only event table (one row per question per
+downloaded guide). Recording a guide inserts one event per question, deleting
+a guide is a filtered DELETE, and usage counts / guide listings are indexed
+aggregations. The "Número de usos" and "Nombre guía / Fecha descarga (uso N)"
+columns are no longer stored: load_subject() and the Excel export derive
+them from the events, so existing consumers see the same layout.
+
+The excel_maestro_{subject}.xlsx files are no longer read on every access: an
+existing one is imported the first time its subject is requested, and
+export_master_excel() writes a fresh copy on demand (for teachers).
+
+On a non-local storage backend (STORAGE_BACKEND=gcp) the container disk is
+not persistent, so the database is kept in storage under CATALOG_DB_PATH: it
+is downloaded to a local working copy when the catalog is opened and uploaded
+again after every transaction that changed rows, or once at the end of a
+batch() that groups the writes of one action. Only one instance should write
+at a time; with concurrent writers the last upload wins.
+"""
+
+import json
+import math
+import re
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import StorageClient
+from config import (
+    CATALOG_DB_PATH,
+    EXCELES_MAESTROS_DIR,
+    EXCEL_COLUMNS,
+    SUBJECT_FOLDERS,
+    USAGE_TRACKING_BASE_COLUMNS,
+    get_usage_column_names,
+)
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+SQLITE_MIME = "application/vnd.sqlite3"
+
+# Serializes snapshot uploads of the catalog on non-local backends
+_UPLOAD_LOCK = threading.Lock()
+
+# SQL column -> master column, for the indexed filter columns
+INDEXED_COLUMNS = {
+    "eje_tematico": EXCEL_COLUMNS["eje_tematico"],
+    "area_tematica": EXCEL_COLUMNS["area_tematica"],
+    "subtema": EXCEL_COLUMNS["conocimiento_subtema"],
+    "habilidad": EXCEL_COLUMNS["habilidad"],
+    "dificultad": EXCEL_COLUMNS["dificultad"],
+    "archivo_origen": EXCEL_COLUMNS["archivo_origen"],
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS subjects (
+    subject TEXT PRIMARY KEY,
+    columns TEXT NOT NULL,
+    datetime_columns TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS questions (
+    subject TEXT NOT NULL,
+    pregunta_id TEXT NOT NULL,
+    {", ".join(f"{column} TEXT" for column in INDEXED_COLUMNS)},
+    data TEXT NOT NULL,
+    PRIMARY KEY (subject, pregunta_id)
+);
+{"".join(
+    f"CREATE INDEX IF NOT EXISTS idx_questions_{column} ON questions (subject, {column});"
+    for column in INDEXED_COLUMNS
+)}
+CREATE TABLE IF NOT EXISTS usage_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    pregunta_id TEXT NOT NULL,
+    guide_name TEXT NOT NULL,
+    downloaded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_usage_question ON usage_events (subject, pregunta_id);
+CREATE INDEX IF NOT EXISTS idx_usage_guide ON usage_events (subject, guide_name, downloaded_at);
+CREATE TABLE IF NOT EXISTS source_manifest (
+    subject TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (subject, path)
+);
+"""
+
+# Usage columns of the legacy wide layout, derived from usage_events on read
+USAGE_COUNT_COLUMN = USAGE_TRACKING_BASE_COLUMNS[0]
+_USAGE_COLUMN_RE = re.compile(r"^(Nombre guía|Fecha descarga) \(uso (\d+)\)$")
+
+# Per-question use number: the n-th recorded event of that question
+_NUMBERED_EVENTS = """
+SELECT pregunta_id, guide_name, downloaded_at,
+       ROW_NUMBER() OVER (PARTITION BY pregunta_id ORDER BY id) AS use_number
+FROM usage_events
+WHERE subject = ?
+"""
+
+
+def master_excel_path(subject: str) -> Path:
+    """Path of the exported master Excel for a subject."""
+    return EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None or value is pd.NaT:
+        return True
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _clean_value(value: Any) -> Any:
+    """Convert a DataFrame cell to a JSON-friendly value (NaN -> None)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if _is_missing(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _is_usage_column(column: Any) -> bool:
+    return column == USAGE_COUNT_COLUMN or bool(_USAGE_COLUMN_RE.match(str(column)))
+
+
+def _event_time(value: Any) -> Optional[str]:
+    """Usage date as stored by the tracker ("YYYY-MM-DD HH:MM:SS")."""
+    if _is_missing(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(_clean_value(value))
+
+
+def split_usage_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[str, str, Optional[str]]]]:
+    """
+    Separate the wide usage columns of a master sheet from the question data.
+
+    Returns:
+        (df without usage columns, [(PreguntaID, guide name, date), ...])
+        with each question's events in use-number order
+    """
+    usage_columns = [column for column in df.columns if _is_usage_column(column)]
+    if not usage_columns:
+        return df, []
+    pregunta_col = EXCEL_COLUMNS["pregunta_id"]
+    use_numbers = sorted(
+        int(match.group(2))
+        for match in map(_USAGE_COLUMN_RE.match, map(str, usage_columns))
+        if match and match.group(1) == "Nombre guía"
+    )
+    events = []
+    for use_number in use_numbers:
+        guide_col, date_col = get_usage_column_names(use_number)
+        guides = df[guide_col]
+        used = guides.notna() & guides.astype(str).str.strip().ne("")
+        dates = df.loc[used, date_col] if date_col in df.columns else pd.Series(None, index=df.index[used])
+        events.extend(
+            (str(pregunta_id), use_number, str(guide), _event_time(when))
+            for pregunta_id, guide, when in zip(df.loc[used, pregunta_col], guides[used], dates)
+        )
+    events.sort(key=lambda event: (event[0], event[1]))
+    return (
+        df.drop(columns=usage_columns),
+        [(pregunta_id, guide, when) for pregunta_id, _, guide, when in events],
+    )
+
+
+def _index_value(sql_column: str, value: Any) -> Optional[str]:
+    """Text stored in an indexed column; difficulty 1 / 1.0 / "1" all become "1"."""
+    value = _clean_value(value)
+    if value is None:
+        return None
+    if sql_column == "dificultad":
+        try:
+            return str(int(float(str(value))))
+        except ValueError:
+            pass
+    return str(value)
+
+
+class QuestionCatalog:
+    """SQLite-backed store of master questions, by subject."""
+
+    def __init__(self, storage_client: Optional[StorageClient] = None, db_path: Optional[Path] = None):
+        self.storage = storage_client or StorageClient()
+        # Storage key of the database; on a non-local backend db_path is a local working copy
+        self.db_key = str(Path(db_path or CATALOG_DB_PATH))
+        self.remote = self.storage.backend != "local"
+        if self.remote:
+            self.db_path = Path(tempfile.gettempdir()) / "question_catalog" / Path(self.db_key).name
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._download()
+        else:
+            self.db_path = Path(self.db_key)
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-thread batch state: nesting depth and whether a batched write changed rows
+        self._batches = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._migrate_stored_usage(conn)
+
+    @contextmanager
+    def _connect(self):
+        """Connection wrapped in a transaction (commit on success, rollback on error)."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+            if self.remote and conn.total_changes:
+                if getattr(self._batches, "depth", 0):
+                    self._batches.dirty = True
+                else:
+                    self._upload(conn)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the writes of one action (a consolidation, a guide download): on
+        a non-local backend the database is uploaded once when the outermost
+        batch ends, if any of its transactions changed rows, instead of after
+        every transaction. Committed writes are uploaded even if the action fails.
+        """
+        self._batches.depth = getattr(self._batches, "depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._batches.depth -= 1
+            if not self._batches.depth and getattr(self._batches, "dirty", False):
+                self._batches.dirty = False
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    self._upload(conn)
+                finally:
+                    conn.close()
+
+    def _download(self):
+        """Replace the local working copy with the database in storage (if any)."""
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+        if self.storage.exists(self.db_key):
+            self.db_path.write_bytes(self.storage.read_bytes(self.db_key))
+
+    def _upload(self, conn):
+        """Upload a consistent snapshot of the committed database to storage."""
+        with _UPLOAD_LOCK:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                snapshot_path = Path(tmp_dir) / self.db_path.name
+                snapshot = sqlite3.connect(snapshot_path)
+                try:
+                    conn.backup(snapshot)
+                finally:
+                    snapshot.close()
+                self.storage.write_bytes(self.db_key, snapshot_path.read_bytes(), content_type=SQLITE_MIME)
+
+    # ── Subjects ──────────────────────────────────────────────────────────────
+
+    def _subject_meta(self, conn, subject: str):
+        row = conn.execute(
+            "SELECT columns, datetime_columns FROM subjects WHERE subject = ?", (subject,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def _set_subject_meta(self, conn, subject: str, columns: List[str], datetime_columns: List[str]):
+        conn.execute(
+            "INSERT INTO subjects (subject, columns, datetime_columns) VALUES (?, ?, ?) "
+            "ON CONFLICT(subject) DO UPDATE SET columns = excluded.columns, "
+            "datetime_columns = excluded.datetime_columns",
+            (subject, json.dumps(columns, ensure_ascii=False), json.dumps(datetime_columns, ensure_ascii=False)),
+        )
+
+    def _extend_columns(self, conn, subject: str, new_columns: Iterable[str],
+                        new_datetime_columns: Iterable[str] = ()):
+        meta = self._subject_meta(conn, subject)
+        columns, datetime_columns = meta if meta else ([], [])
+        added = [column for column in dict.fromkeys(new_columns) if column not in columns]
+        added_dt = [column for column in new_datetime_columns if column not in datetime_columns]
+        if meta is None or added or added_dt:
+            self._set_subject_meta(conn, subject, columns + added, datetime_columns + added_dt)
+
+    def subjects(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT subject FROM subjects ORDER BY subject")]
+
+    def has_subject(self, subject: str) -> bool:
+        """
+        Whether the catalog holds the subject. A legacy master Excel for the
+        subject is imported on first use.
+        """
+        with self._connect() as conn:
+            if self._subject_meta(conn, subject) is not None:
+                return True
+        master_file = master_excel_path(subject)
+        if self.storage.exists(str(master_file)):
+            print(f"Importing legacy master Excel into catalog: {master_file}")
+            self.import_master_excel(subject, master_file)
+            return True
+        return False
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def _insert_rows(self, conn, subject: str, df: pd.DataFrame, on_conflict: str) -> int:
+        """
+        Write question rows. on_conflict decides what happens to a PreguntaID
+        that is already stored: "replace" it, "ignore" the new row, or
+        "update_source" (update only if it comes from the same source file and
+        its data changed). Returns the number of rows written.
+        """
+        pregunta_col = EXCEL_COLUMNS["pregunta_id"]
+        df = df[df[pregunta_col].notna()].drop_duplicates(subset=[pregunta_col], keep="first")
+        has_usage = any(_is_usage_column(column) for column in df.columns)
+        df, events = split_usage_columns(df)
+        datetime_columns = list(df.select_dtypes(include=["datetime", "datetimetz"]).columns)
+        records = json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+
+        rows = [
+            (
+                subject,
+                str(record[pregunta_col]),
+                *(_index_value(sql_col, record.get(master_col)) for sql_col, master_col in INDEXED_COLUMNS.items()),
+                json.dumps(record, ensure_ascii=False),
+            )
+            for record in records
+        ]
+        columns = ", ".join(("subject", "pregunta_id", *INDEXED_COLUMNS, "data"))
+        placeholders = ", ".join("?" * (len(INDEXED_COLUMNS) + 3))
+        if on_conflict == "update_source":
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in (*INDEXED_COLUMNS, "data"))
+            statement = (
+                f"INSERT INTO questions ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(subject, pregunta_id) DO UPDATE SET {assignments} "
+                f"WHERE questions.archivo_origen IS excluded.archivo_origen AND questions.data IS NOT excluded.data"
+            )
+        else:
+            verb = "INSERT OR REPLACE" if on_conflict == "replace" else "INSERT OR IGNORE"
+            statement = f"{verb} INTO questions ({columns}) VALUES ({placeholders})"
+        before = conn.total_changes
+        conn.executemany(statement, rows)
+        inserted = conn.total_changes - before
+        if on_conflict == "replace" and has_usage:
+            # A full master sheet carries the usage history: it replaces the events
+            conn.execute("DELETE FROM usage_events WHERE subject = ?", (subject,))
+            self._insert_events(conn, subject, events)
+        self._extend_columns(conn, subject, [str(column) for column in df.columns], datetime_columns)
+        return inserted
+
+    def _insert_events(self, conn, subject: str, events: Iterable[Tuple[str, str, Optional[str]]]) -> None:
+        conn.executemany(
+            "INSERT INTO usage_events (subject, pregunta_id, guide_name, downloaded_at) VALUES (?, ?, ?, ?)",
+            ((subject, *event) for event in events),
+        )
+
+    def _migrate_stored_usage(self, conn) -> None:
+        """Move usage columns kept inside question records (older catalogs) to usage_events."""
+        for subject, columns in conn.execute("SELECT subject, columns FROM subjects").fetchall():
+            if any(_is_usage_column(column) for column in json.loads(columns)):
+                print(f"Migrating stored usage columns of {subject} to usage events")
+                df = self._frame(conn, subject, with_usage=False)
+                conn.execute("DELETE FROM questions WHERE subject = ?", (subject,))
+                conn.execute("DELETE FROM subjects WHERE subject = ?", (subject,))
+                self._insert_rows(conn, subject, df, on_conflict="replace")
+
+    def replace_subject(self, subject: str, df: pd.DataFrame) -> int:
+        """
+        Replace all questions of a subject with `df`. Returns the row count.
+        Usage events are kept, unless `df` is a master sheet with usage columns.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM questions WHERE subject = ?", (subject,))
+            conn.execute("DELETE FROM subjects WHERE subject = ?", (subject,))
+            return self._insert_rows(conn, subject, df, on_conflict="replace")
+
+    def add_questions(self, subject: str, df: pd.DataFrame) -> int:
+        """
+        Add questions, keeping the existing row when a PreguntaID is already
+        in the catalog. Returns the number of new questions.
+        """
+        self.has_subject(subject)
+        with self._connect() as conn:
+            return self._insert_rows(conn, subject, df, on_conflict="ignore")
+
+    def upsert_source_rows(self, subject: str, source_file: str, df: pd.DataFrame) -> Tuple[int, int]:
+        """
+        Bring the questions of one (new or edited) source Excel up to date.
+
+        Rows of `df` are inserted, or overwrite the stored row when it came
+        from the same source file and differs (a PreguntaID owned by another
+        file keeps its row). Stored rows of this source that are no longer in `df` are
+        deleted. Usage events are not touched.
+
+        Args:
+            subject: Subject area
+            source_file: 'Archivo origen' value of the rows
+            df: Current rows of the source file
+
+        Returns:
+            (rows written, rows removed)
+        """
+        self.has_subject(subject)
+        pregunta_col = EXCEL_COLUMNS["pregunta_id"]
+        current_ids = [str(pregunta_id) for pregunta_id in df[pregunta_col].dropna()]
+        with self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM questions WHERE subject = ? AND archivo_origen = ? "
+                "AND pregunta_id NOT IN (SELECT value FROM json_each(?))",
+                (subject, source_file, json.dumps(current_ids, ensure_ascii=False)),
+            ).rowcount
+            written = self._insert_rows(conn, subject, df, on_conflict="update_source")
+        return written, removed
+
+    # ── Source manifest ───────────────────────────────────────────────────────
+
+    def source_manifest(self, subject: str) -> Dict[str, Tuple[int, float, str]]:
+        """Consolidated source Excels of a subject: path -> (size, mtime, sha256)."""
+        with self._connect() as conn:
+            return {
+                path: (size, mtime, sha256)
+                for path, size, mtime, sha256 in conn.execute(
+                    "SELECT path, size, mtime, sha256 FROM source_manifest WHERE subject = ?", (subject,)
+                )
+            }
+
+    def record_sources(self, subject: str, entries: Iterable[Tuple[str, int, float, str]],
+                       replace: bool = False) -> None:
+        """
+        Store (path, size, mtime, sha256) manifest entries for a subject.
+        With replace=True the subject's manifest becomes exactly `entries`.
+        """
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM source_manifest WHERE subject = ?", (subject,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO source_manifest (subject, path, size, mtime, sha256) VALUES (?, ?, ?, ?, ?)",
+                ((subject, *entry) for entry in entries),
+            )
+
+    def import_master_excel(self, subject: str, path: Optional[Path] = None) -> int:
+        """Load an excel_maestro_*.xlsx into the catalog (replacing the subject)."""
+        path = path or master_excel_path(subject)
+        df = pd.read_excel(BytesIO(self.storage.read_bytes(str(path))))
+        return self.replace_subject(subject, df)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def _frame(self, conn, subject: str, where: str = "", params: tuple = (),
+               with_usage: bool = True) -> pd.DataFrame:
+        meta = self._subject_meta(conn, subject)
+        if meta is None:
+            return pd.DataFrame()
+        columns, datetime_columns = meta
+        records = [
+            json.loads(data)
+            for (data,) in conn.execute(
+                f"SELECT data FROM questions WHERE subject = ?{where} ORDER BY pregunta_id",
+                (subject, *params),
+            )
+        ]
+        df = pd.DataFrame.from_records(records, columns=columns)
+        for column in datetime_columns:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+        return self._attach_usage(conn, subject, df) if with_usage else df
+
+    def _attach_usage(self, conn, subject: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Add "Número de usos" and the per-use guide/date columns, derived from the events."""
+        if df.empty:
+            return df
+        events = pd.read_sql_query(_NUMBERED_EVENTS + " ORDER BY id", conn, params=(subject,))
+        pregunta_ids = df[EXCEL_COLUMNS["pregunta_id"]].astype(str)
+        usage = {USAGE_COUNT_COLUMN: pregunta_ids.map(events["pregunta_id"].value_counts()).fillna(0).astype(int)}
+        if not events.empty:
+            wide = events.pivot(index="pregunta_id", columns="use_number", values=["guide_name", "downloaded_at"])
+            for use_number in range(1, int(events["use_number"].max()) + 1):
+                guide_col, date_col = get_usage_column_names(use_number)
+                usage[guide_col] = pregunta_ids.map(wide[("guide_name", use_number)])
+                usage[date_col] = pregunta_ids.map(wide[("downloaded_at", use_number)])
+        return pd.concat([df, pd.DataFrame(usage, index=df.index)], axis=1)
+
+    def load_subject(self, subject: str) -> pd.DataFrame:
+        """All questions of a subject, sorted by PreguntaID (empty if unknown)."""
+        if not self.has_subject(subject):
+            return pd.DataFrame()
+        with self._connect() as conn:
+            return self._frame(conn, subject)
+
+    def query(self, subject: str, pregunta_ids: Optional[Iterable[str]] = None, **filters) -> pd.DataFrame:
+        """
+        Questions matching all given filters, using the SQL indexes.
+
+        Args:
+            subject: Subject area
+            pregunta_ids: Restrict to these PreguntaIDs
+            **filters: Indexed column (eje_tematico, area_tematica, subtema,
+                habilidad, dificultad, archivo_origen) -> value or list of values
+        """
+        if not self.has_subject(subject):
+            return pd.DataFrame()
+        clauses = []
+        params: List[Any] = []
+        criteria = dict(filters)
+        if pregunta_ids is not None:
+            criteria["pregunta_id"] = list(pregunta_ids)
+        for column, value in criteria.items():
+            if column != "pregunta_id" and column not in INDEXED_COLUMNS:
+                raise ValueError(f"Unknown catalog filter: {column}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            values = [v if column == "pregunta_id" else _index_value(column, v) for v in values]
+            clauses.append(f" AND {column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        with self._connect() as conn:
+            return self._frame(conn, subject, "".join(clauses), tuple(params))
+
+    def source_files(self, subject: str) -> List[str]:
+        """Distinct 'Archivo origen' values of a subject."""
+        if not self.has_subject(subject):
+            return []
+        with self._connect() as conn:
+            return [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT archivo_origen FROM questions "
+                    "WHERE subject = ? AND archivo_origen IS NOT NULL",
+                    (subject,),
+                )
+            ]
+
+    def all_pregunta_ids(self) -> set:
+        """PreguntaIDs of every subject (legacy master Excels are imported first)."""
+        for subject in SUBJECT_FOLDERS:
+            self.has_subject(subject)
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT pregunta_id FROM questions")}
+
+    # ── Usage ─────────────────────────────────────────────────────────────────
+
+    def _existing_ids(self, conn, subject: str, pregunta_ids: List[str]) -> set:
+        existing = set()
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(pregunta_ids), 500):
+            chunk = pregunta_ids[start:start + 500]
+            existing.update(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT pregunta_id FROM questions WHERE subject = ? "
+                    f"AND pregunta_id IN ({', '.join('?' * len(chunk))})",
+                    (subject, *chunk),
+                )
+            )
+        return existing
+
+    def record_usage(self, subject: str, pregunta_ids: Iterable[str], guide_name: str,
+                     downloaded_at: str) -> List[str]:
+        """
+        Append one usage event per question of a downloaded guide.
+
+        Returns:
+            PreguntaIDs that are not in the catalog (no event recorded for them)
+        """
+        ids = [str(pregunta_id) for pregunta_id in pregunta_ids]
+        with self._connect() as conn:
+            existing = self._existing_ids(conn, subject, list(dict.fromkeys(ids)))
+            self._insert_events(
+                conn, subject, ((pregunta_id, guide_name, downloaded_at) for pregunta_id in ids if pregunta_id in existing)
+            )
+        return [pregunta_id for pregunta_id in ids if pregunta_id not in existing]
+
+    def usage_distribution(self, subject: str) -> Dict[int, int]:
+        """Number of questions per usage count (0 = never used), by usage count."""
+        with self._connect() as conn:
+            return dict(conn.execute(
+                "SELECT COALESCE(uses.n, 0), COUNT(*) FROM questions "
+                "LEFT JOIN (SELECT pregunta_id, COUNT(*) AS n FROM usage_events "
+                "           WHERE subject = ? GROUP BY pregunta_id) AS uses "
+                "ON uses.pregunta_id = questions.pregunta_id "
+                "WHERE questions.subject = ? GROUP BY 1 ORDER BY 1",
+                (subject, subject),
+            ).fetchall())
+
+    def usage_events(self, subject: str) -> pd.DataFrame:
+        """
+        Usage events of a subject in recording order: pregunta_id, guide_name,
+        downloaded_at and use_number (n-th use of that question).
+        """
+        with self._connect() as conn:
+            return pd.read_sql_query(_NUMBERED_EVENTS + " ORDER BY id", conn, params=(subject,))
+
+    def delete_usage(self, subject: str, guide_name: str, downloaded_at: Optional[str] = None,
+                     pregunta_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Delete the usage events of one guide (optionally only those with the
+        given download date / questions). Later uses of each question move
+        down one number. Returns the affected PreguntaIDs.
+        """
+        where = "subject = ? AND guide_name = ?"
+        params: List[Any] = [subject, guide_name]
+        if downloaded_at:
+            where += " AND downloaded_at = ?"
+            params.append(downloaded_at)
+        if pregunta_ids is not None:
+            ids = [str(pregunta_id) for pregunta_id in pregunta_ids]
+            where += f" AND pregunta_id IN ({', '.join('?' * len(ids))})"
+            params.extend(ids)
+        with self._connect() as conn:
+            affected = [
+                row[0]
+                for row in conn.execute(f"SELECT DISTINCT pregunta_id FROM usage_events WHERE {where}", params)
+            ]
+            conn.execute(f"DELETE FROM usage_events WHERE {where}", params)
+        return affected
+
+    # ── Export ────────────────────────────────────────────────────────────────
+
+    def master_excel_bytes(self, subject: str) -> bytes:
+        """The subject's questions as .xlsx bytes (b"" if it has none)."""
+        df = self.load_subject(subject)
+        if df.empty:
+            return b""
+        buffer = BytesIO()
+        df.to_excel(buffer, index=False)
+        return buffer.getvalue()
+
+    def export_master_excel(self, subject: str, output_path: Optional[Path] = None) -> str:
+        """
+        Write the subject's questions to an .xlsx (default: the
+        excel_maestro_{subject}.xlsx path). Returns the written path, or "" if
+        the subject has no questions.
+        """
+        data = self.master_excel_bytes(subject)
+        if not data:
+            return ""
+        output_path = output_path or master_excel_path(subject)
+        self.storage.ensure_directory(str(Path(output_path).parent))
+        self.storage.write_bytes(str(output_path), data, content_type=XLSX_MIME)
+        return str(output_path)
@@ -1,16 +1,37 @@
 """
 Word document processing module for splitting questions into individual files.
 Each question is already 1 page, so we split by pages to preserve ALL formatting.
+
+The source .docx is read once into memory and its document.xml parsed once;
+each question package is written straight from the in-memory parts and only
+carries the media its own content references (see docx_package.py).
 """
 
-from typing import List, Dict
-import zipfile
-import re
-import tempfile
-import os
+from typing import List, Dict, Optional
+import copy
+
+from lxml import etree
 
 from storage import StorageClient
 from config import PREGUNTAS_DIVIDIDAS_DIR, SUBJECT_FOLDERS
+from docx_package import (
+    DocxPackage,
+    W_NS,
+    referenced_relationship_ids,
+    serialize_xml,
+    write_package,
+)
+
+
+def split_docx_bytes(doc_bytes: bytes) -> List[bytes]:
+    """
+    Split a Word document (bytes) into one .docx (bytes) per question.
+
+    Pure function with no storage I/O, so it can be submitted to a
+    ProcessPoolExecutor when several subject sets are processed at once.
+    """
+    return QuestionProcessor(None).split_docx_bytes(doc_bytes)
+
 
 class QuestionProcessor:
     """Handles splitting Word documents into individual question files by pages."""
@@ -20,73 +41,108 @@ class QuestionProcessor:
         
     def split_document_by_pages(self, docx_path: str) -> List[str]:
         """
-        Split a Word document into individual pages (questions) by working directly with the ZIP structure.
-        This preserves ALL formatting and images perfectly.
-        
+        Split a Word document into individual pages (questions) and save them as
+        question_NNN.docx placeholders.
+
         Args:
             docx_path: Path to the Word document
             
         Returns:
             List of file paths to the created individual question files
         """
+        question_docs = self.split_document(docx_path)
+
+        subject_folder = SUBJECT_FOLDERS.get("M1", "M1")  # Default to M1
+        output_dir = PREGUNTAS_DIVIDIDAS_DIR / subject_folder
+        self.storage.ensure_directory(str(output_dir))
+
+        output_files = []
+        for i, question_bytes in enumerate(question_docs):
+            output_path = output_dir / f"question_{i + 1:03d}.docx"
+            try:
+                self.storage.write_bytes(str(output_path), question_bytes)
+                output_files.append(str(output_path))
+            except Exception as e:
+                print(f"Error creating question file {i + 1}: {e}")
+        return output_files
+
+    def split_document(self, docx_path: str) -> List[bytes]:
+        """
+        Split a Word document into one in-memory .docx per page (question).
+        This preserves ALL formatting and images perfectly.
+
+        Args:
+            docx_path: Path to the Word document
+
+        Returns:
+            List of .docx bytes, one per question (empty list on failure)
+        """
         try:
-            # Read the Word document
-            doc_bytes = self.storage.read_bytes(docx_path)
-            
-            # Extract the document content to find question boundaries
-            from docx import Document
-            from io import BytesIO
-            original_doc = Document(BytesIO(doc_bytes))
-            
-            # Find question boundaries
-            question_boundaries = self._find_question_boundaries(original_doc)
-            
-            if not question_boundaries:
-                print("No question boundaries found")
-                return []
-            
-            print(f"Found {len(question_boundaries)} questions")
-            
-            # Create individual files by copying the ZIP structure
-            output_files = []
-            for i, (start_idx, end_idx) in enumerate(question_boundaries):
-                output_file = self._create_question_file_from_zip(
-                    doc_bytes, start_idx, end_idx, i + 1
-                )
-                if output_file:
-                    output_files.append(output_file)
-            
-            return output_files
-            
+            return self.split_docx_bytes(self.storage.read_bytes(docx_path))
         except Exception as e:
             print(f"Error splitting Word document {docx_path}: {e}")
             return []
-    
-    
-    
-    def _find_question_boundaries(self, doc) -> List[tuple]:
+
+    def split_docx_bytes(self, doc_bytes: bytes) -> List[bytes]:
+        """
+        Split .docx bytes into one .docx per question, reading the ZIP and
+        parsing document.xml only once.
+
+        Args:
+            doc_bytes: Original document bytes
+
+        Returns:
+            List of .docx bytes, one per question
+        """
+        package = DocxPackage.from_bytes(doc_bytes)
+        body = package.body
+        if body is None:
+            print("Could not find body element")
+            return []
+
+        # Find question boundaries
+        question_boundaries = self._find_question_boundaries(body)
+
+        if not question_boundaries:
+            print("No question boundaries found")
+            return []
+
+        print(f"Found {len(question_boundaries)} questions")
+
+        elements = list(body)
+        shared_parts = package.parts_referenced_outside_document()
+        question_docs = []
+        for i, (start_idx, end_idx) in enumerate(question_boundaries):
+            question_bytes = self._create_question_package(
+                package, elements, start_idx, end_idx, i + 1, shared_parts
+            )
+            if question_bytes:
+                question_docs.append(question_bytes)
+        return question_docs
+
+    def _find_question_boundaries(self, body) -> List[tuple]:
         """
         Find the boundaries of each question in the document.
         Always uses page-based splitting (1 question per page).
         
         Args:
-            doc: Document object
+            body: The document's w:body element
             
         Returns:
             List of (start_index, end_index) tuples for each question
         """
         print("Using page-based splitting (1 question per page)")
-        boundaries = self._find_page_based_boundaries(doc)
+        boundaries = self._find_page_based_boundaries(body)
         
         return boundaries
     
-    def _find_page_based_boundaries(self, doc) -> List[tuple]:
+    def _find_page_based_boundaries(self, body) -> List[tuple]:
         """
         Find question boundaries based on page breaks.
         Since it's 1 question per page, split by page breaks.
         
         Args:
-            doc: Document object
+            body: The document's w:body element
             
         Returns:
             List of (start_index, end_index) tuples for each question
@@ -94,8 +150,9 @@ class QuestionProcessor:
         boundaries = []
         current_start = 0
         page_breaks_found = 0
+        body_elements = list(body)
         
-        for i, element in enumerate(doc.element.body):
+        for i, element in enumerate(body_elements):
             # Check if this element has a page break
             has_page_break = False
             
@@ -119,16 +176,16 @@ class QuestionProcessor:
         
         # Add the last question if it has content
         # Only add if we haven't already processed the last element
-        if current_start < len(doc.element.body) - 1:
-            boundaries.append((current_start, len(doc.element.body) - 1))
-        elif current_start == len(doc.element.body) - 1:
+        if current_start < len(body_elements) - 1:
+            boundaries.append((current_start, len(body_elements) - 1))
+        elif current_start == len(body_elements) - 1:
             # The last element is just a section break, don't create a separate question
             pass
         
         # If no page breaks found, try to split by equal parts
         if not boundaries:
             print("No page breaks found, splitting by equal parts")
-            total_elements = len(doc.element.body)
+            total_elements = len(body_elements)
             if total_elements > 0:
                 # Estimate number of questions (you might need to adjust this)
                 estimated_questions = max(1, total_elements // 10)  # Assume ~10 elements per question
@@ -142,115 +199,59 @@ class QuestionProcessor:
         
         return boundaries
     
-    def _create_question_file_from_zip(self, doc_bytes: bytes, start_idx: int, end_idx: int, question_num: int) -> str:
+    def _create_question_package(self, package: DocxPackage, elements: list, start_idx: int,
+                                 end_idx: int, question_num: int, shared_parts: set) -> bytes:
         """
-        Create a question file using a hybrid approach.
+        Build one question .docx from the in-memory source package.
         Creates a clean document structure while preserving images.
         
         Args:
-            doc_bytes: Original document bytes
+            package: Source package (read once)
+            elements: Direct children of the source w:body
             start_idx: Start element index
             end_idx: End element index
             question_num: Question number
+            shared_parts: Parts referenced by other .rels files (never pruned)
             
         Returns:
-            Path to created file
+            .docx bytes (empty on failure)
         """
         try:
-            # Create temporary directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extract original ZIP
-                original_zip_path = os.path.join(temp_dir, "original.docx")
-                with open(original_zip_path, 'wb') as f:
-                    f.write(doc_bytes)
-                
-                # Extract ZIP contents
-                extract_dir = os.path.join(temp_dir, "extracted")
-                with zipfile.ZipFile(original_zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-                
-                # Create a clean document.xml with only the question content
-                self._create_clean_document_xml(extract_dir, start_idx, end_idx)
-                
-                # Create new ZIP file with all original files (preserving images)
-                new_zip_path = os.path.join(temp_dir, f"question_{question_num}.docx")
-                with zipfile.ZipFile(new_zip_path, 'w', zipfile.ZIP_DEFLATED) as new_zip:
-                    # Add all files from the extracted directory
-                    for root, dirs, files in os.walk(extract_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arc_name = os.path.relpath(file_path, extract_dir)
-                            new_zip.write(file_path, arc_name)
-                
-                # Determine output path
-                subject_folder = SUBJECT_FOLDERS.get("M1", "M1")  # Default to M1
-                output_dir = PREGUNTAS_DIVIDIDAS_DIR / subject_folder
-                self.storage.ensure_directory(str(output_dir))
-                
-                # Generate filename (we'll use a placeholder for now)
-                filename = f"question_{question_num:03d}.docx"
-                output_path = output_dir / filename
-                
-                # Copy the new file to output
-                with open(new_zip_path, 'rb') as f:
-                    self.storage.write_bytes(str(output_path), f.read())
-                
-                return str(output_path)
-                
+            root = package.document_skeleton()
+            body = root.find(f"{{{W_NS}}}body")
+            self._fill_clean_body(body, elements, start_idx, end_idx)
+
+            parts = package.subset_parts(
+                serialize_xml(root),
+                referenced_relationship_ids(body),
+                always_keep=shared_parts,
+            )
+            return write_package(parts)
+
         except Exception as e:
             print(f"Error creating question file {question_num}: {e}")
-            return ""
+            return b""
     
-    def _create_clean_document_xml(self, extract_dir: str, start_idx: int, end_idx: int):
+    def _fill_clean_body(self, body, elements: list, start_idx: int, end_idx: int):
         """
-        Create a clean document.xml with only the question content.
+        Fill `body` with a clean copy of the question content.
         This preserves images while creating a clean document structure.
         Also preserves A4 page size and adds proper margins (2.54 cm on all sides).
         
         Args:
-            extract_dir: Directory where ZIP was extracted
+            body: Empty w:body element of the question document
+            elements: Direct children of the source w:body
             start_idx: Start element index
             end_idx: End element index
         """
         try:
-            import xml.etree.ElementTree as ET
-            
-            # Read the original document.xml
-            doc_xml_path = os.path.join(extract_dir, "word", "document.xml")
-            tree = ET.parse(doc_xml_path)
-            root = tree.getroot()
-            
-            # Find the body element
-            body = None
-            for elem in root.iter():
-                if elem.tag.endswith('body'):
-                    body = elem
-                    break
-            
-            if body is None:
-                print("Could not find body element")
-                return
-            
-            # Get all direct child elements of body
-            all_elements = list(body)
-            
-            # Keep only the elements in the specified range
-            if start_idx < len(all_elements) and end_idx < len(all_elements):
-                # Store the elements we want to keep
-                elements_to_keep = []
-                for i in range(start_idx, end_idx + 1):
-                    if i < len(all_elements):
-                        elements_to_keep.append(all_elements[i])
-                
-                # Clear the body completely
-                body.clear()
-                
+            if start_idx < len(elements) and end_idx < len(elements):
                 # Add back only the elements we want, cleaning them
                 # Skip empty paragraphs at the beginning
                 first_non_empty_found = False
-                for element in elements_to_keep:
-                    # Clean the element of page breaks and section properties
-                    cleaned_element = self._clean_element_for_clean_document(element)
+                for element in elements[start_idx:end_idx + 1]:
+                    # Clean a copy of the element of page breaks and section properties
+                    cleaned_element = self._clean_element_for_clean_document(copy.deepcopy(element))
                     
                     # Check if this is an empty paragraph at the beginning
                     if not first_non_empty_found:
@@ -263,9 +264,10 @@ class QuestionProcessor:
                 
                 # Add proper section properties with A4 page size and margins
                 self._add_section_properties(body)
-            
-            # Write back the modified XML
-            tree.write(doc_xml_path, encoding='utf-8', xml_declaration=True)
+            else:
+                # Out-of-range boundaries keep the whole original body
+                for element in elements:
+                    body.append(copy.deepcopy(element))
             
         except Exception as e:
             print(f"Error creating clean document.xml: {e}")
@@ -278,17 +280,15 @@ class QuestionProcessor:
             body: The body element to add section properties to
         """
         try:
-            import xml.etree.ElementTree as ET
-            
-            # Create section properties element
-            sect_pr = ET.Element('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sectPr')
+            # Create section properties element (inside body, so it reuses the w: prefix)
+            sect_pr = etree.SubElement(body, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sectPr')
             
             # Add page size (A4: 21.0 cm x 29.7 cm)
             # Convert cm to twips (1 cm = 567 twips)
             page_width = int(21.0 * 567)  # 11907 twips
             page_height = int(29.7 * 567)  # 16840 twips
             
-            pg_sz = ET.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pgSz')
+            pg_sz = etree.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pgSz')
             pg_sz.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}w', str(page_width))
             pg_sz.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}h', str(page_height))
             
@@ -296,7 +296,7 @@ class QuestionProcessor:
             # Convert cm to twips (1 cm = 567 twips)
             margin_twips = int(2.54 * 567)  # 1440 twips
             
-            pg_mar = ET.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pgMar')
+            pg_mar = etree.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pgMar')
             pg_mar.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}top', str(margin_twips))
             pg_mar.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}right', str(margin_twips))
             pg_mar.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}bottom', str(margin_twips))
@@ -306,16 +306,13 @@ class QuestionProcessor:
             pg_mar.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}gutter', '0')
             
             # Add columns (single column)
-            cols = ET.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}cols')
+            cols = etree.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}cols')
             cols.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space', '708')  # 1.25 cm
             
             # Add document grid
-            doc_grid = ET.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}docGrid')
+            doc_grid = etree.SubElement(sect_pr, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}docGrid')
             doc_grid.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}linePitch', '360')  # 6.35 mm
             
-            # Append section properties to body
-            body.append(sect_pr)
-            
         except Exception as e:
             print(f"Error adding section properties: {e}")
     
@@ -392,7 +389,8 @@ class QuestionProcessor:
         self, 
         docx_path: str, 
         excel_data: List[Dict], 
-        subject: str
+        subject: str,
+        question_docs: Optional[List[bytes]] = None
     ) -> List[Dict[str, str]]:
         """
         Process a complete Word document and create individual question files.
@@ -401,12 +399,14 @@ class QuestionProcessor:
             docx_path: Path to the Word document
             excel_data: List of dictionaries with question metadata
             subject: Subject area
+            question_docs: Output of split_document() if the caller already
+                split the document (avoids splitting it twice)
             
         Returns:
             List of dictionaries with processing results
         """
-        # Split document by pages using the new ZIP-based approach
-        question_files = self.split_document_by_pages(docx_path)
+        # Split document by pages (in memory)
+        question_files = question_docs if question_docs is not None else self.split_document(docx_path)
         
         if len(question_files) != len(excel_data):
             print(f"Warning: Number of questions ({len(question_files)}) doesn't match Excel rows ({len(excel_data)})")
@@ -428,12 +428,9 @@ class QuestionProcessor:
                     new_filename = f"{pregunta_id}.docx"
                     new_file_path = output_dir / new_filename
                     
-                    # Copy the file with the new name
-                    with open(question_file, 'rb') as f:
-                        self.storage.write_bytes(str(new_file_path), f.read())
-                    
-                    # Delete the temporary file
-                    os.remove(question_file)
+                    # Write the question package under its final name
+                    self.storage.ensure_directory(str(output_dir))
+                    self.storage.write_bytes(str(new_file_path), question_file)
                     
                     results.append({
                         'pregunta_id': pregunta_id,
@@ -474,10 +471,14 @@ if __name__ == "__main__":
     # Test with sample file if it exists
     sample_file = "sets/Ensayo Agosto 2025 - Física.docx"
     if storage.exists(sample_file):
-        page_docs = processor.split_document_by_pages(sample_file)
+        from io import BytesIO
+        from docx import Document
+
+        page_docs = processor.split_document(sample_file)
         print(f"Split {sample_file} into {len(page_docs)} pages")
-        for i, doc in enumerate(page_docs[:3]):  # Show first 3
+        for i, page_bytes in enumerate(page_docs[:3]):  # Show first 3
             # Get first paragraph text as preview
+            doc = Document(BytesIO(page_bytes))
             preview = ""
             if doc.paragraphs:
                 preview = doc.paragraphs[0].text[:100]
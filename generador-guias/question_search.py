@@ -0,0 +1,142 @@
+"""
+Search index for the question browser filters (Streamlit app).
+
+Built once per loaded subject DataFrame instead of on every rerun:
+  - filter columns (eje, área, unidad, habilidad, dificultad, asignatura) as
+    pandas categorical codes, so each filter is one integer comparison
+  - "Número de usos" as a numeric array
+  - descriptions folded once (lowercase, no accents) plus an inverted index
+    of their tokens; a text search intersects the posting sets of the query
+    tokens and only checks the substring on those candidate rows
+
+Filtering is a boolean mask over these arrays; results are the same as
+comparing the raw columns / normalizing every description per search.
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from config import EXCEL_COLUMNS
+
+# filters key -> DataFrame column, for exact-match filters
+FILTER_COLUMNS = {
+    "eje_tematico": EXCEL_COLUMNS["eje_tematico"],
+    "area_tematica": EXCEL_COLUMNS["area_tematica"],
+    "subtema": EXCEL_COLUMNS["conocimiento_subtema"],
+    "habilidad": EXCEL_COLUMNS["habilidad"],
+    "dificultad": EXCEL_COLUMNS["dificultad"],
+    "subject": EXCEL_COLUMNS["subject_source"],
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold_text(text) -> str:
+    """Lowercase, accent-free text (república -> republica); "" for missing values."""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ""
+    if not isinstance(text, str):
+        return str(text).lower()
+    return unidecode(text).lower().strip()
+
+
+class QuestionSearchIndex:
+    """Precomputed filter arrays for one questions DataFrame (row positions)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self._codes: Dict[str, np.ndarray] = {}
+        self._category_codes: Dict[str, Dict[str, int]] = {}
+        for key, column in FILTER_COLUMNS.items():
+            if column not in df.columns:
+                continue
+            values = df[column]
+            if key == "dificultad":
+                # 1 / 1.0 / "1 " all match the "1" option
+                values = values.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+            categorical = pd.Categorical(values)
+            self._codes[key] = categorical.codes
+            self._category_codes[key] = {value: code for code, value in enumerate(categorical.categories)}
+
+        usage_column = EXCEL_COLUMNS["numero_usos"]
+        self._usage = (
+            pd.to_numeric(df[usage_column], errors="coerce").fillna(0).to_numpy()
+            if usage_column in df.columns else np.zeros(self.size)
+        )
+
+        self._descriptions: Optional[List[str]] = None
+        self._postings: Dict[str, Set[int]] = {}
+        self._search_cache: Dict[str, Optional[Set[int]]] = {}
+        description_column = EXCEL_COLUMNS["descripcion"]
+        if description_column in df.columns:
+            self._descriptions = [fold_text(value) for value in df[description_column]]
+            for position, text in enumerate(self._descriptions):
+                for token in set(_TOKEN_RE.findall(text)):
+                    self._postings.setdefault(token, set()).add(position)
+
+    def _equals(self, key: str, value) -> np.ndarray:
+        if key == "dificultad":
+            value = str(value).strip()
+        code = self._category_codes[key].get(value)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self._codes[key] == code
+
+    def search(self, text: str) -> Optional[Set[int]]:
+        """
+        Row positions whose folded description contains the folded `text`
+        (partial match), or None when the text matches every row.
+        """
+        term = fold_text(text)
+        if term in self._search_cache:
+            return self._search_cache[term]
+        if not term:
+            return None
+
+        # Every query token lies inside some description token of a matching
+        # row, so intersecting those postings gives a superset of the result
+        candidates: Optional[Set[int]] = None
+        for token in set(_TOKEN_RE.findall(term)):
+            rows: Set[int] = set()
+            for indexed_token, positions in self._postings.items():
+                if token in indexed_token:
+                    rows |= positions
+            candidates = rows if candidates is None else candidates & rows
+            if not candidates:
+                break
+        if candidates is None:
+            candidates = set(range(self.size))
+        result = {position for position in candidates if term in self._descriptions[position]}
+        self._search_cache[term] = result
+        return result
+
+    def mask(self, filters: dict) -> np.ndarray:
+        """
+        Boolean mask of the rows matching all filters (same keys as the app's
+        filter_questions: FILTER_COLUMNS keys, 'descripcion' and 'usage').
+        Filters on columns the DataFrame does not have are ignored.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for key in FILTER_COLUMNS:
+            if filters.get(key) and key in self._codes:
+                mask &= self._equals(key, filters[key])
+
+        if filters.get("descripcion") and self._descriptions is not None:
+            positions = self.search(filters["descripcion"])
+            if positions is not None:
+                matches = np.zeros(self.size, dtype=bool)
+                matches[list(positions)] = True
+                mask &= matches
+
+        usage_filter = filters.get("usage")
+        if usage_filter == "unused":
+            mask &= self._usage == 0
+        elif usage_filter == "4+":
+            mask &= self._usage >= 4
+        elif isinstance(usage_filter, int):
+            mask &= self._usage == usage_filter
+        return mask
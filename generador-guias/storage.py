@@ -90,6 +90,17 @@ class StorageClient:
             blob.upload_from_string(data, content_type=content_type)
             return True
 
+    def file_info(self, path):
+        """(size in bytes, modification time as a POSIX timestamp) of a file"""
+        if self.backend == 'local':
+            stat = self._local_path(path).stat()
+            return stat.st_size, stat.st_mtime
+        else:
+            blob = self.bucket.get_blob(self._gcs_path(path))
+            if blob is None:
+                raise FileNotFoundError(path)
+            return blob.size, blob.updated.timestamp()
+
     def list_files(self, prefix):
         if self.backend == 'local':
             p = self._local_path(prefix)
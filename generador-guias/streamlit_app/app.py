@@ -8,18 +8,19 @@ from pathlib import Path
 import os
 import sys
 from io import BytesIO
-import shutil
-import zipfile
-import tempfile
 from unidecode import unidecode
 
 # Add parent directory to path to import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 
 from storage import StorageClient
-from config import EXCELES_MAESTROS_DIR, STREAMLIT_CONFIG, CHART_COLORS, NOMBRES_GUIAS_PATH, EXCEL_COLUMNS
+from config import STREAMLIT_CONFIG, CHART_COLORS, NOMBRES_GUIAS_PATH, EXCEL_COLUMNS
 from master_consolidator import MasterConsolidator
+from question_catalog import QuestionCatalog, XLSX_MIME
 from usage_tracker import UsageTracker
+from guide_assembler import assemble_guide_from_paths
+from preview_service import PreviewService
+from question_search import QuestionSearchIndex
 
 # Configure Streamlit page
 st.set_page_config(
@@ -34,6 +35,14 @@ st.set_page_config(
 def get_storage_client():
     return StorageClient()
 
+@st.cache_resource
+def get_question_catalog():
+    return QuestionCatalog(get_storage_client())
+
+@st.cache_resource
+def get_preview_service():
+    return PreviewService()
+
 def normalize_text(text: str) -> str:
     """
     Normalize text for flexible searching by:
@@ -163,7 +172,7 @@ def load_allowed_guide_names() -> pd.DataFrame:
 
 def load_master_excel(subject: str) -> pd.DataFrame:
     """
-    Load master Excel file for a subject.
+    Load master data for a subject from the question catalog.
     
     Args:
         subject: Subject area
@@ -173,21 +182,21 @@ def load_master_excel(subject: str) -> pd.DataFrame:
     """
     try:
         storage = get_storage_client()
-        consolidator = MasterConsolidator(storage)
+        catalog = get_question_catalog()
         
-        # Try to load existing master file
-        master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-        
-        if storage.exists(str(master_file)):
-            df = pd.read_excel(master_file)
+        # Try to load existing master data
+        if catalog.has_subject(subject):
+            df = catalog.load_subject(subject)
         else:
-            # If master file doesn't exist, try to consolidate (using incremental - will create new master)
-            st.warning(f"Master file not found for {subject}. Attempting incremental consolidation...")
-            df, _ = consolidator.consolidate_and_append_new(subject)
+            # If master data doesn't exist, try to consolidate (using incremental - will create new master)
+            st.warning(f"Master data not found for {subject}. Attempting incremental consolidation...")
+            consolidator = MasterConsolidator(storage, catalog)
+            consolidator.consolidate_and_append_new(subject)
+            df = catalog.load_subject(subject)
         
         # Ensure usage tracking columns exist in the loaded DataFrame
         if not df.empty:
-            usage_tracker = UsageTracker(storage)
+            usage_tracker = UsageTracker(storage, catalog)
             df = usage_tracker._ensure_usage_columns(df)
             
             # Standardize text columns for consistent filtering
@@ -196,7 +205,7 @@ def load_master_excel(subject: str) -> pd.DataFrame:
         return df
             
     except Exception as e:
-        st.error(f"Error loading master Excel for {subject}: {e}")
+        st.error(f"Error loading master data for {subject}: {e}")
         return pd.DataFrame()
 
 def load_ciencias_combined_data(storage, consolidator) -> pd.DataFrame:
@@ -214,29 +223,29 @@ def load_ciencias_combined_data(storage, consolidator) -> pd.DataFrame:
         combined_dfs = []
         subjects_to_combine = ["F30M", "Q30M", "B30M", "Ciencias"]
         
+        catalog = get_question_catalog()
+        
         for subject in subjects_to_combine:
             try:
-                # Try to load existing master file first
-                master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-                
-                if storage.exists(str(master_file)):
-                    df = pd.read_excel(master_file)
+                # Try to load existing master data first
+                if catalog.has_subject(subject):
+                    df = catalog.load_subject(subject)
                     if not df.empty:
                         # Add a column to identify the source subject
                         df[EXCEL_COLUMNS['subject_source']] = subject
                         # Ensure usage tracking columns exist
-                        usage_tracker = UsageTracker(storage)
+                        usage_tracker = UsageTracker(storage, catalog)
                         df = usage_tracker._ensure_usage_columns(df)
                         combined_dfs.append(df)
                         st.info(f"✅ Loaded {len(df)} questions from {subject}")
                 else:
-                    # If master file doesn't exist, try to consolidate (using incremental - will create new master)
-                    st.warning(f"Master file not found for {subject}. Attempting incremental consolidation...")
+                    # If master data doesn't exist, try to consolidate (using incremental - will create new master)
+                    st.warning(f"Master data not found for {subject}. Attempting incremental consolidation...")
                     df, _ = consolidator.consolidate_and_append_new(subject)
                     if not df.empty:
                         df[EXCEL_COLUMNS['subject_source']] = subject
                         # Ensure usage tracking columns exist
-                        usage_tracker = UsageTracker(storage)
+                        usage_tracker = UsageTracker(storage, catalog)
                         df = usage_tracker._ensure_usage_columns(df)
                         combined_dfs.append(df)
                         st.info(f"✅ Consolidated and loaded {len(df)} questions from {subject}")
@@ -423,9 +432,9 @@ def track_guide_download(subject: str, question_ids: list, guide_name: str, sele
         print(f"DEBUG: Starting usage tracking for guide '{guide_name}' with {len(question_ids)} questions")
         print(f"DEBUG: Question IDs: {question_ids}")
         
-        # Update usage tracking in master Excel files
+        # Update usage tracking in the master catalog (only the guide's rows are written)
         storage = get_storage_client()
-        usage_tracker = UsageTracker(storage)
+        usage_tracker = UsageTracker(storage, get_question_catalog())
         
         # Update usage tracking for all selected questions
         success = usage_tracker.update_question_usage(
@@ -466,79 +475,39 @@ def track_guide_download(subject: str, question_ids: list, guide_name: str, sele
         st.session_state['download_tracking_message'] = f"❌ Error al actualizar uso: {e}"
         print(f"DEBUG: Exception in track_guide_download: {e}")
 
-def filter_questions(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+def get_search_index(df: pd.DataFrame) -> QuestionSearchIndex:
     """
-    Filter questions based on user criteria.
+    Search index of the loaded questions. Built once per loaded DataFrame
+    (kept in session state) instead of on every rerun.
     
     Args:
         df: DataFrame with questions
-        filters: Dictionary with filter criteria
         
     Returns:
-        Filtered DataFrame
+        QuestionSearchIndex for df
     """
-    filtered_df = df.copy()
-    
-    # Filter by Eje Temático (for Ciencias)
-    if filters.get('eje_tematico') and EXCEL_COLUMNS['eje_tematico'] in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['eje_tematico']] == filters['eje_tematico']]
+    cached = st.session_state.get('_search_index')
+    if cached is None or cached[0] is not df:
+        cached = (df, QuestionSearchIndex(df))
+        st.session_state['_search_index'] = cached
+    return cached[1]
 
-    # Filter by Área Temática
-    if filters.get('area_tematica'):
-        filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['area_tematica']] == filters['area_tematica']]
-    
-    if filters.get('dificultad'):
-        # Robust comparison for difficulty (handling int vs str vs float)
-        target_diff = str(filters['dificultad']).strip()
-        # Convert column to string, strip whitespace, and remove .0 if present (e.g. "1.0" -> "1")
-        filtered_df = filtered_df[
-            filtered_df[EXCEL_COLUMNS['dificultad']].astype(str).str.strip().str.replace(r'\.0$', '', regex=True) == target_diff
-        ]
-    
-    if filters.get('habilidad'):
-        filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['habilidad']] == filters['habilidad']]
-    
-    if filters.get('subtema'):
-        filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['conocimiento_subtema']] == filters['subtema']]
-    
-    if filters.get('descripcion'):
-        # Text search in Descripción column (case-insensitive, accent-insensitive, partial match)
-        if EXCEL_COLUMNS['descripcion'] in filtered_df.columns:
-            # Normalize search term (remove accents, lowercase)
-            search_term_normalized = normalize_text(filters['descripcion'])
-            
-            # Apply filter by normalizing each description and checking if it contains the search term
-            filtered_df = filtered_df[
-                filtered_df[EXCEL_COLUMNS['descripcion']].apply(
-                    lambda x: search_term_normalized in normalize_text(x)
-                )
-            ]
+def filter_questions(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """
+    Filter questions based on user criteria.
     
-    if filters.get('subject'):
-        filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['subject_source']] == filters['subject']]
+    Exact-match filters compare precomputed categorical codes and the
+    description search uses the index's inverted token index
+    (case-insensitive, accent-insensitive, partial match).
     
-    # Apply usage filter
-    if filters.get('usage') is not None:
-        usage_filter = filters['usage']
-        
-        # Ensure usage tracking columns exist
-        if EXCEL_COLUMNS['numero_usos'] not in filtered_df.columns:
-            filtered_df[EXCEL_COLUMNS['numero_usos']] = 0
-        
-        # Convert usage counts to numeric, handling any string values
-        filtered_df[EXCEL_COLUMNS['numero_usos']] = pd.to_numeric(filtered_df[EXCEL_COLUMNS['numero_usos']], errors='coerce').fillna(0)
+    Args:
+        df: DataFrame with questions
+        filters: Dictionary with filter criteria
         
-        if usage_filter == 'unused':
-            # Show only unused questions
-            filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['numero_usos']] == 0]
-        elif usage_filter == '4+':
-            # Show questions used 4 or more times
-            filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['numero_usos']] >= 4]
-        elif isinstance(usage_filter, int):
-            # Show questions used exactly this many times
-            filtered_df = filtered_df[filtered_df[EXCEL_COLUMNS['numero_usos']] == usage_filter]
-    
-    return filtered_df
+    Returns:
+        Filtered DataFrame
+    """
+    return df[get_search_index(df).mask(filters)]
 
 
 def display_question_preview(pregunta_id: str, file_path: str):
@@ -600,11 +569,11 @@ brew install --cask libreoffice
         st.error(f"❌ Error al mostrar vista previa: {e}")
         st.info("💡 Intenta cerrar la vista previa y volver a abrirla.")
 
-@st.cache_data(ttl=7200)  # Cache for 2 hours (longer cache for better performance)
 def convert_docx_to_images(docx_path: str) -> list:
     """
-    Convert Word document to images for preview using LibreOffice direct conversion.
-    Results are cached to avoid re-converting the same documents.
+    Convert Word document to images for preview.
+    Pages are rendered by the shared preview service (warm LibreOffice) and
+    cached on disk by file content, so repeated previews are instant.
     
     Args:
         docx_path: Path to the Word document
@@ -613,149 +582,11 @@ def convert_docx_to_images(docx_path: str) -> list:
         List of image data (bytes) for each page
     """
     try:
-        # Add file modification time to cache key for better cache invalidation
-        file_mtime = os.path.getmtime(docx_path)
-        cache_key = f"{docx_path}_{file_mtime}"
-        
-        return convert_docx_to_images_via_libreoffice_direct(docx_path)
+        return get_preview_service().render(docx_path)
     except Exception as e:
         st.error(f"Error converting document to images: {e}")
         return []
 
-
-def convert_docx_to_images_via_libreoffice_direct(docx_path: str, max_retries: int = 2) -> list:
-    """
-    Convert Word document to images using LibreOffice directly (optimized for speed).
-    Includes retry logic for better reliability.
-    
-    Args:
-        docx_path: Path to the Word document
-        max_retries: Number of retry attempts (default: 2)
-        
-    Returns:
-        List of image data (bytes) for each page
-    """
-    import subprocess
-    import time
-    
-    for attempt in range(max_retries + 1):
-        try:
-            # Create temporary directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Try different LibreOffice paths for Windows
-                libreoffice_paths = [
-                    "libreoffice",  # If in PATH
-                    r"C:\Program Files\LibreOffice\program\soffice.exe",
-                    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-                    r"C:\Program Files\LibreOffice\program\soffice.com",  # Alternative executable
-                ]
-                
-                result = None
-                last_error = None
-                
-                for libreoffice_path in libreoffice_paths:
-                    try:
-                        # Check if file exists before trying
-                        if not os.path.exists(docx_path):
-                            raise FileNotFoundError(f"Document not found: {docx_path}")
-                        
-                        # Convert DOCX to images using LibreOffice with balanced speed and reliability
-                        result = subprocess.run([
-                            libreoffice_path, 
-                            "--headless", 
-                            "--invisible",
-                            "--nodefault",
-                            "--nolockcheck",
-                            "--nologo",
-                            "--norestore",
-                            "--convert-to", "png", 
-                            "--outdir", temp_dir, 
-                            docx_path
-                        ], capture_output=True, text=True, timeout=45)  # Increased timeout to 45s
-                        
-                        if result.returncode == 0:
-                            break
-                        else:
-                            last_error = f"Return code {result.returncode}: {result.stderr}"
-                            
-                    except FileNotFoundError:
-                        continue
-                    except subprocess.TimeoutExpired:
-                        last_error = f"Timeout after 45 seconds"
-                        if attempt < max_retries:
-                            st.info(f"⏱️ Conversion timeout, retrying... (attempt {attempt + 1}/{max_retries + 1})")
-                        continue
-                    except Exception as e:
-                        last_error = str(e)
-                        continue
-                
-                if not result or result.returncode != 0:
-                    error_msg = last_error if last_error else 'LibreOffice not found'
-                    if result and result.stderr:
-                        error_msg = f"{error_msg} | stderr: {result.stderr[:200]}"
-                    if result and result.stdout:
-                        error_msg = f"{error_msg} | stdout: {result.stdout[:200]}"
-                    
-                    # If not the last attempt, retry
-                    if attempt < max_retries:
-                        st.info(f"🔄 Conversion failed, retrying... (attempt {attempt + 1}/{max_retries + 1})")
-                        time.sleep(1)  # Wait 1 second before retry
-                        continue
-                    else:
-                        raise Exception(f"LibreOffice conversion failed after {max_retries + 1} attempts: {error_msg}")
-                
-                # Find generated image files
-                image_files = []
-                for file in os.listdir(temp_dir):
-                    if file.endswith('.png'):
-                        image_files.append(os.path.join(temp_dir, file))
-                
-                if not image_files:
-                    # Check if temp_dir has any files at all
-                    all_files = os.listdir(temp_dir)
-                    error_detail = f"Temp directory has {len(all_files)} files: {all_files[:5]}" if all_files else "Temp directory is empty"
-                    
-                    # If not the last attempt, retry
-                    if attempt < max_retries:
-                        st.info(f"🔄 No images generated, retrying... (attempt {attempt + 1}/{max_retries + 1})")
-                        time.sleep(1)
-                        continue
-                    else:
-                        raise Exception(f"No PNG files were generated. {error_detail}")
-                
-                # Read image files with optimized processing
-                images = []
-                for image_file in sorted(image_files):
-                    try:
-                        with open(image_file, 'rb') as f:
-                            images.append(f.read())
-                    except Exception as e:
-                        st.warning(f"⚠️ Failed to read image {image_file}: {e}")
-                        continue
-                
-                if not images:
-                    if attempt < max_retries:
-                        st.info(f"🔄 Failed to read images, retrying... (attempt {attempt + 1}/{max_retries + 1})")
-                        time.sleep(1)
-                        continue
-                    else:
-                        raise Exception("Failed to read any image files")
-                
-                # Success - return images
-                if attempt > 0:
-                    st.success(f"✅ Conversion succeeded on attempt {attempt + 1}")
-                return images
-            
-        except Exception as e:
-            if attempt >= max_retries:
-                st.error(f"❌ LibreOffice conversion failed after {max_retries + 1} attempts: {e}")
-                return []
-            # Continue to next attempt
-            continue
-    
-    # Should not reach here, but just in case
-    return []
-
 def create_guide_package(word_buffer: BytesIO, excel_buffer: BytesIO, word_filename: str) -> BytesIO:
     """
     Create a ZIP package containing both the Word document and Excel file.
@@ -981,7 +812,7 @@ def create_word_document(ordered_questions: list, questions_df: pd.DataFrame, su
 
 def create_word_guide(questions_df: pd.DataFrame, ordered_questions: list) -> BytesIO:
     """
-    Create a Word document by merging the selected Word documents using ZIP structure approach.
+    Create a Word document by merging the selected Word documents in memory.
     This preserves ALL formatting, images, and tables perfectly, and respects the order.
     
     Args:
@@ -994,498 +825,33 @@ def create_word_guide(questions_df: pd.DataFrame, ordered_questions: list) -> By
     try:
         project_root = Path(__file__).parent.parent
         
-        # Create a temporary directory for merging
-        with tempfile.TemporaryDirectory() as temp_dir:
-            merged_doc_path = os.path.join(temp_dir, "merged_document.docx")
-            
-            # Process questions in the specified order
-            first_doc_path = None
-            processed_questions = []
-            
-            # First pass: find the first valid document
-            for question_id in ordered_questions:
-                row = questions_df[questions_df[EXCEL_COLUMNS['pregunta_id']] == question_id]
-                if not row.empty:
-                    file_path = row.iloc[0].get(EXCEL_COLUMNS['ruta_relativa'], '')
-                    if file_path:
-                        absolute_path = project_root / file_path
-                        if os.path.exists(str(absolute_path)):
-                            first_doc_path = str(absolute_path)
-                            processed_questions.append((question_id, str(absolute_path)))
-                            break
-            
-            if not first_doc_path:
-                st.error("No se encontraron documentos válidos")
-                return None
-            
-            # Copy the first document as the base
-            shutil.copy2(first_doc_path, merged_doc_path)
-            
-            # Second pass: collect all other documents in order
-            for question_id in ordered_questions:
-                row = questions_df[questions_df[EXCEL_COLUMNS['pregunta_id']] == question_id]
-                if not row.empty:
-                    file_path = row.iloc[0].get(EXCEL_COLUMNS['ruta_relativa'], '')
-                    if file_path:
-                        absolute_path = project_root / file_path
-                        if os.path.exists(str(absolute_path)) and str(absolute_path) != first_doc_path:
-                            processed_questions.append((question_id, str(absolute_path)))
-            
-            # Calculate total questions
-            total_questions = len(processed_questions)
-            
-            # Add header to the first question directly
-            if total_questions > 0:
-                add_question_header_to_document(merged_doc_path, 1, total_questions)
-            
-            # Merge all other documents in order with question numbering
-            for i, (question_id, doc_path) in enumerate(processed_questions[1:], start=2):  # Skip first (already used as base)
-                merge_word_documents_zip(merged_doc_path, doc_path, i, total_questions)
-            
-            # Read the merged document
-            with open(merged_doc_path, 'rb') as f:
-                merged_content = f.read()
-            
-            # Create BytesIO buffer
-            buffer = BytesIO(merged_content)
-            buffer.seek(0)
-            
-            return buffer
-        
-    except Exception as e:
-        st.error(f"Error creating Word document: {e}")
-        return None
-
-def merge_word_documents_zip(target_doc_path: str, source_doc_path: str, question_number: int = None, total_questions: int = None):
-    """
-    Merge a source Word document into a target Word document using ZIP structure approach.
-    This preserves ALL formatting, images, and tables perfectly.
-    
-    Args:
-        target_doc_path: Path to the target document (will be modified)
-        source_doc_path: Path to the source document to merge
-        question_number: Current question number (optional)
-        total_questions: Total number of questions (optional)
-    """
-    try:
-        # Create temporary directory for extraction
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Extract target document
-            target_extract_dir = os.path.join(temp_dir, "target")
-            with zipfile.ZipFile(target_doc_path, 'r') as zip_ref:
-                zip_ref.extractall(target_extract_dir)
-            
-            # Extract source document
-            source_extract_dir = os.path.join(temp_dir, "source")
-            with zipfile.ZipFile(source_doc_path, 'r') as zip_ref:
-                zip_ref.extractall(source_extract_dir)
-            
-            # Copy images first and get the mapping
-            image_mapping = copy_images_with_mapping(source_extract_dir, target_extract_dir)
-            
-            # Merge the document.xml files with proper relationship handling
-            merge_document_xml_with_relationships(target_extract_dir, source_extract_dir, image_mapping, question_number, total_questions)
-            
-            # Create new merged document
-            with zipfile.ZipFile(target_doc_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-                for root, dirs, files in os.walk(target_extract_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, target_extract_dir)
-                        zip_ref.write(file_path, arc_name)
-        
-    except Exception as e:
-        st.error(f"Error merging document {source_doc_path}: {e}")
-
-
-def copy_images_with_mapping(source_extract_dir: str, target_extract_dir: str) -> dict:
-    """
-    Copy all images from source to target document and return mapping.
-    
-    Args:
-        source_extract_dir: Directory where source document is extracted
-        target_extract_dir: Directory where target document is extracted
-        
-    Returns:
-        Dictionary mapping old image names to new image names
-    """
-    try:
-        source_media_dir = os.path.join(source_extract_dir, "word", "media")
-        target_media_dir = os.path.join(target_extract_dir, "word", "media")
-        
-        image_mapping = {}
-        
-        if os.path.exists(source_media_dir):
-            # Ensure target media directory exists
-            os.makedirs(target_media_dir, exist_ok=True)
-            
-            # Get existing images in target to avoid conflicts
-            existing_images = set()
-            if os.path.exists(target_media_dir):
-                existing_images = set(os.listdir(target_media_dir))
-            
-            # Copy all images from source to target with unique names
-            for filename in os.listdir(source_media_dir):
-                source_file = os.path.join(source_media_dir, filename)
-                
-                # Create unique filename if it already exists
-                if filename in existing_images:
-                    name, ext = os.path.splitext(filename)
-                    counter = 1
-                    while f"{name}_{counter}{ext}" in existing_images:
-                        counter += 1
-                    new_filename = f"{name}_{counter}{ext}"
-                else:
-                    new_filename = filename
-                
-                target_file = os.path.join(target_media_dir, new_filename)
-                shutil.copy2(source_file, target_file)
-                image_mapping[filename] = new_filename
-                existing_images.add(new_filename)
-        
-        return image_mapping
-        
-    except Exception as e:
-        st.error(f"Error copying images: {e}")
-        return {}
-
-def merge_document_xml_with_relationships(target_extract_dir: str, source_extract_dir: str, image_mapping: dict, question_number: int = None, total_questions: int = None):
-    """
-    Merge the document.xml files from source into target with proper relationship handling.
-    
-    Args:
-        target_extract_dir: Directory where target document is extracted
-        source_extract_dir: Directory where source document is extracted
-        image_mapping: Dictionary mapping old image names to new image names
-        question_number: Current question number (optional)
-        total_questions: Total number of questions (optional)
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        # Read target document.xml
-        target_xml_path = os.path.join(target_extract_dir, "word", "document.xml")
-        target_tree = ET.parse(target_xml_path)
-        target_root = target_tree.getroot()
-        
-        # Read source document.xml
-        source_xml_path = os.path.join(source_extract_dir, "word", "document.xml")
-        source_tree = ET.parse(source_xml_path)
-        source_root = source_tree.getroot()
-        
-        # Find body elements
-        target_body = None
-        source_body = None
-        
-        for elem in target_root.iter():
-            if elem.tag.endswith('body'):
-                target_body = elem
-                break
-        
-        for elem in source_root.iter():
-            if elem.tag.endswith('body'):
-                source_body = elem
-                break
-        
-        if target_body is None or source_body is None:
-            st.error("Could not find body elements in documents")
-            return
-        
-        # Create relationship mapping for this source document
-        relationship_mapping = create_relationship_mapping(target_extract_dir, source_extract_dir, image_mapping)
-        
-        # Add page break before merging
-        page_break = ET.Element('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p')
-        br = ET.SubElement(page_break, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}r')
-        page_br = ET.SubElement(br, '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}br')
-        page_br.set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}type', 'page')
-        target_body.append(page_break)
-        
-        # Copy all elements from source body to target body
-        for i, element in enumerate(source_body):
-            # Skip section properties (we'll keep the target's)
-            if not element.tag.endswith('sectPr'):
-                # Update relationship IDs in the element
-                updated_element = update_relationship_ids(element, relationship_mapping)
-                
-                # Add question number to the first paragraph if question number is provided
-                if question_number is not None and total_questions is not None and i == 0 and element.tag.endswith('p'):
-                    add_question_number_to_first_text(updated_element, question_number)
-                
-                target_body.append(updated_element)
-        
-        # Write back the modified target document.xml
-        target_tree.write(target_xml_path, encoding='utf-8', xml_declaration=True)
-        
-    except Exception as e:
-        st.error(f"Error merging document XML: {e}")
-
-def add_question_number_to_first_text(paragraph, question_number: int):
-    """
-    Add question number as a separate run inserted before the first content in a paragraph.
-    This prevents the number from being injected into equations or formatted text.
-
-    Args:
-        paragraph: XML paragraph element
-        question_number: Current question number
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-
-        # Create a new run with the question number
-        new_run = ET.Element(f'{{{ns}}}r')
-        text_elem = ET.SubElement(new_run, f'{{{ns}}}t')
-        text_elem.text = f"{question_number}. "
-        text_elem.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
-
-        # Insert the new run at the beginning of the paragraph, after any pPr (paragraph properties)
-        insert_index = 0
-        for i, child in enumerate(paragraph):
-            if child.tag.endswith('pPr'):
-                insert_index = i + 1
-                break
-
-        paragraph.insert(insert_index, new_run)
-
-    except Exception as e:
-        st.error(f"Error adding question number to text: {e}")
-
-def add_question_header_to_document(doc_path: str, question_number: int, total_questions: int):
-    """
-    Add a question header to the beginning of a Word document.
-    
-    Args:
-        doc_path: Path to the Word document
-        question_number: Current question number
-        total_questions: Total number of questions
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        # Create temporary directory for extraction
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Extract document
-            with zipfile.ZipFile(doc_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            # Read document.xml
-            doc_xml_path = os.path.join(temp_dir, "word", "document.xml")
-            tree = ET.parse(doc_xml_path)
-            root = tree.getroot()
-            
-            # Find the body element
-            body = None
-            for elem in root.iter():
-                if elem.tag.endswith('body'):
-                    body = elem
-                    break
-            
-            if body is None:
-                st.error("Could not find body element in document")
-                return
-            
-            # Add question number to the first paragraph
-            first_paragraph = None
-            for elem in body:
-                if elem.tag.endswith('p'):
-                    first_paragraph = elem
-                    break
-            
-            if first_paragraph is not None:
-                add_question_number_to_first_text(first_paragraph, question_number)
-            
-            # Write back the modified document.xml
-            tree.write(doc_xml_path, encoding='utf-8', xml_declaration=True)
-            
-            # Create new document
-            with zipfile.ZipFile(doc_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, temp_dir)
-                        zip_ref.write(file_path, arc_name)
-        
-    except Exception as e:
-        st.error(f"Error adding question header to document: {e}")
-
-def create_relationship_mapping(target_extract_dir: str, source_extract_dir: str, image_mapping: dict) -> dict:
-    """
-    Create a mapping of old relationship IDs to new ones for the source document.
-    
-    Args:
-        target_extract_dir: Directory where target document is extracted
-        source_extract_dir: Directory where source document is extracted
-        image_mapping: Dictionary mapping old image names to new image names
-        
-    Returns:
-        Dictionary mapping old relationship IDs to new ones
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        # Get the highest relationship ID in target document
-        max_rel_id = get_max_relationship_id(target_extract_dir)
-        
-        # Read source relationships file
-        source_rels_path = os.path.join(source_extract_dir, "word", "_rels", "document.xml.rels")
-        if not os.path.exists(source_rels_path):
-            return {}
-        
-        source_rels_tree = ET.parse(source_rels_path)
-        source_rels_root = source_rels_tree.getroot()
-        
-        relationship_mapping = {}
-        
-        # Create mapping for image relationships
-        for relationship in source_rels_root.iter():
-            if relationship.tag.endswith('Relationship'):
-                target = relationship.get('Target')
-                if target and target.startswith('media/'):
-                    old_filename = os.path.basename(target)
-                    if old_filename in image_mapping:
-                        old_rel_id = relationship.get('Id')
-                        max_rel_id += 1
-                        new_rel_id = f"rId{max_rel_id}"
-                        relationship_mapping[old_rel_id] = new_rel_id
-        
-        # Update the target relationships file with new relationships
-        update_relationships_file_with_mapping(target_extract_dir, source_extract_dir, image_mapping, relationship_mapping)
-        
-        return relationship_mapping
-        
-    except Exception as e:
-        st.error(f"Error creating relationship mapping: {e}")
-        return {}
-
-def get_max_relationship_id(target_extract_dir: str) -> int:
-    """
-    Get the highest relationship ID in the target document.
-    
-    Args:
-        target_extract_dir: Directory where target document is extracted
-        
-    Returns:
-        Highest relationship ID found
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        rels_xml_path = os.path.join(target_extract_dir, "word", "_rels", "document.xml.rels")
-        if not os.path.exists(rels_xml_path):
-            return 0
-        
-        rels_tree = ET.parse(rels_xml_path)
-        rels_root = rels_tree.getroot()
-        
-        max_id = 0
-        for relationship in rels_root.iter():
-            if relationship.tag.endswith('Relationship'):
-                rel_id = relationship.get('Id')
-                if rel_id and rel_id.startswith('rId'):
-                    try:
-                        id_num = int(rel_id[3:])  # Remove 'rId' prefix
-                        max_id = max(max_id, id_num)
-                    except ValueError:
-                        pass
-        
-        return max_id
-        
-    except Exception as e:
-        st.error(f"Error getting max relationship ID: {e}")
-        return 0
-
-def update_relationship_ids(element, relationship_mapping: dict):
-    """
-    Update relationship IDs in an element using the provided mapping.
-    
-    Args:
-        element: XML element to update
-        relationship_mapping: Dictionary mapping old relationship IDs to new ones
-        
-    Returns:
-        Updated element
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        # Create a copy of the element
-        updated_element = ET.fromstring(ET.tostring(element))
-        
-        # Update relationship IDs
-        for elem in updated_element.iter():
-            # Update drawing elements (newer image format)
-            if elem.tag.endswith('blip'):
-                embed_id = elem.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                if embed_id and embed_id in relationship_mapping:
-                    new_embed_id = relationship_mapping[embed_id]
-                    elem.set('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed', new_embed_id)
-            
-            # Update pict elements (older image format)
-            elif elem.tag.endswith('imagedata'):
-                src = elem.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                if src and src in relationship_mapping:
-                    new_src = relationship_mapping[src]
-                    elem.set('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id', new_src)
-        
-        return updated_element
-        
-    except Exception as e:
-        st.error(f"Error updating relationship IDs: {e}")
-        return element
-
-def update_relationships_file_with_mapping(target_extract_dir: str, source_extract_dir: str, image_mapping: dict, relationship_mapping: dict):
-    """
-    Update the relationships file with new image relationships using the provided mapping.
-    
-    Args:
-        target_extract_dir: Directory where target document is extracted
-        source_extract_dir: Directory where source document is extracted
-        image_mapping: Dictionary mapping old image names to new image names
-        relationship_mapping: Dictionary mapping old relationship IDs to new ones
-    """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        # Read target relationships file
-        target_rels_path = os.path.join(target_extract_dir, "word", "_rels", "document.xml.rels")
-        target_rels_tree = ET.parse(target_rels_path)
-        target_rels_root = target_rels_tree.getroot()
-        
-        # Read source relationships file
-        source_rels_path = os.path.join(source_extract_dir, "word", "_rels", "document.xml.rels")
-        if not os.path.exists(source_rels_path):
-            return
+        # Resolve the question files in the specified order
+        first_rows = questions_df.drop_duplicates(EXCEL_COLUMNS['pregunta_id'])
+        paths_by_id = dict(zip(
+            first_rows[EXCEL_COLUMNS['pregunta_id']],
+            first_rows[EXCEL_COLUMNS['ruta_relativa']].fillna('')
+        ))
+        document_paths = []
+        for question_id in ordered_questions:
+            file_path = paths_by_id.get(question_id, '')
+            if file_path:
+                absolute_path = project_root / file_path
+                if absolute_path.exists():
+                    document_paths.append(absolute_path)
+        
+        if not document_paths:
+            st.error("No se encontraron documentos válidos")
+            return None
         
-        source_rels_tree = ET.parse(source_rels_path)
-        source_rels_root = source_rels_tree.getroot()
-        
-        # Add new relationships for images using the mapping
-        for relationship in source_rels_root.iter():
-            if relationship.tag.endswith('Relationship'):
-                target = relationship.get('Target')
-                if target and target.startswith('media/'):
-                    old_filename = os.path.basename(target)
-                    if old_filename in image_mapping:
-                        old_rel_id = relationship.get('Id')
-                        if old_rel_id in relationship_mapping:
-                            new_rel_id = relationship_mapping[old_rel_id]
-                            new_filename = image_mapping[old_filename]
-                            new_target = f"media/{new_filename}"
-                            
-                            # Create new relationship element
-                            new_rel = ET.Element('{http://schemas.openxmlformats.org/package/2006/relationships}Relationship')
-                            new_rel.set('Id', new_rel_id)
-                            new_rel.set('Type', relationship.get('Type', ''))
-                            new_rel.set('Target', new_target)
-                            
-                            target_rels_root.append(new_rel)
+        # Numbered questions, page breaks between them, single ZIP write
+        buffer = BytesIO(assemble_guide_from_paths(document_paths))
+        buffer.seek(0)
         
-        # Write back the updated relationships file
-        target_rels_tree.write(target_rels_path, encoding='utf-8', xml_declaration=True)
+        return buffer
         
     except Exception as e:
-        st.error(f"Error updating relationships file: {e}")
+        st.error(f"Error creating Word document: {e}")
+        return None
 
 
 def create_pie_chart(values, names, title, total_questions):
@@ -1753,6 +1119,8 @@ def load_subject_data(selected_subject):
             st.session_state['question_positions'] = {}
             st.session_state['preview_question'] = None
             st.session_state['preview_file_path'] = None
+            # An exported master Excel belongs to the previous subject
+            st.session_state.pop('master_excel_export', None)
             # Clear guide name selection
             if 'guide_name_select' in st.session_state:
                 del st.session_state['guide_name_select']
@@ -1815,7 +1183,7 @@ def main():
         if st.button("Ver Estadísticas", help="Mostrar estadísticas de uso de preguntas"):
             with st.spinner("Cargando estadísticas..."):
                 storage = get_storage_client()
-                usage_tracker = UsageTracker(storage)
+                usage_tracker = UsageTracker(storage, get_question_catalog())
                 
                 stats = usage_tracker.get_question_usage_stats(current_subject)
                 if "error" not in stats:
@@ -1904,7 +1272,7 @@ def main():
         if st.button("Ver Guías Creadas", help="Mostrar guías creadas para esta asignatura"):
             with st.spinner("Cargando guías creadas..."):
                 storage = get_storage_client()
-                usage_tracker = UsageTracker(storage)
+                usage_tracker = UsageTracker(storage, get_question_catalog())
                 
                 # Only get guides for the current subject
                 guides = usage_tracker.get_all_guides_for_subject(current_subject)
@@ -1975,7 +1343,7 @@ def main():
                     if st.button("🗑️ ELIMINAR GUÍA", type="secondary", help="Eliminar esta guía y descontar su uso"):
                         with st.spinner("Eliminando guía..."):
                             storage = get_storage_client()
-                            usage_tracker = UsageTracker(storage)
+                            usage_tracker = UsageTracker(storage, get_question_catalog())
                             
                             # Use the specific deletion method to ensure we delete only the exact guide selected
                             result = usage_tracker.delete_specific_guide_usage(
@@ -2020,6 +1388,23 @@ def main():
                 st.session_state['selected_guide_for_deletion'] = None
                 st.rerun()
     
+    # On-demand export of the master data (the catalog is the live store)
+    with st.expander("📥 Exportar Excel maestro"):
+        if st.button("Generar Excel maestro", help="Genera el Excel maestro de la asignatura con el uso actual"):
+            with st.spinner("Generando Excel maestro..."):
+                st.session_state['master_excel_export'] = (
+                    current_subject, get_question_catalog().master_excel_bytes(current_subject)
+                )
+        
+        export_subject, export_data = st.session_state.get('master_excel_export') or (None, b"")
+        if export_subject == current_subject and export_data:
+            st.download_button(
+                label="⬇️ Descargar Excel maestro",
+                data=export_data,
+                file_name=f"excel_maestro_{current_subject.lower()}.xlsx",
+                mime=XLSX_MIME
+            )
+    
     df = st.session_state['questions_df']
     
     # Display data summary with prettier metrics
@@ -2117,11 +1502,7 @@ def main():
         # Second row for Ciencias: Área Temática (full width)
         if EXCEL_COLUMNS['area_tematica'] in df.columns:
             # Filter areas based on selected subject and eje
-            filtered_df_for_area = df.copy()
-            if subject_filter:
-                filtered_df_for_area = filtered_df_for_area[filtered_df_for_area[EXCEL_COLUMNS['subject_source']] == subject_filter]
-            if eje_filter:
-                filtered_df_for_area = filtered_df_for_area[filtered_df_for_area[EXCEL_COLUMNS['eje_tematico']] == eje_filter]
+            filtered_df_for_area = df[get_search_index(df).mask({'subject': subject_filter, 'eje_tematico': eje_filter})]
                 
             unique_vals = filtered_df_for_area[EXCEL_COLUMNS['area_tematica']].astype(str).dropna().unique().tolist()
             unique_vals = [a for a in unique_vals if a.lower() != 'nan' and a.strip() != '']
@@ -2148,19 +1529,14 @@ def main():
     # Next row: Unidad (full width) - dynamic based on selected filters
     if EXCEL_COLUMNS['conocimiento_subtema'] in df.columns:
         # Filter unidades based on selected area, subject and eje (for Ciencias)
-        filtered_df_for_subtema = df.copy()
-        
-        # Apply subject filter first (for Ciencias)
-        if current_subject == "Ciencias" and 'subject_filter' in locals() and subject_filter is not None:
-            filtered_df_for_subtema = filtered_df_for_subtema[filtered_df_for_subtema[EXCEL_COLUMNS['subject_source']] == subject_filter]
+        subtema_filters = {'area_tematica': area_filter}
         
-        # Apply Eje filter (for Ciencias)
-        if current_subject == "Ciencias" and 'eje_filter' in locals() and eje_filter is not None:
-            filtered_df_for_subtema = filtered_df_for_subtema[filtered_df_for_subtema[EXCEL_COLUMNS['eje_tematico']] == eje_filter]
+        # Subject and Eje filters apply for Ciencias only
+        if current_subject == "Ciencias":
+            subtema_filters['subject'] = subject_filter if 'subject_filter' in locals() else None
+            subtema_filters['eje_tematico'] = eje_filter if 'eje_filter' in locals() else None
         
-        # Apply area filter
-        if area_filter is not None:
-            filtered_df_for_subtema = filtered_df_for_subtema[filtered_df_for_subtema[EXCEL_COLUMNS['area_tematica']] == area_filter]
+        filtered_df_for_subtema = df[get_search_index(df).mask(subtema_filters)]
         
         available_subtemas = filtered_df_for_subtema[EXCEL_COLUMNS['conocimiento_subtema']].astype(str).dropna().unique().tolist()
         available_subtemas = [s for s in available_subtemas if s.lower() != 'nan' and s.strip() != '']
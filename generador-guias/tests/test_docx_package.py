@@ -0,0 +1,155 @@
+"""
+Tests for docx_package and question_processor.split_docx_bytes: a real
+multi-question .docx is split and every output must open with zipfile and
+python-docx, carry only its own media, and have consistent CRC/size fields.
+"""
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_BREAK
+
+from docx_package import (
+    CONTENT_TYPES_PART,
+    DOCUMENT_RELS_PART,
+    DocxPackage,
+    RawEntry,
+    read_raw_entries,
+    write_package,
+)
+from question_processor import split_docx_bytes
+
+
+def make_png(rgb):
+    """A valid 2x2 single-colour PNG (python-docx reads its size)."""
+    def chunk(kind, payload):
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+    rows = b"".join(b"\x00" + bytes(rgb) * 2 for _ in range(2))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 2, 2, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+IMAGES = [make_png((255, 0, 0)), make_png((0, 255, 0)), make_png((0, 0, 255))]
+
+
+@pytest.fixture
+def multi_question_docx():
+    """Three one-page questions, each with its own picture."""
+    document = Document()
+    for number, image in enumerate(IMAGES, start=1):
+        document.add_paragraph(f"Pregunta {number}: enunciado")
+        document.add_picture(BytesIO(image))
+        document.add_paragraph(f"A) alternativa de la pregunta {number}")
+        if number < len(IMAGES):
+            document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def assert_valid_zip(data):
+    """Central directory, local headers, CRCs and sizes all agree."""
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        for info in zf.infolist():
+            content = zf.read(info)
+            assert info.file_size == len(content)
+            assert info.CRC == zlib.crc32(content)
+            name_len, extra_len = struct.unpack_from("<HH", data, info.header_offset + 26)
+            local_crc, local_compressed, local_size = struct.unpack_from("<3L", data, info.header_offset + 14)
+            assert (local_crc, local_compressed, local_size) == (info.CRC, info.compress_size, info.file_size)
+            assert name_len == len(info.filename.encode("utf-8")) and extra_len == 0
+
+
+def test_split_round_trips_every_question(multi_question_docx):
+    questions = split_docx_bytes(multi_question_docx)
+
+    assert len(questions) == 3
+    for number, (question, image) in enumerate(zip(questions, IMAGES), start=1):
+        assert_valid_zip(question)
+        with zipfile.ZipFile(BytesIO(question)) as zf:
+            assert zf.namelist()[0] == CONTENT_TYPES_PART
+            media = [name for name in zf.namelist() if name.startswith("word/media/")]
+            assert [zf.read(name) for name in media] == [image]
+
+        document = Document(BytesIO(question))
+        text = "\n".join(p.text for p in document.paragraphs)
+        assert f"Pregunta {number}" in text
+        assert all(f"Pregunta {other}" not in text for other in range(1, 4) if other != number)
+        # The picture's relationship survived the pruning and resolves to the image
+        blips = document.element.body.xpath(".//a:blip/@r:embed")
+        assert [document.part.related_parts[rel_id].blob for rel_id in blips] == [image]
+
+
+def test_split_drops_relationships_of_pruned_media(multi_question_docx):
+    source_media = {
+        name for name in zipfile.ZipFile(BytesIO(multi_question_docx)).namelist()
+        if name.startswith("word/media/")
+    }
+    question = split_docx_bytes(multi_question_docx)[0]
+
+    package = DocxPackage.from_bytes(question)
+    targets = [rel.get("Target") for rel in package.relationships()]
+    image_targets = [target for target in targets if target.startswith("media/")]
+    assert len(image_targets) == 1
+    assert len(source_media) == 3
+    # Parts that are not media (styles, settings...) are all kept
+    assert "word/styles.xml" in package.entries
+    assert DOCUMENT_RELS_PART in package.entries
+
+
+def test_raw_entries_are_copied_without_recompressing():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr(CONTENT_TYPES_PART, b"<Types/>" * 50, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/media/image1.png", IMAGES[0], compress_type=zipfile.ZIP_STORED)
+    source = buffer.getvalue()
+
+    entries = read_raw_entries(source)
+    assert entries[CONTENT_TYPES_PART].compress_type == zipfile.ZIP_DEFLATED
+    assert entries["word/media/image1.png"].compress_type == zipfile.ZIP_STORED
+
+    output = write_package(entries)
+    assert_valid_zip(output)
+    with zipfile.ZipFile(BytesIO(source)) as original, zipfile.ZipFile(BytesIO(output)) as copied:
+        for name in original.namelist():
+            assert copied.read(name) == original.read(name)
+            assert copied.getinfo(name).compress_size == original.getinfo(name).compress_size
+            assert copied.getinfo(name).compress_type == original.getinfo(name).compress_type
+
+
+def test_new_parts_deflate_xml_and_store_precompressed_media():
+    xml = b"<?xml version='1.0'?><w:document>" + b"<w:p/>" * 200 + b"</w:document>"
+    output = write_package({
+        "word/document.xml": xml,
+        "word/media/image1.png": IMAGES[1],
+        CONTENT_TYPES_PART: b"<Types/>",
+        "word/media/ñandú.jpeg": b"\xff\xd8 jpeg bytes",
+    })
+
+    assert_valid_zip(output)
+    with zipfile.ZipFile(BytesIO(output)) as zf:
+        assert zf.namelist()[0] == CONTENT_TYPES_PART
+        assert zf.getinfo("word/document.xml").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("word/document.xml").compress_size < len(xml)
+        assert zf.getinfo("word/media/image1.png").compress_type == zipfile.ZIP_STORED
+        assert zf.read("word/media/ñandú.jpeg") == b"\xff\xd8 jpeg bytes"
+        assert zf.getinfo("word/media/ñandú.jpeg").flag_bits & 0x800
+
+
+def test_raw_entry_decompress_matches_content():
+    data = b"contenido " * 100
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    deflated = RawEntry(zipfile.ZIP_DEFLATED, zlib.crc32(data), len(data),
+                        compressor.compress(data) + compressor.flush())
+    stored = RawEntry(zipfile.ZIP_STORED, zlib.crc32(data), len(data), data)
+
+    assert deflated.decompress() == data
+    assert stored.decompress() == data
@@ -0,0 +1,120 @@
+"""
+Tests for guide_assembler.GuideAssembler: multi-question guides keep every
+question, image and the base section layout; inputs are never modified and
+to_bytes() is repeatable.
+"""
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+from docx.enum.section import WD_ORIENT
+from docx.shared import Cm
+from lxml import etree
+
+from docx_package import DOCUMENT_PART, W_NS, DocxPackage
+from guide_assembler import GuideAssembler, assemble_guide
+from tests.test_docx_package import make_png
+
+IMAGES = [make_png((10, 20, 30)), make_png((40, 50, 60)), make_png((70, 80, 90))]
+
+
+def make_question(number, image, landscape=False):
+    document = Document()
+    section = document.sections[0]
+    section.page_width, section.page_height = Cm(21), Cm(29.7)
+    if landscape:
+        section.orientation = WD_ORIENT.LANDSCAPE
+        section.page_width, section.page_height = Cm(29.7), Cm(21)
+    document.add_paragraph(f"Enunciado {number}")
+    document.add_picture(BytesIO(image))
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def questions():
+    # Only the base (first) question's section layout may reach the guide
+    return [make_question(n, image, landscape=(n == 2)) for n, image in enumerate(IMAGES, start=1)]
+
+
+def body_children(docx_bytes):
+    return list(Document(BytesIO(docx_bytes)).element.body)
+
+
+def assert_guide(guide, count):
+    document = Document(BytesIO(guide))
+    texts = [p.text for p in document.paragraphs if p.text]
+    assert texts == [f"{n}. Enunciado {n}" for n in range(1, count + 1)]
+
+    blips = document.element.body.xpath(".//a:blip/@r:embed")
+    assert [document.part.related_parts[rel_id].blob for rel_id in blips] == IMAGES[:count]
+
+    # Exactly one section, last in the body, with the base (portrait) page size
+    children = body_children(guide)
+    sections = [child for child in children if child.tag == f"{{{W_NS}}}sectPr"]
+    assert len(sections) == 1 and children[-1].tag == f"{{{W_NS}}}sectPr"
+    assert document.sections[0].page_width < document.sections[0].page_height
+
+    with zipfile.ZipFile(BytesIO(guide)) as zf:
+        assert zf.testzip() is None
+
+
+def test_assembles_multiple_questions(questions):
+    assert_guide(assemble_guide(questions), 3)
+
+
+def test_to_bytes_is_repeatable(questions):
+    assembler = GuideAssembler()
+    for question in questions:
+        assembler.add_question(question)
+
+    first = assembler.to_bytes()
+    second = assembler.to_bytes()
+
+    assert_guide(first, 3)
+    assert_guide(second, 3)
+    with zipfile.ZipFile(BytesIO(first)) as a, zipfile.ZipFile(BytesIO(second)) as b:
+        assert a.read(DOCUMENT_PART) == b.read(DOCUMENT_PART)
+
+
+def test_questions_can_be_added_after_to_bytes(questions):
+    assembler = GuideAssembler()
+    assembler.add_question(questions[0])
+    assert_guide(assembler.to_bytes(), 1)
+
+    assembler.add_question(questions[1])
+    assembler.add_question(questions[2])
+    assert_guide(assembler.to_bytes(), 3)
+
+
+def test_input_packages_are_not_modified(questions):
+    packages = [DocxPackage.from_bytes(question) for question in questions]
+    before = [(etree.tostring(p.document_root), len(p.relationships())) for p in packages]
+
+    guide = assemble_guide(packages)
+    # The same opened packages can build a second, identical guide
+    again = assemble_guide(packages)
+
+    for package, (document_xml, rel_count) in zip(packages, before):
+        assert etree.tostring(package.document_root) == document_xml
+        assert len(package.relationships()) == rel_count
+    assert_guide(guide, 3)
+    assert_guide(again, 3)
+
+
+def test_same_question_twice_keeps_both_copies(questions):
+    package = DocxPackage.from_bytes(questions[0])
+
+    guide = assemble_guide([package, package], number_questions=False)
+
+    document = Document(BytesIO(guide))
+    assert [p.text for p in document.paragraphs if p.text] == ["Enunciado 1", "Enunciado 1"]
+    doc_pr_ids = document.element.body.xpath(".//wp:docPr/@id")
+    assert len(doc_pr_ids) == len(set(doc_pr_ids)) == 2
+
+
+def test_empty_guide_is_an_error():
+    with pytest.raises(ValueError):
+        GuideAssembler().to_bytes()
@@ -0,0 +1,128 @@
+"""
+Tests for incremental consolidation in master_consolidator: unchanged,
+modified, new and removed source Excels, read one file at a time.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+import master_consolidator
+from master_consolidator import MasterConsolidator
+from question_catalog import QuestionCatalog
+from storage import StorageClient
+
+SUBJECT = "TESTCAT"
+
+
+class CountingStorage(StorageClient):
+    """Local storage that records which files were read."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+
+    def read_bytes(self, path):
+        self.reads.append(os.path.basename(str(path)))
+        return super().read_bytes(path)
+
+
+@pytest.fixture
+def source_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    monkeypatch.setattr(master_consolidator, "EXCELS_ACTUALIZADOS_DIR", tmp_path / "excels")
+    folder = tmp_path / "excels" / SUBJECT
+    folder.mkdir(parents=True)
+    return folder
+
+
+@pytest.fixture
+def consolidator(tmp_path, source_dir):
+    storage = CountingStorage()
+    return MasterConsolidator(storage, QuestionCatalog(storage, db_path=tmp_path / "catalog.sqlite"))
+
+
+def write_source(folder, name, ids, topic="Ondas", mtime=None):
+    path = folder / name
+    pd.DataFrame({"PreguntaID": ids, "Eje temático": [topic] * len(ids)}).to_excel(path, index=False)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def stored(consolidator):
+    df = consolidator.catalog.load_subject(SUBJECT)
+    return dict(zip(df["PreguntaID"], df["Eje temático"]))
+
+
+def test_new_sources_are_imported_then_unchanged_ones_are_not_read(consolidator, source_dir):
+    write_source(source_dir, "set_a.xlsx", ["A1", "A2"])
+    write_source(source_dir, "set_b.xlsx", ["B1"])
+
+    df, _ = consolidator.consolidate_and_append_new(SUBJECT)
+    assert sorted(df["PreguntaID"]) == ["A1", "A2", "B1"]
+    assert stored(consolidator) == {"A1": "Ondas", "A2": "Ondas", "B1": "Ondas"}
+
+    consolidator.storage.reads.clear()
+    changes = consolidator.detect_source_changes(SUBJECT)
+    assert sorted(os.path.basename(p) for p in changes["unchanged"]) == ["set_a.xlsx", "set_b.xlsx"]
+    assert changes["new"] == changes["changed"] == changes["refresh"] == changes["removed"] == []
+    assert consolidator.storage.reads == []
+
+    df, _ = consolidator.consolidate_and_append_new(SUBJECT)
+    assert df.empty
+    assert consolidator.storage.reads == []
+
+
+def test_modified_source_is_reimported(consolidator, source_dir):
+    write_source(source_dir, "set_a.xlsx", ["A1", "A2"], mtime=1_000_000)
+    write_source(source_dir, "set_b.xlsx", ["B1"])
+    consolidator.consolidate_and_append_new(SUBJECT)
+
+    write_source(source_dir, "set_a.xlsx", ["A1"], topic="Energía", mtime=2_000_000)
+    changes = consolidator.detect_source_changes(SUBJECT)
+    assert [os.path.basename(entry[0]) for entry in changes["changed"]] == ["set_a.xlsx"]
+
+    consolidator.storage.reads.clear()
+    df, _ = consolidator.consolidate_and_append_new(SUBJECT)
+    assert list(df["PreguntaID"]) == ["A1"]
+    assert consolidator.storage.reads == ["set_a.xlsx"]
+    assert stored(consolidator) == {"A1": "Energía", "B1": "Ondas"}
+
+
+def test_touched_but_identical_source_only_refreshes_the_manifest(consolidator, source_dir):
+    path = write_source(source_dir, "set_a.xlsx", ["A1"], mtime=1_000_000)
+    consolidator.consolidate_and_append_new(SUBJECT)
+
+    os.utime(path, (3_000_000, 3_000_000))
+    changes = consolidator.detect_source_changes(SUBJECT)
+    assert [entry[0] for entry in changes["refresh"]] == [path]
+
+    df, _ = consolidator.consolidate_and_append_new(SUBJECT)
+    assert df.empty
+    assert consolidator.catalog.source_manifest(SUBJECT)[path][1] == 3_000_000
+
+
+def test_removed_source_is_reported_and_its_questions_kept(consolidator, source_dir):
+    path_a = write_source(source_dir, "set_a.xlsx", ["A1"])
+    write_source(source_dir, "set_b.xlsx", ["B1"])
+    consolidator.consolidate_and_append_new(SUBJECT)
+
+    os.remove(path_a)
+    assert consolidator.detect_source_changes(SUBJECT)["removed"] == [path_a]
+
+    consolidator.consolidate_and_append_new(SUBJECT)
+    assert stored(consolidator) == {"A1": "Ondas", "B1": "Ondas"}
+
+
+def test_sources_are_read_one_at_a_time(consolidator, source_dir):
+    for name in ("set_a.xlsx", "set_b.xlsx", "set_c.xlsx"):
+        write_source(source_dir, name, [name[4].upper() + "1"])
+
+    reads_per_yield = []
+    for status, _, data, _ in consolidator.iter_source_changes(SUBJECT):
+        assert status == "new" and data
+        reads_per_yield.append(len(consolidator.storage.reads))
+
+    # Each file is read only when the caller asks for it
+    assert reads_per_yield == [1, 2, 3]
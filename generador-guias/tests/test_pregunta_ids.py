@@ -0,0 +1,52 @@
+"""
+Tests for PreguntaID uniqueness across the worker processes of main.process_sets.
+"""
+import os
+import random
+import time
+
+import pytest
+
+import excel_processor
+import main
+from id_generator import PreguntaIDRegistry, validate_pregunta_id
+
+PREFIXES = ["OND-FIS-LON-ANA-MED-C"] * 200
+
+
+def _generate(partition, seed=7):
+    """IDs a worker would hand out with its own registry and the same random state."""
+    random.seed(seed)
+    return PreguntaIDRegistry(partition=partition).generate_ids(PREFIXES)
+
+
+def test_unpartitioned_registries_collide():
+    # Two processes with no knowledge of each other and the same random draws
+    assert set(_generate((0, 1))) == set(_generate((0, 1)))
+
+
+def test_partitioned_registries_never_collide():
+    first = _generate((0, 2))
+    second = _generate((1, 2))
+
+    assert set(first).isdisjoint(second)
+    assert len(set(first)) == len(first) == len(PREFIXES)
+    assert all(validate_pregunta_id(pregunta_id) for pregunta_id in first + second)
+
+
+def _worker_partition():
+    time.sleep(0.2)  # keep this worker busy so the next job goes to another one
+    return os.getpid(), excel_processor._id_registry.partition, len(excel_processor._id_registry)
+
+
+def test_pool_workers_get_distinct_partitions_and_the_parent_ids(monkeypatch):
+    # Workers must not open the catalog: the parent's IDs arrive through initargs
+    monkeypatch.setattr(excel_processor, "load_known_pregunta_ids",
+                        lambda storage: pytest.fail("worker loaded the catalog"))
+    with main._process_pool(2, {"KNOWN-1", "KNOWN-2"}) as pool:
+        results = [future.result() for future in [pool.submit(_worker_partition) for _ in range(4)]]
+
+    partitions = {pid: partition for pid, partition, _ in results}
+    assert set(partitions.values()) <= {(0, 2), (1, 2)}
+    assert len(set(partitions.values())) == len(partitions)
+    assert {known for _, _, known in results} == {2}
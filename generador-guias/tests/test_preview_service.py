@@ -0,0 +1,182 @@
+"""
+Tests for preview_service with a fake soffice executable: worker pool
+lifecycle, the on-disk cache, batching, and the command-line fallback when
+the experimental uno listener is unavailable or fails.
+"""
+import os
+import stat
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+import preview_service
+from preview_service import CLI_BATCH_SIZE, LibreOfficeWorker, PreviewService
+
+FAKE_SOFFICE = f"""#!{sys.executable}
+# Mimics `soffice --convert-to png --outdir DIR FILE...`: one PNG per input,
+# containing the input bytes; inputs starting with BROKEN produce nothing
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+with open(Path(__file__).with_suffix(".log"), "a") as log:
+    log.write(" ".join(args) + "\\n")
+out_dir = Path(args[args.index("--outdir") + 1])
+for name in args[args.index("--outdir") + 2:]:
+    data = Path(name).read_bytes()
+    if not data.startswith(b"BROKEN"):
+        (out_dir / (Path(name).stem + ".png")).write_bytes(b"PNG " + data)
+"""
+
+
+@pytest.fixture
+def soffice(tmp_path):
+    path = tmp_path / "soffice"
+    path.write_text(FAKE_SOFFICE)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return path
+
+
+def soffice_runs(soffice):
+    log = soffice.with_suffix(".log")
+    return log.read_text().splitlines() if log.exists() else []
+
+
+@pytest.fixture
+def documents(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    paths = []
+    for index in range(5):
+        path = folder / f"q{index}.docx"
+        path.write_bytes(f"question {index}".encode())
+        paths.append(str(path))
+    return paths
+
+
+def make_service(tmp_path, soffice, **kwargs):
+    return PreviewService(cache_dir=tmp_path / "cache", soffice=str(soffice), **kwargs)
+
+
+def test_render_converts_once_then_serves_from_cache(tmp_path, soffice, documents):
+    service = make_service(tmp_path, soffice, workers=2)
+
+    assert service.render(documents[0]) == [b"PNG question 0"]
+    assert service.render(documents[0]) == [b"PNG question 0"]
+    # A new service (e.g. after a restart) reuses the same cache folder
+    assert make_service(tmp_path, soffice).render(documents[0]) == [b"PNG question 0"]
+
+    assert len(soffice_runs(soffice)) == 1
+
+
+def test_workers_are_created_lazily_reused_and_closed(tmp_path, soffice, documents):
+    service = make_service(tmp_path, soffice, workers=2)
+    assert service._workers == []
+
+    for path in documents[:3]:
+        service.render(path)
+    # One request at a time only ever needs one worker
+    assert len(service._workers) == 1
+
+    closed = []
+    for worker in service._workers:
+        worker.close = lambda worker=worker: closed.append(worker)
+    service.close()
+    assert closed == service._workers
+
+
+def test_pool_never_exceeds_worker_count(tmp_path, soffice, documents, monkeypatch):
+    service = make_service(tmp_path, soffice, workers=2)
+    both_busy = threading.Event()
+    active = []
+    original = LibreOfficeWorker.render_many
+
+    def slow_render_many(worker, docs):
+        # Hold the first conversions until two run at once
+        active.append(worker)
+        if len(active) >= 2:
+            both_busy.set()
+        both_busy.wait(timeout=5)
+        return original(worker, docs)
+
+    monkeypatch.setattr(LibreOfficeWorker, "render_many", slow_render_many)
+    threads = [threading.Thread(target=service.render, args=(path,)) for path in documents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(service._workers) == 2
+    assert service._idle.qsize() == 2
+    assert all(service.cache.get(service.cache.key(Path(p).read_bytes())) for p in documents)
+
+
+def test_failed_conversion_is_retried_once_and_not_cached(tmp_path, soffice):
+    broken = tmp_path / "broken.docx"
+    broken.write_bytes(b"BROKEN document")
+    service = make_service(tmp_path, soffice)
+
+    assert service.render(str(broken)) == []
+    assert len(soffice_runs(soffice)) == 2
+    assert service.cache.get(service.cache.key(broken.read_bytes())) is None
+
+
+def test_prerender_batches_uncached_files(tmp_path, soffice, documents):
+    service = make_service(tmp_path, soffice, workers=2)
+    service.render(documents[0])
+    broken = tmp_path / "broken.docx"
+    broken.write_bytes(b"BROKEN document")
+    progress = []
+
+    stats = service.prerender(documents + [str(broken), str(tmp_path / "missing.docx")],
+                              progress=lambda done, total: progress.append((done, total)))
+
+    assert stats == {"total": 7, "cached": 1, "rendered": 4, "failed": 2}
+    # 5 pending files fit in one command-line batch (plus the earlier render)
+    assert 5 <= CLI_BATCH_SIZE and len(soffice_runs(soffice)) == 2
+    assert progress == [(5, 5)]
+
+
+def test_without_soffice_nothing_is_rendered(tmp_path, documents):
+    service = PreviewService(cache_dir=tmp_path / "cache", soffice=None)
+    service.soffice = None
+
+    assert service.render(documents[0]) == []
+    assert service.prerender(documents)["failed"] == len(documents)
+
+
+def test_uno_requested_without_bridge_uses_command_line(tmp_path, soffice, documents, monkeypatch):
+    monkeypatch.setattr(preview_service, "uno", None)
+    service = make_service(tmp_path, soffice, use_uno=True)
+
+    assert service.use_uno is False
+    assert service.render(documents[0]) == [b"PNG question 0"]
+    assert "--convert-to" in soffice_runs(soffice)[0]
+
+
+def test_failing_uno_listener_falls_back_to_command_line(tmp_path, soffice, documents, monkeypatch):
+    monkeypatch.setattr(preview_service, "uno", object())
+    listener_starts = []
+
+    def failing_listener(worker):
+        listener_starts.append(worker)
+        raise RuntimeError("LibreOffice listener did not start")
+
+    monkeypatch.setattr(LibreOfficeWorker, "_start_listener", failing_listener)
+    service = make_service(tmp_path, soffice, use_uno=True)
+    assert service.use_uno is True
+
+    assert service.render(documents[0]) == [b"PNG question 0"]
+    stats = service.prerender(documents[1:3])
+
+    assert stats["rendered"] == 2
+    assert len(listener_starts) == 3
+    assert len(soffice_runs(soffice)) == 3
+
+
+def test_uno_is_off_by_default():
+    assert preview_service.USE_UNO is (preview_service.PREVIEW_USE_UNO and preview_service.uno is not None)
+    if not os.getenv("PREVIEW_USE_UNO"):
+        assert preview_service.USE_UNO is False
@@ -0,0 +1,45 @@
+"""
+Tests for main.process_sets: duplicate set names behave the same with one
+worker and with a pool.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """Record process_single_set calls instead of processing real files."""
+    calls = []
+
+    def fake_process_single_set(base_filename, subject, storage, docx_path=None, xlsx_path=None):
+        calls.append(base_filename)
+        return True, f"Processed {base_filename}"
+
+    monkeypatch.setattr(main, "process_single_set", fake_process_single_set)
+    # Threads share the patched function; worker processes would not
+    monkeypatch.setattr(main, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(main, "load_known_pregunta_ids", lambda storage: set())
+    return calls
+
+
+SETS = [
+    ("set_a", "a.docx", "a.xlsx"),
+    ("set_b", "b.docx", "b.xlsx"),
+    ("set_a", "a2.docx", "a2.xlsx"),
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_duplicate_set_names_are_processed_once(processed, workers, capsys):
+    results = main.process_sets("F30M", SETS, storage=None, workers=workers)
+
+    assert sorted(processed) == ["set_a", "set_b"]
+    assert [(name, success) for name, success, _, _ in results] == [("set_a", True), ("set_b", True)]
+    assert "Set listed more than once, processing it once: set_a" in capsys.readouterr().out
+
+
+def test_unique_sets_keeps_first_occurrence():
+    assert main.unique_sets(SETS) == SETS[:2]
@@ -0,0 +1,115 @@
+"""
+Tests for question_catalog.QuestionCatalog: round trips through SQLite and
+the master Excel, and storage sync on a non-local backend.
+"""
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from question_catalog import QuestionCatalog
+from storage import StorageClient
+
+SUBJECT = "TESTCAT"  # no legacy master Excel exists for it
+
+
+class FakeRemoteStorage:
+    """Dict-backed stand-in for the gcp StorageClient."""
+
+    backend = "gcp"
+
+    def __init__(self):
+        self.files = {}
+        self.uploads = 0
+
+    def exists(self, path):
+        return str(path) in self.files
+
+    def read_bytes(self, path):
+        return self.files[str(path)]
+
+    def write_bytes(self, path, data, content_type=None):
+        self.files[str(path)] = data
+        self.uploads += 1
+        return True
+
+
+def questions():
+    return pd.DataFrame({
+        "PreguntaID": ["Q1", "Q2", "Q3"],
+        "Eje temático": ["Ondas", "Ondas", "Energía"],
+        "Dificultad": [1, 2, 3],
+        "Archivo origen": ["set_a", "set_a", "set_b"],
+    })
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    return QuestionCatalog(StorageClient(), db_path=tmp_path / "catalog.sqlite")
+
+
+def test_subject_round_trip_with_usage(catalog):
+    assert catalog.replace_subject(SUBJECT, questions()) == 3
+    assert catalog.record_usage(SUBJECT, ["Q1", "Q3", "QX"], "Guía 1", "2026-03-01 10:00:00") == ["QX"]
+    catalog.record_usage(SUBJECT, ["Q1"], "Guía 2", "2026-03-02 10:00:00")
+
+    df = catalog.load_subject(SUBJECT).set_index("PreguntaID")
+    assert list(df.index) == ["Q1", "Q2", "Q3"]
+    assert df.loc["Q1", "Número de usos"] == 2
+    assert df.loc["Q1", "Nombre guía (uso 2)"] == "Guía 2"
+    assert df.loc["Q3", "Nombre guía (uso 1)"] == "Guía 1"
+
+    assert catalog.delete_usage(SUBJECT, "Guía 1") == ["Q1", "Q3"]
+    df = catalog.load_subject(SUBJECT).set_index("PreguntaID")
+    assert df.loc["Q1", "Nombre guía (uso 1)"] == "Guía 2"
+    assert df.loc["Q3", "Número de usos"] == 0
+
+
+def test_master_excel_export_and_import_round_trip(catalog, tmp_path):
+    catalog.replace_subject(SUBJECT, questions())
+    catalog.record_usage(SUBJECT, ["Q2"], "Guía 1", "2026-03-01 10:00:00")
+    exported = pd.read_excel(BytesIO(catalog.master_excel_bytes(SUBJECT)))
+
+    output = tmp_path / "excel_maestro_testcat.xlsx"
+    assert catalog.export_master_excel(SUBJECT, output) == str(output)
+
+    other = QuestionCatalog(catalog.storage, db_path=tmp_path / "other.sqlite")
+    assert other.import_master_excel(SUBJECT, output) == 3
+    reimported = pd.read_excel(BytesIO(other.master_excel_bytes(SUBJECT)))
+    pd.testing.assert_frame_equal(reimported, exported)
+    assert other.usage_events(SUBJECT)["guide_name"].tolist() == ["Guía 1"]
+
+
+def test_remote_catalog_survives_a_restart(tmp_path):
+    storage = FakeRemoteStorage()
+    catalog = QuestionCatalog(storage, db_path="bucket/catalog.sqlite")
+    catalog.replace_subject(SUBJECT, questions())
+    catalog.record_usage(SUBJECT, ["Q1"], "Guía 1", "2026-03-01 10:00:00")
+    assert list(storage.files) == ["bucket/catalog.sqlite"]
+
+    # A new container starts with an empty disk
+    catalog.db_path.unlink()
+    restarted = QuestionCatalog(storage, db_path="bucket/catalog.sqlite")
+    df = restarted.load_subject(SUBJECT).set_index("PreguntaID")
+    assert list(df.index) == ["Q1", "Q2", "Q3"]
+    assert df.loc["Q1", "Nombre guía (uso 1)"] == "Guía 1"
+
+
+def test_remote_batch_uploads_once(tmp_path):
+    storage = FakeRemoteStorage()
+    catalog = QuestionCatalog(storage, db_path="bucket/catalog.sqlite")
+    storage.uploads = 0
+
+    with catalog.batch():
+        catalog.replace_subject(SUBJECT, questions())
+        with catalog.batch():
+            catalog.record_usage(SUBJECT, ["Q1"], "Guía 1", "2026-03-01 10:00:00")
+        catalog.record_sources(SUBJECT, [("set_a.xlsx", 10, 1.0, "abc")])
+        assert storage.uploads == 0
+    assert storage.uploads == 1
+
+    # Reads and batches without changes do not upload
+    with catalog.batch():
+        catalog.load_subject(SUBJECT)
+    assert storage.uploads == 1
@@ -4,21 +4,23 @@ Usage tracking module for monitoring question usage in generated guides.
 
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from config import USAGE_TRACKING_BASE_COLUMNS, EXCELES_MAESTROS_DIR, get_usage_column_names
+from config import USAGE_TRACKING_BASE_COLUMNS
 from storage import StorageClient
+from question_catalog import QuestionCatalog
 
 
 class UsageTracker:
     """Handles tracking of question usage in generated guides."""
     
-    def __init__(self, storage_client: StorageClient):
+    def __init__(self, storage_client: StorageClient, catalog: Optional[QuestionCatalog] = None):
         self.storage = storage_client
+        self.catalog = catalog or QuestionCatalog(storage_client)
     
     def update_question_usage(self, subject: str, question_ids: List[str], guide_name: str) -> bool:
         """
-        Update the master Excel file with usage tracking information.
+        Update the master data with usage tracking information.
         
         Args:
             subject: Subject area (e.g., 'M1', 'Ciencias')
@@ -51,71 +53,23 @@ class UsageTracker:
             bool: True if update was successful, False otherwise
         """
         try:
-            # Load the master Excel file
-            master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-            
-            if not self.storage.exists(str(master_file)):
-                print(f"Master file not found: {master_file}")
+            if not self.catalog.has_subject(subject):
+                print(f"Master data not found for subject: {subject}")
                 return False
             
-            # Read the Excel file
-            df = pd.read_excel(master_file)
-            
-            # Ensure usage tracking columns exist
-            df = self._ensure_usage_columns(df)
-            
             # Get current date
             current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            # Track which questions were successfully updated
-            updated_questions = []
-            missing_questions = []
-            
-            # Update usage for each question
-            for question_id in question_ids:
-                # Find the row with this question ID
-                mask = df['PreguntaID'] == question_id
-                if mask.any():
-                    row_idx = df[mask].index[0]
-                    
-                    # Get current usage count
-                    current_uses = df.loc[row_idx, 'Número de usos']
-                    if pd.isna(current_uses):
-                        current_uses = 0
-                    else:
-                        current_uses = int(current_uses)
-                    
-                    # Increment usage count
-                    new_uses = current_uses + 1
-                    df.loc[row_idx, 'Número de usos'] = new_uses
-                    
-                    # Add new columns for this use if they don't exist
-                    guide_name_col, date_col = get_usage_column_names(new_uses)
-                    
-                    # Ensure the new columns exist in the DataFrame
-                    if guide_name_col not in df.columns:
-                        df[guide_name_col] = None
-                    if date_col not in df.columns:
-                        df[date_col] = None
-                    
-                    # Update the new usage columns
-                    df.loc[row_idx, guide_name_col] = guide_name
-                    df.loc[row_idx, date_col] = current_date
-                    
-                    updated_questions.append(question_id)
-                else:
-                    missing_questions.append(question_id)
-                    print(f"WARNING: Question {question_id} not found in {subject} master file")
-            
-            # Save the updated Excel file
-            df.to_excel(master_file, index=False)
+            # One usage event per question in this guide
+            missing_questions = self.catalog.record_usage(subject, question_ids, guide_name, current_date)
+            updated_count = len(question_ids) - len(missing_questions)
             
             # Report results
             if missing_questions:
                 print(f"WARNING: {len(missing_questions)} questions not found in {subject}: {missing_questions}")
-                print(f"Successfully updated {len(updated_questions)} out of {len(question_ids)} questions in {subject}")
+                print(f"Successfully updated {updated_count} out of {len(question_ids)} questions in {subject}")
                 # Still return True if at least some questions were updated
-                return len(updated_questions) > 0
+                return updated_count > 0
             else:
                 print(f"Successfully updated usage tracking for all {len(question_ids)} questions in {subject}")
                 return True
@@ -151,33 +105,22 @@ class UsageTracker:
             Dictionary with usage statistics
         """
         try:
-            master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-            
-            if not self.storage.exists(str(master_file)):
-                return {"error": f"Master file not found: {master_file}"}
+            if not self.catalog.has_subject(subject):
+                return {"error": f"Master data not found for subject: {subject}"}
             
-            df = pd.read_excel(master_file)
-            
-            # Ensure usage tracking columns exist
-            df = self._ensure_usage_columns(df)
+            # Questions per usage count, aggregated in the catalog
+            usage_counts = self.catalog.usage_distribution(subject)
             
             # Calculate statistics
-            total_questions = len(df)
-            
-            # Fill NaN values with 0 for unused questions
-            df['Número de usos'] = df['Número de usos'].fillna(0)
-            
-            unused_questions = len(df[df['Número de usos'] == 0])
+            total_questions = sum(usage_counts.values())
+            unused_questions = usage_counts.get(0, 0)
             used_questions = total_questions - unused_questions
             
-            # Count questions by usage frequency
-            usage_counts = df['Número de usos'].value_counts().sort_index()
-            
             return {
                 "total_questions": total_questions,
                 "unused_questions": unused_questions,
                 "used_questions": used_questions,
-                "usage_distribution": usage_counts.to_dict(),
+                "usage_distribution": usage_counts,
                 "usage_percentage": (used_questions / total_questions * 100) if total_questions > 0 else 0
             }
             
@@ -203,7 +146,7 @@ class UsageTracker:
     
     def _get_guides_from_single_subject(self, subject: str) -> List[Dict[str, Any]]:
         """
-        Get guides from a single subject file.
+        Get guides from a single subject's master data.
         
         Args:
             subject: Subject area
@@ -212,70 +155,23 @@ class UsageTracker:
             List of guide dictionaries
         """
         try:
-            master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-            
-            if not self.storage.exists(str(master_file)):
+            if not self.catalog.has_subject(subject):
                 return []
             
-            df = pd.read_excel(master_file)
-            df = self._ensure_usage_columns(df)
+            # Each event is one question of one downloaded guide; a guide
+            # instance is identified by its name and download date
+            events = self.catalog.usage_events(subject)
+            events = events[events['guide_name'].str.strip() != '']
             
-            # Dictionary to store unique guides with their questions
             unique_guides = {}
-            
-            # Look through all usage columns to find guides
-            # We need to process each usage column separately to avoid mixing different guide instances
-            for col in df.columns:
-                if col.startswith('Nombre guía (uso '):
-                    # Extract usage number
-                    usage_num = int(col.split('(')[1].split(')')[0].split()[1])
-                    
-                    # Get the corresponding date column
-                    date_col = f"Fecha descarga (uso {usage_num})"
-                    
-                    # Get unique guide names from this column
-                    guide_names = df[col].dropna().unique()
-                    
-                    for guide_name in guide_names:
-                        if pd.notna(guide_name) and guide_name.strip():
-                            # Find questions that used this guide in this specific usage number
-                            mask = df[col] == guide_name
-                            questions_used = df[mask]['PreguntaID'].tolist()
-                            
-                            # Get the date for this specific usage
-                            date_value = None
-                            if date_col in df.columns and mask.any():
-                                date_value = df[mask][date_col].iloc[0]
-                            
-                            # Create a unique key based on guide name and date only
-                            # This groups guides with the same name and date together
-                            guide_key = (guide_name, date_value)
-                            
-                            if guide_key not in unique_guides:
-                                # First time seeing this guide instance
-                                # Find all questions that have this guide name and date in ANY usage column
-                                all_questions = set()
-                                for usage_col in df.columns:
-                                    if usage_col.startswith('Nombre guía (uso '):
-                                        usage_date_col = f"Fecha descarga (uso {usage_col.split('(')[1].split(')')[0].split()[1]})"
-                                        if usage_date_col in df.columns:
-                                            # Find questions that have this guide name and date
-                                            guide_mask = (df[usage_col] == guide_name) & (df[usage_date_col] == date_value)
-                                            questions_in_this_usage = df[guide_mask]['PreguntaID'].tolist()
-                                            all_questions.update(questions_in_this_usage)
-                                
-                                unique_guides[guide_key] = {
-                                    'guide_name': guide_name,
-                                    'date': date_value,
-                                    'question_count': len(all_questions),
-                                    'questions': all_questions,
-                                    'usage_numbers': [usage_num]
-                                }
-                            else:
-                                # Guide already exists, just add this usage number if not already present
-                                existing_guide = unique_guides[guide_key]
-                                if usage_num not in existing_guide['usage_numbers']:
-                                    existing_guide['usage_numbers'].append(usage_num)
+            for (guide_name, date_value), guide_events in events.groupby(['guide_name', 'downloaded_at'], sort=False, dropna=False):
+                unique_guides[(guide_name, date_value)] = {
+                    'guide_name': guide_name,
+                    'date': None if pd.isna(date_value) else date_value,
+                    'question_count': guide_events['pregunta_id'].nunique(),
+                    'questions': set(guide_events['pregunta_id']),
+                    'usage_numbers': guide_events['use_number'].unique().tolist()
+                }
             
             # Convert sets back to lists and create final guide list
             guides = []
@@ -329,7 +225,7 @@ class UsageTracker:
     
     def _delete_specific_guide_from_single_subject(self, subject: str, guide_name: str, guide_date: str = None, questions: list = None) -> Dict[str, Any]:
         """
-        Delete a specific guide from a single subject file by matching name, date, and questions.
+        Delete a specific guide from a single subject's master data by matching name, date, and questions.
         This is more precise than the regular deletion method.
         
         Args:
@@ -342,72 +238,30 @@ class UsageTracker:
             Dictionary with deletion results
         """
         try:
-            master_file = EXCELES_MAESTROS_DIR / f"excel_maestro_{subject.lower()}.xlsx"
-            
-            if not self.storage.exists(str(master_file)):
+            if not self.catalog.has_subject(subject):
                 return {
                     'success': False,
-                    'error': f"Master file not found: {master_file}"
+                    'error': f"Master data not found for subject: {subject}"
                 }
             
-            # Read the Excel file
-            df = pd.read_excel(master_file)
-            df = self._ensure_usage_columns(df)
-            
-            # Find all questions that used this specific guide and track which usage numbers to remove
-            questions_to_update = {}  # question_id -> list of usage numbers to remove for this question
-            
             print(f"DEBUG: Looking for specific guide '{guide_name}' with date '{guide_date}' and questions {questions} in {subject}")
             
-            # Look through all guide name columns
-            for col in df.columns:
-                if col.startswith('Nombre guía (uso '):
-                    usage_num = int(col.split('(')[1].split(')')[0].split()[1])
-                    date_col = f"Fecha descarga (uso {usage_num})"
-                    
-                    # Find rows where this guide was used
-                    if guide_date:
-                        # Match both guide name and date
-                        mask = (df[col] == guide_name) & (df[date_col] == guide_date)
-                    else:
-                        # Match only guide name
-                        mask = df[col] == guide_name
-                    
-                    if mask.any():
-                        # For each question that used this guide, check if it matches our criteria
-                        for idx in df[mask].index:
-                            question_id = df.loc[idx, 'PreguntaID']
-                            
-                            # If questions list is provided, only process questions that are in that list
-                            if questions is not None and question_id not in questions:
-                                continue
-                            
-                            if question_id not in questions_to_update:
-                                questions_to_update[question_id] = []
-                            questions_to_update[question_id].append(usage_num)
-                            print(f"DEBUG: Question {question_id} used specific guide in usage {usage_num}")
+            # Delete this guide's usage events; later uses of each question move down
+            questions_affected = self.catalog.delete_usage(subject, guide_name, guide_date, questions)
+            total_questions_affected = len(questions_affected)
             
-            print(f"DEBUG: Total questions to update: {len(questions_to_update)}")
+            print(f"DEBUG: Total questions updated: {total_questions_affected}")
             
-            if not questions_to_update:
+            if not questions_affected:
                 return {
                     'success': False,
                     'error': f"Specific guide '{guide_name}' not found in {subject} with the given criteria"
                 }
             
-            # For each question, remove only the specific usage numbers for this guide
-            total_questions_affected = 0
-            for question_id, usage_numbers_to_remove in questions_to_update.items():
-                self._remove_specific_usage_from_question(df, question_id, usage_numbers_to_remove)
-                total_questions_affected += 1
-            
-            # Save the updated Excel file
-            df.to_excel(master_file, index=False)
-            
             return {
                 'success': True,
                 'questions_deleted': total_questions_affected,
-                'questions_affected': list(questions_to_update.keys()),
+                'questions_affected': questions_affected,
                 'message': f"Successfully deleted specific guide '{guide_name}' from {total_questions_affected} questions in {subject}"
             }
             
@@ -416,87 +270,3 @@ class UsageTracker:
                 'success': False,
                 'error': f"Error deleting specific guide from {subject}: {e}"
             }
-    
-    def _remove_specific_usage_from_question(self, df: pd.DataFrame, question_id: str, usage_numbers_to_remove: List[int]):
-        """
-        Remove specific usage numbers from a question and shift other usages down.
-        This method is more precise and only removes the exact usage entries specified.
-        
-        Args:
-            df: DataFrame to modify
-            question_id: Question ID to update
-            usage_numbers_to_remove: List of specific usage numbers to remove for this question
-        """
-        try:
-            # Find the row with this question ID
-            mask = df['PreguntaID'] == question_id
-            if not mask.any():
-                print(f"DEBUG: Question {question_id} not found in DataFrame")
-                return
-            
-            row_idx = df[mask].index[0]
-            
-            # Get current usage count
-            current_uses = df.loc[row_idx, 'Número de usos']
-            if pd.isna(current_uses) or current_uses == 0:
-                print(f"DEBUG: Question {question_id} has no usage count")
-                return
-            
-            current_uses = int(current_uses)
-            print(f"DEBUG: Question {question_id} has {current_uses} uses, removing specific usages: {usage_numbers_to_remove}")
-            
-            # Create a mapping of old usage numbers to new usage numbers
-            # Only shift down the usage numbers that come after the removed ones
-            usage_mapping = {}
-            new_usage_count = 0
-            
-            for old_usage in range(1, current_uses + 1):
-                if old_usage not in usage_numbers_to_remove:
-                    new_usage_count += 1
-                    usage_mapping[old_usage] = new_usage_count
-            
-            print(f"DEBUG: New usage count will be {new_usage_count}, mapping: {usage_mapping}")
-            
-            # Update the usage count
-            df.loc[row_idx, 'Número de usos'] = new_usage_count
-            
-            # Create new columns with shifted usage numbers
-            new_guide_columns = {}
-            new_date_columns = {}
-            
-            for old_usage, new_usage in usage_mapping.items():
-                old_guide_col = f"Nombre guía (uso {old_usage})"
-                old_date_col = f"Fecha descarga (uso {old_usage})"
-                new_guide_col = f"Nombre guía (uso {new_usage})"
-                new_date_col = f"Fecha descarga (uso {new_usage})"
-                
-                if old_guide_col in df.columns:
-                    new_guide_columns[new_guide_col] = df.loc[row_idx, old_guide_col]
-                if old_date_col in df.columns:
-                    new_date_columns[new_date_col] = df.loc[row_idx, old_date_col]
-            
-            # Clear all old usage columns for this question
-            for old_usage in range(1, current_uses + 1):
-                old_guide_col = f"Nombre guía (uso {old_usage})"
-                old_date_col = f"Fecha descarga (uso {old_usage})"
-                
-                if old_guide_col in df.columns:
-                    df.loc[row_idx, old_guide_col] = None
-                if old_date_col in df.columns:
-                    df.loc[row_idx, old_date_col] = None
-            
-            # Set new usage columns with shifted numbers
-            for col_name, value in new_guide_columns.items():
-                if col_name not in df.columns:
-                    df[col_name] = None
-                df.loc[row_idx, col_name] = value
-            
-            for col_name, value in new_date_columns.items():
-                if col_name not in df.columns:
-                    df[col_name] = None
-                df.loc[row_idx, col_name] = value
-            
-            print(f"DEBUG: Successfully updated question {question_id}")
-            
-        except Exception as e:
-            print(f"Error removing specific usage from question {question_id}: {e}")
@@ -6,6 +6,7 @@ Canonical base: diagnosticos/ with additions from ensayos_generales/ and assessm
 """
 
 import os
+import re
 import json
 import logging
 import requests
@@ -22,6 +23,10 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+UNANSWERED_LABEL = "No respondida"
+TIMESTAMP_COLUMNS = ("created", "modified", "submittedTimestamp")
+_QUESTION_NUMBER_RE = re.compile(r"^pregunta (\d+)")
+
 
 class AssessmentDownloader:
     def __init__(self, data_dir: str = "data"):
@@ -550,16 +555,13 @@ class AssessmentDownloader:
         # Filter responses
         filtered_responses = self.filter_responses(responses)
 
-        # Convert to DataFrame
-        df = pd.DataFrame(filtered_responses)
+        # Convert to DataFrame and expand answers in memory (single write)
+        df = self._expand_answer_columns(pd.DataFrame(filtered_responses))
 
         # Save to temporary CSV
         temp_csv_file_path = self.get_temp_csv_file_path(assessment_name)
         self.storage.write_csv(str(temp_csv_file_path), df, sep=';', index=False)
 
-        # Add answer columns
-        self.add_answer_columns_to_csv(str(temp_csv_file_path), filtered_responses)
-
         logger.info(f"Saved {len(filtered_responses)} filtered responses to temporary {temp_csv_file_path}")
         return str(temp_csv_file_path)
 
@@ -590,8 +592,9 @@ class AssessmentDownloader:
             try:
                 users = self.load_users_from_json()
                 if users:
-                    # Add username column by looking up user_id
-                    df['username'] = df['user_id'].apply(lambda x: self.get_username_by_user_id(x, users))
+                    # Add username column with a single id -> username lookup table
+                    usernames = self._build_username_lookup(users)
+                    df['username'] = df['user_id'].map(lambda x: usernames.get(x, x))
                     logger.info(f"Added usernames for {assessment_name} using {len(users)} users")
                 else:
                     logger.warning(f"No users found to add usernames for {assessment_name}")
@@ -600,62 +603,16 @@ class AssessmentDownloader:
                 # If username lookup fails, just use user_id as fallback
                 df['username'] = df['user_id']
 
-        if return_df:
-            # Add answer columns to DataFrame directly
-            # Convert DataFrame to list of dictionaries for processing
-            responses_list = df.to_dict('records')
-
-            # Prepare answer columns
-            all_questions = set()
-            answers_per_row = []
-            for r in responses_list:
-                answers = r.get("answers", [])
-                ans_dict = {}
-                for ans in answers:
-                    desc = ans.get("description")
-                    answer_val = ans.get("answer")
-                    if desc:
-                        # Replace empty or NaN answers with "No respondida"
-                        if answer_val is None or answer_val == "" or (isinstance(answer_val, float) and pd.isna(answer_val)):
-                            answer_val = "No respondida"
-                        ans_dict[desc] = answer_val
-                        all_questions.add(desc)
-                answers_per_row.append(ans_dict)
-
-            # Add columns for each question, ordered by number
-            def question_sort_key(q):
-                import re
-                m = re.match(r"pregunta (\d+)", str(q).lower())
-                return int(m.group(1)) if m else float('inf')
-
-            ordered_questions = sorted([q for q in all_questions if q], key=question_sort_key)
-
-            # Create new columns DataFrame to avoid fragmentation
-            new_columns_data = {}
-            for q in ordered_questions:
-                new_columns_data[q] = [row.get(q) if isinstance(row, dict) else None for row in answers_per_row]
-
-            # Create DataFrame with new columns and concatenate
-            new_columns_df = pd.DataFrame(new_columns_data, index=df.index)
-            result_df = pd.concat([df, new_columns_df], axis=1)
-
-            # Convert timestamps
-            for col in ["created", "modified", "submittedTimestamp"]:
-                if col in result_df.columns:
-                    try:
-                        result_df[col] = pd.to_datetime(result_df[col], unit="s")
-                    except Exception:
-                        pass
+        # Expand answers into one column per question (and convert timestamps)
+        result_df = self._expand_answer_columns(df)
 
+        if return_df:
             logger.info(f"Processed {len(result_df)} filtered responses in memory for {assessment_name}")
             return result_df
         else:
-            # Save to CSV
+            # Save to CSV in a single pass
             csv_file_path = self.get_csv_file_path(assessment_name)
-            self.storage.write_csv(str(csv_file_path), df, sep=';', index=False)
-
-            # Add answer columns
-            self.add_answer_columns_to_csv(str(csv_file_path), filtered_responses)
+            self.storage.write_csv(str(csv_file_path), result_df, sep=';', index=False)
 
             logger.info(f"Saved {len(filtered_responses)} filtered responses to {csv_file_path}")
             return str(csv_file_path)
@@ -939,63 +896,88 @@ class AssessmentDownloader:
         """
         Add answer columns to CSV file
 
+        The save_*_to_csv methods expand answers in memory before their single
+        write; this remains for callers that post-process an existing CSV.
+
         Args:
             csv_path: Path to CSV file
             responses: List of response dictionaries or DataFrame
         """
-        # Convert DataFrame to list if needed
         if isinstance(responses, pd.DataFrame):
-            responses_list = responses.to_dict('records')
             df = responses.copy()
+            answers = df['answers'] if 'answers' in df.columns else pd.Series(dtype=object)
         else:
-            responses_list = responses
-            # Load the existing CSV
+            # Load the existing CSV (it may carry extra columns such as username)
             df = self.storage.read_csv(str(csv_path), sep=';')
+            answers = pd.Series([r.get("answers", []) for r in responses], dtype=object)
 
-        # Convert timestamps
-        for col in ["created", "modified", "submittedTimestamp"]:
+        df = self._convert_timestamps(df)
+        df = pd.concat([df, self._answer_columns_frame(answers, df.index)], axis=1)
+
+        # Save updated CSV
+        self.storage.write_csv(str(csv_path), df, sep=';', index=False)
+
+    @staticmethod
+    def _convert_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+        """Convert epoch-second timestamp columns to datetimes (in place)."""
+        for col in TIMESTAMP_COLUMNS:
             if col in df.columns:
                 try:
                     df[col] = pd.to_datetime(df[col], unit="s")
                 except Exception:
                     pass
+        return df
 
-        # Prepare answer columns
-        all_questions = set()
-        answers_per_row = []
-        for r in responses_list:
-            answers = r.get("answers", [])
-            ans_dict = {}
-            for ans in answers:
-                desc = ans.get("description")
-                answer_val = ans.get("answer")
-                if desc:
-                    # Replace empty or NaN answers with "No respondida"
-                    if answer_val is None or answer_val == "" or (isinstance(answer_val, float) and pd.isna(answer_val)):
-                        answer_val = "No respondida"
-                    ans_dict[desc] = answer_val
-                    all_questions.add(desc)
-            answers_per_row.append(ans_dict)
-
-        # Add columns for each question, ordered by number
-        def question_sort_key(q):
-            import re
-            m = re.match(r"pregunta (\d+)", str(q).lower())
-            return int(m.group(1)) if m else float('inf')
-
-        ordered_questions = sorted([q for q in all_questions if q], key=question_sort_key)
-
-        # Create new columns DataFrame to avoid fragmentation
-        new_columns_data = {}
-        for q in ordered_questions:
-            new_columns_data[q] = [row.get(q) if isinstance(row, dict) else None for row in answers_per_row]
-
-        # Create DataFrame with new columns and concatenate
-        new_columns_df = pd.DataFrame(new_columns_data, index=df.index)
-        df = pd.concat([df, new_columns_df], axis=1)
+    @staticmethod
+    def _answer_columns_frame(answers: pd.Series, index: pd.Index) -> pd.DataFrame:
+        """
+        Pivot per-response answer lists into one column per question.
+
+        `answers` holds each response's LearnWorlds answers list
+        ([{"description": "Pregunta N", "answer": ...}, ...]). The lists are
+        exploded into a long (row, question, answer) table and pivoted once.
+        Empty/NaN answers become "No respondida"; questions are ordered by
+        their "Pregunta N" number, other descriptions last. Rows without an
+        answer for a question get None. The result is aligned to `index`.
+        """
+        answers = pd.Series(answers.to_numpy(), dtype=object)
+        exploded = answers.explode()
+        exploded = exploded[exploded.map(lambda item: isinstance(item, dict))]
+        if exploded.empty:
+            return pd.DataFrame(index=index)
+
+        long_df = pd.DataFrame(exploded.tolist(), columns=["description", "answer"])
+        long_df["row"] = exploded.index.to_numpy()
+        long_df = long_df[long_df["description"].notna() & (long_df["description"] != "")]
+        if long_df.empty:
+            return pd.DataFrame(index=index)
+
+        unanswered = long_df["answer"].isna() | (long_df["answer"] == "")
+        long_df["answer"] = long_df["answer"].astype(object).where(~unanswered, UNANSWERED_LABEL)
+
+        # A repeated description within one response keeps its last answer
+        long_df = long_df.drop_duplicates(subset=["row", "description"], keep="last")
+        wide = long_df.pivot(index="row", columns="description", values="answer")
+
+        questions = pd.Index(long_df["description"].drop_duplicates())
+        numbers = pd.to_numeric(
+            questions.str.lower().str.extract(_QUESTION_NUMBER_RE.pattern, expand=False),
+            errors="coerce",
+        )
+        order = pd.DataFrame({"number": numbers, "first_seen": range(len(questions))}, index=questions)
+        ordered_questions = order.sort_values(["number", "first_seen"], na_position="last").index
 
-        # Save updated CSV
-        self.storage.write_csv(str(csv_path), df, sep=';', index=False)
+        wide = wide.reindex(index=range(len(answers)), columns=ordered_questions)
+        wide = wide.astype(object).where(wide.notna(), None)
+        wide.index = index
+        wide.columns.name = None
+        return wide
+
+    def _expand_answer_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return `df` with timestamps converted and answer columns appended."""
+        answers = df['answers'] if 'answers' in df.columns else pd.Series([None] * len(df), dtype=object)
+        result_df = pd.concat([df, self._answer_columns_frame(answers, df.index)], axis=1)
+        return self._convert_timestamps(result_df)
 
     def delete_assessment_data(self, assessment_name: str) -> bool:
         """
@@ -1548,6 +1530,21 @@ class AssessmentDownloader:
             logger.error(f"Error loading users: {str(e)}")
             return []
 
+    @staticmethod
+    def _username_for_user(user: Dict[str, Any], user_id: Any) -> Any:
+        # Try different possible username fields
+        username = user.get('username') or user.get('email') or user.get('firstName', '') + ' ' + user.get('lastName', '')
+        return username.strip() if username else user_id
+
+    def _build_username_lookup(self, users: List[Dict[str, Any]]) -> Dict[Any, Any]:
+        """Map user ID -> username (first occurrence wins, like get_username_by_user_id)."""
+        lookup: Dict[Any, Any] = {}
+        for user in users:
+            user_id = user.get('id')
+            if user_id not in lookup:
+                lookup[user_id] = self._username_for_user(user, user_id)
+        return lookup
+
     def get_username_by_user_id(self, user_id: str, users: List[Dict[str, Any]]) -> str:
         """
         Get username from user ID by looking up in users list
@@ -1561,9 +1558,7 @@ class AssessmentDownloader:
         """
         for user in users:
             if user.get('id') == user_id:
-                # Try different possible username fields
-                username = user.get('username') or user.get('email') or user.get('firstName', '') + ' ' + user.get('lastName', '')
-                return username.strip() if username else user_id
+                return self._username_for_user(user, user_id)
 
         # If not found, return the user_id as fallback
         return user_id
@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from openpyxl import load_workbook
 
 # Load environment variables
 load_dotenv()
@@ -162,6 +161,8 @@ class AssessmentMapper:
 
     def _load_ids_xlsx_rows(self, workbook_bytes: bytes) -> List[Tuple[int, str, str]]:
         """Load rows from ids.xlsx accepting headered and headerless layouts."""
+        from openpyxl import load_workbook
+
         workbook = load_workbook(filename=BytesIO(workbook_bytes), data_only=True)
         worksheet = workbook.active
         rows = list(worksheet.iter_rows(values_only=True))
@@ -6,7 +6,6 @@ import time
 from typing import Dict, Any
 
 from core.firestore_service import FirestoreService
-from core.runner import PipelineRunner
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +29,10 @@ class BatchProcessor:
         Returns:
             Pipeline result payload with success, records_processed, emails_sent, errors.
         """
+        # Imported here so the webhook cold start (which only maps and queues)
+        # does not load pandas, the generators and the Drive/email clients.
+        from core.runner import PipelineRunner
+
         try:
             runner = PipelineRunner(report_type=report_type, assessment_name=assessment_name)
             result = runner.run()
@@ -5,6 +5,15 @@ Google Drive service for uploading files and managing folders
 Project-agnostic service that can be used across multiple projects
 Handles uploading files to Google Drive with organized folder structure
 Supports shared drives, multiple file types, and flexible folder hierarchies
+
+Performance notes:
+  - The authenticated Drive client is built once per process (per service
+    account key) and shared by every DriveService instance; each request gets
+    its own HTTP transport so the client is safe to use from worker threads.
+  - Folder lookups are cached (parent, name, drive) -> folder ID for
+    DRIVE_FOLDER_CACHE_TTL_SECONDS (default 600).
+  - upload_files() runs resumable uploads concurrently (DRIVE_UPLOAD_CONCURRENCY,
+    default 4).
 """
 
 import os
@@ -12,13 +21,18 @@ import json
 import base64
 import logging
 import tempfile
-from typing import Optional, List, Dict, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Dict, Sequence, Tuple, Union
 from pathlib import Path
 
 # Try to import Google Drive libraries
 try:
+    import httplib2
+    import google_auth_httplib2
     from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
+    from googleapiclient.http import HttpRequest, MediaFileUpload
     from google.oauth2 import service_account
     GOOGLE_DRIVE_AVAILABLE = True
 except ImportError:
@@ -27,18 +41,161 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FOLDER_CACHE_TTL_SECONDS = 600
+DEFAULT_UPLOAD_CONCURRENCY = 4
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        logger.warning(f"Invalid {name}={os.getenv(name)!r}; using {default}")
+        return default
+
+
+def drive_upload_concurrency() -> int:
+    """Number of concurrent Drive uploads (DRIVE_UPLOAD_CONCURRENCY, min 1)."""
+    return max(1, _env_int('DRIVE_UPLOAD_CONCURRENCY', DEFAULT_UPLOAD_CONCURRENCY))
+
+
+class FolderIdCache:
+    """Thread-safe (parent_id, folder_name, drive_id) -> folder_id cache with TTL."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return _env_int('DRIVE_FOLDER_CACHE_TTL_SECONDS', DEFAULT_FOLDER_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def _key(parent_folder_id: str, folder_name: str, drive_id: Optional[str]) -> Tuple[str, str, str]:
+        return (parent_folder_id, folder_name, drive_id or '')
+
+    def get(self, parent_folder_id: str, folder_name: str, drive_id: Optional[str] = None) -> Optional[str]:
+        key = self._key(parent_folder_id, folder_name, drive_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            folder_id, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return folder_id
+
+    def set(self, parent_folder_id: str, folder_name: str, folder_id: str,
+            drive_id: Optional[str] = None) -> None:
+        ttl = self.ttl_seconds
+        if ttl <= 0:
+            return
+        key = self._key(parent_folder_id, folder_name, drive_id)
+        with self._lock:
+            self._entries[key] = (folder_id, time.monotonic() + ttl)
+
+    def invalidate(self, parent_folder_id: str, folder_name: str, drive_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries.pop(self._key(parent_folder_id, folder_name, drive_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Process-wide folder cache shared by all DriveService instances.
+FOLDER_CACHE = FolderIdCache()
+
+_client_lock = threading.Lock()
+_shared_clients: Dict[str, Any] = {}
+
+
+def _load_service_account_info(service_account_key: str) -> Dict[str, Any]:
+    # Try to decode as base64 first
+    try:
+        decoded_key = base64.b64decode(service_account_key).decode('utf-8')
+        return json.loads(decoded_key)
+    except Exception:
+        # If base64 fails, try as raw JSON
+        return json.loads(service_account_key)
+
+
+def get_shared_drive_client(service_account_key: Optional[str] = None):
+    """
+    Return the process-wide Drive v3 client for `service_account_key`
+    (defaults to GOOGLE_SERVICE_ACCOUNT_KEY), building it on first use.
+
+    httplib2 transports are not thread-safe, so the client is built with a
+    request builder that gives each request its own authorized transport.
+    """
+    if not GOOGLE_DRIVE_AVAILABLE:
+        raise ImportError("Google Drive libraries not available")
+
+    service_account_key = service_account_key or os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY')
+    if not service_account_key:
+        raise ValueError("GOOGLE_SERVICE_ACCOUNT_KEY environment variable not set")
+
+    with _client_lock:
+        client = _shared_clients.get(service_account_key)
+        if client is not None:
+            return client
+
+        try:
+            credentials = service_account.Credentials.from_service_account_info(
+                _load_service_account_info(service_account_key),
+                scopes=['https://www.googleapis.com/auth/drive']
+            )
+        except Exception as e:
+            logger.error(f"Error parsing service account key: {e}")
+            raise
+
+        def _build_request(_http, *args, **kwargs):
+            authorized = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+            return HttpRequest(authorized, *args, **kwargs)
+
+        client = build(
+            'drive', 'v3',
+            http=google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http()),
+            requestBuilder=_build_request,
+            cache_discovery=False,
+        )
+        _shared_clients[service_account_key] = client
+        return client
+
+
+def reset_shared_drive_client() -> None:
+    """Drop cached Drive clients and folder IDs (e.g. after rotating credentials)."""
+    with _client_lock:
+        _shared_clients.clear()
+    FOLDER_CACHE.clear()
+
+
+def _escape_query_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
 class DriveService:
-    def __init__(self, base_folder_id: Optional[str] = None, drive_id: Optional[str] = None):
+    def __init__(self, base_folder_id: Optional[str] = None, drive_id: Optional[str] = None,
+                 folder_cache: Optional[FolderIdCache] = None):
         """
         Initialize Google Drive service
 
         Args:
             base_folder_id: Base folder ID for uploads (defaults to GOOGLE_DRIVE_FOLDER_ID env var)
             drive_id: Shared drive ID (defaults to GOOGLE_DRIVE_ID env var)
+            folder_cache: Folder ID cache (defaults to the process-wide FOLDER_CACHE)
         """
         self.drive_service = None
         self.base_folder_id = base_folder_id or os.getenv('GOOGLE_DRIVE_FOLDER_ID')
         self.drive_id = drive_id or os.getenv('GOOGLE_DRIVE_ID')
+        self.folder_cache = folder_cache if folder_cache is not None else FOLDER_CACHE
 
         # Only try to initialize if we have the required environment variables
         if self.base_folder_id:
@@ -53,33 +210,8 @@ class DriveService:
             self.drive_service = None
 
     def _get_drive_service(self):
-        """Initialize Google Drive service"""
-        if not GOOGLE_DRIVE_AVAILABLE:
-            raise ImportError("Google Drive libraries not available")
-
-        # Get the service account key from environment variable
-        service_account_key = os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY')
-
-        if not service_account_key:
-            raise ValueError("GOOGLE_SERVICE_ACCOUNT_KEY environment variable not set")
-
-        try:
-            # Try to decode as base64 first
-            try:
-                decoded_key = base64.b64decode(service_account_key).decode('utf-8')
-                key_data = json.loads(decoded_key)
-            except:
-                # If base64 fails, try as raw JSON
-                key_data = json.loads(service_account_key)
-
-            credentials = service_account.Credentials.from_service_account_info(
-                key_data,
-                scopes=['https://www.googleapis.com/auth/drive']
-            )
-            return build('drive', 'v3', credentials=credentials)
-        except Exception as e:
-            logger.error(f"Error parsing service account key: {e}")
-            raise
+        """Return the shared Google Drive client (built once per process)"""
+        return get_shared_drive_client()
 
     def find_or_create_folder(self, parent_folder_id: str, folder_name: str, drive_id: Optional[str] = None) -> Optional[str]:
         """
@@ -97,8 +229,15 @@ class DriveService:
             logger.warning("Google Drive service not available")
             return None
 
+        cached_id = self.folder_cache.get(parent_folder_id, folder_name, drive_id)
+        if cached_id:
+            return cached_id
+
         try:
-            query = f"mimeType='application/vnd.google-apps.folder' and trashed=false and name='{folder_name}' and '{parent_folder_id}' in parents"
+            query = (
+                f"mimeType='{FOLDER_MIME_TYPE}' and trashed=false "
+                f"and name='{_escape_query_value(folder_name)}' and '{parent_folder_id}' in parents"
+            )
 
             # Add drive ID to query if provided
             if drive_id:
@@ -118,12 +257,13 @@ class DriveService:
                 # Folder already exists, return its ID
                 folder_id = files[0]['id']
                 logger.info(f"Found existing folder: {folder_name} (ID: {folder_id})")
+                self.folder_cache.set(parent_folder_id, folder_name, folder_id, drive_id)
                 return folder_id
             else:
                 # Create new folder
                 folder_metadata = {
                     'name': folder_name,
-                    'mimeType': 'application/vnd.google-apps.folder',
+                    'mimeType': FOLDER_MIME_TYPE,
                     'parents': [parent_folder_id]
                 }
 
@@ -139,6 +279,8 @@ class DriveService:
 
                 folder_id = folder.get('id')
                 logger.info(f"Created new folder: {folder_name} (ID: {folder_id})")
+                if folder_id:
+                    self.folder_cache.set(parent_folder_id, folder_name, folder_id, drive_id)
                 return folder_id
 
         except Exception as e:
@@ -192,7 +334,7 @@ class DriveService:
                 media_body=media,
                 supportsAllDrives=True,
                 fields='id'
-            ).execute()
+            ).execute(num_retries=3)
 
             file_id = file.get('id')
             logger.info(f"Uploaded file: {filename} (ID: {file_id})")
@@ -202,6 +344,29 @@ class DriveService:
             logger.error(f"Error uploading file {file_path}: {e}")
             return None
 
+    def upload_files(self, file_paths: Sequence[Union[str, Path]], folder_id: str,
+                     max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        Upload several files to one folder, running the resumable uploads
+        concurrently (max_workers defaults to DRIVE_UPLOAD_CONCURRENCY).
+
+        Returns:
+            Dict mapping str(file_path) -> file ID (None for failed uploads)
+        """
+        paths = [Path(p) for p in file_paths]
+        if not paths:
+            return {}
+        if not self.drive_service:
+            logger.warning("Google Drive service not available")
+            return {str(p): None for p in paths}
+
+        workers = min(max_workers or drive_upload_concurrency(), len(paths))
+        if workers <= 1:
+            return {str(p): self.upload_file(p, folder_id) for p in paths}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='drive-upload') as pool:
+            file_ids = pool.map(lambda p: self.upload_file(p, folder_id), paths)
+            return {str(p): file_id for p, file_id in zip(paths, file_ids)}
+
     def upload_bytes(self, content: bytes, filename: str, folder_id: str,
                     mime_type: Optional[str] = None) -> Optional[str]:
         """
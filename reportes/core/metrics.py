@@ -0,0 +1,251 @@
+"""
+Lightweight pipeline instrumentation — timing spans, counters and histograms.
+
+Usage:
+    from core.metrics import METRICS
+
+    with METRICS.span("render", report_type="test_de_eje"):
+        ...
+    METRICS.increment("emails_sent", report_type="test_de_eje")
+
+Each PipelineRunner.run() records into its own MetricsRegistry whose parent is
+the process-wide METRICS, so a run's timings can be returned in its
+PipelineResult while the webhook process keeps cumulative totals for /status.
+
+Opt-in profiling (per run):
+    PIPELINE_PROFILE=cprofile|pyinstrument
+    PIPELINE_PROFILE_DIR=<dir>   (default: data/<report_type>/profiles)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" convention).
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    """Running count/sum/min/max plus cumulative bucket counts."""
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[idx] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_s": round(self.total, 6),
+            "mean_s": round(self.total / self.count, 6) if self.count else 0.0,
+            "min_s": round(self.min, 6) if self.min is not None else None,
+            "max_s": round(self.max, 6) if self.max is not None else None,
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-memory registry of timing histograms and counters.
+
+    Observations are forwarded to `parent` (if any), so a per-run registry can
+    feed the process-wide one without double bookkeeping at call sites.
+    """
+
+    def __init__(
+        self,
+        parent: Optional["MetricsRegistry"] = None,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.parent = parent
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, _LabelKey], _Histogram] = {}
+        self._counters: Dict[Tuple[str, _LabelKey], float] = {}
+
+    # ── Recording ──────────────────────────────────────────────────────────────
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """Record one duration (seconds) in the `name` histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(self.buckets)
+            hist.observe(seconds)
+        if self.parent is not None:
+            self.parent.observe(name, seconds, **labels)
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Add `amount` to the `name` counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if self.parent is not None:
+            self.parent.increment(name, amount, **labels)
+
+    @contextmanager
+    def span(self, name: str, **labels: Any) -> Iterator[None]:
+        """Time the enclosed block; failures are counted as `<name>_errors`."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}_errors", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # ── Export ─────────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return a JSON-serialisable view:
+            {"timings": {name: [{"labels": {...}, "count": N, ...}]},
+             "counters": {name: [{"labels": {...}, "value": V}]}}
+        """
+        with self._lock:
+            histograms = [(k, h.to_dict()) for k, h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        timings: Dict[str, list] = {}
+        for (name, labels), stats in sorted(histograms, key=lambda item: item[0]):
+            timings.setdefault(name, []).append({"labels": dict(labels), **stats})
+        counter_out: Dict[str, list] = {}
+        for (name, labels), value in sorted(counters, key=lambda item: item[0]):
+            counter_out.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return {"timings": timings, "counters": counter_out}
+
+    def to_json_log(self, event: str, **fields: Any) -> str:
+        """Return a single-line JSON record suitable for structured logging."""
+        payload = {
+            "event": event,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            **fields,
+            **self.snapshot(),
+        }
+        return json.dumps(payload, default=str, sort_keys=True)
+
+    def to_prometheus(self, prefix: str = "reportes") -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+
+        def _fmt_labels(labels: _LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(labels) + ([extra] if extra else [])
+            if not pairs:
+                return ""
+            body = ",".join(
+                '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+                for k, v in pairs
+            )
+            return "{" + body + "}"
+
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            counters = sorted(self._counters.items(), key=lambda item: item[0])
+
+        lines: list[str] = []
+        seen_types: set[str] = set()
+        for (name, labels), hist in histograms:
+            metric = f"{prefix}_{name}_seconds"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} histogram")
+                seen_types.add(metric)
+            for bound, count in zip(hist.buckets, hist.bucket_counts):
+                lines.append(f"{metric}_bucket{_fmt_labels(labels, ('le', repr(bound)))} {count}")
+            lines.append(f"{metric}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {hist.count}")
+            lines.append(f"{metric}_sum{_fmt_labels(labels)} {hist.total:.6f}")
+            lines.append(f"{metric}_count{_fmt_labels(labels)} {hist.count}")
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} counter")
+                seen_types.add(metric)
+            lines.append(f"{metric}{_fmt_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry (cumulative for the lifetime of the process).
+METRICS = MetricsRegistry()
+
+
+@contextmanager
+def profile_run(report_type: str) -> Iterator[Optional[Path]]:
+    """
+    Optionally profile the enclosed block and dump the result to disk.
+
+    Controlled by PIPELINE_PROFILE ("cprofile" or "pyinstrument"); a no-op when
+    unset. Yields the path the profile will be written to (or None).
+    Profiling failures are logged and never interrupt the pipeline.
+    """
+    mode = os.getenv("PIPELINE_PROFILE", "").strip().lower()
+    if mode not in {"cprofile", "pyinstrument"}:
+        yield None
+        return
+
+    out_dir = Path(os.getenv("PIPELINE_PROFILE_DIR") or Path("data") / report_type / "profiles")
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    suffix = "prof" if mode == "cprofile" else "html"
+    out_path = out_dir / f"{report_type}_{stamp}.{suffix}"
+
+    profiler: Any = None
+    try:
+        if mode == "cprofile":
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+    except Exception as exc:
+        logger.warning(f"[{report_type}] Profiler '{mode}' unavailable: {exc}")
+        profiler = None
+
+    try:
+        yield out_path if profiler is not None else None
+    finally:
+        if profiler is not None:
+            try:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                if mode == "cprofile":
+                    profiler.disable()
+                    profiler.dump_stats(str(out_path))
+                else:
+                    profiler.stop()
+                    out_path.write_text(profiler.output_html(), encoding="utf-8")
+                logger.info(f"[{report_type}] Profile written to {out_path}")
+            except Exception as exc:
+                logger.warning(f"[{report_type}] Failed to write profile: {exc}")
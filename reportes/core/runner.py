@@ -12,7 +12,7 @@ from collections import Counter
 from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
-from typing import List, Optional, Tuple, TypedDict
+from typing import Any, Dict, List, NamedTuple, NotRequired, Optional, Tuple, TypedDict
 
 import pandas as pd
 
@@ -20,6 +20,7 @@ from core.storage import StorageClient
 from reports import get_generator
 from core.email_sender import EmailSender
 from core.drive_service import DriveService
+from core.metrics import METRICS, MetricsRegistry, profile_run
 
 logger = logging.getLogger(__name__)
 _EMAIL_LIKE_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -31,6 +32,17 @@ class PipelineResult(TypedDict):
     records_processed: int
     emails_sent: int
     errors: List[str]
+    timings: NotRequired[Dict[str, Any]]
+
+
+class _Delivery(NamedTuple):
+    """A validated PDF queued for Drive upload and email delivery."""
+    pdf_path: Path
+    student_email: str
+    report_type: str
+    assessment_name: str
+    event_key: str
+    dedupe_key: Tuple[str, str, str]
 
 
 class PipelineRunner:
@@ -41,8 +53,9 @@ class PipelineRunner:
         1. Instantiate the generator via get_generator(report_type)()
         2. Call generator.generate() — returns a Path (file or directory)
         3. Collect all *.pdf files from the output
-        4. For each PDF: optionally upload to Drive, then send email
-        5. Return a PipelineResult with counts and any per-student errors
+        4. Upload the pending PDFs to Drive (concurrently), then email each one
+        5. Return a PipelineResult with counts, per-student errors and the
+           run's stage timings (see core.metrics)
 
     Modes:
         dry_run=True     — generate() runs; email and Drive upload are skipped
@@ -61,6 +74,8 @@ class PipelineRunner:
         self.dry_run = dry_run
         self.test_email = test_email
         self.assessment_name = assessment_name or ""
+        self.metrics = MetricsRegistry(parent=METRICS)
+        self._drive: Optional[DriveService] = None
 
     # ── Private helpers ────────────────────────────────────────────────────────
 
@@ -182,21 +197,28 @@ class PipelineRunner:
             body=body,
         )
 
-    def _upload_to_drive(self, pdf_path: Path) -> Optional[str]:
+    def _upload_pdfs_to_drive(self, pdfs: List[Path]) -> Dict[Path, Optional[str]]:
         """
-        Upload a PDF to Google Drive. Returns the file_id or None on failure.
+        Upload PDFs to Google Drive with DriveService.upload_files (concurrent,
+        DRIVE_UPLOAD_CONCURRENCY at a time). One DriveService serves the run.
 
-        Drive upload failures are non-fatal — they are logged as warnings and the
-        email loop continues regardless.
+        Drive upload failures are non-fatal — they are logged as warnings, the
+        PDF maps to None and the email loop continues regardless.
         """
+        if not pdfs:
+            return {}
         try:
-            return DriveService().upload_file(
-                pdf_path,
-                folder_id=os.getenv("GOOGLE_DRIVE_FOLDER_ID", ""),
-            )
+            if self._drive is None:
+                self._drive = DriveService()
+            with self.metrics.span("drive_upload", report_type=self.report_type):
+                file_ids = self._drive.upload_files(
+                    pdfs,
+                    folder_id=os.getenv("GOOGLE_DRIVE_FOLDER_ID", ""),
+                )
         except Exception as exc:
             logger.warning(f"[{self.report_type}] Drive upload failed: {exc}")
-            return None
+            return {pdf_path: None for pdf_path in pdfs}
+        return {pdf_path: file_ids.get(str(pdf_path)) for pdf_path in pdfs}
 
     def _event_key_for_pdf(self, pdf_path: Path) -> Optional[str]:
         """Return stable event correlation key based on filename semantics."""
@@ -355,11 +377,37 @@ class PipelineRunner:
         success=False only when generate() (or generator instantiation) raises.
         Individual email failures are caught, appended to errors[], and the loop
         continues to the next student.
+
+        Each run records into a fresh MetricsRegistry (forwarded to the
+        process-wide METRICS); its snapshot is returned as result["timings"]
+        and logged as one JSON line. Set PIPELINE_PROFILE to dump a profile.
         """
+        self.metrics = MetricsRegistry(parent=METRICS)
+        with profile_run(self.report_type):
+            with self.metrics.span("pipeline", report_type=self.report_type):
+                result = self._run()
+        result["timings"] = self.metrics.snapshot()
+        logger.info(
+            self.metrics.to_json_log(
+                "pipeline_metrics",
+                report_type=self.report_type,
+                assessment_name=self.assessment_name,
+                success=result["success"],
+                records_processed=result["records_processed"],
+                emails_sent=result["emails_sent"],
+                errors=len(result["errors"]),
+            )
+        )
+        return result
+
+    def _run(self) -> PipelineResult:
+        """Pipeline body for run(); stage timings go to self.metrics."""
+        labels = {"report_type": self.report_type}
         records_processed = 0
         emails_sent = 0
         errors: List[str] = []
-        processed_email_keys = self._load_processed_email_keys()
+        with self.metrics.span("ledger_load", **labels):
+            processed_email_keys = self._load_processed_email_keys()
         processed_emails_for_current_assessment = {
             email
             for report_type, assessment_name, email in processed_email_keys
@@ -371,6 +419,7 @@ class PipelineRunner:
         try:
             GeneratorClass = get_generator(self.report_type)
             generator = GeneratorClass()
+            generator.metrics = self.metrics
             context_setter = getattr(generator, "set_generation_context", None)
             if callable(context_setter):
                 context_setter(
@@ -379,7 +428,8 @@ class PipelineRunner:
                     processed_email_keys=processed_email_keys,
                     processed_emails_for_current_assessment=processed_emails_for_current_assessment,
                 )
-            output_path = generator.generate(assessment_name=self.assessment_name)
+            with self.metrics.span("generate", **labels):
+                output_path = generator.generate(assessment_name=self.assessment_name)
         except Exception as exc:
             errors.append(str(exc))
             logger.error(f"[{self.report_type}] Generation failed: {exc}")
@@ -399,7 +449,8 @@ class PipelineRunner:
         pdfs = self._filter_duplicate_test_de_eje_artifacts(pdfs, errors)
         records_processed = len(pdfs)
 
-        # ── Step 3: Email loop ─────────────────────────────────────────────────
+        # ── Step 3: Validate PDFs ──────────────────────────────────────────────
+        deliveries: List[_Delivery] = []
         for pdf_path in pdfs:
             filename_parts = self._parse_filename_contract(pdf_path)
             student_email = self._extract_email_from_pdf(pdf_path)
@@ -431,6 +482,7 @@ class PipelineRunner:
                 continue
 
             if not self.test_email and dedupe_key in processed_email_keys:
+                self.metrics.increment("skipped_duplicates", **labels)
                 logger.info(
                     "[%s] Skipping already-sent report for %s assessment=%s",
                     self.report_type,
@@ -447,32 +499,64 @@ class PipelineRunner:
                 )
                 continue
 
-            # Determine recipient and Drive link
-            recipient = self.test_email if self.test_email else student_email
-            drive_link = None
+            deliveries.append(
+                _Delivery(
+                    pdf_path=pdf_path,
+                    student_email=student_email,
+                    report_type=report_type_part,
+                    assessment_name=assessment_name_part,
+                    event_key=event_key,
+                    dedupe_key=dedupe_key,
+                )
+            )
+
+        # ── Step 4: Drive upload — normal mode only (not test-email/dry-run) ──
+        # Only the first PDF per student/assessment is uploaded up front; a
+        # later duplicate is sent (and uploaded) only if the first send fails.
+        drive_links: Dict[Path, Optional[str]] = {}
+        if not self.test_email:
+            seen_keys: set[Tuple[str, str, str]] = set()
+            first_pdfs: List[Path] = []
+            for delivery in deliveries:
+                if delivery.dedupe_key not in seen_keys:
+                    seen_keys.add(delivery.dedupe_key)
+                    first_pdfs.append(delivery.pdf_path)
+            drive_links = self._upload_pdfs_to_drive(first_pdfs)
+
+        # ── Step 5: Email loop ─────────────────────────────────────────────────
+        for delivery in deliveries:
+            pdf_path, student_email, report_type_part, assessment_name_part, event_key, dedupe_key = delivery
+            if not self.test_email and dedupe_key in processed_email_keys:
+                # Same student/assessment already delivered earlier in this run
+                self.metrics.increment("skipped_duplicates", **labels)
+                continue
 
-            # Drive upload only in normal mode (not test-email, not dry-run)
-            if not self.test_email:
-                drive_link = self._upload_to_drive(pdf_path)
+            recipient = self.test_email if self.test_email else student_email
+            if not self.test_email and pdf_path not in drive_links:
+                drive_links.update(self._upload_pdfs_to_drive([pdf_path]))
+            drive_link = drive_links.get(pdf_path)
 
             # Send email — catch all exceptions so the loop continues
             try:
-                sent = self._send_email(
-                    recipient,
-                    pdf_path,
-                    drive_link,
-                    correlation_key=event_key,
-                )
+                with self.metrics.span("email_send", **labels):
+                    sent = self._send_email(
+                        recipient,
+                        pdf_path,
+                        drive_link,
+                        correlation_key=event_key,
+                    )
                 if sent:
                     emails_sent += 1
+                    self.metrics.increment("emails_sent", **labels)
                     if not self.test_email:
-                        appended = self._append_processed_email_row(
-                            report_type=report_type_part,
-                            assessment_name=assessment_name_part,
-                            email=student_email,
-                            attachment_filename=pdf_path.name,
-                            event_key=event_key,
-                        )
+                        with self.metrics.span("ledger_append", **labels):
+                            appended = self._append_processed_email_row(
+                                report_type=report_type_part,
+                                assessment_name=assessment_name_part,
+                                email=student_email,
+                                attachment_filename=pdf_path.name,
+                                event_key=event_key,
+                            )
                         if appended:
                             processed_email_keys.add(dedupe_key)
                         else:
@@ -486,6 +570,7 @@ class PipelineRunner:
                         f"{recipient} ({pdf_path.name})"
                     )
                 else:
+                    self.metrics.increment("email_failures", **labels)
                     errors.append(
                         f"Email returned False report_type={self.report_type} "
                         f"event_key={event_key} recipient={recipient} "
@@ -496,6 +581,7 @@ class PipelineRunner:
                         f"send returned False"
                     )
             except Exception as exc:
+                self.metrics.increment("email_failures", **labels)
                 errors.append(
                     f"Email error report_type={self.report_type} "
                     f"event_key={event_key} recipient={recipient} "
@@ -505,7 +591,7 @@ class PipelineRunner:
                     f"[{self.report_type}] Failed: {student_email}: {exc}"
                 )
 
-        # ── Step 4: Final summary log ──────────────────────────────────────────
+        # ── Step 6: Final summary log ──────────────────────────────────────────
         logger.info(
             f"[{self.report_type}] Pipeline complete: "
             f"records_processed={records_processed} "
@@ -1,32 +1,66 @@
-from typing import Dict, Type
-from reports.base import BaseReportGenerator
-from reports.diagnosticos.generator import DiagnosticosGenerator
-from reports.diagnosticos_uim.generator import DiagnosticosUIMGenerator
-from reports.ensayos_generales.generator import EnsayosGeneralesGenerator
-from reports.test_diagnostico.generator import TestDiagnosticoGenerator
-from reports.test_de_eje.generator import TestDeEjeGenerator
-from reports.examen_de_eje.generator import ExamenDeEjeGenerator
-from reports.test_de_habilidad.generator import TestDeHabilidadGenerator
-from reports.examen_de_habilidad.generator import ExamenDeHabilidadGenerator
+import importlib
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Type
+
+if TYPE_CHECKING:
+    from reports.base import BaseReportGenerator
+
+
+class LazyRegistry(Mapping):
+    """
+    Read-only mapping of report type -> generator class, resolved on access.
+
+    Entries are stored as "package.module:ClassName" strings so that importing
+    `reports` (and iterating its keys) does not pull in WeasyPrint, pandas,
+    openpyxl or the Google clients. A generator module is imported the first
+    time its key is looked up and the class is cached afterwards.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self._entries = dict(entries)
+        self._loaded: Dict[str, Type["BaseReportGenerator"]] = {}
+
+    def __getitem__(self, report_type: str) -> Type["BaseReportGenerator"]:
+        if report_type not in self._loaded:
+            module_path, _, class_name = self._entries[report_type].partition(":")
+            module = importlib.import_module(module_path)
+            self._loaded[report_type] = getattr(module, class_name)
+        return self._loaded[report_type]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, report_type: object) -> bool:
+        return report_type in self._entries
+
+    def module_path(self, report_type: str) -> str:
+        """Return the "module:Class" target for report_type without importing it."""
+        return self._entries[report_type]
+
 
 # Plugin registry — maps report type name strings to generator classes.
-# To add a new report type: import its generator class and add one entry here.
-REGISTRY: Dict[str, Type[BaseReportGenerator]] = {
-    "diagnosticos":        DiagnosticosGenerator,
-    "diagnosticos_uim":    DiagnosticosUIMGenerator,
-    "ensayos_generales":   EnsayosGeneralesGenerator,
-    "test_diagnostico":    TestDiagnosticoGenerator,
-    "test_de_eje":         TestDeEjeGenerator,
-    "examen_de_eje":       ExamenDeEjeGenerator,
-    "test_de_habilidad":   TestDeHabilidadGenerator,
-    "examen_de_habilidad": ExamenDeHabilidadGenerator,
-}
-
-
-def get_generator(report_type: str) -> Type[BaseReportGenerator]:
+# To add a new report type: add one "module:Class" entry here. The module is
+# only imported when the report type is actually run.
+REGISTRY: Mapping[str, Type["BaseReportGenerator"]] = LazyRegistry({
+    "diagnosticos":        "reports.diagnosticos.generator:DiagnosticosGenerator",
+    "diagnosticos_uim":    "reports.diagnosticos_uim.generator:DiagnosticosUIMGenerator",
+    "ensayos_generales":   "reports.ensayos_generales.generator:EnsayosGeneralesGenerator",
+    "test_diagnostico":    "reports.test_diagnostico.generator:TestDiagnosticoGenerator",
+    "test_de_eje":         "reports.test_de_eje.generator:TestDeEjeGenerator",
+    "examen_de_eje":       "reports.examen_de_eje.generator:ExamenDeEjeGenerator",
+    "test_de_habilidad":   "reports.test_de_habilidad.generator:TestDeHabilidadGenerator",
+    "examen_de_habilidad": "reports.examen_de_habilidad.generator:ExamenDeHabilidadGenerator",
+})
+
+
+def get_generator(report_type: str) -> Type["BaseReportGenerator"]:
     """
     Look up a generator class by report type string.
 
+    Imports the generator module on first use (see LazyRegistry).
+
     Args:
         report_type: String key from REGISTRY (e.g., "diagnosticos")
 
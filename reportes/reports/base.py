@@ -10,6 +10,8 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Any, Optional
 
+from core.metrics import METRICS, MetricsRegistry
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +58,10 @@ class BaseReportGenerator(ABC):
         self._ensure_data_dirs()
         self._generation_context: dict[str, Any] = {}
 
+        # Timing spans for the lifecycle; PipelineRunner swaps in a per-run
+        # registry so timings end up in its PipelineResult.
+        self.metrics: MetricsRegistry = METRICS
+
     def _ensure_data_dirs(self) -> None:
         """Create per-report data directories at runtime if they don't exist."""
         for directory in [
@@ -148,13 +154,16 @@ class BaseReportGenerator(ABC):
         """
         logger.info(f"[{self.report_type}] Starting report generation")
 
-        download_result = self.download(assessment_name=assessment_name)
+        with self.metrics.span("download", report_type=self.report_type):
+            download_result = self.download(assessment_name=assessment_name)
         logger.info(f"[{self.report_type}] Download complete")
 
-        analysis_result = self.analyze(download_result)
+        with self.metrics.span("analyze", report_type=self.report_type):
+            analysis_result = self.analyze(download_result)
         logger.info(f"[{self.report_type}] Analysis complete")
 
-        output_path = self.render(analysis_result)
+        with self.metrics.span("render", report_type=self.report_type):
+            output_path = self.render(analysis_result)
         logger.info(f"[{self.report_type}] Report rendered: {output_path}")
 
         return output_path
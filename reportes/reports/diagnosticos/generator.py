@@ -213,13 +213,14 @@ class DiagnosticosGenerator(BaseReportGenerator):
                     row_dict = row.to_dict()
 
                     try:
-                        pdf_content = self.report_generator.generate_pdf(
-                            assessment_title=atype,
-                            analysis_result=row_dict,
-                            user_info=user_info,
-                            incremental_mode=False,
-                            analysis_df=analysis_df,
-                        )
+                        with self.metrics.span("render_student", report_type=self.report_type):
+                            pdf_content = self.report_generator.generate_pdf(
+                                assessment_title=atype,
+                                analysis_result=row_dict,
+                                user_info=user_info,
+                                incremental_mode=False,
+                                analysis_df=analysis_df,
+                            )
                         if pdf_content is not None:
                             pdf_path = output_dir / f"informe_{email}_{atype}.pdf"
                             pdf_path.write_bytes(pdf_content)
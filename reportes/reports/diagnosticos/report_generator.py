@@ -9,7 +9,7 @@ import os
 import logging
 import csv
 from typing import Dict, Any, Optional, List
-from weasyprint import HTML
+from reports.weasyprint_loader import HTML
 from core.storage import StorageClient
 import pandas as pd
 
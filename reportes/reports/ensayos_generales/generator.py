@@ -44,7 +44,8 @@ class EnsayosGeneralesGenerator(BaseReportGenerator):
                 logger.warning("[ensayos_generales] Row missing username/email, skipping")
                 continue
             try:
-                pdf_content = self.report_generator.generate_report(str(username))
+                with self.metrics.span("render_student", report_type=self.report_type):
+                    pdf_content = self.report_generator.generate_report(str(username))
                 if pdf_content:
                     pdf_path = output_dir / f"resultados_{username}.pdf"
                     pdf_path.write_bytes(pdf_content)
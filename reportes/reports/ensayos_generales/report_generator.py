@@ -8,7 +8,7 @@ Generates PDF reports with proper placeholder replacement
 import os
 import logging
 import pandas as pd
-from weasyprint import HTML
+from reports.weasyprint_loader import HTML
 from core.storage import StorageClient
 
 logger = logging.getLogger(__name__)
@@ -27,7 +27,7 @@ from typing import Any, Optional
 import pandas as pd
 from core.storage import StorageClient
 from openpyxl import load_workbook
-from weasyprint import HTML
+from reports.weasyprint_loader import HTML
 
 from core.assessment_downloader import AssessmentDownloader
 from core.assessment_mapper import AssessmentMapper
@@ -374,7 +374,8 @@ class ExamenDeHabilidadGenerator(BaseReportGenerator):
             )
             final_html = _compose_cover_plus_body_html(cover_html, rendered_body)
 
-            pdf_bytes = HTML(string=final_html, base_url=str(Path.cwd())).write_pdf()
+            with self.metrics.span("render_student", report_type=REPORT_TYPE):
+                pdf_bytes = HTML(string=final_html, base_url=str(Path.cwd())).write_pdf()
             assessment_label = plan.assessment_name or plan.assessment_type
             pdf_path = output_dir / (
                 f"informe_{_safe_filename_component(REPORT_TYPE)}"
@@ -8,7 +8,7 @@ import logging
 from typing import Dict, List, Optional
 
 import pandas as pd
-from weasyprint import HTML
+from reports.weasyprint_loader import HTML
 
 from reports.test_diagnostico.data_loader import DataLoader
 from reports.test_diagnostico.checklist_generator import ChecklistGenerator
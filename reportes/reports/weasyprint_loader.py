@@ -0,0 +1,15 @@
+"""
+Deferred WeasyPrint entry point.
+
+WeasyPrint pulls in Pango/cairo bindings and takes a noticeable share of
+process start-up. Generators import `HTML` from here instead of from
+`weasyprint` so the real library is only loaded when a PDF is rendered.
+"""
+from typing import Any
+
+
+def HTML(*args: Any, **kwargs: Any) -> Any:
+    """Build a `weasyprint.HTML` document, importing WeasyPrint on first use."""
+    from weasyprint import HTML as _HTML
+
+    return _HTML(*args, **kwargs)
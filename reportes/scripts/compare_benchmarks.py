@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark JSON reports produced by tests/benchmarks.
+
+Usage:
+    python scripts/compare_benchmarks.py .benchmarks/old.json .benchmarks/new.json
+    python scripts/compare_benchmarks.py old.json new.json --threshold 1.10
+
+Prints new/old ratios of the min wall time for every (name, scale) pair present
+in both files. Exits with status 1 when any ratio exceeds --threshold, so the
+script can gate a CI job.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _load(path: Path) -> tuple[dict, dict]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {(r["name"], r["scale"]): r for r in payload.get("results", [])}, payload
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=None, help="fail when new/old exceeds this ratio")
+    args = parser.parse_args()
+
+    old_results, old_meta = _load(args.old)
+    new_results, new_meta = _load(args.new)
+    print(f"old: {old_meta.get('commit') or '?'}  ({args.old})")
+    print(f"new: {new_meta.get('commit') or '?'}  ({args.new})")
+    print()
+    print(f"{'benchmark':<58} {'scale':>7} {'old s':>10} {'new s':>10} {'ratio':>7}")
+
+    regressions = []
+    for key in sorted(old_results.keys() & new_results.keys()):
+        old_s = old_results[key]["min_s"]
+        new_s = new_results[key]["min_s"]
+        ratio = new_s / old_s if old_s else float("inf")
+        flag = ""
+        if args.threshold is not None and ratio > args.threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key[0]:<58} {key[1]:>7} {old_s:>10.4f} {new_s:>10.4f} {ratio:>6.2f}x{flag}")
+
+    for label, only in (("old", old_results.keys() - new_results.keys()),
+                        ("new", new_results.keys() - old_results.keys())):
+        for name, scale in sorted(only):
+            print(f"  only in {label}: {name} (scale {scale})")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
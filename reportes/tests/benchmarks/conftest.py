@@ -0,0 +1,153 @@
+"""
+Benchmark harness for the reportes pipeline.
+
+Benchmarks are skipped unless REPORTES_BENCH=1. Configuration:
+
+    REPORTES_BENCH=1                  enable the benchmark tests
+    REPORTES_BENCH_SCALES=100,5000    student counts to run (default: 100)
+    REPORTES_BENCH_REPEAT=3           timed repetitions per case (default: 3)
+    REPORTES_BENCH_OUTPUT=<file>      JSON output path
+                                      (default: .benchmarks/reportes_<utc-stamp>.json)
+
+Example:
+    REPORTES_BENCH=1 REPORTES_BENCH_SCALES=100,1000,20000 pytest -q tests/benchmarks
+
+Compare two runs with scripts/compare_benchmarks.py.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+BENCH_ENABLED = os.getenv("REPORTES_BENCH", "").strip() in {"1", "true", "yes"}
+
+
+def _scales() -> list[int]:
+    raw = os.getenv("REPORTES_BENCH_SCALES", "100")
+    return [int(part) for part in raw.split(",") if part.strip()]
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCH_ENABLED:
+        return
+    skip = pytest.mark.skip(reason="benchmarks disabled (set REPORTES_BENCH=1)")
+    bench_dir = Path(__file__).resolve().parent
+    for item in items:
+        if bench_dir in Path(str(item.fspath)).resolve().parents:
+            item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        metafunc.parametrize("scale", _scales(), ids=lambda n: f"n{n}")
+
+
+class BenchmarkRecorder:
+    """Times callables and accumulates results for the JSON report."""
+
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.results: list[dict[str, Any]] = []
+
+    def run(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        *,
+        scale: int,
+        items: Optional[int] = None,
+        setup: Optional[Callable[[], Any]] = None,
+        **extra: Any,
+    ) -> Any:
+        """
+        Call `fn` `repeat` times (running `setup` untimed before each call) and
+        record min/median/mean wall time. Returns the last call's result.
+        """
+        durations: list[float] = []
+        result: Any = None
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = fn()
+            durations.append(time.perf_counter() - start)
+
+        per_item = items if items is not None else scale
+        record = {
+            "name": name,
+            "scale": scale,
+            "repeat": self.repeat,
+            "min_s": round(min(durations), 6),
+            "median_s": round(statistics.median(durations), 6),
+            "mean_s": round(statistics.fmean(durations), 6),
+            "per_item_ms": round(min(durations) * 1000 / per_item, 4) if per_item else None,
+            **extra,
+        }
+        self.results.append(record)
+        return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+@pytest.fixture(scope="session")
+def bench() -> BenchmarkRecorder:
+    recorder = BenchmarkRecorder(repeat=int(os.getenv("REPORTES_BENCH_REPEAT", "3")))
+    yield recorder
+    if not recorder.results:
+        return
+
+    import pandas as pd
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = Path(
+        os.getenv("REPORTES_BENCH_OUTPUT")
+        or REPO_ROOT / ".benchmarks" / f"reportes_{stamp}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created_utc": stamp,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "results": sorted(recorder.results, key=lambda r: (r["name"], r["scale"])),
+    }
+    output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"\n[benchmarks] {len(recorder.results)} results written to {output}")
+
+
+@pytest.fixture
+def bench_env(monkeypatch, tmp_path):
+    """Offline environment for constructing downloaders/generators."""
+    monkeypatch.setenv("CLIENT_ID", "bench-client")
+    monkeypatch.setenv("SCHOOL_DOMAIN", "bench.example.com")
+    monkeypatch.setenv("ACCESS_TOKEN", "bench-token")
+    monkeypatch.setenv("STORAGE_BACKEND", "local")
+    monkeypatch.setenv("ASSESSMENT_MAPPING_SOURCE", "local")
+    monkeypatch.setenv("IDS_XLSX_LOCAL_PATH", str(tmp_path / "inputs" / "ids.xlsx"))
+    monkeypatch.delenv("MIN_DOWNLOAD_DATE", raising=False)
+    return tmp_path
@@ -0,0 +1,279 @@
+"""
+Synthetic LearnWorlds-shaped data for the reportes benchmarks.
+
+Everything is generated from a seeded RNG so runs at the same scale are
+comparable. Shapes follow what the pipeline actually consumes:
+
+  - users:      LearnWorlds /users payload items (id, email, username, created)
+  - responses:  LearnWorlds assessment responses (userId, email, timestamps,
+                answers=[{"description": "Pregunta N", "answer": "A"}, ...])
+  - banks:      per-report question bank DataFrames (xlsx columns for the
+                test/examen generators, CSV columns for AssessmentAnalyzer)
+  - ids.xlsx:   assessment_name / assessment_id rows for AssessmentMapper
+
+Generators covered: the test/examen family (GENERATOR_SPECS) and the
+AssessmentAnalyzer-backed diagnosticos / diagnosticos_uim
+(DIAGNOSTIC_REPORT_TYPES). ensayos_generales and test_diagnostico are not
+covered: their analyze() passes through a manually prepared spreadsheet
+(analysis.csv / "analisis de datos.xlsx"), so there is no analysis to time,
+and their render() reads hand-built workbooks whose layout is not
+documented well enough to synthesize.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+ALTERNATIVES = ("A", "B", "C", "D")
+BASE_TIMESTAMP = 1_735_689_600  # 2025-01-01T00:00:00Z
+
+
+@dataclass(frozen=True)
+class GeneratorSpec:
+    """How a test/examen generator names its assessments and banks."""
+
+    report_type: str
+    name_template: str          # ids.xlsx assessment_name
+    key_template: str           # download_result key used by analyze()
+    mapping_method: str         # generator method that builds MappingRow list
+    group_column: str           # bank column that groups questions
+    extra_columns: tuple[str, ...] = ()
+
+
+GENERATOR_SPECS: dict[str, GeneratorSpec] = {
+    "test_de_eje": GeneratorSpec(
+        report_type="test_de_eje",
+        name_template="{group}-TEST DE EJE {number}-DATA",
+        key_template="{group}_TEST_DE_EJE_{number}",
+        mapping_method="_load_test_de_eje_mapping",
+        group_column="unidad",
+        extra_columns=("leccion",),
+    ),
+    "examen_de_eje": GeneratorSpec(
+        report_type="examen_de_eje",
+        name_template="{group}-EXAMEN DE EJE {number}-DATA",
+        key_template="{group}_EXAMEN_DE_EJE_{number}",
+        mapping_method="_load_examen_de_eje_mapping",
+        group_column="unidad",
+    ),
+    "test_de_habilidad": GeneratorSpec(
+        report_type="test_de_habilidad",
+        name_template="{group}-TEST DE HABILIDAD {number}-DATA",
+        key_template="{group}_TEST_DE_HABILIDAD_{number}",
+        mapping_method="_load_test_de_habilidad_mapping",
+        group_column="tarea_lectora",
+        extra_columns=("habilidad",),
+    ),
+    "examen_de_habilidad": GeneratorSpec(
+        report_type="examen_de_habilidad",
+        name_template="{group}-EXAMEN DE HABILIDAD {number}-DATA",
+        key_template="{group}_EXAMEN_DE_HABILIDAD_{number}",
+        mapping_method="_load_examen_de_habilidad_mapping",
+        group_column="tarea_lectora",
+        extra_columns=("habilidad",),
+    ),
+}
+
+
+# Generators whose analyze() runs AssessmentAnalyzer over per-type banks in
+# questions_dir and processed CSVs in processed_dir.
+DIAGNOSTIC_REPORT_TYPES: tuple[str, ...] = ("diagnosticos", "diagnosticos_uim")
+
+MATERIAS = ("Biologia", "Quimica", "Fisica")
+
+
+def _rng(seed: int) -> random.Random:
+    return random.Random(seed)
+
+
+def hex_id(rng: random.Random) -> str:
+    return "".join(rng.choice("0123456789abcdef") for _ in range(24))
+
+
+def make_users(n_students: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = _rng(seed)
+    return [
+        {
+            "id": hex_id(rng),
+            "email": f"student{i:06d}@example.com",
+            "username": f"student{i:06d}",
+            "created": BASE_TIMESTAMP + i,
+        }
+        for i in range(n_students)
+    ]
+
+
+def make_answer_key(n_questions: int, seed: int = 11) -> list[str]:
+    rng = _rng(seed)
+    return [rng.choice(ALTERNATIVES) for _ in range(n_questions)]
+
+
+def make_responses(
+    users: list[dict[str, Any]],
+    answer_key: list[str],
+    *,
+    accuracy: float = 0.65,
+    unanswered_rate: float = 0.03,
+    duplicate_rate: float = 0.05,
+    seed: int = 13,
+) -> list[dict[str, Any]]:
+    """
+    Build raw LearnWorlds responses; `duplicate_rate` of users submit twice so
+    AssessmentDownloader.filter_responses has real work to do.
+    """
+    rng = _rng(seed)
+    responses: list[dict[str, Any]] = []
+    for idx, user in enumerate(users):
+        attempts = 2 if rng.random() < duplicate_rate else 1
+        for attempt in range(attempts):
+            answers = []
+            for q_idx, correct in enumerate(answer_key, start=1):
+                roll = rng.random()
+                if roll < unanswered_rate:
+                    answer = ""
+                elif roll < unanswered_rate + accuracy:
+                    answer = correct
+                else:
+                    answer = rng.choice([a for a in ALTERNATIVES if a != correct])
+                answers.append({"description": f"Pregunta {q_idx}", "answer": answer})
+            submitted = BASE_TIMESTAMP + 3600 * idx + attempt
+            responses.append(
+                {
+                    "id": hex_id(rng),
+                    "userId": user["id"],
+                    "user_id": user["id"],
+                    "email": user["email"],
+                    "created": submitted - 1800,
+                    "modified": submitted,
+                    "submittedTimestamp": submitted,
+                    "score": 0,
+                    "answers": answers,
+                }
+            )
+    return responses
+
+
+def make_generator_bank(
+    spec: GeneratorSpec,
+    answer_key: list[str],
+    *,
+    n_groups: int = 4,
+    lessons_per_group: int = 3,
+) -> pd.DataFrame:
+    """Question bank in the xlsx layout the test/examen generators read."""
+    rows = []
+    for q_idx, correct in enumerate(answer_key, start=1):
+        group_idx = (q_idx - 1) * n_groups // len(answer_key)
+        row = {
+            "Pregunta": f"Pregunta {q_idx}",
+            "Alternativa": correct,
+            spec.group_column: f"{'Unidad' if spec.group_column == 'unidad' else 'Tarea'} {group_idx + 1}",
+        }
+        if "leccion" in spec.extra_columns:
+            row["leccion"] = f"Leccion {group_idx + 1}.{(q_idx - 1) % lessons_per_group + 1}"
+        if "habilidad" in spec.extra_columns:
+            row["habilidad"] = "Comprension lectora"
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def make_analyzer_bank(answer_key: list[str], *, n_lectures: int = 6) -> pd.DataFrame:
+    """M1-style question bank for AssessmentAnalyzer (difficulty based)."""
+    return pd.DataFrame(
+        {
+            "question_number": list(range(1, len(answer_key) + 1)),
+            "correct_alternative": answer_key,
+            "lecture": [f"Leccion {i % n_lectures + 1}" for i in range(len(answer_key))],
+            "question_difficulty": [1 if i % 3 else 2 for i in range(len(answer_key))],
+        }
+    )
+
+
+def make_config_bank(answer_key: list[str], type_config: dict[str, Any], *, n_lectures: int = 6) -> pd.DataFrame:
+    """
+    Question bank for one AssessmentAnalyzer assessment type, with exactly
+    the columns its config lists (difficulty, skill, materia or lecture based).
+    """
+    n = len(answer_key)
+    values: dict[str, list[Any]] = {
+        "question_number": list(range(1, n + 1)),
+        "correct_alternative": answer_key,
+        "lecture": [f"Leccion {i % n_lectures + 1}" for i in range(n)],
+        "question_difficulty": [1 if i % 3 else 2 for i in range(n)],
+        "materia": [MATERIAS[i % len(MATERIAS)] for i in range(n)],
+    }
+    skills = type_config.get("skills") or ["Localizar"]
+    values["skill"] = [skills[i % len(skills)] for i in range(n)]
+    return pd.DataFrame({column: values[column] for column in type_config["columns"]})
+
+
+def write_diagnostic_inputs(generator: Any, answer_key: list[str], responses_df: pd.DataFrame) -> list[str]:
+    """
+    Write a bank and a processed CSV for every assessment type the generator
+    loops over and its analyzer has a config for (others are skipped by
+    analyze() in production too). Returns the assessment types written.
+    """
+    sep = generator.analyzer.config["csv_settings"]["separator"]
+    configured = generator.analyzer.config["assessment_types"]
+    written = []
+    for atype in generator.ASSESSMENT_TYPES:
+        if atype not in configured:
+            continue
+        make_config_bank(answer_key, configured[atype]).to_csv(
+            generator.questions_dir / f"{atype}.csv", sep=sep, index=False
+        )
+        responses_df.to_csv(generator.processed_dir / f"{atype}.csv", sep=sep, index=False)
+        written.append(atype)
+    return written
+
+
+def responses_to_wide_df(responses: list[dict[str, Any]]) -> pd.DataFrame:
+    """Processed-CSV layout: one row per response, one 'Pregunta N' column per question."""
+    records = []
+    for r in responses:
+        record = {"user_id": r["user_id"], "email": r["email"], "username": r["email"]}
+        for ans in r["answers"]:
+            record[ans["description"]] = ans["answer"] or "No respondida"
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def xlsx_bytes(df: pd.DataFrame) -> bytes:
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def write_ids_xlsx(path: Path, rows: list[tuple[str, str]]) -> Path:
+    """Write an ids.xlsx with assessment_name/assessment_id headers."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(rows, columns=["assessment_name", "assessment_id"])
+    path.write_bytes(xlsx_bytes(df))
+    return path
+
+
+def write_generator_inputs(
+    root: Path,
+    spec: GeneratorSpec,
+    answer_key: list[str],
+    *,
+    group: str = "M1",
+    number: int = 1,
+    seed: int = 17,
+) -> tuple[Path, Path, str]:
+    """
+    Lay out inputs/ids.xlsx and the matching bank under `root`.
+
+    Returns (ids_path, banks_dir, download_key).
+    """
+    banks_dir = root / "inputs"
+    assessment_name = spec.name_template.format(group=group, number=number)
+    ids_path = write_ids_xlsx(banks_dir / "ids.xlsx", [(assessment_name, hex_id(_rng(seed)))])
+    bank_df = make_generator_bank(spec, answer_key)
+    (banks_dir / f"{assessment_name}.xlsx").write_bytes(xlsx_bytes(bank_df))
+    return ids_path, banks_dir, spec.key_template.format(group=group, number=number)
@@ -0,0 +1,315 @@
+"""
+Throughput benchmarks for the reportes pipeline stages.
+
+Run with REPORTES_BENCH=1 (see conftest.py). Every case is parametrized by
+`scale` = number of students; question counts are fixed per case.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from tests.benchmarks import synthetic
+
+N_QUESTIONS = 40
+
+WEASYPRINT_AVAILABLE = importlib.util.find_spec("weasyprint") is not None
+
+
+def _weasyprint_loads() -> bool:
+    if not WEASYPRINT_AVAILABLE:
+        return False
+    try:
+        import weasyprint  # noqa: F401
+    except Exception:  # missing Pango/cairo system libraries
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Downloader CSV processing
+# ---------------------------------------------------------------------------
+
+def _make_downloader(root: Path, users: list[dict]):
+    from core.assessment_downloader import AssessmentDownloader
+
+    downloader = AssessmentDownloader(data_dir=str(root / "data" / "bench"))
+    (downloader.raw_dir / "users.json").write_text(json.dumps(users), encoding="utf-8")
+    return downloader
+
+
+def test_bench_downloader_save_responses_to_csv(bench, bench_env, scale):
+    users = synthetic.make_users(scale)
+    responses = synthetic.make_responses(users, synthetic.make_answer_key(N_QUESTIONS))
+    downloader = _make_downloader(bench_env, users)
+
+    csv_path = bench.run(
+        "downloader.save_responses_to_csv",
+        lambda: downloader.save_responses_to_csv(responses, "BENCH_ASSESSMENT"),
+        scale=scale,
+        questions=N_QUESTIONS,
+    )
+    written = pd.read_csv(csv_path, sep=";")
+    assert len(written) == scale
+    assert "Pregunta 1" in written.columns
+
+
+def test_bench_downloader_save_responses_return_df(bench, bench_env, scale):
+    users = synthetic.make_users(scale)
+    responses = synthetic.make_responses(users, synthetic.make_answer_key(N_QUESTIONS))
+    downloader = _make_downloader(bench_env, users)
+
+    df = bench.run(
+        "downloader.save_responses_to_csv[return_df]",
+        lambda: downloader.save_responses_to_csv(responses, "BENCH_ASSESSMENT", return_df=True),
+        scale=scale,
+        questions=N_QUESTIONS,
+    )
+    assert len(df) == scale
+
+
+# ---------------------------------------------------------------------------
+# AssessmentAnalyzer scoring
+# ---------------------------------------------------------------------------
+
+def test_bench_analyzer_analyze_assessment_from_csv(bench, bench_env, scale):
+    from core.assessment_analyzer import AssessmentAnalyzer
+
+    answer_key = synthetic.make_answer_key(N_QUESTIONS)
+    users = synthetic.make_users(scale)
+    responses_df = synthetic.responses_to_wide_df(synthetic.make_responses(users, answer_key, duplicate_rate=0))
+    bank_path = bench_env / "m1_bank.csv"
+    synthetic.make_analyzer_bank(answer_key).to_csv(bank_path, sep=";", index=False)
+
+    analyzer = AssessmentAnalyzer()
+    result = bench.run(
+        "analyzer.analyze_assessment_from_csv[M1]",
+        lambda: analyzer.analyze_assessment_from_csv(
+            "M1", str(bank_path), responses_df, str(bench_env / "out.csv"), return_df=True
+        ),
+        scale=scale,
+        questions=N_QUESTIONS,
+    )
+    assert len(result) == scale
+
+
+# ---------------------------------------------------------------------------
+# Generator analyze() / render()
+# ---------------------------------------------------------------------------
+
+def _prepare_generator(report_type: str, root: Path, monkeypatch, scale: int):
+    spec = synthetic.GENERATOR_SPECS[report_type]
+    module = importlib.import_module(f"reports.{report_type}.generator")
+    answer_key = synthetic.make_answer_key(N_QUESTIONS)
+    ids_path, banks_dir, download_key = synthetic.write_generator_inputs(root, spec, answer_key)
+    monkeypatch.setattr(module, "IDS_LOCAL_PATH", ids_path)
+    monkeypatch.setattr(module, "BANKS_DIR", banks_dir)
+
+    generator_cls = next(
+        obj for obj in vars(module).values()
+        if isinstance(obj, type) and getattr(obj, "__module__", "") == module.__name__
+        and hasattr(obj, spec.mapping_method)
+    )
+    generator = generator_cls()
+    generator.data_dir = root / "data" / report_type
+
+    users = synthetic.make_users(scale)
+    responses = synthetic.make_responses(users, answer_key, duplicate_rate=0)
+    download_result = {download_key: synthetic.responses_to_wide_df(responses)}
+    return generator, download_result
+
+
+@pytest.mark.parametrize("report_type", sorted(synthetic.GENERATOR_SPECS))
+def test_bench_generator_analyze(bench, bench_env, monkeypatch, scale, report_type):
+    generator, download_result = _prepare_generator(report_type, bench_env, monkeypatch, scale)
+
+    plans = bench.run(
+        f"{report_type}.analyze",
+        lambda: generator.analyze(download_result),
+        scale=scale,
+        questions=N_QUESTIONS,
+    )
+    assert len(plans) == scale
+
+
+@pytest.mark.skipif(not _weasyprint_loads(), reason="WeasyPrint (or its Pango libraries) not available")
+@pytest.mark.parametrize("report_type", sorted(synthetic.GENERATOR_SPECS))
+def test_bench_generator_render(bench, bench_env, monkeypatch, scale, report_type):
+    generator, download_result = _prepare_generator(report_type, bench_env, monkeypatch, scale)
+    plans = generator.analyze(download_result)
+    output_dir = generator.data_dir / "output"
+
+    bench.run(
+        f"{report_type}.render",
+        lambda: generator.render(plans),
+        scale=scale,
+        setup=lambda: shutil.rmtree(output_dir, ignore_errors=True),
+        questions=N_QUESTIONS,
+    )
+    assert len(list(output_dir.glob("*.pdf"))) == scale
+
+
+# ---------------------------------------------------------------------------
+# Diagnosticos generators (AssessmentAnalyzer per assessment type)
+# ---------------------------------------------------------------------------
+
+def _prepare_diagnostic_generator(report_type: str, root: Path, scale: int):
+    module = importlib.import_module(f"reports.{report_type}.generator")
+    generator_cls = next(
+        obj for obj in vars(module).values()
+        if isinstance(obj, type) and getattr(obj, "__module__", "") == module.__name__
+        and hasattr(obj, "ASSESSMENT_TYPES")
+    )
+    generator = generator_cls()
+    generator.data_dir = root / "data" / report_type
+    generator.processed_dir = generator.data_dir / "processed"
+    generator.analysis_dir = generator.data_dir / "analysis"
+    generator.questions_dir = generator.data_dir / "questions"
+    for directory in (generator.processed_dir, generator.analysis_dir, generator.questions_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    answer_key = synthetic.make_answer_key(N_QUESTIONS)
+    users = synthetic.make_users(scale)
+    responses_df = synthetic.responses_to_wide_df(synthetic.make_responses(users, answer_key, duplicate_rate=0))
+    atypes = synthetic.write_diagnostic_inputs(generator, answer_key, responses_df)
+    return generator, atypes
+
+
+@pytest.mark.parametrize("report_type", synthetic.DIAGNOSTIC_REPORT_TYPES)
+def test_bench_diagnostic_generator_analyze(bench, bench_env, scale, report_type):
+    generator, atypes = _prepare_diagnostic_generator(report_type, bench_env, scale)
+
+    analysis = bench.run(
+        f"{report_type}.analyze",
+        lambda: generator.analyze({}),
+        scale=scale,
+        items=scale * len(atypes),
+        questions=N_QUESTIONS,
+        assessment_types=atypes,
+    )
+    assert sorted(analysis) == sorted(atypes)
+    assert all(len(df) == scale for df in analysis.values())
+
+
+@pytest.mark.skipif(not _weasyprint_loads(), reason="WeasyPrint (or its Pango libraries) not available")
+@pytest.mark.parametrize("report_type", synthetic.DIAGNOSTIC_REPORT_TYPES)
+def test_bench_diagnostic_generator_render(bench, bench_env, scale, report_type):
+    generator, atypes = _prepare_diagnostic_generator(report_type, bench_env, scale)
+    analysis = generator.analyze({})
+    output_dir = generator.analysis_dir.parent / "output"
+
+    bench.run(
+        f"{report_type}.render",
+        lambda: generator.render(analysis),
+        scale=scale,
+        items=scale * len(atypes),
+        setup=lambda: shutil.rmtree(output_dir, ignore_errors=True),
+        questions=N_QUESTIONS,
+        assessment_types=atypes,
+    )
+    assert len(list(output_dir.glob("*.pdf"))) == scale * len(atypes)
+
+
+# ---------------------------------------------------------------------------
+# Processed-emails ledger
+# ---------------------------------------------------------------------------
+
+LEDGER_APPENDS = 25
+
+
+def _seed_ledger(path: Path, rows: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(
+        {
+            "report_type": ["test_de_eje"] * rows,
+            "assessment_name": ["M1-TEST DE EJE 1-DATA"] * rows,
+            "email": [f"student{i:06d}@example.com" for i in range(rows)],
+            "attachment_filename": [f"informe_{i}.pdf" for i in range(rows)],
+            "sent_at_utc": ["2025-01-01T00:00:00+00:00"] * rows,
+            "event_key": [f"test_de_eje|M1-TEST DE EJE 1-DATA|student{i:06d}@example.com" for i in range(rows)],
+        }
+    ).to_excel(path, index=False)
+
+
+def _ledger_runner(monkeypatch, ledger: Path):
+    from core.runner import PipelineRunner
+
+    monkeypatch.setattr(PipelineRunner, "_processed_emails_xlsx_path", lambda self: ledger)
+    return PipelineRunner("test_de_eje", dry_run=True)
+
+
+def test_bench_ledger_load(bench, bench_env, monkeypatch, scale):
+    ledger = bench_env / "ledger" / "processed_emails.xlsx"
+    _seed_ledger(ledger, scale)
+    runner = _ledger_runner(monkeypatch, ledger)
+
+    keys = bench.run("ledger.load_processed_email_keys", runner._load_processed_email_keys, scale=scale)
+    assert len(keys) == scale
+
+
+def test_bench_ledger_append(bench, bench_env, monkeypatch, scale):
+    ledger = bench_env / "ledger" / "processed_emails.xlsx"
+    runner = _ledger_runner(monkeypatch, ledger)
+
+    def _append_batch():
+        for i in range(LEDGER_APPENDS):
+            runner._append_processed_email_row(
+                report_type="test_de_eje",
+                assessment_name="M1-TEST DE EJE 1-DATA",
+                email=f"new{i}@example.com",
+                attachment_filename=f"informe_new{i}.pdf",
+                event_key=f"test_de_eje|M1-TEST DE EJE 1-DATA|new{i}@example.com",
+            )
+
+    bench.run(
+        "ledger.append_processed_email_row",
+        _append_batch,
+        scale=scale,
+        items=LEDGER_APPENDS,
+        setup=lambda: _seed_ledger(ledger, scale),
+        appends=LEDGER_APPENDS,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Template renderer
+# ---------------------------------------------------------------------------
+
+def test_bench_template_renderer(bench, scale):
+    from reports.template_contracts import load_body_template
+    from reports.template_renderer import render_with_placeholders
+
+    body_template = load_body_template("test_de_eje")
+    computed = {
+        "estimated_total_hours": "12 horas",
+        "unit_1_name": "Unidad 1",
+        "unit_1_initial_pd": "55.0%",
+        "unit_1_activities_table": "",
+        "unit_2_name": "Unidad 2",
+        "unit_2_initial_pd": "70.0%",
+        "unit_2_activities_table": "",
+        "unit_3_name": "-",
+        "unit_3_initial_pd": "0%",
+        "unit_3_activities_table": "",
+    }
+    static = {"report_title": "Plan", "cover_subtitle": "", "unit_block": "", "final_exam_heading": ""}
+
+    def _render_all():
+        return [
+            render_with_placeholders(
+                report_type="test_de_eje",
+                body_html=body_template,
+                computed_values=computed,
+                static_values=static,
+            )
+            for _ in range(scale)
+        ]
+
+    rendered = bench.run("template_renderer.render_with_placeholders[test_de_eje]", _render_all, scale=scale)
+    assert len(rendered) == scale
@@ -0,0 +1,86 @@
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.assessment_downloader import AssessmentDownloader
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLIENT_ID", "client")
+    monkeypatch.setenv("SCHOOL_DOMAIN", "school.example.com")
+    monkeypatch.setenv("ACCESS_TOKEN", "token")
+    monkeypatch.setenv("STORAGE_BACKEND", "local")
+    return AssessmentDownloader(data_dir=str(tmp_path / "data"))
+
+
+def _response(user_id, submitted, answers):
+    return {
+        "id": f"r-{user_id}-{submitted}",
+        "user_id": user_id,
+        "email": f"{user_id}@example.com",
+        "submittedTimestamp": submitted,
+        "answers": [{"description": desc, "answer": ans} for desc, ans in answers],
+    }
+
+
+RESPONSES = [
+    _response("u1", 100, [("Pregunta 10", "B"), ("Pregunta 2", ""), ("Comentario", "ok")]),
+    _response("u2", 200, [("Pregunta 2", "A"), ("Pregunta 2", "C"), ("", "ignored")]),
+    _response("u3", 300, []),
+    _response("u1", 50, [("Pregunta 1", "D")]),  # older duplicate of u1, filtered out
+]
+
+
+def test_answer_columns_pivot_ordering_and_fill(downloader):
+    df = downloader.save_responses_to_csv(RESPONSES, "A", return_df=True, include_usernames=False)
+
+    assert list(df["user_id"]) == ["u1", "u2", "u3"]
+    assert [c for c in df.columns if c.startswith("Pregunta") or c == "Comentario"] == [
+        "Pregunta 2",
+        "Pregunta 10",
+        "Comentario",
+    ]
+    assert list(df["Pregunta 2"]) == ["No respondida", "C", None]
+    assert list(df["Pregunta 10"]) == ["B", None, None]
+    assert pd.api.types.is_datetime64_any_dtype(df["submittedTimestamp"])
+
+
+def test_csv_written_once_without_read_back(downloader, monkeypatch):
+    writes = []
+    original_write = downloader.storage.write_csv
+    monkeypatch.setattr(downloader.storage, "write_csv", lambda path, df, **kw: (writes.append(path), original_write(path, df, **kw)))
+    monkeypatch.setattr(downloader.storage, "read_csv", lambda *a, **kw: pytest.fail("CSV was read back"))
+
+    csv_path = downloader.save_responses_to_csv(RESPONSES, "A", include_usernames=False)
+
+    assert writes == [csv_path]
+    written = pd.read_csv(csv_path, sep=";")
+    assert list(written["Pregunta 10"].fillna("")) == ["B", "", ""]
+
+
+def test_usernames_use_lookup_table(downloader):
+    users = [
+        {"id": "u1", "username": "alice"},
+        {"id": "u2", "username": "", "email": "bob@example.com"},
+        {"id": "u1", "username": "shadowed"},
+    ]
+    downloader.load_users_from_json = lambda incremental=False: users
+
+    df = downloader.save_responses_to_csv(RESPONSES, "A", return_df=True)
+
+    assert list(df["username"]) == ["alice", "bob@example.com", "u3"]
+    assert [downloader.get_username_by_user_id(u, users) for u in ("u1", "u2", "u3")] == list(df["username"])
+
+
+def test_question_number_only_at_start_of_description(downloader):
+    # Like the previous re.match: "Ver pregunta 1" has no number and goes last
+    responses = [_response("u1", 100, [("Ver pregunta 1", "x"), ("Pregunta 3", "A"), ("Pregunta 2", "B")])]
+
+    df = downloader.save_responses_to_csv(responses, "A", return_df=True, include_usernames=False)
+
+    assert [c for c in df.columns if "regunta" in c] == ["Pregunta 2", "Pregunta 3", "Ver pregunta 1"]
@@ -0,0 +1,82 @@
+from pathlib import Path
+import sys
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import core.drive_service as drive_service_module
+from core.drive_service import DriveService, FolderIdCache
+
+
+def _service(folder_cache=None):
+    service = DriveService(base_folder_id="root-folder", folder_cache=folder_cache or FolderIdCache(ttl_seconds=60))
+    service.drive_service = MagicMock()
+    return service
+
+
+def test_folder_cache_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(drive_service_module.time, "monotonic", lambda: now[0])
+    cache = FolderIdCache(ttl_seconds=10)
+
+    cache.set("parent", "M1", "folder-1")
+    assert cache.get("parent", "M1") == "folder-1"
+    assert cache.get("parent", "M1", drive_id="shared") is None
+
+    now[0] += 11
+    assert cache.get("parent", "M1") is None
+    assert len(cache) == 0
+
+
+def test_find_or_create_folder_queries_drive_once_per_folder():
+    service = _service()
+    service.drive_service.files().list().execute.return_value = {"files": [{"id": "folder-1", "name": "M1"}]}
+    service.drive_service.files().list.reset_mock()
+
+    assert service.find_or_create_folder("root-folder", "M1") == "folder-1"
+    assert service.find_or_create_folder("root-folder", "M1") == "folder-1"
+    assert service.drive_service.files().list.call_count == 1
+
+
+def test_find_or_create_folder_escapes_quotes_in_name():
+    service = _service()
+    service.drive_service.files().list().execute.return_value = {"files": [{"id": "f", "name": "x"}]}
+    service.drive_service.files().list.reset_mock()
+
+    service.find_or_create_folder("root-folder", "O'Higgins")
+    query = service.drive_service.files().list.call_args.kwargs["q"]
+    assert "name='O\\'Higgins'" in query
+
+
+def test_upload_files_runs_uploads_concurrently(tmp_path):
+    service = _service()
+    paths = []
+    for idx in range(6):
+        path = tmp_path / f"informe_{idx}.pdf"
+        path.write_bytes(b"%PDF fake")
+        paths.append(path)
+
+    barrier = threading.Barrier(3, timeout=5)
+    threads = set()
+
+    def _fake_upload(file_path, folder_id, filename=None, mime_type=None):
+        threads.add(threading.current_thread().name)
+        barrier.wait()
+        return f"id-{Path(file_path).stem}"
+
+    service.upload_file = _fake_upload
+    result = service.upload_files(paths, "folder-1", max_workers=3)
+
+    assert result == {str(p): f"id-{p.stem}" for p in paths}
+    assert len(threads) == 3
+
+
+@pytest.mark.parametrize("raw, expected", [("", 4), ("8", 8), ("0", 1), ("bogus", 4)])
+def test_drive_upload_concurrency_env(monkeypatch, raw, expected):
+    monkeypatch.setenv("DRIVE_UPLOAD_CONCURRENCY", raw)
+    if raw == "":
+        monkeypatch.delenv("DRIVE_UPLOAD_CONCURRENCY")
+    assert drive_service_module.drive_upload_concurrency() == expected
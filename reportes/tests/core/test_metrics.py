@@ -0,0 +1,81 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.metrics import MetricsRegistry, profile_run
+
+
+def test_span_records_histogram_and_forwards_to_parent():
+    parent = MetricsRegistry()
+    registry = MetricsRegistry(parent=parent)
+
+    with registry.span("render", report_type="test_de_eje"):
+        pass
+    with registry.span("render", report_type="test_de_eje"):
+        pass
+
+    for reg in (registry, parent):
+        stats = reg.snapshot()["timings"]["render"][0]
+        assert stats["labels"] == {"report_type": "test_de_eje"}
+        assert stats["count"] == 2
+        assert stats["min_s"] <= stats["max_s"]
+
+
+def test_span_counts_errors_and_reraises():
+    registry = MetricsRegistry()
+
+    with pytest.raises(ValueError):
+        with registry.span("download", report_type="x"):
+            raise ValueError("boom")
+
+    snap = registry.snapshot()
+    assert snap["timings"]["download"][0]["count"] == 1
+    assert snap["counters"]["download_errors"][0]["value"] == 1
+
+
+def test_prometheus_export_has_buckets_sum_and_counters():
+    registry = MetricsRegistry(buckets=(0.5, 1.0))
+    registry.observe("render_student", 0.2, report_type="test_de_eje")
+    registry.observe("render_student", 0.7, report_type="test_de_eje")
+    registry.increment("emails_sent", report_type="test_de_eje")
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE reportes_render_student_seconds histogram" in text
+    assert 'reportes_render_student_seconds_bucket{report_type="test_de_eje",le="0.5"} 1' in text
+    assert 'reportes_render_student_seconds_bucket{report_type="test_de_eje",le="+Inf"} 2' in text
+    assert 'reportes_render_student_seconds_count{report_type="test_de_eje"} 2' in text
+    assert 'reportes_emails_sent_total{report_type="test_de_eje"} 1' in text
+
+
+def test_json_log_is_single_line_json():
+    registry = MetricsRegistry()
+    registry.observe("analyze", 0.1, report_type="x")
+
+    line = registry.to_json_log("pipeline_metrics", report_type="x")
+
+    assert "\n" not in line
+    payload = json.loads(line)
+    assert payload["event"] == "pipeline_metrics"
+    assert payload["timings"]["analyze"][0]["count"] == 1
+
+
+def test_profile_run_is_noop_without_env(monkeypatch):
+    monkeypatch.delenv("PIPELINE_PROFILE", raising=False)
+    with profile_run("x") as path:
+        assert path is None
+
+
+def test_profile_run_cprofile_writes_dump(tmp_path, monkeypatch):
+    monkeypatch.setenv("PIPELINE_PROFILE", "cprofile")
+    monkeypatch.setenv("PIPELINE_PROFILE_DIR", str(tmp_path))
+
+    with profile_run("test_de_eje") as path:
+        sum(range(1000))
+
+    assert path is not None and path.exists()
+    assert path.parent == tmp_path
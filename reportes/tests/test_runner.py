@@ -51,6 +51,11 @@ def _make_pdf_dir(tmp_path: Path, filenames: list[str]) -> Path:
     return out_dir
 
 
+def _fake_upload_files(file_id_for):
+    """DriveService.upload_files stand-in mapping each path to file_id_for(path)."""
+    return lambda paths, folder_id: {str(p): file_id_for(Path(p)) for p in paths}
+
+
 @pytest.fixture(autouse=True)
 def _isolate_processed_emails_ledger(tmp_path, monkeypatch):
     """Prevent cross-test dedupe interference from shared ledgers."""
@@ -309,7 +314,7 @@ class TestRunNormalMode:
             mock_email_cls.return_value = mock_sender
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = "file-id-123"
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: "file-id-123")
             mock_drive_cls.return_value = mock_drive
 
             result = runner.run()
@@ -338,13 +343,13 @@ class TestRunNormalMode:
             mock_email_cls.return_value = mock_sender
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = "fid"
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: "fid")
             mock_drive_cls.return_value = mock_drive
 
             runner.run()
 
         mock_drive_cls.assert_called_once()
-        mock_drive.upload_file.assert_called_once()
+        mock_drive.upload_files.assert_called_once()
 
 
 # â”€â”€ run() â€” error handling â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -381,7 +386,7 @@ class TestRunErrorHandling:
             mock_get_gen.return_value = MagicMock(return_value=mock_gen)
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = None
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: None)
             mock_drive_cls.return_value = mock_drive
 
             # First call raises, second returns True
@@ -412,7 +417,7 @@ class TestRunErrorHandling:
             mock_get_gen.return_value = MagicMock(return_value=mock_gen)
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = None
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: None)
             mock_drive_cls.return_value = mock_drive
 
             mock_sender = MagicMock()
@@ -460,7 +465,7 @@ class TestRunErrorHandling:
             mock_get_gen.return_value = MagicMock(return_value=mock_gen)
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.side_effect = Exception("Drive quota exceeded")
+            mock_drive.upload_files.side_effect = Exception("Drive quota exceeded")
             mock_drive_cls.return_value = mock_drive
 
             mock_sender = MagicMock()
@@ -717,7 +722,7 @@ class TestRunnerEmailTemplateResolution:
             mock_email_cls.return_value = mock_sender
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = "fid"
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: "fid")
             mock_drive_cls.return_value = mock_drive
 
             runner.run()
@@ -744,7 +749,7 @@ class TestRunnerEmailTemplateResolution:
             mock_email_cls.return_value = mock_sender
 
             mock_drive = MagicMock()
-            mock_drive.upload_file.return_value = "fid"
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: "fid")
             mock_drive_cls.return_value = mock_drive
 
             runner.run()
@@ -868,3 +873,130 @@ class TestBatchProcessorResultSemantics:
         mock_smtp.assert_not_called()
 
 
+
+
+# -- run() -- stage timings -------------------------------------------------
+
+class TestRunTimings:
+    """run() attaches a metrics snapshot for the generate and per-item stages."""
+
+    def test_result_includes_stage_timings(self, tmp_path):
+        runner = PipelineRunner("diagnosticos", test_email="dev@example.com")
+        out_dir = _make_pdf_dir(tmp_path, [
+            "informe_diagnosticos_M1_alice@s.com.pdf",
+            "informe_diagnosticos_CL_bob@s.com.pdf",
+        ])
+
+        with patch("core.runner.get_generator") as mock_get_gen, \
+             patch("core.runner.EmailSender") as mock_email_cls, \
+             patch("core.runner.DriveService"):
+
+            mock_gen = MagicMock()
+            mock_gen.generate.return_value = out_dir
+            mock_get_gen.return_value = MagicMock(return_value=mock_gen)
+            mock_email_cls.return_value.send_comprehensive_report_email.return_value = True
+
+            result = runner.run()
+
+        timings = result["timings"]["timings"]
+        assert timings["generate"][0]["count"] == 1
+        assert timings["email_send"][0]["count"] == 2
+        assert timings["pipeline"][0]["labels"] == {"report_type": "diagnosticos"}
+        assert result["timings"]["counters"]["emails_sent"][0]["value"] == 2
+        assert mock_gen.metrics is runner.metrics
+
+    def test_failed_generation_still_reports_timings(self):
+        runner = PipelineRunner("diagnosticos", dry_run=True)
+
+        with patch("core.runner.get_generator") as mock_get_gen:
+            mock_gen = MagicMock()
+            mock_gen.generate.side_effect = RuntimeError("boom")
+            mock_get_gen.return_value = MagicMock(return_value=mock_gen)
+
+            result = runner.run()
+
+        assert result["success"] is False
+        assert result["timings"]["counters"]["generate_errors"][0]["value"] == 1
+
+
+# -- run() - Drive uploads -----------------------------------------------------
+
+class TestRunDriveUploads:
+    """All PDFs of a run share one DriveService and upload before emailing."""
+
+    def test_one_drive_service_per_run(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DRIVE_UPLOAD_CONCURRENCY", "3")
+        runner = PipelineRunner("diagnosticos")
+        out_dir = _make_pdf_dir(tmp_path, [
+            f"informe_diagnosticos_M1_student{idx}@s.com.pdf" for idx in range(5)
+        ])
+
+        with patch("core.runner.get_generator") as mock_get_gen, \
+             patch("core.runner.EmailSender") as mock_email_cls, \
+             patch("core.runner.DriveService") as mock_drive_cls:
+
+            mock_gen = MagicMock()
+            mock_gen.generate.return_value = out_dir
+            mock_get_gen.return_value = MagicMock(return_value=mock_gen)
+            mock_sender = MagicMock()
+            mock_sender.send_comprehensive_report_email.return_value = True
+            mock_email_cls.return_value = mock_sender
+            mock_drive = MagicMock()
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: f"id-{path.stem}")
+            mock_drive_cls.return_value = mock_drive
+
+            result = runner.run()
+
+        mock_drive_cls.assert_called_once()
+        mock_drive.upload_files.assert_called_once()
+        assert len(mock_drive.upload_files.call_args.args[0]) == 5
+        assert result["emails_sent"] == 5
+        assert result["timings"]["timings"]["drive_upload"][0]["count"] == 1
+        sent_links = {
+            call.kwargs["filename"]: call.kwargs["drive_link"]
+            for call in mock_sender.send_comprehensive_report_email.call_args_list
+        }
+        assert sent_links["informe_diagnosticos_M1_student3@s.com.pdf"] == "id-informe_diagnosticos_M1_student3@s.com"
+
+    def _run_with_in_run_duplicate(self, tmp_path, send_results):
+        runner = PipelineRunner("diagnosticos")
+        out_dir = _make_pdf_dir(tmp_path, [
+            "informe_diagnosticos_M1_a@s.com.pdf",
+            "informe_diagnosticos_M1_b@s.com.pdf",
+        ])
+        # Both PDFs resolve to the same student/assessment
+        runner._dedupe_key_for_pdf = lambda pdf_path: ("diagnosticos", "M1", "a@s.com")
+
+        with patch("core.runner.get_generator") as mock_get_gen, \
+             patch("core.runner.EmailSender") as mock_email_cls, \
+             patch("core.runner.DriveService") as mock_drive_cls:
+
+            mock_gen = MagicMock()
+            mock_gen.generate.return_value = out_dir
+            mock_get_gen.return_value = MagicMock(return_value=mock_gen)
+            mock_sender = MagicMock()
+            mock_sender.send_comprehensive_report_email.side_effect = send_results
+            mock_email_cls.return_value = mock_sender
+            mock_drive = MagicMock()
+            mock_drive.upload_files.side_effect = _fake_upload_files(lambda path: f"id-{path.stem}")
+            mock_drive_cls.return_value = mock_drive
+
+            result = runner.run()
+
+        uploaded = [Path(p).name for call in mock_drive.upload_files.call_args_list for p in call.args[0]]
+        return result, uploaded
+
+    def test_in_run_duplicate_is_not_uploaded(self, tmp_path):
+        result, uploaded = self._run_with_in_run_duplicate(tmp_path, [True])
+
+        assert uploaded == ["informe_diagnosticos_M1_a@s.com.pdf"]
+        assert result["emails_sent"] == 1
+
+    def test_in_run_duplicate_uploaded_when_first_send_fails(self, tmp_path):
+        result, uploaded = self._run_with_in_run_duplicate(tmp_path, [False, True])
+
+        assert uploaded == [
+            "informe_diagnosticos_M1_a@s.com.pdf",
+            "informe_diagnosticos_M1_b@s.com.pdf",
+        ]
+        assert result["emails_sent"] == 1
@@ -0,0 +1,87 @@
+"""Cold-start budget for the webhook entry point.
+
+Runs `python -X importtime -c "import webhook_service"` in a fresh interpreter
+and checks that:
+  - the render-only stack (WeasyPrint, pandas, generator modules) is not loaded;
+  - the cumulative import time of webhook_service stays under a budget.
+
+The budget defaults to WEBHOOK_IMPORT_BUDGET_MS=1500 and can be tightened or
+relaxed per environment through that variable.
+"""
+import importlib.metadata
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BUDGET_MS = 1500
+
+# Modules that only the render path needs; the webhook only maps and queues.
+RENDER_ONLY_MODULES = (
+    "weasyprint",
+    "pandas",
+    "core.runner",
+    "reports.test_de_eje.generator",
+    "reports.examen_de_eje.generator",
+)
+
+
+def _installed(distribution: str) -> bool:
+    # Checked via package metadata: other webhook tests stub these modules in
+    # sys.modules, which makes importlib.util.find_spec unreliable here.
+    try:
+        importlib.metadata.distribution(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(
+    not all(
+        _installed(name)
+        for name in ("functions-framework", "flask", "google-cloud-firestore", "google-cloud-tasks")
+    ),
+    reason="webhook runtime dependencies not installed",
+)
+
+
+def _importtime_webhook() -> dict[str, int]:
+    """Return {module: cumulative_us} from a fresh `-X importtime` import."""
+    env = dict(os.environ)
+    env.setdefault("LEARNWORLDS_WEBHOOK_SECRET", "importtime-test")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import webhook_service"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | [indent]module"
+        _self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def test_webhook_import_does_not_load_render_stack():
+    modules = _importtime_webhook()
+    loaded = sorted(name for name in RENDER_ONLY_MODULES if name in modules)
+    assert not loaded, f"webhook_service import pulled in render-only modules: {loaded}"
+
+
+def test_webhook_import_time_within_budget():
+    budget_ms = int(os.getenv("WEBHOOK_IMPORT_BUDGET_MS", str(DEFAULT_BUDGET_MS)))
+    modules = _importtime_webhook()
+    elapsed_ms = modules["webhook_service"] / 1000
+    assert elapsed_ms <= budget_ms, (
+        f"webhook_service import took {elapsed_ms:.0f} ms (budget {budget_ms} ms)"
+    )
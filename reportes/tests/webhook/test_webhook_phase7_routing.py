@@ -106,3 +106,28 @@ def test_rejected_assessment_id_logs_context_and_returns_400(app, monkeypatch, c
 
     assert status_code == 400
     assert "unknown assessment_id route" in caplog.text
+
+
+def test_status_prometheus_format_exports_metrics_without_firestore(app, monkeypatch):
+    from core.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    registry.observe("render", 0.2, report_type="test_de_eje")
+    registry.increment("emails_sent", 3, report_type="test_de_eje")
+    monkeypatch.setattr(webhook_service, "METRICS", registry)
+    monkeypatch.setattr(
+        webhook_service, "_initialize_services",
+        lambda: pytest.fail("prometheus export must not initialize services"),
+    )
+
+    with app.test_request_context("/status?format=prometheus", method="GET"):
+        body, status_code, headers = webhook_service.status_handler(flask_request)
+
+    assert status_code == 200
+    assert headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    lines = body.splitlines()
+    assert "# TYPE reportes_render_seconds histogram" in lines
+    assert 'reportes_render_seconds_bucket{report_type="test_de_eje",le="+Inf"} 1' in lines
+    assert 'reportes_render_seconds_count{report_type="test_de_eje"} 1' in lines
+    assert "# TYPE reportes_emails_sent_total counter" in lines
+    assert 'reportes_emails_sent_total{report_type="test_de_eje"} 3' in lines
@@ -6,7 +6,7 @@ Entry point: webhook_handler (functions-framework target)
 Routes:
   POST /             -> handle_webhook   (LearnWorlds event)
   GET  /process-batch?report_type=X&batch_id=Y  -> process_batch (Cloud Tasks callback)
-  GET  /status       -> status_handler   (health + queue state)
+  GET  /status       -> status_handler   (health + queue state; ?format=prometheus for metrics)
   POST /cleanup      -> cleanup_handler  (manual queue reset)
 """
 
@@ -24,6 +24,7 @@ from core.firestore_service import FirestoreService
 from core.task_service import TaskService
 from core.batch_processor import BatchProcessor
 from core.assessment_mapper import AssessmentMapper
+from core.metrics import METRICS
 from reports import REGISTRY
 
 # ---------------------------------------------------------------------------
@@ -495,9 +496,16 @@ def status_handler(request: Request):
                     "batch_active": bool,
                     "batch_state": {...} | null
                 }
-            }
+            },
+            "metrics": {"timings": {...}, "counters": {...}}
         }
+
+    With ?format=prometheus, returns the process-wide pipeline metrics
+    (core.metrics.METRICS) as Prometheus text instead; no Firestore calls.
     """
+    if request.args.get('format') == 'prometheus':
+        return METRICS.to_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
     try:
         if not _initialize_services():
             return jsonify({'error': 'Services not properly initialized. Check environment variables.'}), 500
@@ -515,6 +523,7 @@ def status_handler(request: Request):
             'status': 'healthy',
             'timestamp': time.time(),
             'report_types': status_by_type,
+            'metrics': METRICS.snapshot(),
         }), 200
 
     except Exception as exc: